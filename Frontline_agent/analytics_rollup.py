@@ -0,0 +1,204 @@
+"""
+Daily ticket rollups for Frontline analytics.
+
+The analytics endpoints (dashboard, natural-language analytics, graph maker)
+used to load every ticket in the date range and count statuses, categories,
+priorities, resolution times and the per-day series in Python. They now sum
+TicketDailyRollup rows: one per (company, creator, creation day, status,
+category, priority) bucket. A range costs O(days x buckets) rows whatever
+its length or ticket volume.
+
+Rollups are kept current from ticket lifecycle events. After a ticket is
+created, saved with a change to a bucketed field, or deleted, the rows for
+its (company, creator, day) are recomputed from that day's tickets once the
+transaction commits. Recomputing the whole day, rather than adding and
+subtracting, keeps the rows exact without knowing a ticket's previous values.
+Code that changes those fields with a queryset ``update()`` bypasses the
+signals and calls ``schedule_refresh`` itself.
+
+Days are calendar days in the current timezone, the same days the
+``created_at__date`` range filters use.
+"""
+import logging
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+# Ticket fields a rollup bucket depends on; saves touching none of them
+# leave the rollups alone.
+ROLLUP_FIELDS = frozenset({
+    'status', 'category', 'priority', 'auto_resolved', 'resolved_at',
+    'created_at', 'created_by', 'company',
+})
+_ROW_FIELDS = ('company_id', 'created_by_id', 'created_at', 'status', 'category',
+               'priority', 'auto_resolved', 'resolved_at')
+BULK_BATCH_SIZE = 1000
+
+
+def _local_day(value):
+    return timezone.localtime(value).date()
+
+
+def _day_bounds(day):
+    start = timezone.make_aware(datetime.combine(day, time.min))
+    return start, timezone.make_aware(datetime.combine(day + timedelta(days=1), time.min))
+
+
+def _buckets(rows):
+    """{(company_id, created_by_id, day, status, category, priority): counters}
+    for ``_ROW_FIELDS`` tuples."""
+    buckets = defaultdict(lambda: {'ticket_count': 0, 'auto_resolved_count': 0,
+                                   'resolved_count': 0, 'resolution_seconds': 0.0})
+    for company_id, created_by_id, created_at, status, category, priority, auto_resolved, resolved_at in rows:
+        if created_at is None:
+            continue
+        counters = buckets[(company_id, created_by_id, _local_day(created_at), status, category, priority)]
+        counters['ticket_count'] += 1
+        if auto_resolved:
+            counters['auto_resolved_count'] += 1
+        # Durations are summed here rather than in SQL: datetime subtraction
+        # isn't portable across the backends this runs on.
+        if resolved_at:
+            counters['resolved_count'] += 1
+            counters['resolution_seconds'] += (resolved_at - created_at).total_seconds()
+    return buckets
+
+
+def _rollup_rows(model, buckets):
+    return [
+        model(company_id=company_id, created_by_id=created_by_id, day=day,
+              status=status, category=category, priority=priority, **counters)
+        for (company_id, created_by_id, day, status, category, priority), counters in buckets.items()
+    ]
+
+
+def refresh_day(company_id, created_by_id, day):
+    """Recompute the rollup rows of one (company, creator, day)."""
+    from Frontline_agent.models import Ticket, TicketDailyRollup
+
+    start, end = _day_bounds(day)
+    for attempt in (1, 2):
+        rows = (Ticket.objects.filter(company_id=company_id, created_by_id=created_by_id,
+                                      created_at__gte=start, created_at__lt=end)
+                .order_by().values_list(*_ROW_FIELDS))
+        try:
+            with transaction.atomic():
+                TicketDailyRollup.objects.filter(
+                    company_id=company_id, created_by_id=created_by_id, day=day,
+                ).delete()
+                TicketDailyRollup.objects.bulk_create(_rollup_rows(TicketDailyRollup, _buckets(rows)))
+            return
+        except IntegrityError:
+            # A concurrent refresh of the same day inserted first; recompute
+            # once more so the last writer has seen both tickets.
+            if attempt == 2:
+                raise
+
+
+def _refresh_keys(keys):
+    for company_id, created_by_id, day in keys:
+        try:
+            refresh_day(company_id, created_by_id, day)
+        except Exception:
+            logger.exception("Ticket rollup refresh failed (company=%s user=%s day=%s)",
+                             company_id, created_by_id, day)
+
+
+def schedule_refresh(tickets):
+    """Refresh the days of ``tickets`` once the current transaction commits."""
+    keys = {(t.company_id, t.created_by_id, _local_day(t.created_at))
+            for t in tickets if t.created_at and t.created_by_id}
+    if keys:
+        transaction.on_commit(lambda: _refresh_keys(keys))
+
+
+def rebuild_ticket_rollups():
+    """Recompute every rollup row from the Ticket table (repair). Returns the
+    number of rows written."""
+    from Frontline_agent.models import Ticket, TicketDailyRollup
+
+    buckets = _buckets(Ticket.objects.order_by().values_list(*_ROW_FIELDS).iterator(chunk_size=2000))
+    with transaction.atomic():
+        TicketDailyRollup.objects.all().delete()
+        TicketDailyRollup.objects.bulk_create(_rollup_rows(TicketDailyRollup, buckets), batch_size=BULK_BATCH_SIZE)
+    return len(buckets)
+
+
+def _grouped(qs, field):
+    return {
+        row[field]: row['n']
+        for row in qs.values(field).annotate(n=Sum('ticket_count')).order_by('-n', field)
+        if row['n']
+    }
+
+
+def ticket_analytics(created_by_id, date_from=None, date_to=None):
+    """The ticket part of the Frontline analytics payload for one creator,
+    from rollups. ``date_from`` / ``date_to`` are inclusive dates or None."""
+    from Frontline_agent.models import TicketDailyRollup
+
+    qs = TicketDailyRollup.objects.filter(created_by_id=created_by_id)
+    if date_from:
+        qs = qs.filter(day__gte=date_from)
+    if date_to:
+        qs = qs.filter(day__lte=date_to)
+    by_date = [
+        (row['day'].isoformat(), row['n'])
+        for row in qs.values('day').annotate(n=Sum('ticket_count')).order_by('day')
+        if row['n']
+    ]
+    by_status = _grouped(qs, 'status')
+    by_category = _grouped(qs, 'category')
+    by_priority = _grouped(qs, 'priority')
+    totals = qs.aggregate(
+        total=Sum('ticket_count'), auto=Sum('auto_resolved_count'),
+        resolved=Sum('resolved_count'), seconds=Sum('resolution_seconds'),
+    )
+    avg_resolution_hours = (
+        totals['seconds'] / totals['resolved'] / 3600 if totals['resolved'] else None
+    )
+    return {
+        'tickets_by_date': [{'date': k, 'count': v} for k, v in by_date],
+        'tickets_by_date_line': [{'label': k, 'value': v} for k, v in by_date],
+        'tickets_by_status': [{'status': k, 'count': v} for k, v in by_status.items()],
+        'tickets_by_status_obj': by_status,
+        'tickets_by_category': [{'category': k, 'count': v} for k, v in by_category.items()],
+        'tickets_by_category_obj': by_category,
+        'tickets_by_priority': [{'priority': k, 'count': v} for k, v in by_priority.items()],
+        'tickets_by_priority_obj': by_priority,
+        'total_tickets': totals['total'] or 0,
+        'avg_resolution_hours': round(avg_resolution_hours, 2) if avg_resolution_hours is not None else None,
+        'auto_resolved_count': totals['auto'] or 0,
+    }
+
+
+def document_analytics(uploaded_by_id, date_from=None, date_to=None):
+    """Document counts for the analytics payload, as grouped queries."""
+    from Frontline_agent.models import Document
+
+    qs = Document.objects.filter(uploaded_by_id=uploaded_by_id).order_by()
+    if date_from:
+        qs = qs.filter(created_at__date__gte=date_from)
+    if date_to:
+        qs = qs.filter(created_at__date__lte=date_to)
+    docs_by_format = defaultdict(int)
+    for row in qs.values('file_format').annotate(n=Count('id')):
+        docs_by_format[row['file_format'] or 'other'] += row['n']
+    docs_by_status = defaultdict(int)
+    for row in qs.values('processing_status').annotate(n=Count('id')):
+        docs_by_status[row['processing_status'] or 'ready'] += row['n']
+    totals = qs.aggregate(total=Count('id'), outdated=Count('id', filter=Q(is_outdated=True)))
+    return {
+        'total_documents': totals['total'],
+        'ready_documents': docs_by_status.get('ready', 0),
+        'outdated_documents': totals['outdated'],
+        'documents_by_format': [{'format': k, 'count': v} for k, v in docs_by_format.items()],
+        'documents_by_format_obj': dict(docs_by_format),
+        'documents_by_status': [{'status': k, 'count': v} for k, v in docs_by_status.items()],
+        'documents_by_status_obj': dict(docs_by_status),
+    }
@@ -0,0 +1,157 @@
+"""
+Business-hours calendar for SLA math.
+
+A tenant's ``operating_hours`` config (timezone_name + per-weekday lists of
+[start, end] HH:MM windows, see widget_utils.DEFAULT_WIDGET_CONFIG) is
+compiled once into sorted, merged minute intervals per weekday. Adding
+business time or measuring it between two instants then walks whole days:
+each open window is converted to a UTC interval for that date and consumed
+in one step, so a 48h SLA over a weekend costs a handful of iterations
+instead of one per minute.
+
+Windows are local wall-clock times resolved through zoneinfo for each date,
+so a window that spans a DST change is as long as it really is (an hour
+shorter or longer). A window whose end is before its start runs past
+midnight into the next day, matching is_within_operating_hours.
+
+Compiled calendars are cached by config content, so a saved change to the
+schedule takes effect on the next call.
+"""
+from __future__ import annotations
+
+import json
+import logging
+from datetime import date, datetime, time, timedelta, timezone as dt_timezone
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_DAY_KEYS = ('mon', 'tue', 'wed', 'thu', 'fri', 'sat', 'sun')
+_DAY_MINUTES = 24 * 60
+# Upper bound on the days walked for one calculation; a schedule with any
+# open time reaches any SLA budget long before this.
+_MAX_DAYS = 366
+
+
+def _parse_minutes(raw) -> Optional[int]:
+    """'HH:MM' -> minutes after midnight ('24:00' allowed as an end), or None."""
+    try:
+        hours, minutes = (int(part) for part in str(raw).strip().split(':'))
+    except (TypeError, ValueError):
+        return None
+    if not (0 <= minutes < 60) or not (0 <= hours <= 24) or (hours == 24 and minutes):
+        return None
+    return hours * 60 + minutes
+
+
+def _merge(intervals: List[Tuple[int, int]]) -> Tuple[Tuple[int, int], ...]:
+    merged: List[List[int]] = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return tuple((start, end) for start, end in merged)
+
+
+class BusinessCalendar:
+    """Open intervals per weekday (Monday = 0) in one timezone."""
+
+    def __init__(self, tz, days: Tuple[Tuple[Tuple[int, int], ...], ...]):
+        self.tz = tz
+        self.days = days
+        self.has_open_time = any(days)
+
+    @classmethod
+    def from_config(cls, oh_cfg: Dict[str, Any]) -> 'BusinessCalendar':
+        from zoneinfo import ZoneInfo
+
+        try:
+            tz = ZoneInfo((oh_cfg.get('timezone_name') or 'UTC').strip() or 'UTC')
+        except Exception:
+            tz = dt_timezone.utc
+        schedule = oh_cfg.get('schedule') or {}
+        per_day: List[List[Tuple[int, int]]] = [[] for _ in _DAY_KEYS]
+        for index, key in enumerate(_DAY_KEYS):
+            for window in schedule.get(key) or []:
+                if not (isinstance(window, (list, tuple)) and len(window) == 2):
+                    continue
+                start, end = _parse_minutes(window[0]), _parse_minutes(window[1])
+                if start is None or end is None or start == end:
+                    continue
+                if start < end:
+                    per_day[index].append((start, end))
+                else:
+                    # Past midnight: the tail belongs to the next weekday.
+                    per_day[index].append((start, _DAY_MINUTES))
+                    if end:
+                        per_day[(index + 1) % 7].append((0, end))
+        return cls(tz, tuple(_merge(day) for day in per_day))
+
+    def _utc_intervals(self, day: date):
+        """This date's open intervals as aware UTC datetimes."""
+        for start, end in self.days[day.weekday()]:
+            yield self._instant(day, start), self._instant(day, end)
+
+    def _instant(self, day: date, minutes: int) -> datetime:
+        if minutes >= _DAY_MINUTES:
+            day, minutes = day + timedelta(days=1), minutes - _DAY_MINUTES
+        local = datetime.combine(day, time(minutes // 60, minutes % 60), tzinfo=self.tz)
+        return local.astimezone(dt_timezone.utc)
+
+    def add(self, start: datetime, duration: timedelta) -> datetime:
+        """The instant when `duration` of business time has passed after
+        `start`. Wall-clock when the schedule has no open time."""
+        if duration <= timedelta(0) or not self.has_open_time:
+            return start + max(duration, timedelta(0))
+        start = start.astimezone(dt_timezone.utc)
+        remaining = duration
+        day = start.astimezone(self.tz).date()
+        for _ in range(_MAX_DAYS):
+            for open_at, close_at in self._utc_intervals(day):
+                begin = max(open_at, start)
+                if close_at <= begin:
+                    continue
+                if close_at - begin >= remaining:
+                    return begin + remaining
+                remaining -= close_at - begin
+            day += timedelta(days=1)
+        logger.warning("BusinessCalendar.add: budget not reached in %d days; using wall-clock", _MAX_DAYS)
+        return start + duration
+
+    def add_hours(self, start: datetime, hours: float) -> datetime:
+        """`add` for a budget in hours, rounded to whole minutes."""
+        return self.add(start, timedelta(minutes=int(round(hours * 60))))
+
+    def between(self, start: datetime, end: datetime) -> timedelta:
+        """Business time inside [start, end). Zero if end <= start."""
+        if end <= start:
+            return timedelta(0)
+        if not self.has_open_time:
+            return end - start
+        start, end = start.astimezone(dt_timezone.utc), end.astimezone(dt_timezone.utc)
+        total = timedelta(0)
+        day = start.astimezone(self.tz).date()
+        last = end.astimezone(self.tz).date()
+        while day <= last:
+            for open_at, close_at in self._utc_intervals(day):
+                overlap = min(close_at, end) - max(open_at, start)
+                if overlap > timedelta(0):
+                    total += overlap
+            day += timedelta(days=1)
+        return total
+
+
+@lru_cache(maxsize=512)
+def _compiled(key: str) -> BusinessCalendar:
+    return BusinessCalendar.from_config(json.loads(key))
+
+
+def business_calendar(oh_cfg: Dict[str, Any]) -> BusinessCalendar:
+    """The compiled calendar for an operating_hours config dict (cached)."""
+    key = json.dumps(
+        {'timezone_name': oh_cfg.get('timezone_name'), 'schedule': oh_cfg.get('schedule') or {}},
+        sort_keys=True, default=str,
+    )
+    return _compiled(key)
@@ -0,0 +1,111 @@
+"""
+Tabular export sources for Frontline analytics (see core.tabular_export).
+
+Each function rebuilds an export from JSON-safe arguments, so the same code
+serves the streamed download and the background build. Filters are the raw
+query-string values of ``frontline_analytics_export``; unparseable ones are
+ignored, as before.
+"""
+from datetime import datetime
+
+from django.db.models import Count
+
+from core.tabular_export import TabularExport, iter_chunks
+
+TICKET_HEADER = [
+    'id', 'title', 'description', 'status', 'priority', 'category',
+    'auto_resolved', 'resolution_confidence', 'assigned_to_id',
+    'created_by_id', 'intent', 'created_at', 'updated_at', 'resolved_at',
+    'sla_due_at', 'notes_count',
+]
+MEETING_HEADER = [
+    'id', 'title', 'scheduled_at', 'duration_minutes', 'status',
+    'organizer_id', 'participant_count', 'action_item_count',
+    'reminder_24h_sent_at', 'reminder_15m_sent_at', 'created_at',
+]
+
+
+def _iso(value):
+    return value.isoformat() if value else ''
+
+
+def _apply_date_range(qs, filters, field):
+    for key, lookup in (('date_from', 'gte'), ('date_to', 'lte')):
+        if filters.get(key):
+            try:
+                qs = qs.filter(**{f'{field}__date__{lookup}': datetime.strptime(filters[key], '%Y-%m-%d').date()})
+            except ValueError:
+                pass
+    return qs
+
+
+def _counts(qs, key):
+    """{key value: row count} for a related queryset, as one grouped query."""
+    # order_by() strips Meta.ordering so MSSQL doesn't reject the GROUP BY.
+    return dict(qs.order_by().values_list(key).annotate(c=Count('pk')).values_list(key, 'c'))
+
+
+def ticket_export(company_id, filters):
+    """The company's tickets, newest first, filtered by date range and
+    status / priority / category."""
+    from Frontline_agent.models import Ticket, TicketNote
+
+    qs = Ticket.objects.filter(company_id=company_id).order_by('-created_at')
+    qs = _apply_date_range(qs, filters, 'created_at')
+    for field in ('status', 'priority', 'category'):
+        if filters.get(field):
+            qs = qs.filter(**{field: filters[field]})
+
+    def rows():
+        fields = ('id', 'title', 'description', 'status', 'priority', 'category',
+                  'auto_resolved', 'resolution_confidence', 'assigned_to_id', 'created_by_id',
+                  'intent', 'created_at', 'updated_at', 'resolved_at', 'sla_due_at')
+        for chunk in iter_chunks(qs, fields):
+            notes = _counts(TicketNote.objects.filter(ticket_id__in=[t['id'] for t in chunk]), 'ticket_id')
+            for t in chunk:
+                yield [
+                    t['id'], t['title'], (t['description'] or '')[:500],
+                    t['status'], t['priority'], t['category'],
+                    t['auto_resolved'], t['resolution_confidence'], t['assigned_to_id'],
+                    t['created_by_id'], t['intent'] or '',
+                    _iso(t['created_at']), _iso(t['updated_at']),
+                    _iso(t['resolved_at']), _iso(t['sla_due_at']),
+                    notes.get(t['id'], 0),
+                ]
+
+    return TabularExport('frontline_tickets_export', TICKET_HEADER, rows())
+
+
+def meeting_export(company_id, filters):
+    """The company's meetings, latest first, filtered by date range, status
+    and organizer. Ticket-only filters (priority, category) don't apply."""
+    from Frontline_agent.models import FrontlineMeeting
+
+    qs = FrontlineMeeting.objects.filter(company_id=company_id).order_by('-scheduled_at')
+    qs = _apply_date_range(qs, filters, 'scheduled_at')
+    if filters.get('status'):
+        qs = qs.filter(status=filters['status'])
+    if filters.get('organizer_id'):
+        try:
+            qs = qs.filter(organizer_id=int(filters['organizer_id']))
+        except (TypeError, ValueError):
+            pass
+
+    def rows():
+        fields = ('id', 'title', 'scheduled_at', 'duration_minutes', 'status', 'organizer_id',
+                  'action_items', 'reminder_24h_sent_at', 'reminder_15m_sent_at', 'created_at')
+        participants = FrontlineMeeting.participants.through.objects
+        for chunk in iter_chunks(qs, fields):
+            counts = _counts(participants.filter(frontlinemeeting_id__in=[m['id'] for m in chunk]),
+                             'frontlinemeeting_id')
+            for m in chunk:
+                yield [
+                    m['id'], m['title'], _iso(m['scheduled_at']),
+                    m['duration_minutes'], m['status'], m['organizer_id'],
+                    counts.get(m['id'], 0),
+                    len(m['action_items'] or []),
+                    _iso(m['reminder_24h_sent_at']), _iso(m['reminder_15m_sent_at']),
+                    _iso(m['created_at']),
+                ]
+
+    return TabularExport('frontline_meetings_export', MEETING_HEADER, rows())
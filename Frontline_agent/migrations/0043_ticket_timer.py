@@ -0,0 +1,70 @@
+# Generated by Django 4.2.10 on 2026-10-18 22:27
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import Q
+from django.utils import timezone
+
+
+def _desired_timers(ticket, now):
+    # Frozen copy of Frontline_agent.ticket_timers.desired_timers as of this
+    # migration, so later changes to the live rules don't alter the backfill.
+    timers = {}
+    minutes = int(getattr(settings, 'FRONTLINE_SLA_ESCALATION_MINUTES', 60))
+    if (minutes > 0 and ticket.sla_due_at and ticket.sla_due_at > now
+            and ticket.status not in ('resolved', 'closed', 'auto_resolved') and ticket.priority != 'urgent'):
+        timers['sla_escalate'] = ticket.sla_due_at - timedelta(minutes=minutes)
+    if ticket.snoozed_until:
+        timers['snooze_wake'] = ticket.snoozed_until
+    days = int(getattr(settings, 'FRONTLINE_AUTO_CLOSE_DAYS', 7))
+    if days > 0 and ticket.status == 'resolved' and ticket.updated_at:
+        fire_at = ticket.updated_at + timedelta(days=days)
+        if ticket.snoozed_until and ticket.snoozed_until > fire_at:
+            fire_at = ticket.snoozed_until
+        timers['auto_close'] = fire_at
+    return timers
+
+
+def backfill_timers(apps, schema_editor):
+    """Timer rows for the tickets that already have an SLA due date, a snooze
+    or a resolved status, so the new consumer picks them up."""
+    Ticket = apps.get_model('Frontline_agent', 'Ticket')
+    TicketTimer = apps.get_model('Frontline_agent', 'TicketTimer')
+    qs = Ticket.objects.filter(
+        Q(sla_due_at__isnull=False) | Q(snoozed_until__isnull=False) | Q(status='resolved')
+    ).only('id', 'status', 'priority', 'sla_due_at', 'snoozed_until', 'updated_at')
+    now = timezone.now()
+    batch = []
+    for ticket in qs.iterator(chunk_size=1000):
+        for kind, fire_at in _desired_timers(ticket, now).items():
+            batch.append(TicketTimer(ticket_id=ticket.id, kind=kind, fire_at=fire_at))
+        if len(batch) >= 1000:
+            TicketTimer.objects.bulk_create(batch)
+            batch = []
+    TicketTimer.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Frontline_agent', '0042_kbcoveragedismissal'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TicketTimer',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('sla_escalate', 'SLA near-breach escalation'), ('snooze_wake', 'Snooze wake-up'), ('auto_close', 'Auto-close after inactivity')], max_length=20)),
+                ('fire_at', models.DateTimeField(db_index=True)),
+                ('ticket', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='timers', to='Frontline_agent.ticket')),
+            ],
+            options={
+                'unique_together': {('ticket', 'kind')},
+            },
+        ),
+        migrations.RunPython(backfill_timers, migrations.RunPython.noop),
+    ]
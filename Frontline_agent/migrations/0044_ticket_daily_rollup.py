@@ -0,0 +1,71 @@
+# Generated by Django 4.2.10 on 2026-10-18 22:36
+
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+from django.utils import timezone
+
+
+def backfill_rollups(apps, schema_editor):
+    """Rollup rows for the tickets that already exist."""
+    # Frozen copy of Frontline_agent.analytics_rollup's bucketing as of this
+    # migration, so later changes to the live rules don't alter the backfill.
+    Ticket = apps.get_model('Frontline_agent', 'Ticket')
+    TicketDailyRollup = apps.get_model('Frontline_agent', 'TicketDailyRollup')
+    buckets = defaultdict(lambda: {'ticket_count': 0, 'auto_resolved_count': 0,
+                                   'resolved_count': 0, 'resolution_seconds': 0.0})
+    rows = Ticket.objects.order_by().values_list(
+        'company_id', 'created_by_id', 'created_at', 'status', 'category',
+        'priority', 'auto_resolved', 'resolved_at',
+    ).iterator(chunk_size=2000)
+    for company_id, created_by_id, created_at, status, category, priority, auto_resolved, resolved_at in rows:
+        if created_at is None:
+            continue
+        day = timezone.localtime(created_at).date()
+        counters = buckets[(company_id, created_by_id, day, status, category, priority)]
+        counters['ticket_count'] += 1
+        if auto_resolved:
+            counters['auto_resolved_count'] += 1
+        if resolved_at:
+            counters['resolved_count'] += 1
+            counters['resolution_seconds'] += (resolved_at - created_at).total_seconds()
+    TicketDailyRollup.objects.bulk_create([
+        TicketDailyRollup(company_id=company_id, created_by_id=created_by_id, day=day,
+                          status=status, category=category, priority=priority, **counters)
+        for (company_id, created_by_id, day, status, category, priority), counters in buckets.items()
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0084_alter_agenttokenquota_next_reset_at_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('Frontline_agent', '0043_ticket_timer'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TicketDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('status', models.CharField(max_length=20)),
+                ('category', models.CharField(max_length=20)),
+                ('priority', models.CharField(max_length=10)),
+                ('ticket_count', models.IntegerField(default=0)),
+                ('auto_resolved_count', models.IntegerField(default=0)),
+                ('resolved_count', models.IntegerField(default=0)),
+                ('resolution_seconds', models.FloatField(default=0)),
+                ('company', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='frontline_ticket_rollups', to='core.company')),
+                ('created_by', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='frontline_ticket_rollups', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['created_by', 'day'], name='Frontline_a_created_bf3b72_idx'), models.Index(fields=['company', 'day'], name='Frontline_a_company_6d29a5_idx')],
+                'unique_together': {('company', 'created_by', 'day', 'status', 'category', 'priority')},
+            },
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
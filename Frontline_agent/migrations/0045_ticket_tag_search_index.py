@@ -0,0 +1,119 @@
+# Generated by Django 4.2.10 on 2026-10-18 22:46
+
+import re
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+# Frozen copy of Frontline_agent.ticket_index's tag and tokenizer rules as of
+# this migration, so later changes to the live rules don't alter the backfill.
+_WORD_RE = re.compile(r'\w+')
+MIN_TOKEN_LENGTH = 2
+MAX_TOKEN_LENGTH = 64
+MAX_TOKENS_PER_TICKET = 2000
+MAX_TAG_LENGTH = 100
+BATCH_SIZE = 1000
+
+
+def _ticket_tokens(title, description):
+    tokens = {}
+    for text in (title, description):
+        for word in _WORD_RE.findall((text or '').lower()):
+            if len(word) >= MIN_TOKEN_LENGTH:
+                tokens.setdefault(word[:MAX_TOKEN_LENGTH], None)
+    return list(tokens)[:MAX_TOKENS_PER_TICKET]
+
+
+def _ticket_tags(tags):
+    if not isinstance(tags, list):
+        return []
+    return list(dict.fromkeys(str(tag)[:MAX_TAG_LENGTH] for tag in tags if tag))
+
+
+def backfill_index(apps, schema_editor):
+    """Tag rows and search tokens for the tickets that already exist."""
+    Ticket = apps.get_model('Frontline_agent', 'Ticket')
+    TicketTag = apps.get_model('Frontline_agent', 'TicketTag')
+    TicketSearchToken = apps.get_model('Frontline_agent', 'TicketSearchToken')
+    tags, tokens = [], []
+    rows = (Ticket.objects.order_by()
+            .values_list('id', 'company_id', 'title', 'description', 'tags').iterator(chunk_size=2000))
+    for ticket_id, company_id, title, description, ticket_tag_list in rows:
+        tags.extend(TicketTag(ticket_id=ticket_id, company_id=company_id, tag=tag)
+                    for tag in _ticket_tags(ticket_tag_list))
+        tokens.extend(TicketSearchToken(ticket_id=ticket_id, company_id=company_id, token=token)
+                      for token in _ticket_tokens(title, description))
+        if len(tokens) >= BATCH_SIZE * 10:
+            TicketSearchToken.objects.bulk_create(tokens, batch_size=BATCH_SIZE)
+            tokens = []
+        if len(tags) >= BATCH_SIZE:
+            TicketTag.objects.bulk_create(tags, batch_size=BATCH_SIZE)
+            tags = []
+    TicketTag.objects.bulk_create(tags, batch_size=BATCH_SIZE)
+    TicketSearchToken.objects.bulk_create(tokens, batch_size=BATCH_SIZE)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0084_alter_agenttokenquota_next_reset_at_and_more'),
+        ('Frontline_agent', '0044_ticket_daily_rollup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TicketSearchToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token', models.CharField(max_length=64)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='TicketTag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tag', models.CharField(max_length=100)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(fields=['company', 'created_by', 'created_at', 'id'], name='Frontline_a_company_29d83d_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(fields=['assigned_to', 'category', 'created_at', 'id'], name='Frontline_a_assigne_f96977_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(fields=['company', 'created_by', 'sla_due_at', 'id'], name='Frontline_a_company_75ab19_idx'),
+        ),
+        migrations.AddField(
+            model_name='tickettag',
+            name='company',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='frontline_ticket_tags', to='core.company'),
+        ),
+        migrations.AddField(
+            model_name='tickettag',
+            name='ticket',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tag_rows', to='Frontline_agent.ticket'),
+        ),
+        migrations.AddField(
+            model_name='ticketsearchtoken',
+            name='company',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='frontline_ticket_search_tokens', to='core.company'),
+        ),
+        migrations.AddField(
+            model_name='ticketsearchtoken',
+            name='ticket',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_tokens', to='Frontline_agent.ticket'),
+        ),
+        migrations.AddIndex(
+            model_name='tickettag',
+            index=models.Index(fields=['company', 'tag'], name='Frontline_a_company_6357ee_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ticketsearchtoken',
+            index=models.Index(fields=['company', 'token'], name='Frontline_a_company_01f7b1_idx'),
+        ),
+        migrations.RunPython(backfill_index, migrations.RunPython.noop),
+    ]
@@ -123,6 +123,10 @@ class Ticket(models.Model):
             models.Index(fields=['snoozed_until']),
             models.Index(fields=['contact', 'created_at']),
             models.Index(fields=['handoff_status', 'handoff_requested_at']),
+            # Keyset pagination of the ticket list, ticket tasks and aging views.
+            models.Index(fields=['company', 'created_by', 'created_at', 'id']),
+            models.Index(fields=['assigned_to', 'category', 'created_at', 'id']),
+            models.Index(fields=['company', 'created_by', 'sla_due_at', 'id']),
         ]
 
     def __str__(self):
@@ -741,6 +745,40 @@ class FrontlineAnalytics(models.Model):
         return f"{self.metric_name} - {self.metric_value}"
 
 
+class TicketDailyRollup(models.Model):
+    """Ticket counts per creation day, creator and (status, category,
+    priority) bucket, so analytics over a date range sums O(days) rows
+    instead of loading every ticket.
+
+    Buckets follow each ticket's *current* status/category/priority; a day
+    is recomputed from its tickets whenever one of them is created, changes
+    bucket, is resolved or is deleted (see Frontline_agent.analytics_rollup).
+    """
+    company = models.ForeignKey('core.Company', on_delete=models.CASCADE, null=True, blank=True,
+                                related_name='frontline_ticket_rollups')
+    created_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name='frontline_ticket_rollups')
+    day = models.DateField()
+    status = models.CharField(max_length=20)
+    category = models.CharField(max_length=20)
+    priority = models.CharField(max_length=10)
+    ticket_count = models.IntegerField(default=0)
+    auto_resolved_count = models.IntegerField(default=0)
+    # Tickets with resolved_at set, and the sum of their created -> resolved times.
+    resolved_count = models.IntegerField(default=0)
+    resolution_seconds = models.FloatField(default=0)
+
+    class Meta:
+        app_label = 'Frontline_agent'
+        unique_together = [('company', 'created_by', 'day', 'status', 'category', 'priority')]
+        indexes = [
+            models.Index(fields=['created_by', 'day']),
+            models.Index(fields=['company', 'day']),
+        ]
+
+    def __str__(self):
+        return f"{self.day} {self.status}/{self.category}/{self.priority}: {self.ticket_count}"
+
+
 class FrontlineQAChat(models.Model):
     """Knowledge Q&A chat sessions for frontline. Each chat contains multiple messages."""
     company_user = models.ForeignKey(
@@ -1152,6 +1190,69 @@ class FrontlineDeadLetter(models.Model):
         return f"DLQ[{self.task_name}] {self.error_type}: {self.error_message[:60]}"
 
 
+class TicketTimer(models.Model):
+    """Next time-driven transition due on a ticket: SLA near-breach
+    escalation, snooze wake-up or auto-close after inactivity.
+
+    One row per (ticket, kind), kept in step with the ticket by the post_save
+    signal (see Frontline_agent.ticket_timers). The periodic consumer reads
+    only rows whose ``fire_at`` has passed, so its cost follows the number of
+    due transitions instead of the size of the ticket table. A row is a hint:
+    the consumer re-checks the ticket before acting on it.
+    """
+    KIND_CHOICES = [
+        ('sla_escalate', 'SLA near-breach escalation'),
+        ('snooze_wake', 'Snooze wake-up'),
+        ('auto_close', 'Auto-close after inactivity'),
+    ]
+    ticket = models.ForeignKey(Ticket, on_delete=models.CASCADE, related_name='timers')
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    fire_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        app_label = 'Frontline_agent'
+        unique_together = [('ticket', 'kind')]
+
+    def __str__(self):
+        return f"{self.kind} for ticket #{self.ticket_id} at {self.fire_at}"
+
+
+class TicketTag(models.Model):
+    """One row per tag on a ticket, mirrored from ``Ticket.tags`` so tag
+    filters are indexed lookups (JSON containment can't use an index on SQL
+    Server). Kept in step by the post_save signal (see
+    Frontline_agent.ticket_index); ``company`` is copied from the ticket."""
+    ticket = models.ForeignKey(Ticket, on_delete=models.CASCADE, related_name='tag_rows')
+    company = models.ForeignKey('core.Company', on_delete=models.CASCADE, null=True, blank=True,
+                                related_name='frontline_ticket_tags')
+    tag = models.CharField(max_length=100)
+
+    class Meta:
+        app_label = 'Frontline_agent'
+        indexes = [models.Index(fields=['company', 'tag'])]
+
+    def __str__(self):
+        return f"{self.tag} on ticket #{self.ticket_id}"
+
+
+class TicketSearchToken(models.Model):
+    """One row per distinct word of a ticket's title and description, the
+    per-company index behind the ticket list's ``q`` search (a prefix seek on
+    ``token`` instead of a LIKE '%...%' scan of every ticket). Kept in step
+    by the post_save signal (see Frontline_agent.ticket_index)."""
+    ticket = models.ForeignKey(Ticket, on_delete=models.CASCADE, related_name='search_tokens')
+    company = models.ForeignKey('core.Company', on_delete=models.CASCADE, null=True, blank=True,
+                                related_name='frontline_ticket_search_tokens')
+    token = models.CharField(max_length=64)
+
+    class Meta:
+        app_label = 'Frontline_agent'
+        indexes = [models.Index(fields=['company', 'token'])]
+
+    def __str__(self):
+        return f"{self.token} in ticket #{self.ticket_id}"
+
+
 class TicketLink(models.Model):
     """Typed relationship between two tickets. Lets agents surface dependency
     chains ("blocks", "duplicate of", "related to") instead of stuffing
@@ -1,13 +1,19 @@
 """
 Signals for Frontline Agent.
-Runs workflow triggers on ticket update (post_save) so any ticket update path fires triggers.
+Queues workflow triggers on ticket update (post_save) so any ticket update path fires triggers.
+Keeps each ticket's timer rows (SLA escalation, snooze, auto-close), tag / search index rows and its
+day's analytics rollup current.
 Also mirrors Contact rows to HubSpot when the tenant has the integration enabled.
 """
 import logging
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 
+from .analytics_rollup import ROLLUP_FIELDS, schedule_refresh
 from .models import Ticket, Contact
+from .ticket_index import INDEX_FIELDS, sync_ticket_index
+from .ticket_timers import TIMER_FIELDS, sync_ticket_timers
+from .workflow_triggers import dispatch_workflow_triggers
 
 logger = logging.getLogger(__name__)
 
@@ -15,8 +21,9 @@ logger = logging.getLogger(__name__)
 @receiver(post_save, sender=Ticket)
 def run_workflow_triggers_on_ticket_update(sender, instance, created, **kwargs):
     """
-    When a ticket is updated (not created), run workflow triggers for ticket_updated.
-    Uses lazy import to avoid circular import with api.views.frontline_agent.
+    When a ticket is updated (not created), queue the workflows triggered by
+    ticket_updated. Matching is a lookup in the company's cached trigger
+    index; the runs happen in a Celery task after commit.
 
     Re-entrancy guard: if we're already inside a workflow run (the workflow's
     own `update_ticket` step is writing), skip. Without this guard a workflow
@@ -27,7 +34,7 @@ def run_workflow_triggers_on_ticket_update(sender, instance, created, **kwargs):
         return
     if not getattr(instance, 'company_id', None):
         return
-    # Check for re-entrancy *before* any DB work so we don't even spin up the view import.
+    # Check for re-entrancy *before* any DB work.
     try:
         from .workflow_context import is_workflow_executing, current_workflow_id
         if is_workflow_executing():
@@ -41,22 +48,64 @@ def run_workflow_triggers_on_ticket_update(sender, instance, created, **kwargs):
         # dropping all signals. The next code path will still run.
         logger.exception("workflow_context guard import failed — proceeding without guard")
     try:
-        from api.views.frontline_agent import _run_workflow_triggers
-        user = getattr(instance, 'created_by', None)
-        if not user:
+        if not instance.created_by_id:
             logger.warning("Ticket %s has no created_by, skipping workflow triggers", instance.id)
             return
-        _run_workflow_triggers(
+        dispatch_workflow_triggers(
             instance.company_id,
             'ticket_updated',
             instance,
-            executed_by_user=user,
+            instance.created_by_id,
             old_status=None,
         )
     except Exception as e:
         logger.exception("run_workflow_triggers_on_ticket_update failed: %s", e)
 
 
+@receiver(post_save, sender=Ticket)
+def sync_timers_on_ticket_save(sender, instance, created, update_fields=None, **kwargs):
+    """Keep the ticket's TicketTimer rows (SLA escalation, snooze wake-up,
+    auto-close) in step with its SLA due date, snooze and status."""
+    if update_fields and not TIMER_FIELDS.intersection(update_fields):
+        return
+    try:
+        sync_ticket_timers(instance)
+    except Exception:
+        logger.exception("Ticket %s: timer sync failed", instance.pk)
+
+
+@receiver(post_save, sender=Ticket)
+def sync_index_on_ticket_save(sender, instance, created, update_fields=None, **kwargs):
+    """Keep the ticket's tag rows and search tokens in step with its tags,
+    title and description."""
+    if update_fields and not INDEX_FIELDS.intersection(update_fields):
+        return
+    try:
+        sync_ticket_index(instance, created=created, update_fields=update_fields)
+    except Exception:
+        logger.exception("Ticket %s: tag / search index sync failed", instance.pk)
+
+
+@receiver(post_save, sender=Ticket)
+def refresh_rollups_on_ticket_save(sender, instance, created, update_fields=None, **kwargs):
+    """Recompute the analytics rollup of the ticket's creation day after
+    commit when a field it is bucketed by may have changed."""
+    if update_fields and not ROLLUP_FIELDS.intersection(update_fields):
+        return
+    try:
+        schedule_refresh([instance])
+    except Exception:
+        logger.exception("Ticket %s: rollup refresh failed", instance.pk)
+
+
+@receiver(post_delete, sender=Ticket)
+def refresh_rollups_on_ticket_delete(sender, instance, **kwargs):
+    try:
+        schedule_refresh([instance])
+    except Exception:
+        logger.exception("Ticket %s: rollup refresh failed", instance.pk)
+
+
 @receiver(post_save, sender=Contact)
 def mirror_contact_to_hubspot(sender, instance, created, **kwargs):
     """Fan-out: push Contact changes to HubSpot when the tenant opted in.
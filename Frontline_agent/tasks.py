@@ -7,7 +7,6 @@ from datetime import timedelta
 from pathlib import Path
 from celery import shared_task
 from django.utils import timezone
-from django.conf import settings
 
 logger = logging.getLogger(__name__)
 
@@ -421,22 +420,6 @@ def prune_expired_documents():
     return {'deleted': deleted}
 
 
-@shared_task(name='Frontline_agent.tasks.wake_snoozed_tickets')
-def wake_snoozed_tickets():
-    """
-    Clear the snooze on tickets whose snoozed_until has passed.
-    Runs on a short cadence so woken tickets reappear in queues promptly.
-    """
-    from Frontline_agent.models import Ticket
-
-    now = timezone.now()
-    qs = Ticket.objects.filter(snoozed_until__isnull=False, snoozed_until__lte=now)
-    count = qs.update(snoozed_until=None)
-    if count:
-        logger.info("Woke %d snoozed tickets", count)
-    return {'woken': count}
-
-
 # Exponential retry ladder (minutes): after attempt 1 fails, wait 5m; after attempt 2, 30m; after 3, 2h.
 _RETRY_BACKOFF_MINUTES = [5, 30, 120]
 
@@ -828,6 +811,90 @@ def resume_workflow_execution(self, execution_id: int):
     return {'status': execution.status, 'execution_id': execution_id}
 
 
+@shared_task(name='Frontline_agent.tasks.run_triggered_workflows')
+def run_triggered_workflows(company_id, event_type, ticket_id, workflow_ids,
+                            executed_by_id, context_data):
+    """Create and run the executions for workflows a ticket event matched
+    (queued by Frontline_agent.workflow_triggers after the ticket save
+    committed). ``context_data`` is the ticket as it was at the event.
+
+    Idempotent per (workflow, event, ticket): a key that already has an
+    execution is skipped, and the unique constraint settles a concurrent
+    duplicate. Workflows deactivated or deleted since the event are skipped.
+    """
+    from django.contrib.auth.models import User
+    from django.db import IntegrityError
+    from Frontline_agent.models import FrontlineWorkflow, FrontlineWorkflowExecution
+    from api.views.frontline_agent import _execute_workflow_steps, _idempotency_key_for_event
+
+    user = User.objects.filter(pk=executed_by_id).first() if executed_by_id else None
+    if user is None:
+        logger.warning("run_triggered_workflows: no executing user for ticket %s, skipping", ticket_id)
+        return {'executed': 0, 'skipped': len(workflow_ids)}
+    workflows = FrontlineWorkflow.objects.filter(
+        id__in=workflow_ids, company_id=company_id, is_active=True,
+    ).in_bulk()
+    keys = {wid: _idempotency_key_for_event(wid, event_type, ticket_id) for wid in workflows}
+    done = set(
+        FrontlineWorkflowExecution.objects.filter(idempotency_key__in=list(keys.values()))
+        .values_list('workflow_id', 'idempotency_key')
+    )
+    executed = 0
+    for wid in workflow_ids:
+        w = workflows.get(wid)
+        if w is None:
+            continue
+        if (wid, keys[wid]) in done:
+            logger.info(
+                "Workflow trigger: skipping duplicate (workflow=%s event=%s ticket=%s) — already executed",
+                wid, event_type, ticket_id,
+            )
+            continue
+        try:
+            exec_obj = FrontlineWorkflowExecution.objects.create(
+                workflow=w,
+                workflow_name=w.name,
+                workflow_description=w.description or '',
+                executed_by=user,
+                status='awaiting_approval' if w.requires_approval else 'in_progress',
+                context_data=context_data,
+                idempotency_key=keys[wid],
+            )
+        except IntegrityError:
+            # Lost the idempotency race — a concurrent run beat us to the
+            # create. The other execution is authoritative.
+            logger.info(
+                "Workflow trigger: idempotency-key collision for workflow=%s ticket=%s — skipped",
+                wid, ticket_id,
+            )
+            continue
+        executed += 1
+        if w.requires_approval:
+            logger.info("Workflow trigger: workflow %s requires approval. Status: awaiting_approval.", wid)
+            continue
+        try:
+            success, result_data, err = _execute_workflow_steps(
+                w, dict(context_data), user, execution=exec_obj,
+            )
+        except Exception as exc:
+            logger.exception("Workflow trigger: execution failed for workflow %s (ticket %s)", wid, ticket_id)
+            success, result_data, err = False, {}, f"{type(exc).__name__}: {exc}"[:4000]
+        # A run that paused on a `wait` already persisted pause_state +
+        # status='paused' and scheduled its resume.
+        if result_data and result_data.get('paused'):
+            logger.info("Workflow trigger: workflow %s paused for %ss (exec=%s)",
+                        wid, result_data.get('wait_seconds'), exec_obj.id)
+            continue
+        exec_obj.status = 'completed' if success else 'failed'
+        exec_obj.result_data = result_data or {}
+        exec_obj.error_message = err
+        exec_obj.completed_at = timezone.now()
+        exec_obj.save(update_fields=['status', 'result_data', 'error_message', 'completed_at'])
+        logger.info("Workflow trigger: executed workflow %s (%s) for event=%s ticket=%s, status=%s",
+                    wid, w.name, event_type, ticket_id, exec_obj.status)
+    return {'executed': executed, 'skipped': len(workflow_ids) - executed}
+
+
 def _ensure_system_user():
     """Return a single reusable 'frontline-inbound' Django user to own tickets
     created from inbound email. Created on first call; idempotent."""
@@ -920,124 +987,23 @@ def hubspot_sync_all_contacts(company_id: int, batch_size: int = 200):
     return {'enqueued': len(ids), 'company_id': company_id}
 
 
-# ---------- Auto-close inactive tickets (T4) ----------
-
-@shared_task(name='Frontline_agent.tasks.auto_close_inactive_tickets')
-def auto_close_inactive_tickets():
-    """Close tickets that have been ``resolved`` for ``inactivity_days`` without
-    activity. Standard SaaS pattern — once a customer hasn't replied for a
-    week, the ticket is effectively done.
-
-    Skipped:
-      * already-closed tickets (idempotent)
-      * snoozed tickets (Celery's `wake_snoozed_tickets` will handle them when the
-        snooze ends and a fresh inactivity clock starts then)
-      * tickets that were resolved AND already had `resolved_at` set within the
-        window — guards against rows that flipped to `resolved` only this minute
+# ---------- Ticket timers: SLA escalation (S3), snooze wake-up, auto-close (T4) ----------
 
-    Inactivity window: ``settings.FRONTLINE_AUTO_CLOSE_DAYS`` (default 7). Set to
-    0 or negative to disable the task without removing it from the beat schedule.
+@shared_task(name='Frontline_agent.tasks.process_ticket_timers')
+def process_ticket_timers():
+    """Apply the ticket timers that have come due: clear expired snoozes,
+    bump tickets within ``FRONTLINE_SLA_ESCALATION_MINUTES`` of SLA breach to
+    ``urgent`` (firing the ``ticket_near_breach`` notification event), and
+    close tickets ``resolved`` for ``FRONTLINE_AUTO_CLOSE_DAYS`` without
+    activity. Replaces the wake / escalate / auto-close sweeps; see
+    Frontline_agent.ticket_timers.
     """
-    from Frontline_agent.models import Ticket, FrontlineAuditLog
-    inactivity_days = int(getattr(settings, 'FRONTLINE_AUTO_CLOSE_DAYS', 7))
-    if inactivity_days <= 0:
-        logger.info("auto_close_inactive_tickets: disabled (FRONTLINE_AUTO_CLOSE_DAYS=%d)", inactivity_days)
-        return {'closed': 0, 'disabled': True}
-    cutoff = timezone.now() - timedelta(days=inactivity_days)
-    qs = Ticket.objects.filter(
-        status='resolved',
-        updated_at__lt=cutoff,
-    ).exclude(snoozed_until__gt=timezone.now())
-
-    closed = 0
-    for ticket in qs.iterator(chunk_size=200):
-        old_status = ticket.status
-        try:
-            ticket.status = 'closed'
-            ticket.save(update_fields=['status', 'updated_at'])
-        except Exception:
-            logger.exception("auto_close_inactive_tickets: save failed for ticket %s", ticket.id)
-            continue
-        try:
-            FrontlineAuditLog.objects.create(
-                company_id=ticket.company_id, actor=None,
-                action='ticket.auto_close', target_type='ticket', target_id=ticket.id,
-                diff={
-                    'before': {'status': old_status},
-                    'after': {'status': 'closed',
-                              'reason': 'inactive_for_days',
-                              'inactivity_days': inactivity_days},
-                },
-            )
-        except Exception:
-            logger.exception("auto_close_inactive_tickets: audit log write failed for ticket %s", ticket.id)
-        closed += 1
-    if closed:
-        logger.info("auto_close_inactive_tickets: closed %d tickets (cutoff=%s)", closed, cutoff.isoformat())
-    return {'closed': closed, 'cutoff': cutoff.isoformat(), 'inactivity_days': inactivity_days}
-
-
-# ---------- Escalate near-breach tickets (S3) ----------
-
-@shared_task(name='Frontline_agent.tasks.escalate_near_breach_tickets')
-def escalate_near_breach_tickets():
-    """Find tickets within ``escalation_window_minutes`` of SLA breach + status
-    not closed/resolved, bump their priority to ``urgent`` so they surface at
-    the top of dashboards + assignment queues, and fire the
-    ``ticket_near_breach`` notification event so subscribed templates can alert
-    the assignee or HR.
-
-    Idempotent: tickets already at ``urgent`` are skipped (no double-bump, no
-    duplicate notifications). Escalation window: ``settings.FRONTLINE_SLA_ESCALATION_MINUTES``
-    (default 60). Set to 0 or negative to disable.
-    """
-    from Frontline_agent.models import Ticket, FrontlineAuditLog
-    window_minutes = int(getattr(settings, 'FRONTLINE_SLA_ESCALATION_MINUTES', 60))
-    if window_minutes <= 0:
-        logger.info("escalate_near_breach_tickets: disabled (window=%d)", window_minutes)
-        return {'escalated': 0, 'disabled': True}
-    now = timezone.now()
-    deadline = now + timedelta(minutes=window_minutes)
-    qs = Ticket.objects.filter(
-        sla_due_at__gt=now,
-        sla_due_at__lte=deadline,
-    ).exclude(
-        status__in=['resolved', 'closed', 'auto_resolved'],
-    ).exclude(priority='urgent')
-
-    escalated = 0
-    for ticket in qs.iterator(chunk_size=200):
-        old_priority = ticket.priority
-        try:
-            ticket.priority = 'urgent'
-            ticket.save(update_fields=['priority', 'updated_at'])
-        except Exception:
-            logger.exception("escalate_near_breach_tickets: save failed for ticket %s", ticket.id)
-            continue
-        try:
-            FrontlineAuditLog.objects.create(
-                company_id=ticket.company_id, actor=None,
-                action='ticket.sla_escalate', target_type='ticket', target_id=ticket.id,
-                diff={
-                    'before': {'priority': old_priority},
-                    'after': {'priority': 'urgent',
-                              'sla_due_at': ticket.sla_due_at.isoformat() if ticket.sla_due_at else None,
-                              'window_minutes': window_minutes},
-                },
-            )
-        except Exception:
-            logger.exception("escalate_near_breach_tickets: audit log write failed for ticket %s", ticket.id)
-        # Fire the notification trigger so any template subscribed to
-        # ``ticket_near_breach`` fans out (e.g. "Slack the on-call channel"
-        # or "email the manager"). Best-effort; failure here doesn't undo
-        # the escalation itself.
-        try:
-            from api.views.frontline_agent import _run_notification_triggers
-            _run_notification_triggers(ticket.company_id, 'ticket_near_breach', ticket)
-        except Exception:
-            logger.exception("escalate_near_breach_tickets: notification trigger failed for ticket %s", ticket.id)
-        escalated += 1
-    if escalated:
-        logger.info("escalate_near_breach_tickets: escalated %d tickets (window=%dm)", escalated, window_minutes)
-    return {'escalated': escalated, 'window_minutes': window_minutes,
-            'deadline': deadline.isoformat()}
+    from Frontline_agent.ticket_timers import process_due_timers
+
+    result = process_due_timers()
+    if any(result.values()):
+        logger.info(
+            "process_ticket_timers: woke %(woken)d, escalated %(escalated)d, closed %(closed)d, "
+            "rescheduled %(rescheduled)d", result,
+        )
+    return result
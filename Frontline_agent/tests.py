@@ -0,0 +1,365 @@
+import logging
+import random
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+from zoneinfo import ZoneInfo
+
+from django.test import SimpleTestCase
+
+from Frontline_agent import workflow_conditions
+from Frontline_agent.business_calendar import BusinessCalendar, business_calendar
+from Frontline_agent.workflow_conditions import (
+    ConditionSyntaxError, compile_condition, evaluate, steps_condition_error, validate_steps,
+)
+
+DAY_KEYS = ('mon', 'tue', 'wed', 'thu', 'fri', 'sat', 'sun')
+UTC = dt_timezone.utc
+
+
+def minute_walk_add_business_hours(now, hours_to_add, oh_cfg):
+    """The minute-by-minute walk business_calendar replaced (was
+    api.views.frontline_agent._add_business_hours), kept as the reference
+    the calendar is checked against."""
+    try:
+        tz = ZoneInfo((oh_cfg.get('timezone_name') or 'UTC'))
+    except Exception:
+        tz = UTC
+    schedule = oh_cfg.get('schedule') or {}
+    if not any((schedule.get(d) or []) for d in DAY_KEYS):
+        return now + timedelta(hours=hours_to_add)
+
+    def _in_open_window(local_dt):
+        cur = local_dt.time()
+        for start_s, end_s in schedule.get(DAY_KEYS[local_dt.weekday()]) or []:
+            try:
+                sh, sm = [int(x) for x in start_s.split(':')]
+                eh, em = [int(x) for x in end_s.split(':')]
+            except (TypeError, ValueError):
+                continue
+            if time(sh, sm) <= cur < time(eh, em):
+                return True
+        return False
+
+    remaining_minutes = int(round(hours_to_add * 60))
+    cursor = now.astimezone(tz)
+    max_iter = 60 * 24 * 90
+    iters = 0
+    while remaining_minutes > 0 and iters < max_iter:
+        iters += 1
+        if _in_open_window(cursor):
+            remaining_minutes -= 1
+        cursor += timedelta(minutes=1)
+    return cursor.astimezone(UTC)
+
+
+def _hhmm(minutes):
+    return f'{minutes // 60:02d}:{minutes % 60:02d}'
+
+
+def random_schedule(rnd, earliest=0, latest=24 * 60 - 1, overnight=False):
+    """Random windows per weekday between `earliest` and `latest` local
+    minutes; with `overnight`, some windows end before they start."""
+    schedule = {}
+    for key in DAY_KEYS:
+        windows = []
+        for _ in range(rnd.choice([0, 0, 1, 1, 2, 3])):
+            start = rnd.randrange(earliest, latest)
+            end = rnd.randrange(start + 1, latest + 1)
+            if overnight and rnd.random() < 0.3:
+                start, end = rnd.randrange(18 * 60, 24 * 60), rnd.randrange(1, 6 * 60)
+            windows.append([_hhmm(start), _hhmm(end)])
+        schedule[key] = windows
+    # At least one ordinary window, so every budget is reached well inside
+    # the minute walk's 90-day cap.
+    schedule['wed'].append(['08:00', '20:00'])
+    return schedule
+
+
+def random_start(rnd, around=None):
+    if around is not None:
+        return around + timedelta(minutes=rnd.randrange(-3 * 24 * 60, 2 * 24 * 60))
+    return datetime(2026, rnd.randint(1, 12), rnd.randint(1, 28), rnd.randrange(24), rnd.randrange(60), tzinfo=UTC)
+
+
+# Local DST changes in 2026, as UTC instants.
+DST_CHANGES = {
+    'America/New_York': [datetime(2026, 3, 8, 7, 0, tzinfo=UTC), datetime(2026, 11, 1, 6, 0, tzinfo=UTC)],
+    'Europe/Berlin': [datetime(2026, 3, 29, 1, 0, tzinfo=UTC), datetime(2026, 10, 25, 1, 0, tzinfo=UTC)],
+}
+BUDGETS = [0.5, 1, 2.75, 4, 8, 24, 48]
+
+
+class BusinessCalendarTests(SimpleTestCase):
+
+    def assertSameDeadline(self, cfg, start, hours):
+        expected = minute_walk_add_business_hours(start, hours, cfg)
+        got = business_calendar(cfg).add_hours(start, hours)
+        self.assertEqual(got, expected, f'{cfg} start={start} hours={hours}')
+        return got
+
+    def test_matches_minute_walk(self):
+        rnd = random.Random(44)
+        for tz_name in ('UTC', 'Asia/Kolkata', 'America/New_York', 'Europe/Berlin'):
+            for _ in range(60):
+                cfg = {'timezone_name': tz_name, 'schedule': random_schedule(rnd)}
+                start, hours = random_start(rnd), rnd.choice(BUDGETS)
+                # The walk counts wall-clock minutes, so a window holding a
+                # DST change is legitimately a different length (see
+                # test_dst_change_inside_window); those spans are covered by
+                # the next test.
+                expected = minute_walk_add_business_hours(start, hours, cfg)
+                if any(start <= change <= expected for change in DST_CHANGES.get(tz_name, [])):
+                    continue
+                self.assertEqual(business_calendar(cfg).add_hours(start, hours), expected, f'{cfg} {start} {hours}')
+
+    def test_matches_minute_walk_across_dst_changes(self):
+        # Windows clear of the 01:00-03:00 changeover: business time is the
+        # same in wall-clock and real minutes, so the deadlines agree.
+        rnd = random.Random(4401)
+        for tz_name, changes in DST_CHANGES.items():
+            for change in changes:
+                for _ in range(25):
+                    cfg = {'timezone_name': tz_name, 'schedule': random_schedule(rnd, earliest=4 * 60)}
+                    self.assertSameDeadline(cfg, random_start(rnd, around=change), rnd.choice(BUDGETS))
+
+    def test_between_inverts_add(self):
+        rnd = random.Random(4402)
+        for tz_name in ('UTC', 'America/New_York', 'Europe/Berlin'):
+            for _ in range(100):
+                cal = BusinessCalendar.from_config(
+                    {'timezone_name': tz_name, 'schedule': random_schedule(rnd, overnight=True)})
+                start = random_start(rnd, around=rnd.choice(DST_CHANGES.get(tz_name, [None])))
+                duration = timedelta(minutes=int(rnd.choice(BUDGETS) * 60))
+                self.assertEqual(cal.between(start, cal.add(start, duration)), duration)
+
+    def test_overnight_windows_count(self):
+        # The walk never matched a window whose end is before its start;
+        # the calendar runs it past midnight into the next day.
+        rnd = random.Random(4403)
+        for _ in range(100):
+            schedule = random_schedule(rnd, overnight=True)
+            cfg = {'timezone_name': rnd.choice(['UTC', 'Asia/Kolkata']), 'schedule': schedule}
+            start, hours = random_start(rnd), rnd.choice(BUDGETS)
+            same_day = {key: [w for w in windows if w[0] < w[1]] for key, windows in schedule.items()}
+            split = {key: [] for key in DAY_KEYS}
+            for index, key in enumerate(DAY_KEYS):
+                for opens, closes in schedule[key]:
+                    if opens < closes:
+                        split[key].append([opens, closes])
+                    else:
+                        split[key].append([opens, '24:00'])
+                        split[DAY_KEYS[(index + 1) % 7]].append(['00:00', closes])
+            self.assertEqual(
+                minute_walk_add_business_hours(start, hours, cfg),
+                business_calendar({**cfg, 'schedule': same_day}).add_hours(start, hours),
+            )
+            self.assertEqual(
+                business_calendar(cfg).add_hours(start, hours),
+                business_calendar({**cfg, 'schedule': split}).add_hours(start, hours),
+            )
+
+        cfg = {'timezone_name': 'UTC', 'schedule': {
+            'thu': [['09:00', '17:00']], 'fri': [['09:00', '17:00'], ['22:00', '02:00']], 'mon': [['09:00', '17:00']],
+        }}
+        friday_late = datetime(2026, 10, 16, 23, 0, tzinfo=UTC)
+        self.assertEqual(business_calendar(cfg).add_hours(friday_late, 2), datetime(2026, 10, 17, 1, 0, tzinfo=UTC))
+        self.assertEqual(minute_walk_add_business_hours(friday_late, 2, cfg), datetime(2026, 10, 19, 11, 0, tzinfo=UTC))
+
+    def test_dst_change_inside_window(self):
+        # 00:00-04:00 New York on the spring-forward night is three real
+        # hours; the walk counted four wall-clock hours.
+        cfg = {'timezone_name': 'America/New_York', 'schedule': {'sun': [['00:00', '04:00']]}}
+        midnight = datetime(2026, 3, 8, 5, 0, tzinfo=UTC)
+        cal = business_calendar(cfg)
+        self.assertEqual(cal.between(midnight, midnight + timedelta(days=1)), timedelta(hours=3))
+        self.assertEqual(cal.add_hours(midnight, 3), datetime(2026, 3, 8, 8, 0, tzinfo=UTC))
+        self.assertEqual(minute_walk_add_business_hours(midnight, 4, cfg), datetime(2026, 3, 8, 8, 0, tzinfo=UTC))
+        # Five real hours on the fall-back night, with 01:00-02:00 twice.
+        midnight = datetime(2026, 11, 1, 4, 0, tzinfo=UTC)
+        self.assertEqual(cal.between(midnight, midnight + timedelta(days=1)), timedelta(hours=5))
+
+
+CONDITION_PATHS = ['priority', 'category', 'ticket.priority', 'ticket.meta.n', 'n', 'tags', 'missing', '', None, 5, ['x']]
+CONDITION_LITERALS = [
+    "'high'", '"low"', '3', '2.5', 'true', 'False', 'null', "['a', 'b', 3]", '[]', 'abc', '', ' 4 ',
+    "[a, 'b,c']", 'None', '1.2.3',
+]
+CONDITION_VALUES = ['high', 3, 1, 1.0, True, 2.5, None, ['a', 'b'], ('a',), [], {}, '', 'x', {'k': 1}]
+
+
+def random_condition(rnd, depth=0):
+    """A random condition, valid or not: string and dict atoms with real
+    and bogus ops, all/any/not nesting, and malformed shapes and operands."""
+    roll = rnd.random()
+    if depth > 3 or roll < 0.3:
+        if rnd.random() < 0.5:
+            left = rnd.choice(['priority', 'ticket.priority', 'n', 'tags', 'x1', '9bad', ''])
+            op = rnd.choice(list(workflow_conditions._OPS) + ['bogus', '=>'])
+            return f'{left} {op} {rnd.choice(CONDITION_LITERALS)}'
+        condition = {'left': rnd.choice(CONDITION_PATHS), 'op': rnd.choice(list(workflow_conditions._OPS) + ['bogus', None, ['=='], 3])}
+        if rnd.random() < 0.8:
+            condition['right'] = rnd.choice(CONDITION_LITERALS + CONDITION_VALUES)
+        return condition
+    if roll < 0.4:
+        return rnd.choice([None, True, False, 7, 2.5, ['x'], 'garbage', {}, {'foo': 1}, {'left': 'n'}, {'op': '=='}])
+    key = rnd.choice(['all', 'any', 'not'])
+    if key == 'not':
+        return {'not': random_condition(rnd, depth + 1)}
+    operands = rnd.choice([
+        [random_condition(rnd, depth + 1) for _ in range(rnd.randint(0, 3))],
+        [random_condition(rnd, depth + 1) for _ in range(rnd.randint(1, 3))],
+        None, 'ab', ('priority == 1',), {'a': 1}, 5,
+    ])
+    return {key: operands}
+
+
+def random_context(rnd):
+    return rnd.choice([
+        {
+            'priority': rnd.choice(['high', 'low', None, 3]),
+            'n': rnd.choice([1, 2.5, '3', None, 'x']),
+            'tags': rnd.choice([['a'], 'ab', None, [], {}]),
+            'ticket': rnd.choice([{'priority': 'high', 'meta': {'n': 3}}, 'str', None]),
+            '': 1,
+        },
+        {},
+        None,
+        'notadict',
+    ])
+
+
+class _Records(logging.Handler):
+    def __init__(self):
+        super().__init__(logging.WARNING)
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+
+
+class WorkflowConditionTests(SimpleTestCase):
+
+    def setUp(self):
+        workflow_conditions._COMPILED_CACHE.clear()
+        self.records = _Records()
+        logger = workflow_conditions.logger
+        logger.addHandler(self.records)
+        self.addCleanup(logger.removeHandler, self.records)
+        propagate, logger.propagate = logger.propagate, False
+        self.addCleanup(setattr, logger, 'propagate', propagate)
+
+    def run_condition(self, fn, condition, context):
+        """(outcome, warnings) for one evaluation, an exception included."""
+        self.records.messages = []
+        try:
+            outcome = ('ok', fn(condition, context))
+        except Exception as exc:
+            outcome = ('raised', type(exc), str(exc))
+        return outcome, self.records.messages
+
+    def test_evaluate_matches_interpreter(self):
+        rnd = random.Random(47)
+        for _ in range(5000):
+            condition, context = random_condition(rnd), random_context(rnd)
+            expected = self.run_condition(workflow_conditions._interpret, condition, context)
+            # First call compiles; the second is served from the cache.
+            for call in ('first', 'cached'):
+                self.assertEqual(
+                    self.run_condition(evaluate, condition, context), expected,
+                    f'{call} call: condition={condition!r} context={context!r}',
+                )
+
+    def test_strictly_compiled_conditions_evaluate_without_syntax_warnings(self):
+        syntax_warnings = ('Unparseable', 'Unknown condition', 'Unsupported condition')
+        rnd = random.Random(4701)
+        accepted = 0
+        for _ in range(3000):
+            condition = random_condition(rnd)
+            try:
+                compile_condition(condition, strict=True)
+            except ConditionSyntaxError:
+                continue
+            accepted += 1
+            for _ in range(3):
+                outcome, messages = self.run_condition(workflow_conditions._interpret, condition, random_context(rnd))
+                self.assertEqual(outcome[0], 'ok', repr(condition))
+                self.assertFalse([m for m in messages if m.startswith(syntax_warnings)], repr(condition))
+        self.assertGreater(accepted, 100)
+
+    def test_strict_compile_rejects_malformed_conditions(self):
+        for condition in [
+            'garbage', "9bad == 'x'", 'priority => 3', {'left': 'n', 'op': 'bogus'}, {'left': 5, 'op': '=='},
+            {'left': 'n', 'op': None}, {'all': 'ab'}, {'any': 5}, {'foo': 1}, {'not': {'op': '=='}}, 7, ['x'],
+            {'all': ["priority == 'high'", {'any': [{'not': 'garbage'}]}]},
+        ]:
+            with self.assertRaises(ConditionSyntaxError, msg=repr(condition)):
+                compile_condition(condition, strict=True)
+        for condition in [
+            None, True, False, "priority == 'high'", 'tags is_empty', {'all': []}, {'any': None},
+            {'left': None, 'op': 'is_empty'}, {'not': {'left': 'ticket.meta.n', 'op': '>', 'right': '2'}},
+        ]:
+            compile_condition(condition, strict=True)
+
+    def random_steps(self, rnd, depth=0):
+        steps = []
+        for _ in range(rnd.randint(0, 3)):
+            kind = rnd.choice(['send_email', 'assign', 'branch', 'Branch', 'BRANCH', None, 3])
+            step = {'type': kind} if rnd.random() < 0.9 else rnd.choice(['branch', None, 4])
+            if isinstance(step, dict) and kind in ('branch', 'Branch', 'BRANCH'):
+                # Mostly valid conditions, so some trees save cleanly.
+                step['condition'] = random_condition(rnd) if rnd.random() < 0.3 else rnd.choice(
+                    ["priority == 'high'", {'left': 'n', 'op': '>', 'right': 2}, None, True])
+                if depth < 3:
+                    for branch in ('if_true', 'if_false'):
+                        if rnd.random() < 0.6:
+                            step[branch] = self.random_steps(rnd, depth + 1)
+            steps.append(step)
+        return steps
+
+    def first_bad_condition(self, steps, path=''):
+        """Reference for validate_steps: the path of the first branch step
+        (depth first, if_true before if_false) whose condition doesn't
+        compile strictly."""
+        for i, step in enumerate(steps if isinstance(steps, list) else []):
+            if not isinstance(step, dict) or str(step.get('type') or '').lower() != 'branch':
+                continue
+            try:
+                compile_condition(step.get('condition'), strict=True)
+            except ConditionSyntaxError:
+                return f'{path}{i}'
+            for branch in ('if_true', 'if_false'):
+                bad = self.first_bad_condition(step.get(branch) or [], f'{path}{i}.{branch}.')
+                if bad is not None:
+                    return bad
+        return None
+
+    def test_steps_condition_error_names_first_bad_branch(self):
+        rnd = random.Random(4702)
+        rejected = 0
+        for _ in range(2000):
+            steps = rnd.choice([self.random_steps(rnd), self.random_steps(rnd), None, {}, 'x'])
+            bad = self.first_bad_condition(steps)
+            error = steps_condition_error(steps)
+            if bad is None:
+                self.assertIsNone(error, repr(steps))
+                validate_steps(steps)
+                continue
+            rejected += 1
+            self.assertTrue(error.startswith(f'Invalid branch condition: Step {bad}: '), f'{error} {steps!r}')
+            with self.assertRaisesMessage(ConditionSyntaxError, f'Step {bad}: '):
+                validate_steps(steps)
+        self.assertGreater(rejected, 100)
+
+    def test_steps_condition_error_examples(self):
+        self.assertIsNone(steps_condition_error(None))
+        self.assertIsNone(steps_condition_error([{'type': 'send_email', 'condition': 'garbage'}]))
+        self.assertEqual(
+            steps_condition_error([
+                {'type': 'send_email'},
+                {'type': 'branch', 'condition': 'a == 1', 'if_true': [{'type': 'Branch', 'condition': 'oops'}]},
+            ]),
+            "Invalid branch condition: Step 1.if_true.0: Unparseable condition string: 'oops'",
+        )
+        self.assertEqual(
+            steps_condition_error([{'type': 'branch', 'condition': {'left': 'n', 'op': 'bogus'}}]),
+            "Invalid branch condition: Step 0: Unknown condition op: 'bogus'",
+        )
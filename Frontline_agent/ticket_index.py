@@ -0,0 +1,142 @@
+"""
+Indexed tag filters and word search for the ticket list.
+
+``list_tickets`` used to filter tags with JSON containment
+(``tags__contains=[tag]``) and search with ``title__icontains |
+description__icontains``. SQL Server can use an index for neither, so both
+scanned every ticket the user could see. Two side tables replace them:
+
+- TicketTag holds one row per tag. A tag filter is an indexed
+  ``(company, tag)`` lookup.
+- TicketSearchToken holds one row per distinct word of the title and
+  description (lower-cased, ``\\w+`` runs of at least MIN_TOKEN_LENGTH
+  characters). Each word of ``q`` must prefix-match a token of the ticket,
+  an indexed ``LIKE 'word%'`` seek on ``(company, token)``. So "refund del"
+  finds "Refund delayed", but a fragment from inside a word ("fund") no
+  longer matches. A query with no indexable word falls back to the
+  substring scan.
+
+``sync_ticket_index`` brings a ticket's rows in line with its fields. The
+Ticket post_save signal calls it, skipping saves whose ``update_fields``
+don't touch tags, title or description. Code that changes those fields with
+a queryset ``update()`` must call it itself.
+"""
+import re
+
+from django.db.models import Q
+
+from core.tabular_import import IN_LOOKUP_CHUNK, chunked
+
+MIN_TOKEN_LENGTH = 2
+MAX_TOKEN_LENGTH = 64
+# Distinct words indexed per ticket; title words come first so they are
+# always searchable, however long the description.
+MAX_TOKENS_PER_TICKET = 2000
+MAX_TAG_LENGTH = 100
+INDEX_FIELDS = frozenset({'title', 'description', 'tags', 'company'})
+BULK_BATCH_SIZE = 1000
+
+_WORD_RE = re.compile(r'\w+')
+
+
+def tokenize(*texts):
+    """Distinct lower-cased words of ``texts``, in first-seen order."""
+    tokens = {}
+    for text in texts:
+        for word in _WORD_RE.findall((text or '').lower()):
+            if len(word) >= MIN_TOKEN_LENGTH:
+                tokens.setdefault(word[:MAX_TOKEN_LENGTH], None)
+    return list(tokens)
+
+
+def ticket_tokens(title, description):
+    return tokenize(title, description)[:MAX_TOKENS_PER_TICKET]
+
+
+def ticket_tags(tags):
+    if not isinstance(tags, list):
+        return []
+    return list(dict.fromkeys(str(tag)[:MAX_TAG_LENGTH] for tag in tags if tag))
+
+
+def _sync_rows(model, field, ticket, wanted, created=False):
+    """Make ``ticket``'s rows of ``model`` hold exactly the values in ``wanted``."""
+    seen, stale, moved = set(), [], False
+    if not created:
+        wanted_set = set(wanted)
+        rows = model.objects.filter(ticket_id=ticket.pk).values_list('pk', field, 'company_id')
+        for pk, value, company_id in rows:
+            if value in seen or value not in wanted_set:
+                stale.append(pk)
+                continue
+            seen.add(value)
+            moved = moved or company_id != ticket.company_id
+    for chunk in chunked(stale, IN_LOOKUP_CHUNK):
+        model.objects.filter(pk__in=chunk).delete()
+    if moved:
+        model.objects.filter(ticket_id=ticket.pk).update(company_id=ticket.company_id)
+    model.objects.bulk_create(
+        [model(ticket_id=ticket.pk, company_id=ticket.company_id, **{field: value})
+         for value in wanted if value not in seen],
+        batch_size=BULK_BATCH_SIZE,
+    )
+
+
+def sync_ticket_index(ticket, created=False, update_fields=None):
+    """Bring ``ticket``'s tag and search-token rows in line with its fields."""
+    from Frontline_agent.models import TicketSearchToken, TicketTag
+
+    fields = INDEX_FIELDS if update_fields is None else INDEX_FIELDS.intersection(update_fields)
+    if fields & {'tags', 'company'}:
+        _sync_rows(TicketTag, 'tag', ticket, ticket_tags(ticket.tags), created)
+    if fields & {'title', 'description', 'company'}:
+        _sync_rows(TicketSearchToken, 'token', ticket, ticket_tokens(ticket.title, ticket.description), created)
+
+
+def rebuild_ticket_index():
+    """Recompute every tag and search-token row from the Ticket table (repair)."""
+    from Frontline_agent.models import Ticket, TicketSearchToken, TicketTag
+
+    TicketTag.objects.all().delete()
+    TicketSearchToken.objects.all().delete()
+    tags, tokens = [], []
+    rows = (Ticket.objects.order_by()
+            .values_list('id', 'company_id', 'title', 'description', 'tags').iterator(chunk_size=2000))
+    for ticket_id, company_id, title, description, ticket_tag_list in rows:
+        tags.extend(TicketTag(ticket_id=ticket_id, company_id=company_id, tag=tag)
+                    for tag in ticket_tags(ticket_tag_list))
+        tokens.extend(TicketSearchToken(ticket_id=ticket_id, company_id=company_id, token=token)
+                      for token in ticket_tokens(title, description))
+        if len(tokens) >= BULK_BATCH_SIZE * 10:
+            TicketSearchToken.objects.bulk_create(tokens, batch_size=BULK_BATCH_SIZE)
+            tokens = []
+        if len(tags) >= BULK_BATCH_SIZE:
+            TicketTag.objects.bulk_create(tags, batch_size=BULK_BATCH_SIZE)
+            tags = []
+    TicketTag.objects.bulk_create(tags, batch_size=BULK_BATCH_SIZE)
+    TicketSearchToken.objects.bulk_create(tokens, batch_size=BULK_BATCH_SIZE)
+
+
+def filter_tags(qs, company_id, tags):
+    """Narrow ``qs`` to tickets carrying every tag in ``tags``."""
+    from Frontline_agent.models import TicketTag
+
+    for tag in tags:
+        qs = qs.filter(id__in=TicketTag.objects.filter(
+            company_id=company_id, tag=str(tag)[:MAX_TAG_LENGTH],
+        ).values('ticket_id'))
+    return qs
+
+
+def filter_search(qs, company_id, q):
+    """Narrow ``qs`` to tickets with a word starting with each word of ``q``."""
+    from Frontline_agent.models import TicketSearchToken
+
+    terms = tokenize(q)
+    if not terms:
+        return qs.filter(Q(title__icontains=q) | Q(description__icontains=q))
+    for term in terms:
+        qs = qs.filter(id__in=TicketSearchToken.objects.filter(
+            company_id=company_id, token__startswith=term,
+        ).values('ticket_id'))
+    return qs
@@ -0,0 +1,227 @@
+"""
+Ticket timer queue: SLA near-breach escalation, snooze wake-up and
+auto-close after inactivity.
+
+These used to be three periodic sweeps over the Ticket table that saved,
+audited and notified one ticket at a time, so each run cost time
+proportional to the number of open tickets. Now every ticket keeps one
+TicketTimer row per pending transition with its ``fire_at``:
+
+- ``sync_ticket_timers`` recomputes a ticket's rows from its current
+  fields. The Ticket post_save signal calls it, so the SLA due date,
+  snooze and inactivity clock are followed on every save path.
+- ``process_due_timers`` claims due rows with ``skip_locked`` (concurrent
+  workers take disjoint batches) and re-checks each ticket under a row lock.
+  It then applies each kind of transition with one UPDATE, writes the audit
+  rows with one ``bulk_create``, and drops the rows it consumed. A row whose
+  ticket has changed since is moved to its new time or removed.
+
+The windows come from settings, as before: FRONTLINE_SLA_ESCALATION_MINUTES
+(default 60) and FRONTLINE_AUTO_CLOSE_DAYS (default 7); 0 or less disables
+that transition. The consumer applies the current settings to every due
+row, so a changed window takes effect on the next run.
+"""
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from Frontline_agent.analytics_rollup import schedule_refresh
+
+logger = logging.getLogger(__name__)
+
+SLA_ESCALATE = 'sla_escalate'
+SNOOZE_WAKE = 'snooze_wake'
+AUTO_CLOSE = 'auto_close'
+
+# Ticket fields the timers are computed from; saves touching none of them
+# leave the timers alone.
+TIMER_FIELDS = frozenset({'sla_due_at', 'snoozed_until', 'status', 'priority', 'updated_at'})
+_SLA_DONE_STATUSES = ('resolved', 'closed', 'auto_resolved')
+
+TIMER_BATCH_SIZE = 500
+# Batches one consumer run works through before leaving the rest for the next tick.
+MAX_BATCHES_PER_RUN = 20
+
+
+def escalation_window():
+    minutes = int(getattr(settings, 'FRONTLINE_SLA_ESCALATION_MINUTES', 60))
+    return timedelta(minutes=minutes) if minutes > 0 else None
+
+
+def inactivity_window():
+    days = int(getattr(settings, 'FRONTLINE_AUTO_CLOSE_DAYS', 7))
+    return timedelta(days=days) if days > 0 else None
+
+
+def desired_timers(ticket, now=None):
+    """{kind: fire_at} for the transitions still pending on ``ticket``.
+
+    A fire_at at or before ``now`` means the transition is due. The
+    escalation fires only while the SLA is not yet breached, as the old
+    sweep only looked ``window`` ahead of now. A snoozed resolved ticket is
+    not auto-closed before its snooze ends.
+    """
+    now = now or timezone.now()
+    timers = {}
+    window = escalation_window()
+    if (window and ticket.sla_due_at and ticket.sla_due_at > now
+            and ticket.status not in _SLA_DONE_STATUSES and ticket.priority != 'urgent'):
+        timers[SLA_ESCALATE] = ticket.sla_due_at - window
+    if ticket.snoozed_until:
+        timers[SNOOZE_WAKE] = ticket.snoozed_until
+    inactivity = inactivity_window()
+    if inactivity and ticket.status == 'resolved' and ticket.updated_at:
+        fire_at = ticket.updated_at + inactivity
+        if ticket.snoozed_until and ticket.snoozed_until > fire_at:
+            fire_at = ticket.snoozed_until
+        timers[AUTO_CLOSE] = fire_at
+    return timers
+
+
+def sync_ticket_timers(ticket, now=None):
+    """Bring ``ticket``'s TicketTimer rows in line with its current fields."""
+    from Frontline_agent.models import TicketTimer
+
+    desired = desired_timers(ticket, now)
+    existing = {timer.kind: timer for timer in TicketTimer.objects.filter(ticket_id=ticket.pk)}
+    stale = [timer.pk for kind, timer in existing.items() if kind not in desired]
+    if stale:
+        TicketTimer.objects.filter(pk__in=stale).delete()
+    moved = []
+    for kind, fire_at in desired.items():
+        timer = existing.get(kind)
+        if timer is not None:
+            if timer.fire_at != fire_at:
+                timer.fire_at = fire_at
+                moved.append(timer)
+            continue
+        try:
+            with transaction.atomic():
+                TicketTimer.objects.create(ticket_id=ticket.pk, kind=kind, fire_at=fire_at)
+        except IntegrityError:
+            # A concurrent save of the same ticket inserted it first.
+            TicketTimer.objects.filter(ticket_id=ticket.pk, kind=kind).update(fire_at=fire_at)
+    if moved:
+        TicketTimer.objects.bulk_update(moved, ['fire_at'])
+
+
+def _audit_row(ticket, action, before, after):
+    from Frontline_agent.models import FrontlineAuditLog
+
+    return FrontlineAuditLog(
+        company_id=ticket.company_id, actor=None,
+        action=action, target_type='ticket', target_id=ticket.id,
+        diff={'before': before, 'after': after},
+    )
+
+
+def _process_batch(now, limit):
+    """Claim and apply up to ``limit`` due timers. Returns (timers handled,
+    counts, escalated tickets)."""
+    from Frontline_agent.models import FrontlineAuditLog, Ticket, TicketTimer
+
+    counts = {'woken': 0, 'escalated': 0, 'closed': 0, 'rescheduled': 0}
+    with transaction.atomic():
+        timers = list(
+            TicketTimer.objects.select_for_update(skip_locked=True)
+            .filter(fire_at__lte=now).order_by('fire_at')[:limit]
+        )
+        if not timers:
+            return 0, counts, []
+        # Tickets being saved elsewhere right now are skipped; their timers
+        # stay due and are picked up next run against the saved values.
+        tickets = {
+            ticket.id: ticket
+            for ticket in Ticket.objects.select_for_update(skip_locked=True)
+            .filter(id__in={timer.ticket_id for timer in timers})
+        }
+        fire = {SNOOZE_WAKE: [], SLA_ESCALATE: [], AUTO_CLOSE: []}
+        consumed, moved = [], []
+        for timer in timers:
+            ticket = tickets.get(timer.ticket_id)
+            if ticket is None:
+                continue
+            fire_at = desired_timers(ticket, now).get(timer.kind)
+            if fire_at is not None and fire_at <= now:
+                fire[timer.kind].append(ticket)
+                consumed.append(timer.pk)
+            elif fire_at is None:
+                consumed.append(timer.pk)
+            else:
+                timer.fire_at = fire_at
+                moved.append(timer)
+
+        audit = []
+        if fire[SNOOZE_WAKE]:
+            Ticket.objects.filter(id__in=[t.id for t in fire[SNOOZE_WAKE]]).update(snoozed_until=None)
+            for ticket in fire[SNOOZE_WAKE]:
+                ticket.snoozed_until = None
+        if fire[SLA_ESCALATE]:
+            window_minutes = int(escalation_window().total_seconds() // 60)
+            Ticket.objects.filter(id__in=[t.id for t in fire[SLA_ESCALATE]]).update(
+                priority='urgent', updated_at=now,
+            )
+            for ticket in fire[SLA_ESCALATE]:
+                audit.append(_audit_row(
+                    ticket, 'ticket.sla_escalate', {'priority': ticket.priority},
+                    {'priority': 'urgent',
+                     'sla_due_at': ticket.sla_due_at.isoformat(),
+                     'window_minutes': window_minutes},
+                ))
+                ticket.priority, ticket.updated_at = 'urgent', now
+        if fire[AUTO_CLOSE]:
+            inactivity_days = inactivity_window().days
+            Ticket.objects.filter(id__in=[t.id for t in fire[AUTO_CLOSE]]).update(
+                status='closed', updated_at=now,
+            )
+            for ticket in fire[AUTO_CLOSE]:
+                audit.append(_audit_row(
+                    ticket, 'ticket.auto_close', {'status': ticket.status},
+                    {'status': 'closed', 'reason': 'inactive_for_days',
+                     'inactivity_days': inactivity_days},
+                ))
+                ticket.status, ticket.updated_at = 'closed', now
+        FrontlineAuditLog.objects.bulk_create(audit, batch_size=TIMER_BATCH_SIZE)
+        # The UPDATEs above skip post_save; refresh the analytics rollups here.
+        schedule_refresh(fire[SLA_ESCALATE] + fire[AUTO_CLOSE])
+        # Each transition clears the condition of its own timer and none of
+        # the others', so the rows consumed above are the only ones to drop.
+        if consumed:
+            TicketTimer.objects.filter(pk__in=consumed).delete()
+        if moved:
+            TicketTimer.objects.bulk_update(moved, ['fire_at'], batch_size=TIMER_BATCH_SIZE)
+
+    counts.update(
+        woken=len(fire[SNOOZE_WAKE]), escalated=len(fire[SLA_ESCALATE]),
+        closed=len(fire[AUTO_CLOSE]), rescheduled=len(moved),
+    )
+    return len(consumed) + len(moved), counts, fire[SLA_ESCALATE]
+
+
+def process_due_timers(now=None, limit=TIMER_BATCH_SIZE, max_batches=MAX_BATCHES_PER_RUN):
+    """Apply every due ticket timer, ``limit`` at a time. Returns counts per
+    transition plus ``rescheduled`` (timers moved because the ticket changed)."""
+    now = now or timezone.now()
+    totals = {'woken': 0, 'escalated': 0, 'closed': 0, 'rescheduled': 0}
+    for _ in range(max_batches):
+        handled, counts, escalated = _process_batch(now, limit)
+        for key, value in counts.items():
+            totals[key] += value
+        # Fire ``ticket_near_breach`` so subscribed templates alert the
+        # assignee. Best-effort, after commit: a failure here doesn't undo
+        # the escalation.
+        if escalated:
+            from api.views.frontline_agent import _run_notification_triggers
+            for ticket in escalated:
+                try:
+                    _run_notification_triggers(ticket.company_id, 'ticket_near_breach', ticket)
+                except Exception:
+                    logger.exception("ticket timers: notification trigger failed for ticket %s", ticket.id)
+        # A short batch means nothing else is due, or the rest is locked by
+        # another worker or waiting on a ticket being saved.
+        if handled < limit:
+            break
+    return totals
@@ -10,12 +10,20 @@ user-provided strings. Conditions are either:
 
 The dict form is preferred for UIs; the string form is convenience.
 Lookups resolve `foo.bar.baz` paths against the execution context.
+
+Conditions are compiled into closures (`compile_condition`) so a branch step
+doesn't re-run the regex, literal parsing and dict walk on every evaluation.
+Compiled closures are cached per process by condition content, and workflow
+saves compile every branch condition strictly (`validate_steps`) so a syntax
+error is rejected at save instead of evaluating to False at runtime. The
+compiled form behaves exactly like the interpreter (`_interpret`), including
+its warnings; shapes the compiler doesn't model are delegated to it.
 """
 from __future__ import annotations
 
 import logging
 import re
-from typing import Any
+from typing import Any, Callable
 
 logger = logging.getLogger(__name__)
 
@@ -137,8 +145,8 @@ def _eval_atom(left_path: str, op: str, right_raw: Any, context: dict) -> bool:
         return False
 
 
-def evaluate(condition: Any, context: dict) -> bool:
-    """Evaluate a condition against a context dict. Returns False on any parse error."""
+def _interpret(condition: Any, context: dict) -> bool:
+    """Reference evaluator: parses and walks the condition on every call."""
     if condition is None:
         return True  # No condition = always true
     if isinstance(condition, bool):
@@ -151,14 +159,163 @@ def evaluate(condition: Any, context: dict) -> bool:
         return _eval_atom(m.group('left'), m.group('op'), m.group('right'), context)
     if isinstance(condition, dict):
         if 'all' in condition:
-            return all(evaluate(c, context) for c in (condition.get('all') or []))
+            return all(_interpret(c, context) for c in (condition.get('all') or []))
         if 'any' in condition:
-            return any(evaluate(c, context) for c in (condition.get('any') or []))
+            return any(_interpret(c, context) for c in (condition.get('any') or []))
         if 'not' in condition:
-            return not evaluate(condition.get('not'), context)
+            return not _interpret(condition.get('not'), context)
         if 'left' in condition and 'op' in condition:
             return _eval_atom(condition['left'], condition['op'], condition.get('right'), context)
         logger.warning("Unknown condition dict shape: %r", condition)
         return False
     logger.warning("Unsupported condition type: %r", type(condition))
     return False
+
+
+class ConditionSyntaxError(ValueError):
+    """A branch condition that can never evaluate (raised when compiling strictly)."""
+
+
+_Compiled = Callable[[dict], bool]
+
+
+def _true(_context: dict) -> bool:
+    return True
+
+
+def _false(_context: dict) -> bool:
+    return False
+
+
+def _warn_false(message: str, arg: Any) -> _Compiled:
+    def fn(_context: dict) -> bool:
+        logger.warning(message, arg)
+        return False
+    return fn
+
+
+def _compile_atom(left_path: Any, op: str, right_raw: Any) -> _Compiled:
+    fn = _OPS[op]
+    parts = (left_path or '').split('.')
+    right = _parse_literal(right_raw) if isinstance(right_raw, str) else right_raw
+
+    def atom(context: dict) -> bool:
+        left: Any = context
+        for part in parts:
+            if isinstance(left, dict):
+                left = left.get(part)
+            else:
+                left = None
+                break
+        try:
+            return bool(fn(left, right))
+        except Exception as exc:
+            logger.warning("Condition eval failed (%s %s %r): %s", left_path, op, right, exc)
+            return False
+    return atom
+
+
+def compile_condition(condition: Any, strict: bool = False) -> _Compiled:
+    """Compile a condition into ``fn(context) -> bool``.
+
+    ``strict`` raises ConditionSyntaxError for anything the evaluator would
+    reject (unparseable string, unknown op or shape, malformed operands).
+    Otherwise the result evaluates exactly like ``_interpret``, warnings
+    included.
+    """
+    def reject(message: str, arg: Any) -> _Compiled:
+        if strict:
+            raise ConditionSyntaxError(message % (arg,))
+        return lambda context: _interpret(condition, context)
+
+    if condition is None:
+        return _true  # No condition = always true
+    if isinstance(condition, bool):
+        return _true if condition else _false
+    if isinstance(condition, str):
+        m = _STRING_OP_PATTERN.match(condition)
+        if not m:
+            if strict:
+                raise ConditionSyntaxError(f"Unparseable condition string: {condition!r}")
+            return _warn_false("Unparseable condition string: %r", condition)
+        return _compile_atom(m.group('left'), m.group('op'), m.group('right'))
+    if isinstance(condition, dict):
+        for key, combine in (('all', all), ('any', any)):
+            if key in condition:
+                items = condition.get(key) or []
+                if not isinstance(items, list):
+                    return reject(f"'{key}' must be a list of conditions, got %r", items)
+                parts = [compile_condition(c, strict) for c in items]
+                return lambda context: combine(part(context) for part in parts)
+        if 'not' in condition:
+            inner = compile_condition(condition.get('not'), strict)
+            return lambda context: not inner(context)
+        if 'left' in condition and 'op' in condition:
+            left, op = condition['left'], condition['op']
+            if left is not None and not isinstance(left, str):
+                return reject("Condition 'left' must be a dotted path, got %r", left)
+            if not isinstance(op, str):
+                return reject("Condition 'op' must be a string, got %r", op)
+            if op not in _OPS:
+                if strict:
+                    raise ConditionSyntaxError(f"Unknown condition op: {op!r}")
+                return _warn_false("Unknown condition op: %r", op)
+            return _compile_atom(left, op, condition.get('right'))
+        if strict:
+            raise ConditionSyntaxError(f"Unknown condition dict shape: {condition!r}")
+        return _warn_false("Unknown condition dict shape: %r", condition)
+    if strict:
+        raise ConditionSyntaxError(f"Unsupported condition type: {type(condition)!r}")
+    return _warn_false("Unsupported condition type: %r", type(condition))
+
+
+_COMPILED_CACHE: dict = {}
+_COMPILED_CACHE_MAX = 2048
+
+
+def compiled(condition: Any) -> _Compiled:
+    """``compile_condition(condition)``, cached by content. The key is the
+    string itself, or a dict's repr (which keeps 1 / 1.0 / True and list /
+    tuple apart), so conditions sharing a key always evaluate alike."""
+    if isinstance(condition, str):
+        key = ('s', condition)
+    elif isinstance(condition, dict):
+        key = ('d', repr(condition))
+    else:
+        return compile_condition(condition)
+    fn = _COMPILED_CACHE.get(key)
+    if fn is None:
+        if len(_COMPILED_CACHE) >= _COMPILED_CACHE_MAX:
+            _COMPILED_CACHE.clear()
+        fn = _COMPILED_CACHE[key] = compile_condition(condition)
+    return fn
+
+
+def evaluate(condition: Any, context: dict) -> bool:
+    """Evaluate a condition against a context dict. Returns False on any parse error."""
+    return compiled(condition)(context)
+
+
+def validate_steps(steps: Any, path: str = '') -> None:
+    """Compile every ``branch`` condition in a workflow's steps strictly.
+    Raises ConditionSyntaxError naming the step path of the first bad one."""
+    for i, step in enumerate(steps if isinstance(steps, list) else []):
+        if not isinstance(step, dict) or str(step.get('type') or '').lower() != 'branch':
+            continue
+        step_path = f"{path}{i}"
+        try:
+            compile_condition(step.get('condition'), strict=True)
+        except ConditionSyntaxError as exc:
+            raise ConditionSyntaxError(f"Step {step_path}: {exc}") from None
+        for branch in ('if_true', 'if_false'):
+            validate_steps(step.get(branch) or [], f"{step_path}.{branch}.")
+
+
+def steps_condition_error(steps: Any) -> str | None:
+    """The save-time error message for a workflow's steps (first branch
+    condition that can't be evaluated), or None when they all compile."""
+    try:
+        validate_steps(steps)
+    except ConditionSyntaxError as exc:
+        return f"Invalid branch condition: {exc}"
+    return None
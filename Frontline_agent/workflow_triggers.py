@@ -0,0 +1,161 @@
+"""
+Workflow trigger matching for ticket events, off the request path.
+
+Every ticket save (post_save signal) and ticket creation asks which active
+workflows a ticket event starts. Doing that by loading the company's
+workflows and testing each ``trigger_conditions`` in Python, then running the
+matches inline, made every ticket write pay for every workflow. Instead:
+
+- A company's active workflows are compiled once into an index keyed by
+  (event, category, priority, status), where None stands for "any". A
+  ticket event is matched with eight dict lookups however many workflows
+  there are. The index lives in the Django cache under the company's
+  workflow version (count and latest ``updated_at``), read with one small
+  aggregate per lookup. Saving or deleting a workflow changes the version,
+  so every process, whatever its cache backend, rebuilds on its next ticket
+  event; superseded entries just expire.
+- The matches are handed to the ``run_triggered_workflows`` Celery task
+  once the saving transaction commits. The task creates the executions
+  (idempotency-checked) and runs the steps. When the broker is unreachable
+  it runs inline instead, as document processing does.
+
+``status`` only narrows ``ticket_updated`` triggers, as before: on
+``ticket_created`` the condition is ignored.
+"""
+import logging
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Max
+
+logger = logging.getLogger(__name__)
+
+TRIGGER_INDEX_TIMEOUT = 300
+_STATUS_EVENTS = ('ticket_updated',)
+_HASHABLE = (str, int, float, bool)
+
+
+def _cache_key(company_id):
+    """Cache key for the company's index at its current workflow version.
+    Workflows are only changed through save() (auto_now bumps updated_at)
+    and delete() (the count drops)."""
+    from Frontline_agent.models import FrontlineWorkflow
+
+    version = FrontlineWorkflow.objects.filter(company_id=company_id).aggregate(
+        n=Count('id'), last=Max('updated_at'),
+    )
+    last = version['last'].isoformat() if version['last'] else ''
+    return f"frontline:workflow_triggers:{company_id}:{version['n']}:{last}"
+
+
+def _condition_key(value):
+    """Index key for one trigger condition: None for "any", the value itself
+    when it can equal a ticket field, or False for a value that never can
+    (a list, a dict) so the workflow is left out."""
+    if value is None:
+        return None
+    return value if isinstance(value, _HASHABLE) else False
+
+
+def build_trigger_index(company_id):
+    """{(event, category, priority, status): [(rank, workflow id)]} for the
+    company's active workflows. ``rank`` is the workflow's place in the
+    default listing (most recently edited first), the order matches run in."""
+    from Frontline_agent.models import FrontlineWorkflow
+
+    index = {}
+    workflows = (FrontlineWorkflow.objects.filter(company_id=company_id, is_active=True)
+                 .values_list('id', 'trigger_conditions'))
+    for rank, (workflow_id, tc) in enumerate(workflows):
+        tc = tc if isinstance(tc, dict) else {}
+        event = tc.get('on')
+        if not event or not isinstance(event, str):
+            continue
+        key = (
+            event,
+            _condition_key(tc.get('category')),
+            _condition_key(tc.get('priority')),
+            _condition_key(tc.get('status')) if event in _STATUS_EVENTS else None,
+        )
+        if False in key[1:]:
+            continue
+        index.setdefault(key, []).append((rank, workflow_id))
+    return index
+
+
+def trigger_index(company_id):
+    """The cached trigger index for a company, built on a miss."""
+    key = _cache_key(company_id)
+    index = cache.get(key)
+    if index is None:
+        index = build_trigger_index(company_id)
+        cache.set(key, index, TRIGGER_INDEX_TIMEOUT)
+    return index
+
+
+def matching_workflow_ids(company_id, event_type, ticket):
+    """Ids of the active workflows whose trigger matches this ticket event."""
+    index = trigger_index(company_id)
+    if not index:
+        return []
+    statuses = (ticket.status, None) if event_type in _STATUS_EVENTS else (None,)
+    matched = []
+    for category in (ticket.category, None):
+        for priority in (ticket.priority, None):
+            for status in statuses:
+                matched.extend(index.get((event_type, category, priority, status), ()))
+    # A workflow sits under exactly one key, so there is nothing to dedupe.
+    return [workflow_id for _, workflow_id in sorted(matched)]
+
+
+def trigger_context(ticket, event_type, old_status=None):
+    """The execution context_data for a ticket event, captured when the
+    event happens so a delayed run sees the ticket as it was."""
+    created_by = ticket.created_by
+    context_data = {
+        'ticket_id': ticket.id,
+        'ticket_title': ticket.title,
+        'description': getattr(ticket, 'description', '') or '',
+        'resolution': (ticket.resolution or ''),
+        'customer_name': getattr(created_by, 'email', '') or '',
+        'recipient_email': getattr(created_by, 'email', '') or '',
+        'status': ticket.status,
+        'priority': ticket.priority,
+        'category': ticket.category,
+    }
+    if event_type == 'ticket_updated' and old_status is not None:
+        context_data['old_status'] = old_status
+    return context_data
+
+
+def _enqueue(kwargs):
+    from Frontline_agent.tasks import run_triggered_workflows
+    from api.views.frontline_agent import _celery_broker_ready
+
+    if _celery_broker_ready(timeout_seconds=0.5):
+        try:
+            run_triggered_workflows.apply_async(kwargs=kwargs, retry=False)
+            return
+        except Exception:
+            logger.exception("Workflow trigger: Celery dispatch failed, running inline")
+    else:
+        logger.warning("Workflow trigger: Celery broker unreachable, running inline")
+    run_triggered_workflows.apply(kwargs=kwargs)
+
+
+def dispatch_workflow_triggers(company_id, event_type, ticket, executed_by_id, old_status=None):
+    """Queue the workflows this ticket event triggers to run after commit.
+    Returns the matched workflow ids."""
+    workflow_ids = matching_workflow_ids(company_id, event_type, ticket)
+    if not workflow_ids:
+        return []
+    kwargs = {
+        'company_id': company_id,
+        'event_type': event_type,
+        'ticket_id': ticket.id,
+        'workflow_ids': workflow_ids,
+        'executed_by_id': executed_by_id,
+        'context_data': trigger_context(ticket, event_type, old_status),
+    }
+    transaction.on_commit(lambda: _enqueue(kwargs))
+    return workflow_ids
@@ -593,6 +593,7 @@ const SDRLeadsTab = () => {
   // CSV import preview modal state.
   const [csvImport, setCsvImport] = useState(null); // { file, rows, columns, skippedEmpty } | null
   const [csvImporting, setCsvImporting] = useState(false);
+  const [csvProgress, setCsvProgress] = useState(null); // running import job while polling
   const [leads, setLeads] = useState([]);
   const [stats, setStats] = useState({ total: 0, hot: 0, warm: 0, cold: 0, unscored: 0, qualifying: 0 });
   const [pagination, setPagination] = useState({ page: 1, page_size: 25, total_count: 0, total_pages: 1, has_next: false, has_prev: false });
@@ -906,14 +907,14 @@ const SDRLeadsTab = () => {
     if (!csvImport?.file) return;
     setCsvImporting(true);
     try {
-      const resp = await importLeadsFromCSV(csvImport.file);
+      const resp = await importLeadsFromCSV(csvImport.file, setCsvProgress);
       toast({ title: `Imported ${resp.created} leads`, description: resp.message });
       setCsvImport(null);
       setPage(1);
       loadLeads({ page: 1 });
     } catch (err) {
       toast({ title: 'Import failed', description: err?.message, variant: 'destructive' });
-    } finally { setCsvImporting(false); }
+    } finally { setCsvImporting(false); setCsvProgress(null); }
   };
 
   const CheckIcon = ({ checked, indeterminate, size = 16 }) => {
@@ -1659,7 +1660,9 @@ Jane Doe,jane@acme.com,VP Sales,Acme Corp,SaaS,150,"San Francisco, CA",,https://
                 <Button variant="outline" onClick={() => setCsvImport(null)} disabled={csvImporting} style={{ border: '1px solid #2d1f4a', color: '#9ca3af', borderRadius: 8 }}>Cancel</Button>
                 <Button onClick={handleCsvConfirm} disabled={csvImporting || !csvImport?.total} style={{ background: 'linear-gradient(90deg,#7c3aed,#a855f7)', color: '#fff', border: 'none', borderRadius: 8, fontWeight: 600, display: 'flex', alignItems: 'center', gap: 6 }}>
                   {csvImporting ? <Loader2 size={14} className="animate-spin" /> : <Upload size={14} />}
-                  {csvImporting ? 'Importing…' : `Import ${csvImport?.total || 0} leads`}
+                  {csvImporting
+                    ? (csvProgress ? `Importing… ${csvProgress.processed_rows} / ${csvImport?.total || 0}` : 'Importing…')
+                    : `Import ${csvImport?.total || 0} leads`}
                 </Button>
               </>
             )}
@@ -116,6 +116,7 @@ const INTEREST_LABELS = {
   objection: 'Objection',
   unsubscribe: 'Unsubscribe',
   not_analyzed: 'Not Analyzed',
+  pending_analysis: 'Analyzing…',
 };
 
 const INTEREST_BADGE_CLASSES = {
@@ -43,6 +43,7 @@ export const INTEREST_STYLES = {
   unsubscribe: { label: 'Unsubscribe', className: 'bg-red-500/15 text-red-300 border-red-500/30' },
   neutral: { label: 'Neutral', className: 'bg-slate-500/15 text-slate-300 border-slate-500/30' },
   not_analyzed: { label: 'Not Analyzed', className: 'bg-white/5 text-gray-400 border-white/10' },
+  pending_analysis: { label: 'Analyzing…', className: 'bg-white/5 text-gray-400 border-white/10' },
 };
 
 export const STATUS_STYLES = {
@@ -172,11 +172,29 @@ export const qualifyAllLeads = async () => {
 };
 
 // --------------------------------------------------------------------------
-// Research (Apollo.io or AI generation)
+// Research (Apollo.io, Apify or AI generation). The backend runs research as
+// a background job (Apify runs take minutes); poll it until it finishes and
+// resolve with the final job ({ leads_created, skipped_duplicates, message, ... }).
 // --------------------------------------------------------------------------
-export const researchLeads = async ({ count = 20, source = 'auto' } = {}) => {
+export const getResearchJobStatus = async (jobId) => {
   try {
-    return await companyApi.post('/sdr/leads/research/', { count, source });
+    return await companyApi.get(`/sdr/leads/research/${jobId}/`);
+  } catch (error) {
+    console.error('Get research job status error:', error);
+    throw error;
+  }
+};
+
+export const researchLeads = async ({ count = 20, source = 'auto', icp_id } = {}, onProgress) => {
+  try {
+    let { job } = await companyApi.post('/sdr/leads/research/', icp_id ? { count, source, icp_id } : { count, source });
+    while (job.status === 'pending' || job.status === 'running') {
+      if (onProgress) onProgress(job);
+      await new Promise((resolve) => setTimeout(resolve, 3000));
+      ({ job } = await getResearchJobStatus(job.id));
+    }
+    if (job.status === 'failed') throw new Error(job.message || 'Lead research failed');
+    return job;
   } catch (error) {
     console.error('Research leads error:', error);
     throw error;
@@ -203,9 +221,20 @@ export const getResearchSources = async () => {
 };
 
 // --------------------------------------------------------------------------
-// CSV Import — uses raw fetch to send multipart/form-data
+// CSV Import — uses raw fetch to send multipart/form-data. The backend runs
+// the import as a background job; poll it until it finishes and resolve with
+// the final job ({ created, skipped_duplicates, message, ... }).
 // --------------------------------------------------------------------------
-export const importLeadsFromCSV = async (file) => {
+export const getLeadImportStatus = async (jobId) => {
+  try {
+    return await companyApi.get(`/sdr/leads/import/${jobId}/`);
+  } catch (error) {
+    console.error('Get lead import status error:', error);
+    throw error;
+  }
+};
+
+export const importLeadsFromCSV = async (file, onProgress) => {
   try {
     const token = localStorage.getItem('company_auth_token');
     const baseUrl = import.meta.env.VITE_API_URL || 'http://localhost:8000/api';
@@ -222,7 +251,14 @@ export const importLeadsFromCSV = async (file) => {
       const err = await resp.json().catch(() => ({ message: 'Import failed' }));
       throw new Error(err.message || 'CSV import failed');
     }
-    return resp.json();
+    let { job } = await resp.json();
+    while (job.status === 'pending' || job.status === 'running') {
+      if (onProgress) onProgress(job);
+      await new Promise((resolve) => setTimeout(resolve, 2000));
+      ({ job } = await getLeadImportStatus(job.id));
+    }
+    if (job.status === 'failed') throw new Error(job.message || 'CSV import failed');
+    return job;
   } catch (error) {
     console.error('CSV import error:', error);
     throw error;
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import SDRIcpProfile, SDRLead, SDRLeadResearchJob
+from .models import SDRIcpProfile, SDRLead, SDRLeadImportJob, SDRLeadResearchJob, SDRSchedulerJob
 
 @admin.register(SDRIcpProfile)
 class SDRIcpProfileAdmin(admin.ModelAdmin):
@@ -14,5 +14,15 @@ class SDRLeadAdmin(admin.ModelAdmin):
 
 @admin.register(SDRLeadResearchJob)
 class SDRLeadResearchJobAdmin(admin.ModelAdmin):
-    list_display = ['id', 'company_user', 'status', 'leads_created', 'leads_qualified', 'source', 'created_at']
+    list_display = ['id', 'company_user', 'status', 'source', 'run_status', 'leads_created', 'skipped_duplicates', 'created_at']
     list_filter = ['status', 'source']
+
+@admin.register(SDRLeadImportJob)
+class SDRLeadImportJobAdmin(admin.ModelAdmin):
+    list_display = ['id', 'company_user', 'file_name', 'status', 'processed_rows', 'created_count', 'skipped_duplicates', 'created_at']
+    list_filter = ['status']
+
+@admin.register(SDRSchedulerJob)
+class SDRSchedulerJobAdmin(admin.ModelAdmin):
+    list_display = ['job_id', 'last_status', 'last_started_at', 'last_duration_ms', 'run_count', 'error_count', 'last_holder']
+    list_filter = ['last_status']
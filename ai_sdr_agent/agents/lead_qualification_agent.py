@@ -20,6 +20,10 @@ Temperature (ICP-configurable):
   score >= hot_threshold  → hot
   score >= warm_threshold → warm
   else                    → cold
+
+qualify_batch scores up to QUALIFY_LLM_BATCH leads of one ICP in a single
+JSON-mode call, so the ICP and the scoring model are sent once per batch
+instead of once per lead.
 """
 
 import json
@@ -36,6 +40,9 @@ _SYSTEM_PROMPT = (
     "Return ONLY valid JSON — no markdown, no extra text."
 )
 
+# Leads scored per LLM call by qualify_batch.
+QUALIFY_LLM_BATCH = 10
+
 # Fixed thresholds for score category labels (independent of ICP hot/warm)
 SCORE_CATEGORY_THRESHOLDS = (
     (90, 'hot_lead'),
@@ -85,11 +92,38 @@ class LeadQualificationAgent:
 
         return self._rule_based_qualify(lead, icp_profile)
 
+    def qualify_batch(self, leads, icp_profile) -> dict:
+        """Score ``leads`` against one ICP with one LLM call per
+        QUALIFY_LLM_BATCH leads.
+
+        Returns {index in ``leads``: result} for the leads that came back
+        with a valid score; score the rest with qualify_lead. Empty without
+        an LLM client. KeyServiceError propagates; any other failure of a
+        call only leaves its leads out of the result.
+        """
+        results = {}
+        if not self.groq_client:
+            return results
+        for start in range(0, len(leads), QUALIFY_LLM_BATCH):
+            chunk = leads[start:start + QUALIFY_LLM_BATCH]
+            try:
+                scored = self._ai_qualify_batch(chunk, icp_profile)
+            except Exception as exc:
+                from core.api_key_service import KeyServiceError
+                if isinstance(exc, KeyServiceError):
+                    raise
+                logger.warning("Batch AI qualification of %d leads failed: %s", len(chunk), exc)
+                continue
+            for index, result in scored.items():
+                results[start + index] = result
+        return results
+
     # ------------------------------------------------------------------
     # Groq AI qualification
     # ------------------------------------------------------------------
 
-    def _ai_qualify(self, lead, icp) -> dict:
+    @staticmethod
+    def _lead_summary(lead) -> str:
         size_int = _get_field(lead, 'company_size', None)
         size_range = _get_field(lead, 'company_size_range', '')
         size_display = str(size_int) if size_int else (size_range or 'unknown')
@@ -102,7 +136,7 @@ class LeadQualificationAgent:
         recent_news = _get_field(lead, 'recent_news', [])
         technologies = _get_field(lead, 'company_technologies', [])
 
-        lead_summary = (
+        return (
             f"Name: {_get_field(lead, 'full_name') or _get_field(lead, 'first_name')} | "
             f"Title: {_get_field(lead, 'job_title')} | "
             f"Seniority: {_get_field(lead, 'seniority_level') or 'unknown'} | "
@@ -119,7 +153,9 @@ class LeadQualificationAgent:
             f"Recent news: {'yes' if recent_news else 'no'}"
         )
 
-        icp_summary = (
+    @staticmethod
+    def _icp_summary(icp) -> str:
+        return (
             f"Target industries: {', '.join(icp.industries) or 'any'} | "
             f"Target titles: {', '.join(icp.job_titles) or 'any'} | "
             f"Company size: {icp.company_size_min or 0}–{icp.company_size_max or 99999} employees | "
@@ -127,32 +163,24 @@ class LeadQualificationAgent:
             f"Keywords: {', '.join(icp.keywords) or 'none'}"
         )
 
-        prompt = f"""Score this B2B sales lead against our ICP using the weighted model below. Respond with ONLY a JSON object.
-
-ICP Profile: {icp_summary}
-
-Lead Data: {lead_summary}
-
-Scoring model (total = 100 points):
+    _SCORING_MODEL = """Scoring model (total = 100 points):
 1. company_quality (0-30): Does the company have a professional website (0-10)? Active business presence / real company (0-10)? Clear service offerings / known industry (0-10)?
 2. contact_quality (0-20): Is this person a decision-maker (C-suite/VP/Director/Head) (0-10)? Do they have verified email and/or phone (0-10)?
 3. business_fit (0-25): How well does the industry match ICP (0-15)? Does company size fit ICP range (0-10)?
 4. engagement_signals (0-15): Active LinkedIn presence (0-5)? Has buying signals or recent news (0-5)? Uses relevant technologies (0-5)?
 5. data_completeness (0-10): Is the profile complete — name, email, title, company, location all present (0-10)?
 
-Score each category realistically. If a field is missing, penalise accordingly. If unknown, give partial credit.
+Score each category realistically. If a field is missing, penalise accordingly. If unknown, give partial credit."""
 
-Also determine:
-- The recommended outreach strategy (1-2 sentences specific to this lead)
-- 2-3 key strengths
-- 1-2 main concerns
-
-Return EXACTLY this JSON structure:
-{{"score": <int 0-100>, "temperature": "<hot|warm|cold>", "breakdown": {{"company_quality": <0-30>, "contact_quality": <0-20>, "business_fit": <0-25>, "engagement_signals": <0-15>, "data_completeness": <0-10>}}, "reasoning": "<2-3 sentence summary of fit>", "key_strengths": ["<strength1>", "<strength2>"], "concerns": ["<concern1>"], "outreach_strategy": "<personalised outreach recommendation>"}}
-
-Use hot if score >= {icp.hot_threshold}, warm if >= {icp.warm_threshold}, else cold.
-Score this lead now:"""
+    _RESULT_SHAPE = (
+        '"score": <int 0-100>, "temperature": "<hot|warm|cold>", "breakdown": {"company_quality": <0-30>, '
+        '"contact_quality": <0-20>, "business_fit": <0-25>, "engagement_signals": <0-15>, "data_completeness": <0-10>}, '
+        '"reasoning": "<2-3 sentence summary of fit>", "key_strengths": ["<strength1>", "<strength2>"], '
+        '"concerns": ["<concern1>"], "outreach_strategy": "<personalised outreach recommendation>"'
+    )
 
+    def _complete(self, prompt, max_tokens, json_mode=False) -> str:
+        kwargs = {'response_format': {'type': 'json_object'}} if json_mode else {}
         resp = self.groq_client.chat.completions.create(
             model=self.model,
             messages=[
@@ -160,14 +188,17 @@ Score this lead now:"""
                 {"role": "user", "content": prompt},
             ],
             temperature=0.1,
-            max_tokens=500,
+            max_tokens=max_tokens,
+            **kwargs,
         )
 
         from ai_sdr_agent.agents.sdr_key_resolver import record_sdr_usage
         record_sdr_usage(self._key_ctx, getattr(resp.usage, 'total_tokens', 0))
 
-        raw = resp.choices[0].message.content.strip()
+        return resp.choices[0].message.content.strip()
 
+    @staticmethod
+    def _parse_json(raw: str):
         # Strip markdown fences
         if "```" in raw:
             m = re.search(r'```(?:json)?\s*([\s\S]*?)```', raw)
@@ -179,8 +210,72 @@ Score this lead now:"""
             if m:
                 raw = m.group(0)
 
-        result = json.loads(raw)
+        return json.loads(raw)
 
+    def _ai_qualify(self, lead, icp) -> dict:
+        prompt = f"""Score this B2B sales lead against our ICP using the weighted model below. Respond with ONLY a JSON object.
+
+ICP Profile: {self._icp_summary(icp)}
+
+Lead Data: {self._lead_summary(lead)}
+
+{self._SCORING_MODEL}
+
+Also determine:
+- The recommended outreach strategy (1-2 sentences specific to this lead)
+- 2-3 key strengths
+- 1-2 main concerns
+
+Return EXACTLY this JSON structure:
+{{{self._RESULT_SHAPE}}}
+
+Use hot if score >= {icp.hot_threshold}, warm if >= {icp.warm_threshold}, else cold.
+Score this lead now:"""
+
+        return self._build_result(self._parse_json(self._complete(prompt, max_tokens=500)), icp)
+
+    def _ai_qualify_batch(self, leads, icp) -> dict:
+        """One LLM call for ``leads``; {index: result} for each lead whose
+        entry in the answer is valid."""
+        lead_lines = "\n".join(
+            f"[{number}] {self._lead_summary(lead)}" for number, lead in enumerate(leads, start=1)
+        )
+        prompt = f"""Score each of these {len(leads)} B2B sales leads against our ICP using the weighted model below. Score every lead on its own. Respond with ONLY a JSON object.
+
+ICP Profile: {self._icp_summary(icp)}
+
+Leads:
+{lead_lines}
+
+{self._SCORING_MODEL}
+
+For each lead also determine the recommended outreach strategy (1-2 sentences specific to that lead), 2-3 key strengths and 1-2 main concerns.
+
+Return EXACTLY this JSON structure, with one entry per lead, "lead" being the number in brackets:
+{{"results": [{{"lead": <number>, {self._RESULT_SHAPE}}}]}}
+
+Use hot if score >= {icp.hot_threshold}, warm if >= {icp.warm_threshold}, else cold.
+Score the leads now:"""
+
+        data = self._parse_json(self._complete(prompt, max_tokens=120 + 380 * len(leads), json_mode=True))
+        entries = data.get('results') if isinstance(data, dict) else None
+        if not isinstance(entries, list):
+            raise ValueError("batch answer has no results list")
+
+        results = {}
+        for entry in entries:
+            try:
+                index = int(entry.get('lead')) - 1
+                if 0 <= index < len(leads) and index not in results:
+                    results[index] = self._build_result(entry, icp)
+            except (AttributeError, TypeError, ValueError) as exc:
+                logger.info("Batch AI qualification: skipping invalid entry %r: %s", entry, exc)
+        if len(results) < len(leads):
+            logger.info("Batch AI qualification: %d of %d leads scored", len(results), len(leads))
+        return results
+
+    def _build_result(self, result: dict, icp) -> dict:
+        """Validate one parsed AI answer into the lead's qualification fields."""
         raw_score = result.get('score', 0)
         score = max(0, min(100, int(float(str(raw_score)))))
 
@@ -7,16 +7,23 @@ Sources (in priority order):
   1. Apollo.io REST API  — if APOLLO_API_KEY is set
   2. Apify              — if APIFY_API_TOKEN is set
   3. Groq AI generation — fallback, always available
+
+Apollo and AI generation answer in one call (search_leads). An Apify actor
+run takes minutes, so it is not waited for here: start_apify_run returns
+the run id and ai_sdr_agent/lead_research.py polls it (apify_run) and
+streams the dataset (iter_apify_pages) once it has finished.
 """
 
 import json
 import logging
 import os
 import re
-import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
 import requests
 from django.conf import settings
+from requests.adapters import HTTPAdapter
 
 logger = logging.getLogger(__name__)
 
@@ -26,6 +33,37 @@ APIFY_BASE = "https://api.apify.com/v2"
 # Default Apify actor — Google Search scraper (free, no Bright Data needed)
 DEFAULT_APIFY_ACTOR = "apify/google-search-scraper"
 
+# Apify dataset items fetched per request, and requests in flight at once.
+DATASET_PAGE_SIZE = 100
+DATASET_PAGE_WORKERS = 4
+# Datasets read in parallel by fetch_apify_runs.
+DATASET_WORKERS = 4
+APIFY_FINISHED_STATUSES = ('SUCCEEDED', 'FAILED', 'ABORTED', 'TIMED-OUT')
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def http_session() -> requests.Session:
+    """Process-wide Session for Apollo / Apify calls.
+
+    Keeps connections (and their TLS handshakes) alive between requests and
+    is sized for the concurrent dataset downloads.
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(
+                    pool_connections=4,
+                    pool_maxsize=DATASET_WORKERS * DATASET_PAGE_WORKERS,
+                )
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                _session = session
+    return _session
+
 # Employee-count bands used by code_crafter/leads-finder's `size` filter.
 _LEADS_FINDER_BANDS = [
     (1, 10), (11, 20), (21, 50), (51, 100), (101, 200),
@@ -187,7 +225,8 @@ class LeadResearchAgent:
             from ai_sdr_agent.agents.sdr_key_resolver import resolve_sdr_groq_client
             self.groq_client, self._key_ctx = resolve_sdr_groq_client(company)
         else:
-            logger.warning(
+            # Fine for Apollo / Apify; AI generation needs the company's key.
+            logger.debug(
                 "LeadResearchAgent initialised without a company — no LLM key resolved."
             )
 
@@ -197,29 +236,44 @@ class LeadResearchAgent:
     # Public API
     # ------------------------------------------------------------------
 
-    def search_leads(self, icp_profile, count: int = 20, source: str = 'auto') -> list[dict]:
-        """Return a list of raw lead dicts for the given ICP profile."""
+    def resolve_source(self, source: str = 'auto') -> str:
+        """The source a research request will use: 'apollo', 'apify' or 'ai'.
+
+        Raises ValueError when an explicitly requested source has no key.
+        """
         if source == 'apify':
             if not self.apify_token:
                 raise ValueError(
                     'Apify API token not configured. '
                     'Go to SDR Agent → Settings and enter your Apify API token.'
                 )
-            return self._search_apify(icp_profile, count)
+            return 'apify'
         if source == 'apollo':
             if not self.apollo_api_key:
                 raise ValueError(
                     'Apollo API key not configured. '
                     'Go to SDR Agent → Settings and enter your Apollo.io API key.'
                 )
-            return self._search_apollo(icp_profile, count)
+            return 'apollo'
         if source in ('ai', 'ai_generated'):
-            return self._generate_ai_leads(icp_profile, count)
+            return 'ai'
         # auto priority — apify only if both token AND actor are set
         if self.apollo_api_key:
-            return self._search_apollo(icp_profile, count)
+            return 'apollo'
         if self.apify_token and self.apify_actor:
-            return self._search_apify(icp_profile, count)
+            return 'apify'
+        return 'ai'
+
+    def search_leads(self, icp_profile, count: int = 20, source: str = 'auto') -> list[dict]:
+        """Return a list of raw lead dicts for the given ICP profile.
+
+        Apify runs are asynchronous — start them with start_apify_run.
+        """
+        source = self.resolve_source(source)
+        if source == 'apollo':
+            return self._search_apollo(icp_profile, count)
+        if source == 'apify':
+            raise ValueError('Apify research runs in the background; use start_apify_run.')
         return self._generate_ai_leads(icp_profile, count)
 
     @property
@@ -277,7 +331,7 @@ class LeadResearchAgent:
 
         logger.info("Apollo search payload: %s", payload)
         try:
-            resp = requests.post(
+            resp = http_session().post(
                 APOLLO_SEARCH_URL,
                 json=payload,
                 headers=headers,
@@ -336,21 +390,25 @@ class LeadResearchAgent:
     # Apify
     # ------------------------------------------------------------------
 
-    def _search_apify(self, icp, count: int) -> list[dict]:
-        """Run Apify actor (async) and return mapped leads."""
+    def start_apify_run(self, icp, count: int) -> str:
+        """Start the configured actor for ``icp`` and return the run id.
+
+        Does not wait for the run; see apify_run / iter_apify_pages.
+        """
         actor_id = self.apify_actor.replace('/', '~')
         actor_input = self._build_apify_input(icp, count)
+        session = http_session()
 
         logger.info("Apify: starting actor=%s input=%s", self.apify_actor, actor_input)
         try:
-            # Step 1: Start the run. Some actors validate array fields against a
-            # fixed enum; if a value isn't allowed the run 400s with the list of
-            # allowed values. We parse that, drop/repair the offending values,
-            # and retry — so an out-of-vocabulary ICP value never fails the run
+            # Some actors validate array fields against a fixed enum; if a
+            # value isn't allowed the run 400s with the list of allowed
+            # values. We parse that, drop/repair the offending values, and
+            # retry — so an out-of-vocabulary ICP value never fails the run
             # (works for ANY actor + ANY enum field, not just this one).
             run_resp = None
             for _attempt in range(4):
-                run_resp = requests.post(
+                run_resp = session.post(
                     f"{APIFY_BASE}/acts/{actor_id}/runs",
                     json=actor_input,
                     params={'token': self.apify_token},
@@ -388,63 +446,83 @@ class LeadResearchAgent:
                 raise ValueError(f"Apify rejected the request: {body}")
             run_resp.raise_for_status()
             run_id = run_resp.json().get('data', {}).get('id')
-            if not run_id:
-                raise ValueError("Apify did not return a run ID")
-
-            logger.info("Apify: run started id=%s — polling for completion", run_id)
+        except requests.RequestException as exc:
+            logger.error("Apify request error: %s", exc)
+            raise ValueError(f"Apify request failed: {exc}") from exc
+        if not run_id:
+            raise ValueError("Apify did not return a run ID")
+        logger.info("Apify: run started id=%s", run_id)
+        return run_id
+
+    def apify_run(self, run_id: str) -> dict:
+        """Current state of an actor run (status, defaultDatasetId, ...)."""
+        resp = http_session().get(
+            f"{APIFY_BASE}/actor-runs/{run_id}",
+            params={'token': self.apify_token},
+            timeout=15,
+        )
+        resp.raise_for_status()
+        return resp.json().get('data', {}) or {}
+
+    def _dataset_page(self, dataset_id: str, offset: int, limit: int) -> list:
+        resp = http_session().get(
+            f"{APIFY_BASE}/datasets/{dataset_id}/items",
+            params={'token': self.apify_token, 'clean': 'true', 'offset': offset, 'limit': limit},
+            timeout=30,
+        )
+        resp.raise_for_status()
+        items = resp.json()
+        return items if isinstance(items, list) else []
 
-            # Step 2: Poll until finished (max 120s)
-            for _ in range(24):
-                time.sleep(5)
-                status_resp = requests.get(
-                    f"{APIFY_BASE}/actor-runs/{run_id}",
-                    params={'token': self.apify_token},
-                    timeout=15,
-                )
-                status_resp.raise_for_status()
-                run_data = status_resp.json().get('data', {})
-                status = run_data.get('status', '')
-                logger.info("Apify: run=%s status=%s", run_id, status)
-                if status == 'SUCCEEDED':
-                    break
-                if status in ('FAILED', 'ABORTED', 'TIMED-OUT'):
-                    raise ValueError(f"Apify run failed with status: {status}")
-            else:
-                raise ValueError("Apify run timed out after 120s")
+    def iter_apify_pages(self, dataset_id: str, limit: int, offset: int = 0):
+        """Yield ``(offset, items)`` pages of a dataset, in order, up to
+        ``limit`` items from ``offset``.
 
-            # Step 3: Fetch dataset items
-            dataset_id = run_data.get('defaultDatasetId')
-            items_resp = requests.get(
-                f"{APIFY_BASE}/datasets/{dataset_id}/items",
-                params={'token': self.apify_token, 'limit': count, 'clean': 'true'},
-                timeout=30,
+        Pages are requested DATASET_PAGE_WORKERS at a time, so the caller
+        works on one page while the next ones download.
+        """
+        resp = http_session().get(
+            f"{APIFY_BASE}/datasets/{dataset_id}",
+            params={'token': self.apify_token},
+            timeout=15,
+        )
+        resp.raise_for_status()
+        item_count = (resp.json().get('data') or {}).get('itemCount') or 0
+        end = min(item_count, offset + limit)
+        offsets = range(offset, end, DATASET_PAGE_SIZE)
+        if not offsets:
+            return
+        with ThreadPoolExecutor(max_workers=min(DATASET_PAGE_WORKERS, len(offsets))) as pool:
+            pages = pool.map(
+                lambda start: (start, self._dataset_page(dataset_id, start, min(DATASET_PAGE_SIZE, end - start))),
+                offsets,
             )
-            items_resp.raise_for_status()
-            items = items_resp.json()
-            if not isinstance(items, list):
-                items = []
+            yield from pages
 
-        except requests.RequestException as exc:
-            logger.error("Apify request error: %s", exc)
-            raise ValueError(f"Apify request failed: {exc}") from exc
+    def parse_apify_items(self, items: list) -> list[dict]:
+        """Map dataset items to lead dicts.
 
-        # Flatten: a google-search-scraper item holds MANY organicResults (each a
-        # separate lead), so expand those instead of keeping only the first.
+        A google-search-scraper item holds MANY organicResults (each a
+        separate lead), so those are expanded instead of keeping only the
+        first.
+        """
         leads = []
         for item in items:
             if not item:
                 continue
             if isinstance(item, dict) and 'organicResults' in item:
-                for r in item.get('organicResults', []):
-                    lead = self._parse_google_result(r)
-                    if lead:
-                        leads.append(lead)
+                parsed = [self._parse_google_result(r) for r in item.get('organicResults', [])]
             else:
-                lead = self._parse_apify_item(item)
-                if lead:
-                    leads.append(lead)
-        logger.info("Apify: got %d raw items → %d leads parsed", len(items), len(leads))
-        return leads[:count]
+                parsed = [self._parse_apify_item(item)]
+            leads.extend(lead for lead in parsed if lead)
+        return leads
+
+    def _read_dataset(self, dataset_id: str, limit: int) -> list:
+        try:
+            return [item for _, page in self.iter_apify_pages(dataset_id, limit) for item in page]
+        except requests.RequestException as exc:
+            logger.warning("Apify fetch: dataset %s failed: %s", dataset_id, exc)
+            return []
 
     def fetch_apify_runs(self, max_leads: int = 200, actor: str = None) -> list[dict]:
         """Import leads from the user's EXISTING Apify runs (created via the Apify
@@ -454,6 +532,8 @@ class LeadResearchAgent:
 
         Fetches the most recent SUCCEEDED runs of `actor` (defaults to the
         configured actor, else leads-finder) and parses their dataset items.
+        The datasets are downloaded in parallel; leads keep newest-run-first
+        order.
         """
         if not self.apify_token:
             raise ValueError('Add your Apify API token in SDR Agent → Settings first.')
@@ -461,7 +541,7 @@ class LeadResearchAgent:
         actor_id = actor_ref.replace('/', '~')
 
         # List recent runs (newest first). This read works on the free plan.
-        runs_resp = requests.get(
+        runs_resp = http_session().get(
             f"{APIFY_BASE}/acts/{actor_id}/runs",
             params={'token': self.apify_token, 'desc': '1', 'limit': 10},
             timeout=25,
@@ -479,41 +559,20 @@ class LeadResearchAgent:
 
         leads = []
         seen = set()
-        for run in succeeded:
-            if len(leads) >= max_leads:
-                break
-            ds = run['defaultDatasetId']
-            try:
-                items_resp = requests.get(
-                    f"{APIFY_BASE}/datasets/{ds}/items",
-                    params={'token': self.apify_token, 'clean': 'true', 'limit': max_leads},
-                    timeout=30,
-                )
-                items_resp.raise_for_status()
-                items = items_resp.json()
-            except requests.RequestException as exc:
-                logger.warning("Apify fetch: dataset %s failed: %s", ds, exc)
-                continue
-            if not isinstance(items, list):
-                continue
-            for item in items:
-                if not item:
-                    continue
-                if isinstance(item, dict) and 'organicResults' in item:
-                    parsed_list = [self._parse_google_result(r) for r in item.get('organicResults', [])]
-                else:
-                    parsed_list = [self._parse_apify_item(item)]
-                for lead in parsed_list:
-                    if not lead:
-                        continue
+        with ThreadPoolExecutor(max_workers=min(DATASET_WORKERS, len(succeeded))) as pool:
+            datasets = pool.map(
+                lambda run: self._read_dataset(run['defaultDatasetId'], max_leads), succeeded,
+            )
+            for items in datasets:
+                for lead in self.parse_apify_items(items):
+                    if len(leads) >= max_leads:
+                        break
                     key = (lead.get('email') or '').lower() or (lead.get('linkedin_url') or '').lower() or lead.get('full_name', '')
                     if key and key in seen:
                         continue
                     if key:
                         seen.add(key)
                     leads.append(lead)
-                    if len(leads) >= max_leads:
-                        break
         logger.info("Apify fetch: imported %d leads from %d runs of %s", len(leads), len(succeeded), actor_ref)
         return leads[:max_leads]
 
@@ -561,7 +620,7 @@ class LeadResearchAgent:
         This actor validates several fields against fixed enums (all lowercase),
         so free-text ICP values are normalised: lowercased, common aliases
         applied (e.g. USA → united states). Anything still invalid is auto-dropped
-        by the retry logic in _search_apify, so a bad value never fails the run.
+        by the retry logic in start_apify_run, so a bad value never fails the run.
         """
         data = {
             'fetch_count': max(1, min(int(count or 20), 50000)),
@@ -256,21 +256,7 @@ Rules:
 
     def _get_imap_credentials(self, campaign):
         """Return (imap_host, imap_port, username, password) for campaign."""
-        imap_host = (
-            campaign.imap_host
-            or os.environ.get('IMAP_HOST', '')
-            or _derive_imap_host(campaign.smtp_host or getattr(settings, 'EMAIL_HOST', 'smtp.gmail.com'))
-        )
-        imap_port = campaign.imap_port or int(os.environ.get('IMAP_PORT', '993'))
-
-        if campaign.smtp_username:
-            username = campaign.smtp_username
-            password = campaign.smtp_password
-        else:
-            username = getattr(settings, 'EMAIL_HOST_USER', '')
-            password = getattr(settings, 'EMAIL_HOST_PASSWORD', '')
-
-        return imap_host, imap_port, username, password
+        return imap_credentials(campaign)
 
     def check_inbox_for_replies(self, campaign, enrollments: list) -> list:
         """
@@ -475,14 +461,15 @@ Rules:
     # Email sending
     # ------------------------------------------------------------------
 
-    def send_email(self, campaign, to_email: str, subject: str, body: str) -> None:
+    def send_email(self, campaign, to_email: str, subject: str, body: str) -> str:
+        """Send one email; returns the Message-ID it was sent with."""
         if not (campaign.smtp_host and campaign.smtp_username and campaign.smtp_password):
             raise ValueError(
                 "Campaign SMTP credentials not configured. "
                 "Add SMTP settings in campaign Settings before sending."
             )
         if campaign.smtp_host and campaign.smtp_username:
-            self._send_via_smtp(
+            return self._send_via_smtp(
                 host=campaign.smtp_host,
                 port=campaign.smtp_port or 587,
                 username=campaign.smtp_username,
@@ -494,9 +481,8 @@ Rules:
                 subject=subject,
                 body=body,
             )
-            return
 
-        from django.core.mail import send_mail
+        from django.core.mail import EmailMessage
         from django.conf import settings as djsettings
 
         from_addr = (
@@ -506,24 +492,27 @@ Rules:
         )
         display_name = campaign.sender_name or campaign.sender_company or ''
         from_header = f"{display_name} <{from_addr}>" if display_name else from_addr
+        message_id = _make_message_id(from_addr)
 
         try:
-            send_mail(
+            EmailMessage(
                 subject=subject,
-                message=body,
+                body=body,
                 from_email=from_header,
-                recipient_list=[to_email],
-                fail_silently=False,
-            )
+                to=[to_email],
+                headers={'Message-ID': message_id},
+            ).send(fail_silently=False)
         except Exception as exc:
             raise ValueError(f"Email send failed: {exc}") from exc
+        return message_id
 
     def _send_via_smtp(self, host, port, username, password, use_tls,
-                       from_addr, display_name, to_email, subject, body) -> None:
+                       from_addr, display_name, to_email, subject, body) -> str:
         msg = MIMEMultipart('alternative')
         msg['Subject'] = subject
         msg['From'] = f"{display_name} <{from_addr}>" if display_name else from_addr
         msg['To'] = to_email
+        msg['Message-ID'] = _make_message_id(from_addr)
         msg.attach(MIMEText(body, 'plain', 'utf-8'))
 
         context = ssl.create_default_context()
@@ -537,6 +526,7 @@ Rules:
                 server.sendmail(from_addr, to_email, msg.as_string())
         except smtplib.SMTPException as exc:
             raise ValueError(f"SMTP error: {exc}") from exc
+        return msg['Message-ID']
 
     # ------------------------------------------------------------------
     # Process a single enrollment step
@@ -723,7 +713,7 @@ Rules:
                         step.step_order, content['subject'],
                         campaign.smtp_host or '(django default)',
                     )
-                    self.send_email(campaign, lead.email, content['subject'], content['body'])
+                    message_id = self.send_email(campaign, lead.email, content['subject'], content['body'])
                     logger.info(
                         "SDR [EMAIL-SEND] enrollment=%d lead=%s TO=%s step=%d — SUCCESS",
                         enrollment.id, lead.display_name, lead.email, step.step_order,
@@ -732,6 +722,7 @@ Rules:
                         **log_base, status='sent',
                         subject_sent=content['subject'],
                         body_sent=content['body'],
+                        message_id=message_id or '',
                     )
                     campaign.emails_sent = (campaign.emails_sent or 0) + 1
                     campaign.save(update_fields=['emails_sent'])
@@ -812,6 +803,31 @@ Rules:
 # Module-level helpers
 # ------------------------------------------------------------------
 
+def imap_credentials(campaign):
+    """Return (imap_host, imap_port, username, password) for campaign."""
+    imap_host = (
+        campaign.imap_host
+        or os.environ.get('IMAP_HOST', '')
+        or _derive_imap_host(campaign.smtp_host or getattr(settings, 'EMAIL_HOST', 'smtp.gmail.com'))
+    )
+    imap_port = campaign.imap_port or int(os.environ.get('IMAP_PORT', '993'))
+
+    if campaign.smtp_username:
+        username = campaign.smtp_username
+        password = campaign.smtp_password
+    else:
+        username = getattr(settings, 'EMAIL_HOST_USER', '')
+        password = getattr(settings, 'EMAIL_HOST_PASSWORD', '')
+
+    return imap_host, imap_port, username, password
+
+
+def _make_message_id(from_addr: str) -> str:
+    """Message-ID for an outgoing email, on the sender's domain."""
+    domain = email.utils.parseaddr(from_addr or '')[1].rpartition('@')[2] or None
+    return email.utils.make_msgid(domain=domain)
+
+
 def _derive_imap_host(smtp_host: str) -> str:
     """Derive likely IMAP host from SMTP host (smtp.gmail.com → imap.gmail.com)."""
     if not smtp_host:
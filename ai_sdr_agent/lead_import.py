@@ -0,0 +1,335 @@
+"""
+SDR lead import — streaming, chunked, resumable
+================================================
+import_leads_csv used to read the whole upload into memory, load every
+existing lead email of the company user into a set and call
+SDRLead.objects.create once per row, all inside the request. A 200k-row
+purchased list timed the request out. Now the view stores the upload on an
+SDRLeadImportJob and returns at once; run_import_job then:
+
+  - streams rows from the stored file (core.tabular_import — CSV line by
+    line, .xlsx via openpyxl read-only),
+  - normalizes and validates IMPORT_CHUNK_SIZE rows at a time,
+  - dedupes the chunk's emails against the DB with IN lookups on the
+    (company_user, email_normalized) index — earlier chunks are already
+    committed, so duplicates within the file are caught the same way,
+  - writes the new leads with bulk_create and, in the same transaction,
+    advances the job's counters.
+
+Because a chunk and its counters commit together, processed_rows is the
+number of data rows already handled. A job whose worker died (no progress
+for STALE_AFTER) is picked up again by the scheduler and skips those rows.
+Each run holds the job by its started_at stamp; a run that finds the stamp
+changed has been superseded and stops.
+"""
+
+import logging
+import re
+import threading
+from datetime import timedelta
+from functools import lru_cache
+from itertools import islice
+
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from core.tabular_import import IN_LOOKUP_CHUNK, TabularImportError, chunked, iter_rows
+
+logger = logging.getLogger(__name__)
+
+IMPORT_CHUNK_SIZE = 1000        # rows normalized / deduped / committed together
+BULK_CREATE_BATCH_SIZE = 500    # the DB backend lowers this further if needed
+MAX_STORED_ERRORS = 20          # row errors kept on the job for the UI
+STALE_AFTER = timedelta(minutes=5)
+
+# Map each lead field to the (normalized) header variations that feed it:
+# "Full Name" / "FULL_NAME" / "full-name" all normalize to "fullname".
+FIELD_ALIASES = {
+    'full_name':        ['fullname', 'name', 'contactname', 'leadname'],
+    'first_name':       ['firstname', 'fname', 'givenname'],
+    'last_name':        ['lastname', 'lname', 'surname', 'familyname'],
+    'email':            ['email', 'emailaddress', 'workemail', 'businessemail', 'mail'],
+    'phone':            ['phone', 'phonenumber', 'mobile', 'mobilenumber', 'tel', 'telephone'],
+    'job_title':        ['jobtitle', 'title', 'position', 'role', 'designation'],
+    'company_name':     ['companyname', 'company', 'organization', 'organisation', 'employer', 'account'],
+    'company_industry': ['companyindustry', 'industry', 'sector', 'vertical'],
+    'company_size':     ['companysize', 'size', 'employees', 'employeecount', 'headcount'],
+    'company_location': ['companylocation', 'location', 'city', 'country', 'region', 'address'],
+    'linkedin_url':     ['linkedinurl', 'linkedin', 'linkedinprofile', 'profileurl'],
+    'company_website':  ['companywebsite', 'website', 'url', 'domain', 'web'],
+}
+
+_MAX_INT = 2 ** 31 - 1
+
+
+def _norm_key(key):
+    return re.sub(r'[^a-z0-9]', '', (key or '').strip().lower())
+
+
+@lru_cache(maxsize=1)
+def _max_lengths():
+    from ai_sdr_agent.models import SDRLead
+    return {
+        field: SDRLead._meta.get_field(field).max_length
+        for field in FIELD_ALIASES if field != 'company_size'
+    }
+
+
+def normalize_row(raw):
+    """SDRLead field values for one upload row, or None for a blank row.
+
+    Raises ValueError for a value that doesn't fit its column.
+    """
+    norm = {_norm_key(k): v for k, v in raw.items() if k}
+
+    def pick(field):
+        for alias in FIELD_ALIASES[field]:
+            if norm.get(alias):
+                return norm[alias]
+        return ''
+
+    fields = {field: pick(field) for field in FIELD_ALIASES}
+    fields['full_name'] = fields['full_name'] or f"{fields['first_name']} {fields['last_name']}".strip()
+    fields['email'] = fields['email'].lower()
+    # Skip completely blank rows (no name, no company, no email).
+    if not fields['full_name'] and not fields['company_name'] and not fields['email']:
+        return None
+
+    digits = re.sub(r'[^\d]', '', fields['company_size'])
+    fields['company_size'] = int(digits) if digits and int(digits) <= _MAX_INT else None
+
+    for field, max_length in _max_lengths().items():
+        if max_length and len(fields[field]) > max_length:
+            raise ValueError(f"{field} is longer than {max_length} characters")
+    return fields
+
+
+def _existing_emails(company_user_id, emails):
+    """The subset of ``emails`` (normalized) the company user already has."""
+    from ai_sdr_agent.models import SDRLead
+
+    emails = sorted(emails)
+    found = set()
+    for i in range(0, len(emails), IN_LOOKUP_CHUNK):
+        found.update(
+            SDRLead.objects.filter(
+                company_user_id=company_user_id,
+                email_normalized__in=emails[i:i + IN_LOOKUP_CHUNK],
+            ).values_list('email_normalized', flat=True)
+        )
+    return found
+
+
+def _create_leads(pending, errors):
+    """bulk_create ``[(row_no, lead), ...]``; returns the saved leads.
+
+    If the batch insert fails, rows are inserted one by one so a single bad
+    row is reported instead of sinking the chunk.
+    """
+    from ai_sdr_agent.models import SDRLead
+
+    if not pending:
+        return []
+    try:
+        with transaction.atomic():
+            return SDRLead.objects.bulk_create(
+                [lead for _, lead in pending], batch_size=BULK_CREATE_BATCH_SIZE,
+            )
+    except Exception as exc:
+        logger.warning("SDR lead import: batch insert failed (%s); retrying row by row", exc)
+
+    created = []
+    for row_no, lead in pending:
+        lead.pk = None
+        lead._state.adding = True
+        try:
+            with transaction.atomic():
+                created.extend(SDRLead.objects.bulk_create([lead]))
+        except Exception as exc:
+            errors.append(f"Row {row_no}: {exc}")
+    return created
+
+
+def _import_chunk(job, chunk, lease):
+    """Import one chunk of ``(row_no, raw_row)``. Returns False if the job
+    was taken over by another run (nothing from this chunk is kept)."""
+    from ai_sdr_agent.models import SDRLead, SDRLeadImportJob
+
+    errors = []
+    skipped_empty = skipped_dupes = 0
+    rows = []
+    for row_no, raw in chunk:
+        try:
+            fields = normalize_row(raw)
+        except ValueError as exc:
+            errors.append(f"Row {row_no}: {exc}")
+            continue
+        if fields is None:
+            skipped_empty += 1
+        else:
+            rows.append((row_no, fields))
+
+    existing = _existing_emails(job.company_user_id, {f['email'] for _, f in rows if f['email']})
+    now = timezone.now()
+    pending = []
+    for row_no, fields in rows:
+        email = fields['email']
+        if email and email in existing:
+            skipped_dupes += 1
+            continue
+        if email:
+            existing.add(email)   # a later row of this chunk with the same email
+        pending.append((row_no, SDRLead(
+            company_user_id=job.company_user_id,
+            email_normalized=email,
+            source='csv_import',
+            status='new',
+            # Queue for background qualification so imported leads get
+            # scored automatically instead of sitting permanently unscored.
+            qualification_status='pending',
+            qualification_queued_at=now,
+            **fields,
+        )))
+
+    with transaction.atomic():
+        created = _create_leads(pending, errors)
+        updated = SDRLeadImportJob.objects.filter(
+            id=job.id, status='running', started_at=lease,
+        ).update(
+            processed_rows=F('processed_rows') + len(chunk),
+            created_count=F('created_count') + len(created),
+            skipped_duplicates=F('skipped_duplicates') + skipped_dupes,
+            skipped_empty=F('skipped_empty') + skipped_empty,
+            error_count=F('error_count') + len(errors),
+            errors=(job.errors + errors)[:MAX_STORED_ERRORS],
+            updated_at=timezone.now(),
+        )
+        if not updated:
+            transaction.set_rollback(True)
+            return False
+    job.errors = (job.errors + errors)[:MAX_STORED_ERRORS]
+
+    # bulk_create sends no post_save, so hand the new leads to CRM sync here.
+    if created:
+        from crm_sync_agent.signals import on_sdr_leads_bulk_created
+        on_sdr_leads_bulk_created(created)
+    return True
+
+
+def _claimable(now):
+    return Q(status='pending') | Q(status='running', updated_at__lt=now - STALE_AFTER)
+
+
+def run_import_job(job_id):
+    """Run (or resume) one import job. Returns the job, or None if another
+    run holds it or it is already finished."""
+    from ai_sdr_agent.models import SDRLeadImportJob
+
+    lease = timezone.now()
+    claimed = SDRLeadImportJob.objects.filter(_claimable(lease), id=job_id).update(
+        status='running', started_at=lease, updated_at=lease,
+    )
+    if not claimed:
+        return None
+    job = SDRLeadImportJob.objects.get(id=job_id)
+    if job.processed_rows:
+        logger.info("SDR lead import #%s: resuming after %d rows", job.id, job.processed_rows)
+
+    final = {'status': 'completed', 'error_message': ''}
+    try:
+        with job.file.open('rb') as fh:
+            rows = islice(iter_rows(fh, job.file_name), job.processed_rows, None)
+            for chunk in chunked(rows, IMPORT_CHUNK_SIZE):
+                if not _import_chunk(job, chunk, lease):
+                    logger.warning("SDR lead import #%s: taken over by another run; stopping", job.id)
+                    return None
+    except TabularImportError as exc:
+        final = {'status': 'failed', 'error_message': str(exc)}
+    except UnicodeDecodeError:
+        final = {'status': 'failed', 'error_message': 'The file is not UTF-8 encoded. Save it as "CSV UTF-8" and try again.'}
+    except Exception as exc:
+        logger.exception("SDR lead import #%s failed", job.id)
+        final = {'status': 'failed', 'error_message': str(exc)[:500]}
+
+    if not SDRLeadImportJob.objects.filter(id=job.id, status='running', started_at=lease).update(
+        completed_at=timezone.now(), **final,
+    ):
+        return None
+    # The stored upload is only needed while the job runs.
+    try:
+        job.file.delete(save=False)
+    except Exception as exc:
+        logger.warning("SDR lead import #%s: could not delete upload: %s", job.id, exc)
+    job.refresh_from_db()
+    logger.info(
+        "SDR lead import #%s %s — created=%d duplicates=%d empty=%d errors=%d",
+        job.id, job.status, job.created_count, job.skipped_duplicates, job.skipped_empty, job.error_count,
+    )
+    return job
+
+
+def start_import_job(job_id):
+    """Run the job in a background thread once the creating transaction commits.
+
+    If the process dies first, resume_import_jobs picks the job up.
+    """
+    def _run():
+        try:
+            run_import_job(job_id)
+        except Exception:
+            logger.exception("SDR lead import #%s crashed", job_id)
+        finally:
+            from django.db import connection
+            connection.close()
+
+    transaction.on_commit(lambda: threading.Thread(target=_run, daemon=True).start())
+
+
+def resume_import_jobs(limit=5):
+    """Run pending jobs and resume stalled ones. Called by the scheduler."""
+    from ai_sdr_agent.models import SDRLeadImportJob
+
+    job_ids = list(
+        SDRLeadImportJob.objects.filter(_claimable(timezone.now()))
+        .order_by('created_at')
+        .values_list('id', flat=True)[:limit]
+    )
+    finished = sum(1 for job_id in job_ids if run_import_job(job_id) is not None)
+    return {'jobs': len(job_ids), 'finished': finished}
+
+
+def job_message(job):
+    if job.status == 'failed':
+        return job.error_message or 'Import failed.'
+    if job.status != 'completed':
+        return f'Importing… {job.processed_rows} rows processed, {job.created_count} leads imported so far.'
+    if job.created_count == 0 and not job.error_count:
+        return ('No leads imported — check the CSV has a header row with columns like '
+                'full_name / email / company_name (any capitalisation).')
+    msg = f'Imported {job.created_count} leads. Skipped {job.skipped_duplicates} duplicates'
+    if job.skipped_empty:
+        msg += f', {job.skipped_empty} empty rows'
+    msg += '.'
+    if job.created_count:
+        msg += ' Qualifying them in the background — scores will appear shortly.'
+    return msg
+
+
+def job_payload(job):
+    """API representation of an import job (the status endpoint's data)."""
+    return {
+        'id': job.id,
+        'status': job.status,
+        'message': job_message(job),
+        'file_name': job.file_name,
+        'processed_rows': job.processed_rows,
+        'created': job.created_count,
+        'skipped_duplicates': job.skipped_duplicates,
+        'skipped_empty': job.skipped_empty,
+        'error_count': job.error_count,
+        'errors': (job.errors or [])[:5],
+        'error_message': job.error_message,
+        'created_at': job.created_at.isoformat() if job.created_at else None,
+        'completed_at': job.completed_at.isoformat() if job.completed_at else None,
+    }
@@ -0,0 +1,465 @@
+"""
+SDR lead research — background jobs
+===================================
+research_leads used to call LeadResearchAgent.search_leads inside the
+request. For Apify that meant starting an actor run and then sleeping in a
+poll loop for up to two minutes before the dataset was read, and the daily
+auto-research did the same for every ICP one after another. Now a research
+request is an SDRLeadResearchJob and the view returns its id at once:
+
+  - run_research_job (a background thread, started on commit) either
+    starts the Apify actor run and stores its run id, or — for Apollo and
+    AI generation, which answer in one call — fetches the leads directly,
+  - advance_research_jobs (the scheduler's research_jobs job) checks every
+    outstanding Apify run in one pass, the status requests going out in
+    parallel, and imports the dataset of each run that has finished,
+  - a dataset is read page by page (LeadResearchAgent.iter_apify_pages
+    downloads the next pages while the current one is imported) and each
+    page's leads are deduped, bulk-created and counted in one transaction.
+
+Because a page and the job's processed_items commit together, a dataset
+import that dies part-way resumes after the last committed page. As in
+lead_import, the run that claims a job holds it by its started_at stamp.
+"""
+
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+import requests
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from core.tabular_import import chunked
+
+logger = logging.getLogger(__name__)
+
+RESEARCH_BATCH_SIZE = 200       # leads deduped / created / committed together
+POLL_LIMIT = 50                 # Apify runs checked per scheduler pass
+POLL_WORKERS = 8                # run-status requests in flight at once
+RUN_TIMEOUT = timedelta(hours=1)
+STALE_AFTER = timedelta(minutes=5)
+FAILED_RUN_STATUSES = ('FAILED', 'ABORTED', 'TIMED-OUT')
+
+
+def ensure_https(url):
+    """Add https:// prefix if a URL has no protocol."""
+    if not url:
+        return url
+    url = url.strip()
+    if url and not url.startswith(('http://', 'https://')):
+        return f'https://{url}'
+    return url
+
+
+def _norm_li(url):
+    u = (url or '').strip().lower().rstrip('/')
+    return u.split('?')[0] if u else ''
+
+
+class LeadDedupe:
+    """Duplicate guard for researched leads — linkedin > email >
+    name+company > name.
+
+    LinkedIn URL is the most reliable key (unique per profile) — essential
+    for no-email sources like the Google scraper, where company often
+    doesn't parse and name+company misses. The company user's existing
+    leads are loaded once; accepted leads are added so repeats within the
+    run are caught too.
+    """
+
+    def __init__(self, company_user_id):
+        from ai_sdr_agent.models import SDRLead
+
+        self.emails, self.name_company, self.linkedin, self.names = set(), set(), set(), set()
+        for em, fn, cn, li in SDRLead.objects.filter(company_user_id=company_user_id).values_list(
+            'email', 'full_name', 'company_name', 'linkedin_url'
+        ).iterator():
+            if em:
+                self.emails.add(em.lower())
+            if fn and cn:
+                self.name_company.add((fn.lower().strip(), cn.lower().strip()))
+            if fn:
+                self.names.add(fn.lower().strip())
+            nli = _norm_li(li)
+            if nli:
+                self.linkedin.add(nli)
+
+    def accept(self, full_name, email, company_name, linkedin_url):
+        """True (and remember the lead) unless it is empty or already known."""
+        linkedin = _norm_li(linkedin_url)
+        name_key = full_name.lower().strip()
+        name_company = (name_key, company_name.lower().strip())
+        if not name_key and not company_name:
+            return False
+        if linkedin and linkedin in self.linkedin:
+            return False
+        if email and email in self.emails:
+            return False
+        if full_name and company_name and name_company in self.name_company:
+            return False
+        # No email/company (Google scraper) → fall back to name-only so the
+        # same profile scraped twice isn't inserted again.
+        if not email and not company_name and not linkedin and name_key in self.names:
+            return False
+        if linkedin:
+            self.linkedin.add(linkedin)
+        if email:
+            self.emails.add(email)
+        if full_name and company_name:
+            self.name_company.add(name_company)
+        if name_key:
+            self.names.add(name_key)
+        return True
+
+
+def _new_leads(company_user_id, icp_id, raw_leads, dedupe, default_source):
+    """Unsaved SDRLeads for the raw lead dicts that pass ``dedupe``."""
+    from ai_sdr_agent.agents.lead_validator import validate_lead
+    from ai_sdr_agent.models import SDRLead
+
+    now = timezone.now()
+    leads = []
+    for ld in raw_leads:
+        full_name = ld.get('full_name') or f"{ld.get('first_name', '')} {ld.get('last_name', '')}".strip()
+        email = (ld.get('email') or '').strip().lower()
+        company_name = (ld.get('company_name') or '').strip()
+        if not dedupe.accept(full_name, email, company_name, ld.get('linkedin_url')):
+            continue
+        validation = validate_lead({**ld, 'full_name': full_name})
+        leads.append(SDRLead(
+            company_user_id=company_user_id,
+            icp_profile_id=icp_id,
+            first_name=ld.get('first_name', ''),
+            last_name=ld.get('last_name', ''),
+            full_name=full_name,
+            email=email,
+            email_normalized=email,
+            phone=ld.get('phone', ''),
+            job_title=ld.get('job_title', ''),
+            seniority_level=ld.get('seniority_level', ''),
+            department=ld.get('department', ''),
+            company_name=ld.get('company_name', ''),
+            company_domain=ld.get('company_domain', ''),
+            company_industry=ld.get('company_industry', ''),
+            company_size=ld.get('company_size') or None,
+            company_size_range=ld.get('company_size_range', ''),
+            company_location=ld.get('company_location', ''),
+            company_technologies=ld.get('company_technologies', []),
+            linkedin_url=ensure_https(ld.get('linkedin_url', '')),
+            company_linkedin_url=ensure_https(ld.get('company_linkedin_url', '')),
+            company_website=ensure_https(ld.get('company_website', '')),
+            recent_news=ld.get('recent_news', []),
+            buying_signals=ld.get('buying_signals', []),
+            apollo_id=ld.get('apollo_id', ''),
+            raw_data=ld.get('raw_data', {}),
+            source=ld.get('source') or default_source,
+            status='new',
+            confidence_score=validation['confidence_score'],
+            data_quality_flags=validation['data_quality_flags'],
+            # Queued for background qualification — the scheduler drains the
+            # queue in small batches so AI tokens aren't exhausted in one burst.
+            qualification_status='pending',
+            qualification_queued_at=now,
+        ))
+    return leads
+
+
+def _created(leads):
+    # bulk_create sends no post_save, so hand the new leads to CRM sync here.
+    if leads:
+        from crm_sync_agent.signals import on_sdr_leads_bulk_created
+        on_sdr_leads_bulk_created(leads)
+
+
+def import_raw_leads(company_user, icp, raw_leads, default_source='apify'):
+    """Dedupe and save researched lead dicts outside a job (fetch_apify_leads).
+
+    Returns (created, skipped_duplicates).
+    """
+    from ai_sdr_agent.models import SDRLead
+
+    dedupe = LeadDedupe(company_user.pk)
+    created = skipped = 0
+    for batch in chunked(raw_leads, RESEARCH_BATCH_SIZE):
+        leads = _new_leads(company_user.pk, icp.pk if icp else None, batch, dedupe, default_source)
+        leads = SDRLead.objects.bulk_create(leads)
+        _created(leads)
+        created += len(leads)
+        skipped += len(batch) - len(leads)
+    return created, skipped
+
+
+def _save_batch(job, raw_leads, dedupe, lease, items=0):
+    """Create one batch of the job's leads and advance its counters together.
+    Returns False if the job was taken over by another run (nothing kept)."""
+    from ai_sdr_agent.models import SDRLead, SDRLeadResearchJob
+
+    leads = _new_leads(job.company_user_id, job.icp_profile_id, raw_leads, dedupe, job.source)
+    with transaction.atomic():
+        leads = SDRLead.objects.bulk_create(leads)
+        updated = SDRLeadResearchJob.objects.filter(
+            id=job.id, status='running', started_at=lease,
+        ).update(
+            total_found=F('total_found') + len(raw_leads),
+            leads_created=F('leads_created') + len(leads),
+            skipped_duplicates=F('skipped_duplicates') + len(raw_leads) - len(leads),
+            processed_items=F('processed_items') + items,
+            updated_at=timezone.now(),
+        )
+        if not updated:
+            transaction.set_rollback(True)
+            return False
+    job.total_found += len(raw_leads)
+    job.processed_items += items
+    _created(leads)
+    return True
+
+
+def _finish(job, lease, status, error_message=''):
+    from ai_sdr_agent.models import SDRLeadResearchJob
+
+    done = SDRLeadResearchJob.objects.filter(id=job.id, status='running', started_at=lease).update(
+        status=status, error_message=error_message[:2000], completed_at=timezone.now(),
+    )
+    if done:
+        job.refresh_from_db()
+        logger.info(
+            "SDR research #%s %s (%s) — found=%d created=%d duplicates=%d%s",
+            job.id, job.status, job.source, job.total_found, job.leads_created,
+            job.skipped_duplicates, f" error={error_message}" if error_message else '',
+        )
+    return done
+
+
+def research_agent(job):
+    """LeadResearchAgent with the keys the job was started with.
+
+    Auto-research jobs use the platform Apify token; the others the company
+    user's SDR settings. The LLM client is only resolved for AI generation.
+    """
+    from ai_sdr_agent.agents.lead_research_agent import LeadResearchAgent
+    from ai_sdr_agent.models import SDRAgentSettings
+
+    if job.search_params.get('auto'):
+        return LeadResearchAgent()
+    company_user = job.company_user
+    company = company_user.company if job.source == 'ai_generated' else None
+    sdr_settings = SDRAgentSettings.objects.filter(company_user=company_user).first()
+    if sdr_settings:
+        return LeadResearchAgent(
+            company=company,
+            apollo_api_key=sdr_settings.apollo_api_key or None,
+            apify_token=sdr_settings.apify_api_token or None,
+            apify_actor=sdr_settings.apify_actor_id or None,
+        )
+    return LeadResearchAgent(company=company)
+
+
+def create_research_job(company_user, icp, count, source, requested_source=None, auto=False):
+    """A pending research job. ``source`` is the resolved source ('apollo',
+    'apify' or 'ai_generated'); run it with start_research_job or
+    run_research_job."""
+    from ai_sdr_agent.models import SDRLeadResearchJob
+
+    search_params = {
+        'industries': icp.industries, 'job_titles': icp.job_titles,
+        'count': count, 'source': requested_source or source,
+    }
+    if auto:
+        search_params['auto'] = True
+    return SDRLeadResearchJob.objects.create(
+        company_user=company_user, icp_profile=icp, status='pending',
+        source=source, search_params=search_params,
+    )
+
+
+def _claimable(now):
+    # A started run that never recorded its Apify run id (or an Apollo / AI
+    # search) whose thread died is simply started again.
+    return Q(status='pending') | Q(status='running', run_id='', updated_at__lt=now - STALE_AFTER)
+
+
+def run_research_job(job_id):
+    """Start one research job: start its Apify run, or fetch and save the
+    Apollo / AI leads. Returns the job, or None if another run holds it."""
+    from ai_sdr_agent.models import SDRLeadResearchJob
+
+    lease = timezone.now()
+    claimed = SDRLeadResearchJob.objects.filter(_claimable(lease), id=job_id).update(
+        status='running', started_at=lease, updated_at=lease,
+    )
+    if not claimed:
+        return None
+    job = SDRLeadResearchJob.objects.select_related('company_user', 'icp_profile').get(id=job_id)
+    count = int(job.search_params.get('count') or 20)
+    try:
+        if job.icp_profile is None:
+            raise ValueError('The ICP profile for this research was deleted.')
+        researcher = research_agent(job)
+        if job.source == 'apify':
+            run_id = researcher.start_apify_run(job.icp_profile, count)
+            SDRLeadResearchJob.objects.filter(id=job.id, status='running', started_at=lease).update(
+                run_id=run_id, run_status='READY', polled_at=timezone.now(),
+            )
+            job.run_id, job.run_status = run_id, 'READY'
+            return job
+        raw_leads = researcher.search_leads(
+            job.icp_profile, count=count, source='ai' if job.source == 'ai_generated' else job.source,
+        )
+        dedupe = LeadDedupe(job.company_user_id)
+        for batch in chunked(raw_leads, RESEARCH_BATCH_SIZE):
+            if not _save_batch(job, batch, dedupe, lease):
+                return None
+        _finish(job, lease, 'completed')
+    except Exception as exc:
+        logger.exception("SDR research #%s failed", job.id)
+        _finish(job, lease, 'failed', str(exc))
+    return job
+
+
+def start_research_job(job_id):
+    """Run the job in a background thread once the creating transaction commits.
+
+    If the process dies first, advance_research_jobs picks the job up.
+    """
+    def _run():
+        try:
+            run_research_job(job_id)
+        except Exception:
+            logger.exception("SDR research #%s crashed", job_id)
+        finally:
+            from django.db import connection
+            connection.close()
+
+    transaction.on_commit(lambda: threading.Thread(target=_run, daemon=True).start())
+
+
+def _import_dataset(job, researcher, lease):
+    """Stream a finished run's dataset into leads, from processed_items on."""
+    count = int(job.search_params.get('count') or 20)
+    dedupe = LeadDedupe(job.company_user_id)
+    pages = researcher.iter_apify_pages(
+        job.dataset_id, limit=max(count - job.processed_items, 0), offset=job.processed_items,
+    )
+    for _, items in pages:
+        raw_leads = researcher.parse_apify_items(items)[:max(count - job.total_found, 0)]
+        if not _save_batch(job, raw_leads, dedupe, lease, items=len(items)):
+            logger.warning("SDR research #%s: taken over by another run; stopping", job.id)
+            return False
+        if job.total_found >= count:
+            break
+    return _finish(job, lease, 'completed')
+
+
+def _poll(job, researcher):
+    try:
+        return researcher.apify_run(job.run_id)
+    except Exception as exc:
+        return exc
+
+
+def advance_research_jobs(limit=POLL_LIMIT):
+    """One pass over the outstanding research jobs. Called by the scheduler.
+
+    Starts pending jobs, checks the Apify runs in progress and imports the
+    datasets of the runs that have finished.
+    """
+    from ai_sdr_agent.models import SDRLeadResearchJob
+
+    now = timezone.now()
+    result = {'started': 0, 'jobs': 0, 'completed': 0, 'failed': 0}
+    for job_id in (SDRLeadResearchJob.objects.filter(_claimable(now))
+                   .order_by('created_at').values_list('id', flat=True)[:limit]):
+        if run_research_job(job_id) is not None:
+            result['started'] += 1
+
+    # Runs not yet seen finished, plus dataset imports that have stalled.
+    jobs = list(
+        SDRLeadResearchJob.objects.filter(status='running').exclude(run_id='')
+        .filter(~Q(run_status='SUCCEEDED') | Q(updated_at__lt=now - STALE_AFTER))
+        .select_related('company_user').order_by('polled_at')[:limit]
+    )
+    if not jobs:
+        return result
+    result['jobs'] = len(jobs)
+    agents = {}
+    for job in jobs:
+        key = (job.company_user_id, bool(job.search_params.get('auto')))
+        if key not in agents:
+            agents[key] = research_agent(job)
+    researchers = {job.id: agents[(job.company_user_id, bool(job.search_params.get('auto')))] for job in jobs}
+    with ThreadPoolExecutor(max_workers=min(POLL_WORKERS, len(jobs))) as pool:
+        runs = list(pool.map(lambda job: _poll(job, researchers[job.id]), jobs))
+
+    for job, run in zip(jobs, runs):
+        polled = SDRLeadResearchJob.objects.filter(id=job.id, status='running', started_at=job.started_at)
+        if isinstance(run, Exception):
+            logger.warning("SDR research #%s: polling Apify run %s failed: %s", job.id, job.run_id, run)
+            polled.update(polled_at=now)
+            continue
+        run_status = run.get('status', '')
+        if run_status == 'SUCCEEDED':
+            lease = timezone.now()
+            if not polled.update(started_at=lease, run_status=run_status, polled_at=now,
+                                 dataset_id=run.get('defaultDatasetId') or job.dataset_id):
+                continue
+            job.dataset_id = run.get('defaultDatasetId') or job.dataset_id
+            try:
+                if _import_dataset(job, researchers[job.id], lease):
+                    result['completed'] += 1
+            except requests.RequestException as exc:
+                # Left running: the next pass after STALE_AFTER resumes it.
+                logger.warning("SDR research #%s: reading dataset %s failed: %s", job.id, job.dataset_id, exc)
+            except Exception as exc:
+                logger.exception("SDR research #%s: dataset import failed", job.id)
+                if _finish(job, lease, 'failed', str(exc)):
+                    result['failed'] += 1
+        elif run_status in FAILED_RUN_STATUSES:
+            if _finish(job, job.started_at, 'failed', f"Apify run failed with status: {run_status}"):
+                result['failed'] += 1
+        elif job.started_at and now - job.started_at > RUN_TIMEOUT:
+            if _finish(job, job.started_at, 'failed',
+                       f"Apify run did not finish within {int(RUN_TIMEOUT.total_seconds() // 60)} minutes"):
+                result['failed'] += 1
+        else:
+            polled.update(run_status=run_status, polled_at=now)
+    return result
+
+
+def job_message(job):
+    if job.status == 'failed':
+        return job.error_message or 'Research failed.'
+    if job.status == 'pending':
+        return 'Research queued…'
+    if job.status == 'running':
+        if job.run_id and job.run_status != 'SUCCEEDED':
+            return 'Apify is collecting leads — they will be imported when the run finishes.'
+        return f'Researching… {job.leads_created} leads found so far.'
+    if job.leads_created:
+        return (
+            f'Found {job.leads_created} leads. Qualifying them in the background — '
+            f'scores will appear shortly. Skipped {job.skipped_duplicates} duplicates.'
+        )
+    return f'Found 0 leads. Skipped {job.skipped_duplicates} duplicates.'
+
+
+def job_payload(job):
+    """API representation of a research job (the status endpoint's data)."""
+    return {
+        'id': job.id,
+        'status': job.status,
+        'message': job_message(job),
+        'source': job.source,
+        'run_status': job.run_status,
+        'total_found': job.total_found,
+        'leads_created': job.leads_created,
+        # every created lead is queued for qualification
+        'leads_queued': job.leads_created,
+        'skipped_duplicates': job.skipped_duplicates,
+        'error_message': job.error_message,
+        'created_at': job.created_at.isoformat() if job.created_at else None,
+        'completed_at': job.completed_at.isoformat() if job.completed_at else None,
+    }
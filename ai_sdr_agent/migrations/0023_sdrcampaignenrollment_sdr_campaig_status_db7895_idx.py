@@ -0,0 +1,17 @@
+# Generated by Django 4.2.10 on 2026-10-18 21:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ai_sdr_agent', '0022_alter_sdrlead_source'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='sdrcampaignenrollment',
+            index=models.Index(fields=['status', 'next_action_at'], name='sdr_campaig_status_db7895_idx'),
+        ),
+    ]
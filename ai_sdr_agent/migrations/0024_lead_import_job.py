@@ -0,0 +1,62 @@
+# Generated by Django 4.2.10 on 2026-10-18 21:46
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+def backfill_email_normalized(apps, schema_editor):
+    from django.db.models.functions import Lower, Trim
+
+    SDRLead = apps.get_model('ai_sdr_agent', 'SDRLead')
+    SDRLead._base_manager.exclude(email='').update(email_normalized=Lower(Trim('email')))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0095_agentplan'),
+        ('ai_sdr_agent', '0023_sdrcampaignenrollment_sdr_campaig_status_db7895_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SDRLeadImportJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('file', models.FileField(blank=True, max_length=1000, upload_to='sdr_lead_imports/%Y/%m/')),
+                ('file_name', models.CharField(blank=True, max_length=255)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('completed', 'Completed'), ('failed', 'Failed')], db_index=True, default='pending', max_length=20)),
+                ('processed_rows', models.IntegerField(default=0)),
+                ('created_count', models.IntegerField(default=0)),
+                ('skipped_duplicates', models.IntegerField(default=0)),
+                ('skipped_empty', models.IntegerField(default=0)),
+                ('error_count', models.IntegerField(default=0)),
+                ('errors', models.JSONField(blank=True, default=list)),
+                ('error_message', models.TextField(blank=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'sdr_lead_import_job',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.AddField(
+            model_name='sdrlead',
+            name='email_normalized',
+            field=models.CharField(blank=True, editable=False, max_length=255),
+        ),
+        migrations.RunPython(backfill_email_normalized, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='sdrlead',
+            index=models.Index(fields=['company_user', 'email_normalized'], name='sdr_lead_company_5fbf3a_idx'),
+        ),
+        migrations.AddField(
+            model_name='sdrleadimportjob',
+            name='company_user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sdr_lead_imports', to='core.companyuser'),
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 4.2.10 on 2026-10-18 21:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ai_sdr_agent', '0024_lead_import_job'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SDRSchedulerJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('job_id', models.CharField(max_length=64, unique=True)),
+                ('last_status', models.CharField(blank=True, choices=[('running', 'Running'), ('success', 'Success'), ('error', 'Error')], max_length=20)),
+                ('last_started_at', models.DateTimeField(blank=True, null=True)),
+                ('last_finished_at', models.DateTimeField(blank=True, null=True)),
+                ('last_duration_ms', models.IntegerField(blank=True, null=True)),
+                ('last_error', models.TextField(blank=True)),
+                ('last_holder', models.CharField(blank=True, max_length=255)),
+                ('run_count', models.IntegerField(default=0)),
+                ('error_count', models.IntegerField(default=0)),
+                ('total_duration_ms', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'db_table': 'sdr_scheduler_job',
+                'ordering': ['job_id'],
+            },
+        ),
+        migrations.CreateModel(
+            name='SDRSchedulerLease',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=64, unique=True)),
+                ('holder', models.CharField(blank=True, max_length=255)),
+                ('acquired_at', models.DateTimeField(blank=True, null=True)),
+                ('renewed_at', models.DateTimeField(blank=True, null=True)),
+                ('expires_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'db_table': 'sdr_scheduler_lease',
+            },
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 4.2.10 on 2026-10-18 21:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ai_sdr_agent', '0025_scheduler_lease'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='sdroutreachlog',
+            name='message_id',
+            field=models.CharField(blank=True, db_index=True, max_length=255),
+        ),
+        migrations.CreateModel(
+            name='SDRMailboxState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('imap_host', models.CharField(max_length=255)),
+                ('imap_port', models.IntegerField(default=993)),
+                ('username', models.CharField(max_length=255)),
+                ('uidvalidity', models.BigIntegerField(blank=True, null=True)),
+                ('last_uid', models.BigIntegerField(default=0)),
+                ('deferred_uids', models.JSONField(blank=True, default=list)),
+                ('last_polled_at', models.DateTimeField(blank=True, null=True)),
+                ('last_error', models.TextField(blank=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'sdr_mailbox_state',
+                'unique_together': {('imap_host', 'imap_port', 'username')},
+            },
+        ),
+    ]
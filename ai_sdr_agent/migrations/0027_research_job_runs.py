@@ -0,0 +1,53 @@
+# Generated by Django 4.2.10 on 2026-10-18 22:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ai_sdr_agent', '0026_mailbox_state'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='sdrleadresearchjob',
+            name='dataset_id',
+            field=models.CharField(blank=True, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='sdrleadresearchjob',
+            name='polled_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='sdrleadresearchjob',
+            name='processed_items',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='sdrleadresearchjob',
+            name='run_id',
+            field=models.CharField(blank=True, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='sdrleadresearchjob',
+            name='run_status',
+            field=models.CharField(blank=True, max_length=20),
+        ),
+        migrations.AddField(
+            model_name='sdrleadresearchjob',
+            name='skipped_duplicates',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='sdrleadresearchjob',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AlterField(
+            model_name='sdrleadresearchjob',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('completed', 'Completed'), ('failed', 'Failed')], db_index=True, default='pending', max_length=20),
+        ),
+    ]
@@ -86,6 +86,10 @@ class SDRLead(models.Model):
     last_name = models.CharField(max_length=255, blank=True)
     full_name = models.CharField(max_length=255, blank=True)
     email = models.CharField(max_length=255, blank=True)
+    # Trimmed, lowercased email, kept in step by save(). Indexed with
+    # company_user so imports can dedupe with IN lookups instead of loading
+    # every existing email.
+    email_normalized = models.CharField(max_length=255, blank=True, editable=False)
     phone = models.CharField(max_length=100, blank=True)
 
     # Professional
@@ -172,10 +176,24 @@ class SDRLead(models.Model):
         # serialization; point it at the unfiltered manager so those internals
         # never silently drop a soft-deleted row they legitimately need.
         base_manager_name = 'all_objects'
+        indexes = [
+            models.Index(fields=['company_user', 'email_normalized']),
+        ]
 
     def __str__(self):
         return f"{self.display_name} — {self.company_name} ({self.temperature or 'unscored'})"
 
+    @staticmethod
+    def normalize_email(email):
+        return (email or '').strip().lower()
+
+    def save(self, *args, **kwargs):
+        self.email_normalized = self.normalize_email(self.email)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'email' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'email_normalized'}
+        super().save(*args, **kwargs)
+
     def soft_delete(self):
         """Mark as deleted without removing the row, so it can be restored."""
         self.is_deleted = True
@@ -352,6 +370,10 @@ class SDRCampaignEnrollment(models.Model):
         db_table = 'sdr_campaign_enrollment'
         unique_together = ['campaign', 'lead']
         ordering = ['-enrolled_at']
+        indexes = [
+            # send_due_steps due-queue scan (ai_sdr_agent/tasks.py).
+            models.Index(fields=['status', 'next_action_at']),
+        ]
 
     def __str__(self):
         return f"{self.lead.display_name} → {self.campaign.name} ({self.status})"
@@ -375,6 +397,9 @@ class SDROutreachLog(models.Model):
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='sent')
     subject_sent = models.CharField(max_length=500, blank=True)
     body_sent = models.TextField(blank=True)
+    # Message-ID header of the sent email; replies quote it in In-Reply-To /
+    # References, which routes them to this enrollment.
+    message_id = models.CharField(max_length=255, blank=True, db_index=True)
     error_message = models.TextField(blank=True)
     sent_at = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(default=timezone.now)
@@ -462,7 +487,13 @@ class SDRAgentSettings(models.Model):
 
 
 class SDRLeadResearchJob(models.Model):
-    """Tracks async lead-research jobs (Apollo search or AI generation)."""
+    """A lead-research request (Apollo search, Apify actor run or AI generation).
+
+    Runs in the background (ai_sdr_agent/lead_research.py). An Apify job
+    keeps the actor's run id while the run is in progress; the scheduler
+    polls it and streams the dataset into leads, committing
+    ``processed_items`` with each batch so an interrupted import resumes.
+    """
 
     STATUS_CHOICES = [
         ('pending', 'Pending'),
@@ -475,16 +506,26 @@ class SDRLeadResearchJob(models.Model):
     icp_profile = models.ForeignKey(
         'SDRIcpProfile', on_delete=models.SET_NULL, null=True, blank=True
     )
-    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
-    source = models.CharField(max_length=20, default='ai_generated')  # 'apollo' | 'ai_generated'
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending', db_index=True)
+    source = models.CharField(max_length=20, default='ai_generated')  # 'apollo' | 'apify' | 'ai_generated'
     search_params = models.JSONField(default=dict)
     total_found = models.IntegerField(default=0)
     leads_created = models.IntegerField(default=0)
     leads_qualified = models.IntegerField(default=0)
+    skipped_duplicates = models.IntegerField(default=0)
     error_message = models.TextField(blank=True)
+
+    # Apify actor run (empty for Apollo / AI generation)
+    run_id = models.CharField(max_length=64, blank=True)
+    run_status = models.CharField(max_length=20, blank=True)   # Apify's: READY / RUNNING / SUCCEEDED / ...
+    dataset_id = models.CharField(max_length=64, blank=True)
+    processed_items = models.IntegerField(default=0)           # dataset items already turned into leads
+    polled_at = models.DateTimeField(null=True, blank=True)
+
     started_at = models.DateTimeField(null=True, blank=True)
     completed_at = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(default=timezone.now)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         db_table = 'sdr_lead_research_job'
@@ -492,3 +533,131 @@ class SDRLeadResearchJob(models.Model):
 
     def __str__(self):
         return f"ResearchJob #{self.id} — {self.status} ({self.leads_created} leads)"
+
+
+class SDRLeadImportJob(models.Model):
+    """A CSV / Excel lead import, processed in the background in chunks.
+
+    The upload is stored on the default storage so whichever process picks
+    the job up can stream it. Each chunk's leads and the progress counters
+    are committed together, so processed_rows is always the number of data
+    rows already handled and an interrupted job resumes after them.
+    """
+
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
+
+    company_user = models.ForeignKey(
+        'core.CompanyUser', on_delete=models.CASCADE, related_name='sdr_lead_imports'
+    )
+    file = models.FileField(upload_to='sdr_lead_imports/%Y/%m/', max_length=1000, blank=True)
+    file_name = models.CharField(max_length=255, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending', db_index=True)
+
+    processed_rows = models.IntegerField(default=0)
+    created_count = models.IntegerField(default=0)
+    skipped_duplicates = models.IntegerField(default=0)
+    skipped_empty = models.IntegerField(default=0)
+    error_count = models.IntegerField(default=0)
+    errors = models.JSONField(default=list, blank=True)   # first few "Row N: ..." messages
+    error_message = models.TextField(blank=True)
+
+    started_at = models.DateTimeField(null=True, blank=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'sdr_lead_import_job'
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"LeadImportJob #{self.id} — {self.status} ({self.created_count} leads)"
+
+
+class SDRSchedulerLease(models.Model):
+    """Leader lease for the embedded SDR scheduler.
+
+    Every web / worker process starts the scheduler, but only the process
+    whose instance id is in ``holder`` (and whose lease hasn't expired)
+    runs jobs. The holder renews the lease on a heartbeat; another process
+    takes it over once ``expires_at`` has passed.
+    """
+
+    name = models.CharField(max_length=64, unique=True)
+    holder = models.CharField(max_length=255, blank=True)   # "host:pid:nonce", '' = free
+    acquired_at = models.DateTimeField(null=True, blank=True)
+    renewed_at = models.DateTimeField(null=True, blank=True)
+    expires_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'sdr_scheduler_lease'
+
+    def __str__(self):
+        return f"{self.name} → {self.holder or '(free)'}"
+
+
+class SDRSchedulerJob(models.Model):
+    """Last run and run-time stats of one scheduler job.
+
+    The row is also the job's run claim: a run starts only by moving
+    ``last_started_at`` forward while the job is due, so a new leader does
+    not repeat a run its predecessor just made.
+    """
+
+    STATUS_CHOICES = [
+        ('running', 'Running'),
+        ('success', 'Success'),
+        ('error', 'Error'),
+    ]
+
+    job_id = models.CharField(max_length=64, unique=True)
+    last_status = models.CharField(max_length=20, choices=STATUS_CHOICES, blank=True)
+    last_started_at = models.DateTimeField(null=True, blank=True)
+    last_finished_at = models.DateTimeField(null=True, blank=True)
+    last_duration_ms = models.IntegerField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    last_holder = models.CharField(max_length=255, blank=True)
+    run_count = models.IntegerField(default=0)
+    error_count = models.IntegerField(default=0)
+    total_duration_ms = models.BigIntegerField(default=0)
+
+    class Meta:
+        db_table = 'sdr_scheduler_job'
+        ordering = ['job_id']
+
+    def __str__(self):
+        return f"{self.job_id} — {self.last_status or 'never run'}"
+
+
+class SDRMailboxState(models.Model):
+    """Incremental IMAP polling position of one reply mailbox.
+
+    Every campaign that reads replies from the same (host, port, username)
+    shares one row, so the mailbox is scanned once per tick from
+    ``last_uid`` on. UIDs are only comparable within one UIDVALIDITY; when
+    the server reports a different one the position is reset.
+    """
+
+    imap_host = models.CharField(max_length=255)
+    imap_port = models.IntegerField(default=993)
+    username = models.CharField(max_length=255)
+    uidvalidity = models.BigIntegerField(null=True, blank=True)
+    last_uid = models.BigIntegerField(default=0)
+    # Routed messages that couldn't be handled yet (e.g. the campaign's
+    # AI keys are blocked); fetched again on the next poll.
+    deferred_uids = models.JSONField(default=list, blank=True)
+    last_polled_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'sdr_mailbox_state'
+        unique_together = ['imap_host', 'imap_port', 'username']
+
+    def __str__(self):
+        return f"{self.username}@{self.imap_host} (uid {self.last_uid})"
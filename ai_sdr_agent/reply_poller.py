@@ -0,0 +1,311 @@
+"""
+Shared per-mailbox reply polling for SDR campaigns
+===================================================
+check_inbox_replies_impl used to open an IMAP session per campaign and
+re-read the newest 100 messages each time, so a mailbox used by N
+campaigns was scanned N times per tick and the same replies came back
+tick after tick. Now:
+
+  - Campaigns are grouped by the mailbox their replies arrive in
+    (imap_credentials → host, port, username); each mailbox is polled once.
+  - SDRMailboxState keeps the mailbox's UIDVALIDITY and the last UID seen,
+    so a poll only asks for UIDs above it. The first poll (or one after the
+    server changed UIDVALIDITY) looks back to the earliest outreach, capped
+    at FIRST_POLL_MAX_MESSAGES like the old scan.
+  - Headers are fetched in batches with BODY.PEEK (the mailbox is opened
+    read-only; nothing is marked as read) and each message is routed
+    through one MailboxIndex built for all the mailbox's campaigns:
+    In-Reply-To / References matched against the Message-IDs of our sent
+    emails first, then the sender address against enrolled leads, guarded
+    by the outreach time as before. Only routed messages are fetched in
+    full.
+  - The caller's handler applies each reply; a handler that can't process
+    one yet returns False and the UID is kept in deferred_uids for the next
+    poll.
+"""
+
+import datetime as _dt
+import email as email_lib
+import email.utils
+import imaplib
+import logging
+import re
+import time
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db.models import Max
+from django.utils import timezone
+
+from ai_sdr_agent.agents.outreach_agent import _extract_email_body, imap_credentials
+
+logger = logging.getLogger(__name__)
+
+# Enrollment statuses whose leads' replies are still picked up.
+REPLY_STATUSES = ('active', 'paused', 'completed', 'replied')
+FETCH_BATCH = 100                 # UIDs per FETCH command
+MAX_MESSAGES_PER_POLL = 500       # new UIDs handled per poll; the rest wait for the next
+FIRST_POLL_MAX_MESSAGES = 100     # newest messages read when there is no saved position
+MAX_DEFERRED = 200
+_HEADER_FIELDS = 'FROM SUBJECT DATE MESSAGE-ID IN-REPLY-TO REFERENCES'
+_UID_RE = re.compile(rb'\bUID (\d+)')
+_MSG_ID_RE = re.compile(r'<[^<>\s]+>')
+
+
+def mailbox_key(campaign):
+    """(host, port, username) the campaign's replies are read from, or None
+    if it has no IMAP credentials."""
+    host, port, username, password = imap_credentials(campaign)
+    if not username or not password:
+        return None
+    return (host.strip().lower(), int(port), username.strip().lower())
+
+
+def group_by_mailbox(campaigns):
+    """{mailbox key: [campaign, ...]}; campaigns without credentials are skipped."""
+    groups = defaultdict(list)
+    for campaign in campaigns:
+        key = mailbox_key(campaign)
+        if key is None:
+            logger.warning("No IMAP credentials available for campaign %s", campaign.id)
+            continue
+        groups[key].append(campaign)
+    return groups
+
+
+def _aware(value):
+    if value is not None and timezone.is_naive(value):
+        return timezone.make_aware(value)
+    return value
+
+
+class MailboxIndex:
+    """Routes a mailbox's inbound messages to the enrollments of its campaigns."""
+
+    def __init__(self, campaigns):
+        from ai_sdr_agent.models import SDRCampaignEnrollment, SDROutreachLog
+
+        by_campaign = {c.id: c for c in campaigns}
+        self.by_email = defaultdict(list)   # lead email → [enrollment]
+        self.by_message_id = {}             # Message-ID of a sent email → enrollment
+        self.sent_at = {}                   # enrollment id → last outreach sent
+
+        enrollments = (
+            SDRCampaignEnrollment.objects
+            .filter(campaign_id__in=list(by_campaign), status__in=REPLY_STATUSES)
+            .exclude(lead__email='')
+            .select_related('lead')
+        )
+        by_id = {}
+        for enr in enrollments:
+            # Share the campaign objects so counter updates land on one instance.
+            enr.campaign = by_campaign[enr.campaign_id]
+            by_id[enr.id] = enr
+            self.sent_at[enr.id] = enr.enrolled_at
+            self.by_email[enr.lead.email.strip().lower()].append(enr)
+
+        sent_logs = SDROutreachLog.objects.filter(
+            enrollment__campaign_id__in=list(by_campaign), action_type='email', status='sent',
+        )
+        # The most recent sent email is the "outreach sent" time; enrolled_at
+        # is the fallback.
+        for row in sent_logs.values('enrollment_id').annotate(last=Max('sent_at')):
+            if row['enrollment_id'] in by_id and row['last']:
+                self.sent_at[row['enrollment_id']] = row['last']
+        for message_id, enrollment_id in sent_logs.exclude(message_id='').values_list('message_id', 'enrollment_id'):
+            if enrollment_id in by_id:
+                self.by_message_id[message_id.strip()] = by_id[enrollment_id]
+
+    def __len__(self):
+        return len(self.sent_at)
+
+    def earliest_outreach(self):
+        return min((_aware(t) for t in self.sent_at.values() if t), default=None)
+
+    def route(self, sender, referenced_ids, received_at):
+        """The enrollment a message belongs to, or None."""
+        for message_id in referenced_ids:
+            enrollment = self.by_message_id.get(message_id)
+            if enrollment is not None:
+                return enrollment
+
+        candidates = self.by_email.get(sender)
+        if not candidates:
+            return None
+        if received_at is None:
+            logger.warning(
+                "IMAP [NO-DATE] accepting from=%s — message has no date, cannot filter by outreach time",
+                sender,
+            )
+            return max(candidates, key=lambda e: _aware(self.sent_at[e.id]))
+        # Only accept email RECEIVED after our outreach; if the lead is in
+        # several of this mailbox's campaigns, the latest outreach wins.
+        eligible = [e for e in candidates if received_at > _aware(self.sent_at[e.id])]
+        if not eligible:
+            logger.info(
+                "IMAP [PRE-OUTREACH] SKIPPED from=%s — received %s before outreach was sent",
+                sender, received_at,
+            )
+            return None
+        return max(eligible, key=lambda e: _aware(self.sent_at[e.id]))
+
+
+def _received_at(meta, msg):
+    """Server INTERNALDATE, falling back to the Date header."""
+    try:
+        parsed = imaplib.Internaldate2tuple(meta)   # local time
+        if parsed:
+            return _dt.datetime.fromtimestamp(time.mktime(parsed), tz=_dt.timezone.utc)
+    except Exception:
+        pass
+    date_raw = (msg.get('Date') or '').strip()
+    if date_raw:
+        try:
+            value = email.utils.parsedate_to_datetime(date_raw)
+            return value if value.tzinfo else value.replace(tzinfo=_dt.timezone.utc)
+        except Exception:
+            pass
+    return None
+
+
+def _fetch(imap, uids, parts):
+    """UID FETCH ``parts`` for ``uids`` in batches; yields (uid, meta, payload)."""
+    for i in range(0, len(uids), FETCH_BATCH):
+        batch = ','.join(str(uid) for uid in uids[i:i + FETCH_BATCH])
+        typ, data = imap.uid('FETCH', batch, parts)
+        if typ != 'OK':
+            raise ValueError(f"IMAP FETCH failed: {data}")
+        for item in data or []:
+            if not isinstance(item, tuple):
+                continue
+            match = _UID_RE.search(item[0])
+            if match:
+                yield int(match.group(1)), item[0], item[1]
+
+
+def _search(imap, *criteria):
+    typ, data = imap.uid('SEARCH', None, *criteria)
+    if typ != 'OK':
+        raise ValueError(f"IMAP SEARCH failed: {data}")
+    return sorted(int(uid) for uid in (data[0] or b'').split())
+
+
+def _new_uids(imap, state, uidvalidity, index):
+    """UIDs to look at this poll, and whether the saved position was reset."""
+    if state.uidvalidity == uidvalidity and state.last_uid:
+        # "N:*" always matches the newest message, even if its UID is below N.
+        uids = [u for u in _search(imap, 'UID', f'{state.last_uid + 1}:*') if u > state.last_uid]
+        return uids[:MAX_MESSAGES_PER_POLL], False
+    since = index.earliest_outreach() or timezone.now()
+    since = (since - timedelta(days=1)).strftime('%d-%b-%Y')
+    uids = _search(imap, 'SINCE', since)
+    logger.info("IMAP [RESET] %s: no saved position, reading back to %s (%d messages)", state, since, len(uids))
+    return uids[-FIRST_POLL_MAX_MESSAGES:], True
+
+
+def poll_mailbox(key, campaigns, handle):
+    """
+    Fetch the mailbox's new messages once and pass each reply to
+    ``handle(reply)`` — reply is {enrollment, reply_text, sender_email,
+    subject}. ``handle`` returns False to have the message fetched again
+    on the next poll. Returns the number of replies handled.
+    """
+    from ai_sdr_agent.models import SDRMailboxState
+
+    index = MailboxIndex(campaigns)
+    if not len(index):
+        return 0
+
+    host, port, mailbox_user = key
+    _, _, username, password = imap_credentials(campaigns[0])
+    state, _ = SDRMailboxState.objects.get_or_create(imap_host=host, imap_port=port, username=mailbox_user)
+
+    replies = {}          # enrollment id → (uid, reply); newest UID wins
+    try:
+        with imaplib.IMAP4_SSL(host, port) as imap:
+            imap.login(username, password)
+            typ, data = imap.select('INBOX', readonly=True)
+            if typ != 'OK':
+                raise ValueError(f"IMAP SELECT failed: {data}")
+            _, validity = imap.response('UIDVALIDITY')
+            uidvalidity = int(validity[0]) if validity and validity[0] else None
+            _, uidnext = imap.response('UIDNEXT')
+            uidnext = int(uidnext[0]) if uidnext and uidnext[0] else None
+
+            new_uids, reset = _new_uids(imap, state, uidvalidity, index)
+            deferred = [] if reset else [int(u) for u in state.deferred_uids or []]
+            uids = sorted(set(new_uids) | set(deferred))
+            logger.info(
+                "IMAP: %s — %d new message(s)%s for %d campaign(s)",
+                state, len(new_uids), f" + {len(deferred)} deferred" if deferred else '', len(campaigns),
+            )
+
+            routed = {}
+            for uid, meta, header in _fetch(imap, uids, f'(UID INTERNALDATE BODY.PEEK[HEADER.FIELDS ({_HEADER_FIELDS})])'):
+                try:
+                    msg = email_lib.message_from_bytes(header)
+                    sender = email.utils.parseaddr(msg.get('From', ''))[1].lower()
+                    referenced = _MSG_ID_RE.findall(
+                        f"{msg.get('In-Reply-To', '')} {msg.get('References', '')}"
+                    )
+                    enrollment = index.route(sender, referenced, _received_at(meta, msg))
+                except Exception as exc:
+                    logger.warning("IMAP: error parsing message uid=%s: %s", uid, exc)
+                    continue
+                if enrollment is not None:
+                    routed[uid] = (enrollment, sender, msg.get('Subject', ''))
+
+            for uid, _meta, raw in _fetch(imap, sorted(routed), '(UID BODY.PEEK[])'):
+                enrollment, sender, subject = routed[uid]
+                try:
+                    body = _extract_email_body(email_lib.message_from_bytes(raw))
+                except Exception as exc:
+                    logger.warning("IMAP: error parsing message uid=%s: %s", uid, exc)
+                    continue
+                # Only the most recent reply per enrollment is acted on.
+                replies[enrollment.id] = (uid, {
+                    'enrollment': enrollment,
+                    'reply_text': body,
+                    'sender_email': sender,
+                    'subject': subject,
+                })
+    except imaplib.IMAP4.error as exc:
+        SDRMailboxState.objects.filter(id=state.id).update(last_error=f"IMAP login failed: {exc}"[:2000], last_polled_at=timezone.now())
+        raise ValueError(f"IMAP login failed: {exc}") from exc
+    except Exception as exc:
+        SDRMailboxState.objects.filter(id=state.id).update(last_error=f"IMAP error: {exc}"[:2000], last_polled_at=timezone.now())
+        raise ValueError(f"IMAP error: {exc}") from exc
+
+    still_deferred = []
+    handled = 0
+    for uid, reply in sorted(replies.values(), key=lambda item: item[0]):
+        logger.info(
+            "IMAP [REPLY-FOUND] enrollment=%d from=%s subject='%s' current_enrollment_status=%s",
+            reply['enrollment'].id, reply['sender_email'], reply['subject'], reply['enrollment'].status,
+        )
+        try:
+            ok = handle(reply)
+        except Exception as exc:
+            # Not deferred: a reply that fails every time would come back forever.
+            logger.error("IMAP: handling reply uid=%s enrollment=%d failed: %s",
+                         uid, reply['enrollment'].id, exc, exc_info=True)
+            continue
+        if ok is False:
+            still_deferred.append(uid)
+        else:
+            handled += 1
+    if len(still_deferred) > MAX_DEFERRED:
+        logger.warning("IMAP: %s — dropping %d oldest deferred replies", state, len(still_deferred) - MAX_DEFERRED)
+        still_deferred = still_deferred[-MAX_DEFERRED:]
+
+    state.uidvalidity = uidvalidity
+    if new_uids:
+        state.last_uid = new_uids[-1]
+    elif reset:
+        # Nothing to read back; start from the mailbox's current end.
+        state.last_uid = uidnext - 1 if uidnext else 0
+    state.deferred_uids = still_deferred
+    state.last_polled_at = timezone.now()
+    state.last_error = ''
+    state.save(update_fields=['uidvalidity', 'last_uid', 'deferred_uids', 'last_polled_at', 'last_error', 'updated_at'])
+    return handled
@@ -12,20 +12,50 @@ Why APScheduler instead of threading.Timer:
   - DB connection close →  each worker thread closes its Django DB connection when done
   - atexit + signal     →  clean shutdown on Ctrl-C / gunicorn SIGTERM
 
+Leader election
+---------------
+ready() starts a scheduler in every gunicorn worker on every node, so
+without coordination each job ran once per process (8 workers × 3 nodes =
+24 inbox syncs every 5 minutes). Now:
+
+  - Each process runs a heartbeat thread that takes or renews a lease row
+    (SDRSchedulerLease) every HEARTBEAT_SECONDS. Only the holder runs jobs;
+    the other schedulers keep firing but skip. The holder stops treating
+    itself as leader LEASE_TTL_SECONDS - HEARTBEAT_SECONDS after its last
+    successful renewal, before anyone else may take the lease over.
+  - If the leader dies its lease expires after LEASE_TTL_SECONDS and the
+    next heartbeat elsewhere takes over; a clean shutdown releases it at
+    once.
+  - Each job's last run is kept in SDRSchedulerJob. A run starts only by
+    claiming that row while the job is due, so a new leader (or a
+    restarted one) continues the cadence instead of re-running every job
+    on startup. Jobs longer than POLL_SECONDS are polled at that rate and
+    the row decides when they are due, so they also fail over promptly.
+    The rows carry the run-time stats shown by sdr_scheduler_status.
+
 Jobs
 ----
   send_due_steps        every 5 min   (first run 30 s after startup)
+  qualify_queue         every 2 min   (first run 45 s after startup)
   check_inbox_replies   every 5 min   (first run 60 s after startup)
   auto_start_campaigns  every 15 min  (first run 90 s after startup)
   auto_pause_expired    every 60 min  (first run 120 s after startup)
   meeting_reminders     every 60 min  (first run 150 s after startup)
   daily_analytics       every 24 h    (first run 180 s after startup)
+  token_resets          every 5 min   (first run 45 s after startup)
+  lead_imports          every 60 s    (first run 75 s after startup)
+  research_jobs         every 60 s    (first run 105 s after startup)
+  auto_research         every 24 h    (first run 300 s after startup)
 """
 
 import atexit
 import datetime
 import logging
+import os
+import socket
 import threading
+import time
+import uuid
 
 from apscheduler.events import EVENT_JOB_ERROR, EVENT_JOB_EXECUTED, EVENT_JOB_MISSED
 from apscheduler.executors.pool import ThreadPoolExecutor
@@ -33,10 +63,25 @@ from apscheduler.schedulers.background import BackgroundScheduler
 
 logger = logging.getLogger(__name__)
 
+# ── Leader election settings ─────────────────────────────────────────────────
+LEASE_NAME = 'sdr-scheduler'
+LEASE_TTL_SECONDS = 45
+HEARTBEAT_SECONDS = 15
+# Jobs with a longer interval are fired this often and run when due.
+POLL_SECONDS = 300
+# A run another process left 'running' is presumed dead after its interval
+# (but at least this long).
+MIN_ABANDON_SECONDS = 120
+
 # ── Module-level state ───────────────────────────────────────────────────────
 _scheduler: BackgroundScheduler | None = None
 _lock = threading.Lock()
 
+_instance: tuple[int, str] | None = None   # (pid, instance id)
+_leader_until = 0.0                         # time.monotonic() deadline of our leadership
+_heartbeat_thread: threading.Thread | None = None
+_heartbeat_stop = threading.Event()
+
 
 # ── DB connection cleanup ────────────────────────────────────────────────────
 
@@ -54,99 +99,258 @@ def _close_db():
 
 
 # ── Job wrappers ─────────────────────────────────────────────────────────────
+# Errors, timing and DB cleanup are handled by _run_job.
 
 def _run_send_due_steps():
-    try:
-        from ai_sdr_agent.tasks import send_due_steps_impl
-        result = send_due_steps_impl()
-        if result:
-            logger.debug("SDR send_due_steps → %s", result)
-    except Exception as exc:
-        logger.exception("SDR send_due_steps crashed: %s", exc)
-    finally:
-        _close_db()
+    from ai_sdr_agent.tasks import send_due_steps_impl
+    return send_due_steps_impl()
 
 
 def _run_qualify_queue():
-    try:
-        from ai_sdr_agent.tasks import qualify_queue_impl
-        result = qualify_queue_impl()
-        if result:
-            logger.debug("SDR qualify_queue → %s", result)
-    except Exception as exc:
-        logger.exception("SDR qualify_queue crashed: %s", exc)
+    from ai_sdr_agent.tasks import qualify_queue_impl
+    return qualify_queue_impl()
 
 
 def _run_check_inbox():
-    try:
-        from ai_sdr_agent.tasks import check_inbox_replies_impl
-        result = check_inbox_replies_impl()
-        if result:
-            logger.debug("SDR check_inbox → %s", result)
-    except Exception as exc:
-        logger.exception("SDR check_inbox crashed: %s", exc)
-    finally:
-        _close_db()
+    from ai_sdr_agent.tasks import check_inbox_replies_impl
+    return check_inbox_replies_impl()
 
 
 def _run_auto_start():
-    try:
-        from ai_sdr_agent.tasks import auto_start_campaigns_impl
-        result = auto_start_campaigns_impl()
-        if result:
-            logger.debug("SDR auto_start → %s", result)
-    except Exception as exc:
-        logger.exception("SDR auto_start crashed: %s", exc)
-    finally:
-        _close_db()
+    from ai_sdr_agent.tasks import auto_start_campaigns_impl
+    return auto_start_campaigns_impl()
 
 
 def _run_auto_complete():
-    try:
-        from ai_sdr_agent.tasks import auto_pause_expired_campaigns_impl
-        result = auto_pause_expired_campaigns_impl()
-        if result:
-            logger.debug("SDR auto_complete → %s", result)
-    except Exception as exc:
-        logger.exception("SDR auto_complete crashed: %s", exc)
-    finally:
-        _close_db()
+    from ai_sdr_agent.tasks import auto_pause_expired_campaigns_impl
+    return auto_pause_expired_campaigns_impl()
 
 
 def _run_meeting_reminders():
+    from ai_sdr_agent.tasks import send_meeting_reminders_impl
+    return send_meeting_reminders_impl()
+
+
+def _run_daily_analytics():
+    from ai_sdr_agent.tasks import send_daily_analytics_impl
+    return send_daily_analytics_impl()
+
+
+def _run_lead_imports():
+    from ai_sdr_agent.tasks import lead_imports_impl
+    result = lead_imports_impl()
+    if result and result.get('jobs'):
+        logger.info("SDR lead_imports → %s", result)
+    return result
+
+
+def _run_research_jobs():
+    from ai_sdr_agent.tasks import research_jobs_impl
+    result = research_jobs_impl()
+    if result and (result.get('started') or result.get('jobs')):
+        logger.info("SDR research_jobs → %s", result)
+    return result
+
+
+def _run_token_resets():
+    """Apply any managed-token quota resets that are due, so resets happen on
+    schedule even when a company isn't actively using the agent."""
+    from core.api_key_service import run_due_token_resets
+    result = run_due_token_resets()
+    if result and result.get('applied'):
+        logger.info("Token resets applied → %s", result)
+    return result
+
+
+def _run_auto_research():
+    """Start Apify lead research for every active ICP (was a 24 h thread
+    started by AutoLeadResearchMiddleware in each process). research_jobs
+    imports the leads when the runs finish."""
+    from ai_sdr_agent.tasks import auto_research_leads_impl
+    result = auto_research_leads_impl(leads_per_run=10)
+    logger.info("Apify auto-research started: %s", result)
+    return result
+
+
+# ── Job registry ─────────────────────────────────────────────────────────────
+# (job_id, callable, interval_seconds, initial_delay_seconds)
+JOBS = [
+    ('send_due_steps',    _run_send_due_steps,     300,    30),
+    ('qualify_queue',     _run_qualify_queue,      120,    45),
+    ('check_inbox',       _run_check_inbox,         300,    60),
+    ('auto_start',        _run_auto_start,          900,    90),
+    ('auto_complete',     _run_auto_complete,       3600,  120),
+    ('meeting_reminders', _run_meeting_reminders,   3600,  150),
+    ('daily_analytics',   _run_daily_analytics,    86400,  180),
+    # Apply due managed-token resets every 5 min (first run 45 s in).
+    ('token_resets',      _run_token_resets,        300,    45),
+    # Resume lead imports whose background thread died (restart mid-file).
+    ('lead_imports',      _run_lead_imports,         60,    75),
+    # Start queued research jobs and follow their Apify runs.
+    ('research_jobs',     _run_research_jobs,        60,   105),
+    ('auto_research',     _run_auto_research,      86400,  300),
+]
+
+
+# ── Leader election ──────────────────────────────────────────────────────────
+
+def instance_id() -> str:
+    """This process's lease holder id ("host:pid:nonce"); new after a fork."""
+    global _instance
+    pid = os.getpid()
+    if _instance is None or _instance[0] != pid:
+        _instance = (pid, f"{socket.gethostname()}:{pid}:{uuid.uuid4().hex[:6]}")
+    return _instance[1]
+
+
+def is_leader() -> bool:
+    """True while this process holds an unexpired scheduler lease."""
+    return time.monotonic() < _leader_until
+
+
+def _renew_lease() -> bool:
+    """Renew our lease, or take it over if it is free or expired.
+    Returns True if this process holds it afterwards."""
+    from django.db import IntegrityError, transaction
+    from django.db.models import Q
+    from django.utils import timezone
+    from ai_sdr_agent.models import SDRSchedulerLease
+
+    me = instance_id()
+    now = timezone.now()
+    expires = now + datetime.timedelta(seconds=LEASE_TTL_SECONDS)
+    if SDRSchedulerLease.objects.filter(name=LEASE_NAME, holder=me).update(
+        renewed_at=now, expires_at=expires,
+    ):
+        return True
+    if SDRSchedulerLease.objects.filter(
+        Q(holder='') | Q(expires_at__isnull=True) | Q(expires_at__lt=now), name=LEASE_NAME,
+    ).update(holder=me, acquired_at=now, renewed_at=now, expires_at=expires):
+        return True
+    if SDRSchedulerLease.objects.filter(name=LEASE_NAME).exists():
+        return False
+    try:
+        with transaction.atomic():
+            SDRSchedulerLease.objects.create(
+                name=LEASE_NAME, holder=me, acquired_at=now, renewed_at=now, expires_at=expires,
+            )
+        return True
+    except IntegrityError:
+        return False   # another process created it first
+
+
+def _heartbeat_once() -> None:
+    global _leader_until
+    was_leader = is_leader()
+    started = time.monotonic()
     try:
-        from ai_sdr_agent.tasks import send_meeting_reminders_impl
-        result = send_meeting_reminders_impl()
-        if result:
-            logger.debug("SDR meeting_reminders → %s", result)
+        held = _renew_lease()
     except Exception as exc:
-        logger.exception("SDR meeting_reminders crashed: %s", exc)
-    finally:
+        # Keep the current deadline: if the DB stays unreachable our
+        # leadership lapses on its own before the lease can be taken over.
+        logger.warning("SDR scheduler: lease heartbeat failed: %s", exc)
         _close_db()
+        return
+    _leader_until = started + LEASE_TTL_SECONDS - HEARTBEAT_SECONDS if held else 0.0
+    if held and not was_leader:
+        logger.info("SDR scheduler: %s is now the leader", instance_id())
+    elif was_leader and not held:
+        logger.warning("SDR scheduler: %s lost the leader lease", instance_id())
 
 
-def _run_daily_analytics():
+def _heartbeat_loop() -> None:
+    while not _heartbeat_stop.is_set():
+        _heartbeat_once()
+        _heartbeat_stop.wait(HEARTBEAT_SECONDS)
+    _close_db()
+
+
+def _release_lease() -> None:
+    """Give the lease up so another process takes over on its next heartbeat."""
+    global _leader_until
+    _leader_until = 0.0
     try:
-        from ai_sdr_agent.tasks import send_daily_analytics_impl
-        result = send_daily_analytics_impl()
-        if result:
-            logger.debug("SDR daily_analytics → %s", result)
+        from ai_sdr_agent.models import SDRSchedulerLease
+        SDRSchedulerLease.objects.filter(name=LEASE_NAME, holder=instance_id()).update(
+            holder='', expires_at=None,
+        )
     except Exception as exc:
-        logger.exception("SDR daily_analytics crashed: %s", exc)
+        logger.debug("SDR scheduler: could not release lease: %s", exc)
     finally:
         _close_db()
 
 
-def _run_token_resets():
-    """Apply any managed-token quota resets that are due, so resets happen on
-    schedule even when a company isn't actively using the agent."""
+# ── Run claims and stats ─────────────────────────────────────────────────────
+
+def _claim_run(job_id: str, interval: int) -> bool:
+    """Mark ``job_id`` as started if it is due. False if it ran too recently
+    or another process's run is still in progress."""
+    from django.db import IntegrityError, transaction
+    from django.db.models import Q
+    from django.utils import timezone
+    from ai_sdr_agent.models import SDRSchedulerJob
+
+    me = instance_id()
+    now = timezone.now()
+    # Firings jitter by a few seconds; don't skip a run over that.
+    tolerance = min(30.0, interval * 0.1)
+    due_before = now - datetime.timedelta(seconds=interval - tolerance)
+    abandoned_before = now - datetime.timedelta(seconds=max(interval, MIN_ABANDON_SECONDS))
+    claimed = SDRSchedulerJob.objects.filter(
+        Q(last_started_at__isnull=True) | Q(last_started_at__lte=due_before),
+        ~Q(last_status='running') | Q(last_holder=me) | Q(last_started_at__lte=abandoned_before),
+        job_id=job_id,
+    ).update(last_started_at=now, last_status='running', last_holder=me)
+    if claimed:
+        return True
+    if SDRSchedulerJob.objects.filter(job_id=job_id).exists():
+        return False
     try:
-        from core.api_key_service import run_due_token_resets
-        result = run_due_token_resets()
-        if result and result.get('applied'):
-            logger.info("Token resets applied → %s", result)
+        with transaction.atomic():
+            SDRSchedulerJob.objects.create(
+                job_id=job_id, last_started_at=now, last_status='running', last_holder=me,
+            )
+        return True
+    except IntegrityError:
+        return False
+
+
+def _record_run(job_id: str, status: str, error: str, duration_ms: int) -> None:
+    from django.db.models import F
+    from django.utils import timezone
+    from ai_sdr_agent.models import SDRSchedulerJob
+
+    SDRSchedulerJob.objects.filter(job_id=job_id).update(
+        last_status=status,
+        last_finished_at=timezone.now(),
+        last_duration_ms=duration_ms,
+        last_error=error,
+        run_count=F('run_count') + 1,
+        error_count=F('error_count') + (1 if status == 'error' else 0),
+        total_duration_ms=F('total_duration_ms') + duration_ms,
+    )
+
+
+def _run_job(job_id: str, interval: int, func) -> None:
+    """APScheduler entry point for every job: run ``func`` if this process
+    is the leader and the job is due, and record how the run went."""
+    if not is_leader():
+        return
+    try:
+        if not _claim_run(job_id, interval):
+            return
+        started = time.monotonic()
+        status, error = 'success', ''
+        try:
+            result = func()
+            if result:
+                logger.debug("SDR %s → %s", job_id, result)
+        except Exception as exc:
+            status, error = 'error', str(exc)[:2000]
+            logger.exception("SDR %s crashed: %s", job_id, exc)
+        _record_run(job_id, status, error, int((time.monotonic() - started) * 1000))
     except Exception as exc:
-        logger.exception("Token reset job crashed: %s", exc)
+        logger.exception("SDR scheduler: bookkeeping for '%s' failed: %s", job_id, exc)
     finally:
         _close_db()
 
@@ -161,17 +365,17 @@ def _on_job_event(event):
             "SDR scheduler: job '%s' raised an unhandled exception: %s",
             event.job_id, event.exception,
         )
-    # EVENT_JOB_EXECUTED → debug already handled inside each wrapper
+    # EVENT_JOB_EXECUTED → timing is recorded by _run_job
 
 
 # ── Public API ───────────────────────────────────────────────────────────────
 
 def start_scheduler() -> None:
     """
-    Start the BackgroundScheduler. Idempotent — safe to call multiple times.
-    If the scheduler is already running this is a no-op.
+    Start the BackgroundScheduler and the lease heartbeat. Idempotent — safe
+    to call multiple times. If the scheduler is already running this is a no-op.
     """
-    global _scheduler
+    global _scheduler, _heartbeat_thread
 
     with _lock:
         if _scheduler is not None and _scheduler.running:
@@ -198,26 +402,13 @@ def start_scheduler() -> None:
             EVENT_JOB_ERROR | EVENT_JOB_MISSED | EVENT_JOB_EXECUTED,
         )
 
-        # ── Job registry ─────────────────────────────────────────────────────
-        # (job_id, callable, interval_seconds, initial_delay_seconds)
         now = datetime.datetime.now(tz=datetime.timezone.utc)
-        jobs = [
-            ('send_due_steps',    _run_send_due_steps,     300,    30),
-            ('qualify_queue',     _run_qualify_queue,      120,    45),
-            ('check_inbox',       _run_check_inbox,         300,    60),
-            ('auto_start',        _run_auto_start,          900,    90),
-            ('auto_complete',     _run_auto_complete,       3600,  120),
-            ('meeting_reminders', _run_meeting_reminders,   3600,  150),
-            ('daily_analytics',   _run_daily_analytics,    86400,  180),
-            # Apply due managed-token resets every 5 min (first run 45 s in).
-            ('token_resets',      _run_token_resets,        300,    45),
-        ]
-
-        for job_id, func, interval, delay in jobs:
+        for job_id, func, interval, delay in JOBS:
             _scheduler.add_job(
-                func,
+                _run_job,
+                args=(job_id, interval, func),
                 trigger='interval',
-                seconds=interval,
+                seconds=min(interval, POLL_SECONDS),
                 id=job_id,
                 name=f'sdr-{job_id}',
                 start_date=now + datetime.timedelta(seconds=delay),
@@ -226,20 +417,25 @@ def start_scheduler() -> None:
 
         _scheduler.start()
 
+        _heartbeat_stop.clear()
+        _heartbeat_thread = threading.Thread(
+            target=_heartbeat_loop, name='sdr-scheduler-lease', daemon=True,
+        )
+        _heartbeat_thread.start()
+
         # Ensure clean shutdown when the Python process exits (Ctrl-C, SIGTERM, etc.)
         atexit.register(stop_scheduler)
 
         logger.info(
-            "SDR scheduler started (APScheduler %s) — "
-            "send_due_steps(5m), check_inbox(5m), auto_start(15m), "
-            "auto_complete(1h), meeting_reminders(1h), daily_analytics(24h)",
-            _apscheduler_version(),
+            "SDR scheduler started (APScheduler %s, instance %s) — jobs run only "
+            "while this process holds the leader lease",
+            _apscheduler_version(), instance_id(),
         )
 
 
 def stop_scheduler() -> None:
     """Gracefully stop the scheduler (called by atexit and Django shutdown signal)."""
-    global _scheduler
+    global _scheduler, _heartbeat_thread
     with _lock:
         if _scheduler is not None and _scheduler.running:
             try:
@@ -248,6 +444,10 @@ def stop_scheduler() -> None:
             except Exception as exc:
                 logger.warning("SDR scheduler shutdown error: %s", exc)
             _scheduler = None
+        if _heartbeat_thread is not None:
+            _heartbeat_stop.set()
+            _heartbeat_thread = None
+            _release_lease()
 
 
 def get_scheduler() -> BackgroundScheduler | None:
@@ -255,23 +455,69 @@ def get_scheduler() -> BackgroundScheduler | None:
     return _scheduler
 
 
+def _iso(value):
+    return value.isoformat() if value else None
+
+
 def scheduler_status() -> dict:
     """
     Return a status dict suitable for a health-check API endpoint.
-    Example: {"running": true, "jobs": [{"id": "send_due_steps", "next_run": "..."}]}
+
+    "running" / "next_run" describe the scheduler in the process that served
+    the request; "leader" and the per-job stats are cluster-wide (DB rows).
+    Example: {"running": true, "instance": "...", "is_leader": false,
+              "leader": {"holder": "...", "expires_at": "..."},
+              "jobs": [{"id": "send_due_steps", "next_run": "...", "last_status": "success",
+                        "last_duration_ms": 812, "avg_duration_ms": 640, ...}]}
     """
     s = _scheduler
-    if s is None or not s.running:
-        return {"running": False, "jobs": []}
-
-    jobs = []
-    for job in s.get_jobs():
-        jobs.append({
-            "id": job.id,
-            "name": job.name,
-            "next_run": job.next_run_time.isoformat() if job.next_run_time else None,
+    running = s is not None and s.running
+    scheduled = {job.id: job for job in s.get_jobs()} if running else {}
+
+    status = {
+        "running": running,
+        "instance": instance_id(),
+        "is_leader": running and is_leader(),
+        "leader": None,
+        "jobs": [],
+    }
+    stats = {}
+    try:
+        from django.utils import timezone
+        from ai_sdr_agent.models import SDRSchedulerJob, SDRSchedulerLease
+
+        lease = SDRSchedulerLease.objects.filter(name=LEASE_NAME).first()
+        if lease is not None and lease.holder:
+            status["leader"] = {
+                "holder": lease.holder,
+                "acquired_at": _iso(lease.acquired_at),
+                "renewed_at": _iso(lease.renewed_at),
+                "expires_at": _iso(lease.expires_at),
+                "expired": bool(lease.expires_at and lease.expires_at < timezone.now()),
+            }
+        stats = {row.job_id: row for row in SDRSchedulerJob.objects.all()}
+    except Exception as exc:
+        status["error"] = str(exc)
+
+    for job_id, _func, interval, _delay in JOBS:
+        job = scheduled.get(job_id)
+        row = stats.get(job_id)
+        status["jobs"].append({
+            "id": job_id,
+            "name": f'sdr-{job_id}',
+            "interval_seconds": interval,
+            "next_run": _iso(job.next_run_time) if job else None,
+            "last_status": row.last_status if row else None,
+            "last_started_at": _iso(row.last_started_at) if row else None,
+            "last_finished_at": _iso(row.last_finished_at) if row else None,
+            "last_duration_ms": row.last_duration_ms if row else None,
+            "avg_duration_ms": round(row.total_duration_ms / row.run_count) if row and row.run_count else None,
+            "last_error": row.last_error if row else '',
+            "last_holder": row.last_holder if row else '',
+            "run_count": row.run_count if row else 0,
+            "error_count": row.error_count if row else 0,
         })
-    return {"running": True, "jobs": jobs}
+    return status
 
 
 # ── Helpers ──────────────────────────────────────────────────────────────────
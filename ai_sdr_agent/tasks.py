@@ -7,6 +7,8 @@ The Celery shared_tasks simply delegate to those _impl functions.
 """
 
 import logging
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import timedelta
 
 from celery import shared_task
@@ -20,116 +22,98 @@ logger = logging.getLogger(__name__)
 # Core implementations (plain Python — no Celery dependency)
 # ---------------------------------------------------------------------------
 
-def send_due_steps_impl():
-    """Send the next due step for every active enrollment whose next_action_at has arrived."""
-    from ai_sdr_agent.models import SDRCampaign
-    from ai_sdr_agent.agents.outreach_agent import OutreachAgent
-
-    now = timezone.now()
-
-    active_campaigns = SDRCampaign.objects.filter(status='active').select_related('company_user__company')
-    total_processed = 0
-    total_sent = 0
-    total_failed = 0
-
-    logger.info(
-        "SDR [send-due-steps] START — time=%s active_campaigns=%d",
-        now.isoformat(), active_campaigns.count(),
+# Most enrollments claimed by one send-due-steps tick; the rest stay due
+# and are picked up oldest-first on the next tick.
+SEND_DUE_BATCH_SIZE = 500
+# A claimed enrollment's next_action_at is pushed this far out while it is
+# processed, so a scheduler running in another process skips it. If that
+# worker dies the enrollment becomes due again when the lease expires.
+SEND_DUE_CLAIM_LEASE = timedelta(minutes=10)
+# Sending mailboxes handled in parallel per tick. Each mailbox's enrollments
+# are still sent one after another, in due order.
+SEND_DUE_MAX_WORKERS = 4
+
+
+def _claim_due_enrollments(now):
+    """Claim the due enrollments of every active campaign; returns their ids.
+
+    One indexed scan over (status, next_action_at) replaces the per-campaign
+    walk. Candidates are re-selected by id with
+    ``select_for_update(skip_locked=True)`` (no joins — mssql can't lock
+    ``of=`` a subset) and leased by moving next_action_at into the future,
+    so concurrent schedulers never pick the same enrollment. Rows that
+    OutreachAgent.process_enrollment doesn't reschedule (guards, rate
+    limits) are retried once the lease expires.
+    """
+    from django.db import transaction
+    from ai_sdr_agent.models import SDRCampaignEnrollment
+
+    due_filter = Q(next_action_at__lte=now) | Q(next_action_at__isnull=True)
+    candidate_ids = list(
+        SDRCampaignEnrollment.objects
+        .filter(due_filter, status='active', campaign__status='active')
+        .order_by('next_action_at')
+        .values_list('id', flat=True)[:SEND_DUE_BATCH_SIZE]
     )
+    if not candidate_ids:
+        return []
+    with transaction.atomic():
+        claimed_ids = list(
+            SDRCampaignEnrollment.objects
+            .select_for_update(skip_locked=True)
+            .filter(due_filter, id__in=candidate_ids, status='active')
+            .values_list('id', flat=True)
+        )
+        if claimed_ids:
+            SDRCampaignEnrollment.objects.filter(id__in=claimed_ids).update(
+                next_action_at=now + SEND_DUE_CLAIM_LEASE,
+            )
+    return claimed_ids
 
-    # One email address must receive at most ONE email per scheduler cycle.
-    # This prevents duplicate sends when the same address exists in:
-    #   - multiple lead records enrolled in the same campaign
-    #   - multiple active campaigns simultaneously
-    sent_emails_this_run: set = set()
-
-    for campaign in active_campaigns:
-        # Resolve key per campaign owner — each campaign belongs to a company_user
-        try:
-            _company = campaign.company_user.company
-            agent = OutreachAgent(company=_company)
-        except Exception as _key_exc:
-            from core.api_key_service import KeyServiceError
-            if isinstance(_key_exc, KeyServiceError):
-                logger.warning(
-                    "SDR [send-due-steps] campaign=%d SKIPPED — key blocked: %s",
-                    campaign.id, _key_exc.reason,
-                )
-                continue
-            logger.error("SDR [send-due-steps] campaign=%d agent init failed: %s", campaign.id, _key_exc)
-            continue
-
-        due_qs = campaign.enrollments.filter(
-            status='active'
-        ).filter(
-            Q(next_action_at__lte=now) | Q(next_action_at__isnull=True)
-        ).select_related('lead')
 
-        due_count = due_qs.count()
-        logger.info(
-            "SDR [send-due-steps] campaign=%d (%s) due_enrollments=%d",
-            campaign.id, campaign.name, due_count,
-        )
+def _emailed_today(emails, since):
+    """{email: {campaign ids that emailed it since ``since``}} for ``emails``
+    (normalized). One query per IN_LOOKUP_CHUNK addresses."""
+    from core.tabular_import import IN_LOOKUP_CHUNK
+    from ai_sdr_agent.models import SDROutreachLog
 
-        for enrollment in due_qs:
-            lead_email = (enrollment.lead.email or '').strip().lower()
-            lead_name = enrollment.lead.display_name
+    emails = sorted(emails)
+    sent = defaultdict(set)
+    for i in range(0, len(emails), IN_LOOKUP_CHUNK):
+        rows = SDROutreachLog.objects.filter(
+            status='sent',
+            sent_at__gte=since,
+            enrollment__lead__email_normalized__in=emails[i:i + IN_LOOKUP_CHUNK],
+        ).values_list('enrollment__lead__email_normalized', 'enrollment__campaign_id').distinct()
+        for email, campaign_id in rows:
+            sent[email].add(campaign_id)
+    return sent
 
-            logger.debug(
-                "SDR [send-due-steps] considering enrollment=%d lead=%s email=%s "
-                "current_step=%d next_action_at=%s",
-                enrollment.id, lead_name, lead_email,
-                enrollment.current_step, enrollment.next_action_at,
-            )
 
-            # Hard dedup: skip this enrollment if we already sent to this address
-            if lead_email and lead_email in sent_emails_this_run:
-                logger.warning(
-                    "SDR [DEDUP-CYCLE] enrollment=%d lead=%s email=%s — "
-                    "SKIPPED: already sent to this address in this scheduler cycle",
-                    enrollment.id, lead_name, lead_email,
-                )
-                continue
+def _sending_mailbox(campaign):
+    return ((campaign.smtp_host or '').strip().lower(), (campaign.smtp_username or '').strip().lower())
 
-            # ── Cross-campaign daily guard ───────────────────────────────────
-            # A lead enrolled in multiple campaigns must receive at most ONE
-            # email per day across ALL campaigns. This prevents a lead in
-            # Campaign A and Campaign B from getting 2 emails on Day 1.
-            if lead_email:
-                from ai_sdr_agent.models import SDROutreachLog
-                today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
-                already_emailed_today = SDROutreachLog.objects.filter(
-                    enrollment__lead__email__iexact=lead_email,
-                    status='sent',
-                    sent_at__gte=today_start,
-                ).exclude(enrollment__campaign=campaign).exists()
-                if already_emailed_today:
-                    logger.warning(
-                        "SDR [CROSS-CAMPAIGN-DAILY] enrollment=%d lead=%s email=%s "
-                        "campaign=%d — SKIPPED: already emailed from another campaign today",
-                        enrollment.id, lead_name, lead_email, campaign.id,
-                    )
-                    continue
-            # ────────────────────────────────────────────────────────────────
 
-            # Lock this email address NOW — before the call — so that even if
-            # process_enrollment throws an exception the address is still blocked
-            # for all subsequent enrollments in this same scheduler cycle.
-            if lead_email:
-                sent_emails_this_run.add(lead_email)
+def _send_partition(batch):
+    """Process one sending mailbox's enrollments in order (pool worker)."""
+    from django.db import connection
 
+    counts = {'processed': 0, 'sent': 0, 'failed': 0}
+    try:
+        for agent, enrollment, lead_email in batch:
+            lead_name = enrollment.lead.display_name
             try:
                 result = agent.process_enrollment(enrollment)
-                total_processed += 1
+                counts['processed'] += 1
                 status = result.get('status')
                 logger.info(
                     "SDR [send-due-steps] enrollment=%d lead=%s email=%s → status=%s",
                     enrollment.id, lead_name, lead_email, status,
                 )
                 if status == 'sent':
-                    total_sent += 1
+                    counts['sent'] += 1
                 elif status == 'failed':
-                    total_failed += 1
+                    counts['failed'] += 1
                     logger.error(
                         "SDR [SEND-FAIL] enrollment=%d lead=%s email=%s error=%s",
                         enrollment.id, lead_name, lead_email, result.get('error'),
@@ -139,232 +123,360 @@ def send_due_steps_impl():
                     "SDR [SEND-EXCEPTION] enrollment=%d lead=%s email=%s — %s",
                     enrollment.id, lead_name, lead_email, exc, exc_info=True,
                 )
-                total_failed += 1
+                counts['failed'] += 1
+    finally:
+        connection.close()
+    return counts
+
+
+def send_due_steps_impl():
+    """Send the next due step for every active enrollment whose next_action_at has arrived.
+
+    Which enrollments go out this tick (agent available, per-cycle and
+    cross-campaign daily dedupe) is decided up front in this thread; the
+    sends are then dispatched on a pool of SEND_DUE_MAX_WORKERS threads,
+    one sending mailbox per task, so a slow SMTP server only delays its
+    own mailbox.
+    """
+    from ai_sdr_agent.models import SDRCampaignEnrollment
+    from ai_sdr_agent.agents.outreach_agent import OutreachAgent
+
+    now = timezone.now()
+
+    total_processed = 0
+    total_sent = 0
+    total_failed = 0
+
+    claimed_ids = _claim_due_enrollments(now)
+    # Oldest-due first, grouped by campaign so each campaign's agent is
+    # built once.
+    due_enrollments = list(
+        SDRCampaignEnrollment.objects
+        .filter(id__in=claimed_ids)
+        .select_related('lead', 'campaign__company_user__company')
+        .order_by('campaign_id', 'id')
+    )
+    campaign_ids = {e.campaign_id for e in due_enrollments}
 
     logger.info(
-        "SDR [send-due-steps] END — campaigns=%d processed=%d sent=%d failed=%d",
-        active_campaigns.count(), total_processed, total_sent, total_failed,
+        "SDR [send-due-steps] START — time=%s campaigns_with_due=%d due_enrollments=%d",
+        now.isoformat(), len(campaign_ids), len(due_enrollments),
+    )
+
+    # Cross-campaign daily guard: a lead enrolled in multiple campaigns must
+    # receive at most ONE email per day across ALL campaigns. Who was
+    # emailed today (and from which campaigns) is loaded once for the tick.
+    today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    emailed_today = _emailed_today(
+        {(e.lead.email or '').strip().lower() for e in due_enrollments} - {''},
+        today_start,
+    )
+
+    # One email address must receive at most ONE email per scheduler cycle.
+    # This prevents duplicate sends when the same address exists in:
+    #   - multiple lead records enrolled in the same campaign
+    #   - multiple active campaigns simultaneously
+    sent_emails_this_run: set = set()
+
+    agents = {}
+    partitions = defaultdict(list)   # sending mailbox → [(agent, enrollment, email)]
+    for enrollment in due_enrollments:
+        campaign = enrollment.campaign
+        if campaign.id not in agents:
+            # Resolve key per campaign owner — each campaign belongs to a company_user
+            agents[campaign.id] = None
+            try:
+                _company = campaign.company_user.company
+                agents[campaign.id] = OutreachAgent(company=_company)
+            except Exception as _key_exc:
+                from core.api_key_service import KeyServiceError
+                if isinstance(_key_exc, KeyServiceError):
+                    logger.warning(
+                        "SDR [send-due-steps] campaign=%d SKIPPED — key blocked: %s",
+                        campaign.id, _key_exc.reason,
+                    )
+                else:
+                    logger.error("SDR [send-due-steps] campaign=%d agent init failed: %s", campaign.id, _key_exc)
+        agent = agents[campaign.id]
+        if agent is None:
+            continue
+
+        lead_email = (enrollment.lead.email or '').strip().lower()
+        lead_name = enrollment.lead.display_name
+
+        logger.debug(
+            "SDR [send-due-steps] considering enrollment=%d lead=%s email=%s "
+            "current_step=%d next_action_at=%s",
+            enrollment.id, lead_name, lead_email,
+            enrollment.current_step, enrollment.next_action_at,
+        )
+
+        # Hard dedup: skip this enrollment if we already sent to this address
+        if lead_email and lead_email in sent_emails_this_run:
+            logger.warning(
+                "SDR [DEDUP-CYCLE] enrollment=%d lead=%s email=%s — "
+                "SKIPPED: already sent to this address in this scheduler cycle",
+                enrollment.id, lead_name, lead_email,
+            )
+            continue
+
+        if lead_email and emailed_today.get(lead_email, set()) - {campaign.id}:
+            logger.warning(
+                "SDR [CROSS-CAMPAIGN-DAILY] enrollment=%d lead=%s email=%s "
+                "campaign=%d — SKIPPED: already emailed from another campaign today",
+                enrollment.id, lead_name, lead_email, campaign.id,
+            )
+            continue
+
+        # Lock this email address NOW — before dispatch — so that even if
+        # process_enrollment throws an exception the address is still blocked
+        # for all subsequent enrollments in this same scheduler cycle.
+        if lead_email:
+            sent_emails_this_run.add(lead_email)
+        partitions[_sending_mailbox(campaign)].append((agent, enrollment, lead_email))
+
+    if partitions:
+        workers = min(SEND_DUE_MAX_WORKERS, len(partitions))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='sdr-send') as pool:
+            for counts in pool.map(_send_partition, partitions.values()):
+                total_processed += counts['processed']
+                total_sent += counts['sent']
+                total_failed += counts['failed']
+
+    logger.info(
+        "SDR [send-due-steps] END — campaigns=%d mailboxes=%d processed=%d sent=%d failed=%d",
+        len(campaign_ids), len(partitions), total_processed, total_sent, total_failed,
     )
     return {
-        'campaigns': active_campaigns.count(),
+        'campaigns': len(campaign_ids),
         'processed': total_processed,
         'sent': total_sent,
         'failed': total_failed,
     }
 
 
-def check_inbox_replies_impl():
-    """Poll IMAP inbox for replies on every active campaign with auto_check_replies=True."""
-    from ai_sdr_agent.models import SDRCampaign, SDRMeeting
+def _reply_agents(campaign, cache):
+    """(OutreachAgent, EmailAssistantAgent) for the campaign owner's company,
+    or None if they can't be created (e.g. its AI keys are blocked)."""
     from ai_sdr_agent.agents.outreach_agent import OutreachAgent
     from ai_sdr_agent.agents.email_assistant_agent import EmailAssistantAgent
 
-    campaigns = SDRCampaign.objects.filter(
-        status='active', auto_check_replies=True
-    ).select_related('company_user__company')
-
-    total_replies = 0
-    total_meetings = 0
-
-    logger.info(
-        "SDR [check-inbox] START — checking %d active campaigns for replies",
-        campaigns.count(),
-    )
-
-    for campaign in campaigns:
-        # Resolve keys per campaign owner
+    company = campaign.company_user.company
+    if company.id not in cache:
         try:
-            _company = campaign.company_user.company
-            agent = OutreachAgent(company=_company)
-            email_agent = EmailAssistantAgent(company=_company)
+            cache[company.id] = (OutreachAgent(company=company), EmailAssistantAgent(company=company))
         except Exception as _key_exc:
             from core.api_key_service import KeyServiceError
             if isinstance(_key_exc, KeyServiceError):
                 logger.warning(
-                    "SDR [check-inbox] campaign=%d SKIPPED — key blocked: %s",
-                    campaign.id, getattr(_key_exc, 'reason', str(_key_exc)),
+                    "SDR [check-inbox] company=%d replies DEFERRED — key blocked: %s",
+                    company.id, getattr(_key_exc, 'reason', str(_key_exc)),
                 )
-                continue
-            logger.error("SDR [check-inbox] campaign=%d agent init failed: %s", campaign.id, _key_exc)
-            continue
+            else:
+                logger.error("SDR [check-inbox] company=%d agent init failed: %s", company.id, _key_exc)
+            cache[company.id] = None
+    return cache[company.id]
 
-        try:
-            enrollments = list(
-                campaign.enrollments
-                .filter(status__in=['active', 'paused', 'completed', 'replied'])
-                .exclude(lead__email='')
-                .select_related('lead')
-                .prefetch_related('logs')
-            )
-            logger.info(
-                "SDR [check-inbox] campaign=%d (%s) checking %d enrollments via IMAP",
-                campaign.id, campaign.name, len(enrollments),
-            )
 
-            if not enrollments:
-                continue
+def _apply_inbox_reply(r, agent_cache, totals):
+    """Classify one reply and act on it. Returns False if it has to wait
+    for a later poll (no agents for the campaign's company)."""
+    from ai_sdr_agent.models import SDRMeeting
 
-            replies = agent.check_inbox_for_replies(campaign, enrollments)
-            logger.info(
-                "SDR [check-inbox] campaign=%d IMAP returned %d candidate replies",
-                campaign.id, len(replies),
-            )
+    enrollment = r['enrollment']
+    campaign = enrollment.campaign
+    reply_text = r['reply_text']
+    lead = enrollment.lead
+    lead_email = r['sender_email']
+    reply_subject = (r.get('subject') or '').lower()
+
+    # ── Bounce detection ─────────────────────────────────────────
+    # Hard bounces come from MAILER-DAEMON / postmaster with
+    # delivery-failure subjects. Detect and mark lead + enrollment.
+    _BOUNCE_SENDERS = ('mailer-daemon', 'postmaster', 'noreply+bounce',
+                       'bounce+', 'bounces+', 'mail-noreply')
+    _BOUNCE_SUBJECTS = (
+        'undeliverable', 'delivery failure', 'delivery status notification',
+        'mail delivery failed', 'returned mail', 'failure notice',
+        'auto-submitted', 'could not deliver', 'message not delivered',
+        'address not found', 'user unknown',
+    )
+    is_bounce = (
+        any(b in lead_email for b in _BOUNCE_SENDERS) or
+        any(b in reply_subject for b in _BOUNCE_SUBJECTS)
+    )
+    if is_bounce:
+        # Find the actual lead whose email bounced — it's the lead
+        # enrolled in this campaign, not the mailer-daemon sender.
+        bounced_lead = enrollment.lead
+        if not bounced_lead.email_bounced:
+            bounced_lead.email_bounced = True
+            bounced_lead.email_bounced_at = timezone.now()
+            bounced_lead.email_bounce_reason = f"{lead_email}: {reply_subject[:200]}"
+            bounced_lead.save(update_fields=['email_bounced', 'email_bounced_at', 'email_bounce_reason'])
+        enrollment.status = 'bounced'
+        enrollment.save(update_fields=['status'])
+        logger.warning(
+            "SDR [BOUNCE] lead=%s email=%s enrollment=%d marked bounced — subject='%s'",
+            bounced_lead.display_name, bounced_lead.email, enrollment.id, reply_subject,
+        )
+        return True   # skip normal reply classification
+    # ─────────────────────────────────────────────────────────────
 
-            for r in replies:
-                enrollment = r['enrollment']
-                reply_text = r['reply_text']
-                lead = enrollment.lead
-                lead_email = r['sender_email']
-                reply_subject = (r.get('subject') or '').lower()
-
-                # ── Bounce detection ─────────────────────────────────────────
-                # Hard bounces come from MAILER-DAEMON / postmaster with
-                # delivery-failure subjects. Detect and mark lead + enrollment.
-                _BOUNCE_SENDERS = ('mailer-daemon', 'postmaster', 'noreply+bounce',
-                                   'bounce+', 'bounces+', 'mail-noreply')
-                _BOUNCE_SUBJECTS = (
-                    'undeliverable', 'delivery failure', 'delivery status notification',
-                    'mail delivery failed', 'returned mail', 'failure notice',
-                    'auto-submitted', 'could not deliver', 'message not delivered',
-                    'address not found', 'user unknown',
-                )
-                is_bounce = (
-                    any(b in lead_email for b in _BOUNCE_SENDERS) or
-                    any(b in reply_subject for b in _BOUNCE_SUBJECTS)
-                )
-                if is_bounce:
-                    # Find the actual lead whose email bounced — it's the lead
-                    # enrolled in this campaign, not the mailer-daemon sender.
-                    bounced_lead = enrollment.lead
-                    if not bounced_lead.email_bounced:
-                        bounced_lead.email_bounced = True
-                        bounced_lead.email_bounced_at = timezone.now()
-                        bounced_lead.email_bounce_reason = f"{lead_email}: {reply_subject[:200]}"
-                        bounced_lead.save(update_fields=['email_bounced', 'email_bounced_at', 'email_bounce_reason'])
-                    enrollment.status = 'bounced'
-                    enrollment.save(update_fields=['status'])
-                    logger.warning(
-                        "SDR [BOUNCE] lead=%s email=%s enrollment=%d marked bounced — subject='%s'",
-                        bounced_lead.display_name, bounced_lead.email, enrollment.id, reply_subject,
-                    )
-                    continue   # skip normal reply classification
-                # ─────────────────────────────────────────────────────────────
+    # Skip already-unsubscribed enrollments
+    if enrollment.status == 'unsubscribed':
+        return True
 
-                # Skip already-unsubscribed enrollments
-                if enrollment.status == 'unsubscribed':
-                    continue
+    # Skip 'replied' enrollments that already have a meeting booked
+    already_has_meeting = SDRMeeting.objects.filter(enrollment=enrollment).exists()
+    if enrollment.status == 'replied' and already_has_meeting:
+        return True
 
-                # Skip 'replied' enrollments that already have a meeting booked
-                already_has_meeting = SDRMeeting.objects.filter(enrollment=enrollment).exists()
-                if enrollment.status == 'replied' and already_has_meeting:
-                    continue
+    agents = _reply_agents(campaign, agent_cache)
+    if agents is None:
+        return False
+    agent, email_agent = agents
 
-                classification = email_agent.classify_reply(reply_text)
-                action = classification['action']
-                category = classification['category']
-                resume_date = classification.get('resume_date')
+    classification = email_agent.classify_reply(reply_text)
+    action = classification['action']
+    category = classification['category']
+    resume_date = classification.get('resume_date')
 
-                logger.info(
-                    "SDR [check-inbox] enrollment=%d lead=%s → category=%s action=%s",
-                    enrollment.id, lead_email, category, action,
-                )
+    logger.info(
+        "SDR [check-inbox] enrollment=%d lead=%s → category=%s action=%s",
+        enrollment.id, lead_email, category, action,
+    )
+
+    if action == 'pause':
+        enrollment.status = 'paused'
+        enrollment.replied_at = timezone.now()
+        enrollment.reply_content = reply_text[:2000]
+        enrollment.reply_sentiment = 'out_of_office'
+        enrollment.next_action_at = resume_date or (timezone.now() + timedelta(days=5))
+        enrollment.save()
+        logger.info('SDR [OOO] enrollment=%d paused until %s', enrollment.id, enrollment.next_action_at)
+
+    elif action == 'stop':
+        enrollment.status = 'unsubscribed'
+        enrollment.replied_at = timezone.now()
+        enrollment.reply_content = reply_text[:2000]
+        enrollment.reply_sentiment = 'not_interested'
+        enrollment.save()
+        lead.status = 'disqualified'
+        lead.save(update_fields=['status'])
+        totals['replies'] += 1
+        logger.info('SDR [NOT-INTERESTED] enrollment=%d unsubscribed, lead=%s disqualified', enrollment.id, lead.display_name)
+
+    elif action == 'send_info':
+        if enrollment.status != 'replied':
+            enrollment.status = 'replied'
+            enrollment.replied_at = timezone.now()
+            enrollment.reply_content = reply_text[:2000]
+            enrollment.reply_sentiment = 'wants_more_info'
+            enrollment.save()
+        lead.status = 'replied'
+        lead.save(update_fields=['status'])
+        campaign.replies_received = (campaign.replies_received or 0) + 1
+        totals['replies'] += 1
+        try:
+            info_email = email_agent.generate_more_info_email(lead, campaign, reply_text)
+            agent.send_email(campaign, lead.email, info_email['subject'], info_email['body'])
+            logger.info('SDR [MORE-INFO] sent follow-up to %s', lead.email)
+        except Exception as exc:
+            logger.warning('SDR [MORE-INFO] email failed for %s: %s', lead.email, exc)
+
+    elif action == 'book_meeting':
+        if enrollment.status != 'replied':
+            enrollment.status = 'replied'
+            enrollment.replied_at = timezone.now()
+            enrollment.reply_content = reply_text[:2000]
+            enrollment.reply_sentiment = 'positive'
+            enrollment.save()
+        lead.status = 'replied'
+        lead.save(update_fields=['status'])
+        campaign.replies_received = (campaign.replies_received or 0) + 1
+        totals['replies'] += 1
+
+        from ai_sdr_agent.agents.meeting_scheduling_agent import guess_timezone_from_location
+        lead_tz = guess_timezone_from_location(lead.company_location or '')
+        meeting, created = SDRMeeting.objects.get_or_create(
+            enrollment=enrollment,
+            defaults={
+                'company_user': campaign.company_user,
+                'lead': lead,
+                'title': f'Discovery Call with {lead.display_name}',
+                'reply_snippet': reply_text[:500],
+                'calendar_link': campaign.calendar_link or '',
+                'status': 'pending',
+                'lead_timezone': lead_tz,
+            },
+        )
+        if created:
+            totals['meetings'] += 1
+            campaign.meetings_booked = (campaign.meetings_booked or 0) + 1
+            try:
+                from ai_sdr_agent.agents.meeting_scheduling_agent import MeetingSchedulingAgent
+                sched_agent = MeetingSchedulingAgent()
+                prep_notes = sched_agent.generate_prep_notes(lead, enrollment, reply_text)
+                sent = sched_agent.send_scheduling_email_once(campaign, lead, meeting, prep_notes)
+                if sent:
+                    meeting.prep_notes = prep_notes
+                    meeting.save(update_fields=['prep_notes'])
+            except Exception as exc:
+                logger.warning('SDR [MEETING] scheduling email FAILED for %s: %s', lead.email, exc)
+
+    else:  # wait / neutral
+        enrollment.reply_content = reply_text[:2000]
+        enrollment.reply_sentiment = 'neutral'
+        enrollment.save(update_fields=['reply_content', 'reply_sentiment'])
+    return True
 
-                if action == 'pause':
-                    enrollment.status = 'paused'
-                    enrollment.replied_at = timezone.now()
-                    enrollment.reply_content = reply_text[:2000]
-                    enrollment.reply_sentiment = 'out_of_office'
-                    enrollment.next_action_at = resume_date or (timezone.now() + timedelta(days=5))
-                    enrollment.save()
-                    logger.info('SDR [OOO] enrollment=%d paused until %s', enrollment.id, enrollment.next_action_at)
-
-                elif action == 'stop':
-                    enrollment.status = 'unsubscribed'
-                    enrollment.replied_at = timezone.now()
-                    enrollment.reply_content = reply_text[:2000]
-                    enrollment.reply_sentiment = 'not_interested'
-                    enrollment.save()
-                    lead.status = 'disqualified'
-                    lead.save(update_fields=['status'])
-                    total_replies += 1
-                    logger.info('SDR [NOT-INTERESTED] enrollment=%d unsubscribed, lead=%s disqualified', enrollment.id, lead.display_name)
-
-                elif action == 'send_info':
-                    if enrollment.status != 'replied':
-                        enrollment.status = 'replied'
-                        enrollment.replied_at = timezone.now()
-                        enrollment.reply_content = reply_text[:2000]
-                        enrollment.reply_sentiment = 'wants_more_info'
-                        enrollment.save()
-                    lead.status = 'replied'
-                    lead.save(update_fields=['status'])
-                    campaign.replies_received = (campaign.replies_received or 0) + 1
-                    total_replies += 1
-                    try:
-                        info_email = email_agent.generate_more_info_email(lead, campaign, reply_text)
-                        agent.send_email(campaign, lead.email, info_email['subject'], info_email['body'])
-                        logger.info('SDR [MORE-INFO] sent follow-up to %s', lead.email)
-                    except Exception as exc:
-                        logger.warning('SDR [MORE-INFO] email failed for %s: %s', lead.email, exc)
-
-                elif action == 'book_meeting':
-                    if enrollment.status != 'replied':
-                        enrollment.status = 'replied'
-                        enrollment.replied_at = timezone.now()
-                        enrollment.reply_content = reply_text[:2000]
-                        enrollment.reply_sentiment = 'positive'
-                        enrollment.save()
-                    lead.status = 'replied'
-                    lead.save(update_fields=['status'])
-                    campaign.replies_received = (campaign.replies_received or 0) + 1
-                    total_replies += 1
-
-                    from ai_sdr_agent.agents.meeting_scheduling_agent import guess_timezone_from_location
-                    lead_tz = guess_timezone_from_location(lead.company_location or '')
-                    meeting, created = SDRMeeting.objects.get_or_create(
-                        enrollment=enrollment,
-                        defaults={
-                            'company_user': campaign.company_user,
-                            'lead': lead,
-                            'title': f'Discovery Call with {lead.display_name}',
-                            'reply_snippet': reply_text[:500],
-                            'calendar_link': campaign.calendar_link or '',
-                            'status': 'pending',
-                            'lead_timezone': lead_tz,
-                        },
-                    )
-                    if created:
-                        total_meetings += 1
-                        campaign.meetings_booked = (campaign.meetings_booked or 0) + 1
-                        try:
-                            from ai_sdr_agent.agents.meeting_scheduling_agent import MeetingSchedulingAgent
-                            sched_agent = MeetingSchedulingAgent()
-                            prep_notes = sched_agent.generate_prep_notes(lead, enrollment, reply_text)
-                            sent = sched_agent.send_scheduling_email_once(campaign, lead, meeting, prep_notes)
-                            if sent:
-                                meeting.prep_notes = prep_notes
-                                meeting.save(update_fields=['prep_notes'])
-                        except Exception as exc:
-                            logger.warning('SDR [MEETING] scheduling email FAILED for %s: %s', lead.email, exc)
-
-                else:  # wait / neutral
-                    enrollment.reply_content = reply_text[:2000]
-                    enrollment.reply_sentiment = 'neutral'
-                    enrollment.save(update_fields=['reply_content', 'reply_sentiment'])
-
-            campaign.last_replies_checked_at = timezone.now()
-            campaign.save(update_fields=['replies_received', 'meetings_booked', 'last_replies_checked_at'])
 
+def check_inbox_replies_impl():
+    """Poll IMAP for replies on every active campaign with auto_check_replies=True.
+
+    Campaigns reading the same mailbox share one incremental poll per tick
+    (ai_sdr_agent.reply_poller).
+    """
+    from ai_sdr_agent.models import SDRCampaign
+    from ai_sdr_agent.reply_poller import group_by_mailbox, poll_mailbox
+
+    campaigns = list(
+        SDRCampaign.objects.filter(status='active', auto_check_replies=True)
+        .select_related('company_user__company')
+    )
+    groups = group_by_mailbox(campaigns)
+    totals = {'replies': 0, 'meetings': 0}
+    agent_cache = {}
+
+    logger.info(
+        "SDR [check-inbox] START — checking %d active campaigns on %d mailboxes for replies",
+        len(campaigns), len(groups),
+    )
+
+    for key, group in groups.items():
+        try:
+            handled = poll_mailbox(
+                key, group, lambda r: _apply_inbox_reply(r, agent_cache, totals),
+            )
         except Exception as exc:
             logger.error(
-                "SDR [check-inbox] campaign=%d FAILED: %s", campaign.id, exc, exc_info=True,
+                "SDR [check-inbox] mailbox=%s@%s campaigns=%s FAILED: %s",
+                key[2], key[0], [c.id for c in group], exc, exc_info=True,
             )
+            continue
+        if handled:
+            logger.info("SDR [check-inbox] mailbox=%s@%s handled %d replies", key[2], key[0], handled)
+        now = timezone.now()
+        for campaign in group:
+            campaign.last_replies_checked_at = now
+            campaign.save(update_fields=['replies_received', 'meetings_booked', 'last_replies_checked_at'])
 
     logger.info(
         "SDR [check-inbox] END — campaigns=%d replies=%d meetings=%d",
-        campaigns.count(), total_replies, total_meetings,
+        len(campaigns), totals['replies'], totals['meetings'],
     )
-    return {'campaigns': campaigns.count(), 'replies': total_replies, 'meetings': total_meetings}
+    return {'campaigns': len(campaigns), 'replies': totals['replies'], 'meetings': totals['meetings']}
 
 
 def auto_start_campaigns_impl():
@@ -561,13 +673,14 @@ def sdr_daily_analytics_task(self):
 
 def auto_research_leads_impl(leads_per_run: int = 10):
     """
-    Automatically fetch leads from Apify for all company users who have:
+    Start an Apify lead research run for all company users who have:
     - An active ICP profile
     - Apify token configured in settings
+    The runs are followed up by research_jobs_impl, which imports each
+    run's leads once it has finished.
     """
     import os
     from django.conf import settings
-    from django.utils import timezone as tz
 
     apify_token = (
         getattr(settings, 'APIFY_API_TOKEN', None)
@@ -578,11 +691,10 @@ def auto_research_leads_impl(leads_per_run: int = 10):
         logger.info("Apify auto-research skipped: APIFY_API_TOKEN not set")
         return {'skipped': True, 'reason': 'No APIFY_API_TOKEN'}
 
-    from ai_sdr_agent.models import SDRIcpProfile, SDRLead, SDRLeadResearchJob
-    from ai_sdr_agent.agents.lead_research_agent import LeadResearchAgent
+    from ai_sdr_agent.models import SDRIcpProfile
+    from ai_sdr_agent.lead_research import create_research_job, run_research_job
 
-    researcher = LeadResearchAgent()
-    total_created = 0
+    started = 0
     errors = 0
 
     active_icps = SDRIcpProfile.objects.filter(is_active=True).select_related('company_user')
@@ -590,68 +702,15 @@ def auto_research_leads_impl(leads_per_run: int = 10):
 
     for icp in active_icps:
         company_user = icp.company_user
-        try:
-            job = SDRLeadResearchJob.objects.create(
-                company_user=company_user,
-                icp_profile=icp,
-                status='running',
-                source='apify',
-                search_params={'count': leads_per_run, 'source': 'apify', 'auto': True},
-                started_at=tz.now(),
-            )
-
-            raw_leads = researcher.search_leads(icp, count=leads_per_run, source='apify')
-            created = 0
-
-            for ld in raw_leads:
-                email = ld.get('email', '').strip().lower()
-                if email and SDRLead.objects.filter(company_user=company_user, email=email).exists():
-                    continue  # skip duplicate
-
-                full_name = ld.get('full_name') or f"{ld.get('first_name','')} {ld.get('last_name','')}".strip()
-                SDRLead.objects.create(
-                    company_user=company_user,
-                    icp_profile=icp,
-                    first_name=ld.get('first_name', ''),
-                    last_name=ld.get('last_name', ''),
-                    full_name=full_name,
-                    email=email,
-                    phone=ld.get('phone', ''),
-                    job_title=ld.get('job_title', ''),
-                    seniority_level=ld.get('seniority_level', ''),
-                    department=ld.get('department', ''),
-                    company_name=ld.get('company_name', ''),
-                    company_domain=ld.get('company_domain', ''),
-                    company_industry=ld.get('company_industry', ''),
-                    company_size=ld.get('company_size'),
-                    company_location=ld.get('company_location', ''),
-                    linkedin_url=ld.get('linkedin_url', ''),
-                    company_website=ld.get('company_website', ''),
-                    source='apify',
-                    temperature='cold',
-                    status='new',
-                )
-                created += 1
-
-            job.status = 'completed'
-            job.leads_created = created
-            job.completed_at = tz.now()
-            job.save(update_fields=['status', 'leads_created', 'completed_at'])
-
-            total_created += created
-            logger.info("Apify auto-research: company_user=%d created=%d leads", company_user.pk, created)
-
-        except Exception as exc:
+        job = create_research_job(company_user, icp, leads_per_run, source='apify', auto=True)
+        job = run_research_job(job.id)
+        if job is not None and job.status == 'running':
+            started += 1
+            logger.info("Apify auto-research: company_user=%d run=%s started", company_user.pk, job.run_id or '?')
+        else:
             errors += 1
-            logger.error("Apify auto-research failed for company_user=%d: %s", company_user.pk, exc)
-            try:
-                SDRLeadResearchJob.objects.filter(
-                    company_user=company_user, status='running'
-                ).update(status='failed', error_message=str(exc))
-            except Exception:
-                pass
 
-    return {'total_created': total_created, 'errors': errors}
+    return {'runs_started': started, 'errors': errors}
 
 
 @shared_task(bind=True, name='ai_sdr_agent.tasks.auto_research_leads_task', max_retries=1)
@@ -662,103 +721,197 @@ def auto_research_leads_task(self):
 # ---------------------------------------------------------------------------
 # Lead qualification queue — background, batched, self-retrying
 # ---------------------------------------------------------------------------
-QUALIFY_BATCH_SIZE = 5        # leads scored per scheduler tick
+QUALIFY_BATCH_SIZE = 20       # leads scored per company per scheduler tick
+QUALIFY_MAX_COMPANIES = 20    # companies served per tick, longest-waiting first
+QUALIFY_MAX_WORKERS = 4       # companies qualified in parallel
 QUALIFY_MAX_ATTEMPTS = 3      # give up after this many failed attempts
 
 
-def qualify_queue_impl():
-    """Score a small batch of queued leads. Runs every ~2 min via the scheduler.
+def _queued_leads_q():
+    # pending, or failed-but-still-retryable
+    return (
+        Q(qualification_status='pending')
+        | Q(qualification_status='failed', qualification_attempts__lt=QUALIFY_MAX_ATTEMPTS)
+    )
 
-    - Picks the oldest 'pending' (or retryable 'failed') leads across all
-      companies, capped at QUALIFY_BATCH_SIZE, so AI tokens are spent gradually
-      instead of all at once.
-    - On a key/quota error for a company, that company's leads are left 'pending'
-      and retried on the next tick (never burns the whole batch on a dead key).
-    - Other errors bump the attempt count; after QUALIFY_MAX_ATTEMPTS the lead is
-      marked 'failed' and stops retrying.
+
+def _apply_qualification(lead, result, now):
+    lead.score = result['score']
+    lead.temperature = result['temperature']
+    lead.score_breakdown = result.get('score_breakdown', {})
+    lead.qualification_reasoning = result.get('qualification_reasoning', '')
+    lead.key_strengths = result.get('key_strengths', [])
+    lead.concerns = result.get('concerns', [])
+    lead.outreach_strategy = result.get('outreach_strategy', '')
+    lead.qualified_at = now
+    lead.status = 'qualified'
+    lead.qualification_status = 'done'
+    lead.qualification_error = ''
+    lead.save()
+
+
+def _qualification_failed(lead, exc):
+    lead.qualification_attempts = (lead.qualification_attempts or 0) + 1
+    lead.qualification_error = str(exc)[:500]
+    lead.qualification_status = (
+        'failed' if lead.qualification_attempts >= QUALIFY_MAX_ATTEMPTS else 'pending'
+    )
+    lead.save(update_fields=[
+        'qualification_attempts', 'qualification_error', 'qualification_status', 'updated_at',
+    ])
+    logger.error("SDR qualify-queue: lead %s attempt %s failed: %s",
+                 lead.id, lead.qualification_attempts, exc)
+
+
+def _qualify_company(leads):
+    """Score one company user's queued leads (pool worker).
+
+    Leads go to the LLM QUALIFY_LLM_BATCH at a time against the active ICP;
+    a lead the batch answer didn't score validly is qualified on its own.
+    On a key/quota error the company's remaining leads are left 'pending'
+    and retried on the next tick (never burns the batch on a dead key). Any
+    other error escaping the loop (agent setup, the batch call, the DB) is
+    logged and counted as a failed attempt for each lead not yet scored, so
+    one company can't take down the whole tick.
     """
-    from django.db.models import Q as _Q
-    from ai_sdr_agent.models import SDRLead, SDRIcpProfile
+    from django.db import connection
+    from ai_sdr_agent.agents.lead_qualification_agent import QUALIFY_LLM_BATCH
+    from ai_sdr_agent.models import SDRIcpProfile, SDRLead
     from core.api_key_service import KeyServiceError
     from api.views.ai_sdr_agent import _get_qualification_agent
 
+    counts = {'qualified': 0, 'failed': 0}
+    done = set()
+    cu_id = leads[0].company_user_id
     now = timezone.now()
-    # pending, or failed-but-still-retryable, oldest first.
-    batch = list(
+    try:
+        agent = _get_qualification_agent(leads[0].company_user.company)
+        icp = SDRIcpProfile.objects.filter(company_user_id=cu_id, is_active=True).first()
+        for start in range(0, len(leads), QUALIFY_LLM_BATCH):
+            chunk = leads[start:start + QUALIFY_LLM_BATCH]
+            SDRLead.objects.filter(pk__in=[lead.pk for lead in chunk]).update(
+                qualification_status='processing', updated_at=timezone.now(),
+            )
+            scored = agent.qualify_batch(chunk, icp) if icp else {}
+            for index, lead in enumerate(chunk):
+                try:
+                    result = scored.get(index) or agent.qualify_lead(lead, icp)
+                    _apply_qualification(lead, result, now)
+                    counts['qualified'] += 1
+                except KeyServiceError:
+                    raise
+                except Exception as exc:
+                    _qualification_failed(lead, exc)
+                    counts['failed'] += 1
+                done.add(lead.pk)
+    except KeyServiceError as exc:
+        # Tokens/key exhausted for this company — put the leads being scored
+        # back to pending and stop touching this company for the rest of the tick.
         SDRLead.objects.filter(
-            _Q(qualification_status='pending')
-            | _Q(qualification_status='failed', qualification_attempts__lt=QUALIFY_MAX_ATTEMPTS)
+            pk__in=[lead.pk for lead in leads], qualification_status='processing',
+        ).update(
+            qualification_status='pending', qualification_error='AI tokens exhausted — will retry.',
+            updated_at=timezone.now(),
         )
-        .select_related('company_user__company')
-        .order_by('qualification_queued_at', 'created_at')[:QUALIFY_BATCH_SIZE]
+        logger.warning("SDR qualify-queue: key/quota out for company_user=%s: %s", cu_id, exc)
+    except Exception as exc:
+        logger.exception("SDR qualify-queue: company_user=%s failed", cu_id)
+        for lead in leads:
+            if lead.pk in done:
+                continue
+            counts['failed'] += 1
+            try:
+                _qualification_failed(lead, exc)
+            except Exception:
+                logger.exception("SDR qualify-queue: could not record failure for lead %s", lead.pk)
+    finally:
+        connection.close()
+    return counts
+
+
+def qualify_queue_impl():
+    """Score the queued leads of the longest-waiting companies. Runs every
+    ~2 min via the scheduler.
+
+    - Takes up to QUALIFY_BATCH_SIZE of the oldest 'pending' (or retryable
+      'failed') leads of each of QUALIFY_MAX_COMPANIES company users, so AI
+      tokens are spent gradually and one big import can't starve the other
+      companies.
+    - Each company's leads are scored by a pool worker, several leads per
+      LLM call (LeadQualificationAgent.qualify_batch); companies run in
+      parallel, QUALIFY_MAX_WORKERS at a time.
+    - On a key/quota error for a company, that company's leads are left 'pending'
+      and retried on the next tick.
+    - Other errors bump the attempt count; after QUALIFY_MAX_ATTEMPTS the lead is
+      marked 'failed' and stops retrying.
+    """
+    from django.db.models import Min
+    from ai_sdr_agent.models import SDRLead
+
+    company_user_ids = list(
+        SDRLead.objects.filter(_queued_leads_q())
+        .values('company_user_id')
+        .annotate(oldest=Min('qualification_queued_at'))
+        .order_by('oldest')
+        .values_list('company_user_id', flat=True)[:QUALIFY_MAX_COMPANIES]
     )
-    if not batch:
+    groups = []
+    for cu_id in company_user_ids:
+        leads = list(
+            SDRLead.objects.filter(_queued_leads_q(), company_user_id=cu_id)
+            .select_related('company_user__company')
+            .order_by('qualification_queued_at', 'created_at')[:QUALIFY_BATCH_SIZE]
+        )
+        if leads:
+            groups.append(leads)
+    if not groups:
         return {'processed': 0, 'qualified': 0, 'failed': 0, 'pending': 0}
 
     qualified = 0
     failed = 0
-    # Cache one agent + active ICP per company; skip companies whose key is out.
-    agents: dict = {}
-    icps: dict = {}
-    blocked_companies: set = set()
-
-    for lead in batch:
-        company = lead.company_user.company
-        cu_id = lead.company_user_id
-        if cu_id in blocked_companies:
-            continue  # key already out for this company this tick
-
-        try:
-            if cu_id not in agents:
-                agents[cu_id] = _get_qualification_agent(company)
-                icps[cu_id] = SDRIcpProfile.objects.filter(
-                    company_user=lead.company_user, is_active=True
-                ).first()
-
-            lead.qualification_status = 'processing'
-            lead.save(update_fields=['qualification_status', 'updated_at'])
-
-            result = agents[cu_id].qualify_lead(lead, icps[cu_id])
-            lead.score = result['score']
-            lead.temperature = result['temperature']
-            lead.score_breakdown = result.get('score_breakdown', {})
-            lead.qualification_reasoning = result.get('qualification_reasoning', '')
-            lead.key_strengths = result.get('key_strengths', [])
-            lead.concerns = result.get('concerns', [])
-            lead.outreach_strategy = result.get('outreach_strategy', '')
-            lead.qualified_at = now
-            lead.status = 'qualified'
-            lead.qualification_status = 'done'
-            lead.qualification_error = ''
-            lead.save()
-            qualified += 1
-        except KeyServiceError as exc:
-            # Tokens/key exhausted for this company — leave the lead pending and
-            # stop touching this company for the rest of the tick.
-            lead.qualification_status = 'pending'
-            lead.qualification_error = 'AI tokens exhausted — will retry.'
-            lead.save(update_fields=['qualification_status', 'qualification_error', 'updated_at'])
-            blocked_companies.add(cu_id)
-            logger.warning("SDR qualify-queue: key/quota out for company_user=%s: %s", cu_id, exc)
-        except Exception as exc:
-            lead.qualification_attempts = (lead.qualification_attempts or 0) + 1
-            lead.qualification_error = str(exc)[:500]
-            lead.qualification_status = (
-                'failed' if lead.qualification_attempts >= QUALIFY_MAX_ATTEMPTS else 'pending'
-            )
-            lead.save(update_fields=[
-                'qualification_attempts', 'qualification_error', 'qualification_status', 'updated_at',
-            ])
-            failed += 1
-            logger.error("SDR qualify-queue: lead %s attempt %s failed: %s",
-                         lead.id, lead.qualification_attempts, exc)
+    workers = min(QUALIFY_MAX_WORKERS, len(groups))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='sdr-qualify') as pool:
+        for counts in pool.map(_qualify_company, groups):
+            qualified += counts['qualified']
+            failed += counts['failed']
 
+    processed = sum(len(leads) for leads in groups)
     remaining = SDRLead.objects.filter(qualification_status='pending').count()
-    logger.info("SDR [qualify-queue] processed=%d qualified=%d failed=%d pending_left=%d",
-                len(batch), qualified, failed, remaining)
-    return {'processed': len(batch), 'qualified': qualified, 'failed': failed, 'pending': remaining}
+    logger.info("SDR [qualify-queue] companies=%d processed=%d qualified=%d failed=%d pending_left=%d",
+                len(groups), processed, qualified, failed, remaining)
+    return {'processed': processed, 'qualified': qualified, 'failed': failed, 'pending': remaining}
 
 
 @shared_task(bind=True, name='ai_sdr_agent.tasks.qualify_queue_task', max_retries=1)
 def qualify_queue_task(self):
     return qualify_queue_impl()
+
+
+# ---------------------------------------------------------------------------
+# Lead research — start queued jobs, follow Apify runs, import their datasets
+# ---------------------------------------------------------------------------
+
+def research_jobs_impl():
+    """Advance every outstanding lead research job in one pass."""
+    from ai_sdr_agent.lead_research import advance_research_jobs
+    return advance_research_jobs()
+
+
+@shared_task(bind=True, name='ai_sdr_agent.tasks.sdr_research_jobs_task', max_retries=1)
+def sdr_research_jobs_task(self):
+    return research_jobs_impl()
+
+
+# ---------------------------------------------------------------------------
+# Lead import — run pending CSV / Excel imports, resume stalled ones
+# ---------------------------------------------------------------------------
+
+def lead_imports_impl():
+    """Pick up import jobs whose background thread never ran or died mid-file."""
+    from ai_sdr_agent.lead_import import resume_import_jobs
+    return resume_import_jobs()
+
+
+@shared_task(bind=True, name='ai_sdr_agent.tasks.sdr_lead_imports_task', max_retries=1)
+def sdr_lead_imports_task(self):
+    return lead_imports_impl()
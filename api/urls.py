@@ -46,6 +46,7 @@ from api.views import ai_sdr_agent as sdr_api
 from api.views import crm_sync_agent as crm_api
 from api.views.health import health_check
 from api.views import public_jobs
+from api.views import exports
 
 app_name = 'api'
 
@@ -53,6 +54,9 @@ urlpatterns = [
     # Health check
     re_path(r'^health/?$', health_check, name='health_check'),
 
+    # Background CSV / Excel exports (started with ?async=1 on an export endpoint)
+    re_path(r'^exports/(?P<export_id>[0-9a-f-]{36})/?$', exports.export_status, name='export_status'),  # GET
+
     # Public Job Application (no auth required)
     re_path(r'^public/jobs/(?P<job_id>\d+)/?$', public_jobs.public_job_detail, name='public_job_detail'),
     re_path(r'^public/jobs/(?P<job_id>\d+)/apply/?$', public_jobs.public_job_apply, name='public_job_apply'),
@@ -713,8 +717,10 @@ urlpatterns = [
     re_path(r'^sdr/leads/?$', sdr_api.leads_list, name='sdr_leads_list'),  # GET, POST
     re_path(r'^sdr/leads/research/sources/?$', sdr_api.research_sources, name='sdr_research_sources'),  # GET
     re_path(r'^sdr/leads/research/?$', sdr_api.research_leads, name='sdr_research_leads'),  # POST
+    re_path(r'^sdr/leads/research/(?P<job_id>\d+)/?$', sdr_api.research_leads_status, name='sdr_research_leads_status'),  # GET
     re_path(r'^sdr/leads/fetch-apify/?$', sdr_api.fetch_apify_leads, name='sdr_fetch_apify_leads'),  # POST
     re_path(r'^sdr/leads/import/?$', sdr_api.import_leads_csv, name='sdr_import_leads_csv'),  # POST
+    re_path(r'^sdr/leads/import/(?P<job_id>\d+)/?$', sdr_api.import_leads_csv_status, name='sdr_import_leads_csv_status'),  # GET
     re_path(r'^sdr/leads/qualify-all/?$', sdr_api.qualify_all_leads, name='sdr_qualify_all_leads'),  # POST
     re_path(r'^sdr/leads/(?P<lead_id>\d+)/restore/?$', sdr_api.restore_lead, name='sdr_restore_lead'),  # POST
     re_path(r'^sdr/leads/(?P<lead_id>\d+)/?$', sdr_api.lead_detail, name='sdr_lead_detail'),  # GET, PUT, DELETE
@@ -6,8 +6,6 @@ Endpoints for Lead Research & Enrichment, Lead Qualification, and ICP management
 Auth: CompanyUserTokenAuthentication + IsCompanyUserOnly  (same as every other agent)
 """
 
-import csv
-import io
 import json
 import logging
 import os
@@ -17,6 +15,7 @@ from typing import Optional
 
 from django.conf import settings
 from django.core.paginator import Paginator
+from django.db import transaction
 from django.db.models import Q
 from django.utils import timezone
 from rest_framework.decorators import api_view, authentication_classes, permission_classes
@@ -25,7 +24,7 @@ from rest_framework.response import Response
 from api.authentication import CompanyUserTokenAuthentication
 from api.permissions import IsCompanyUserOnly
 from ai_sdr_agent.models import (
-    SDRIcpProfile, SDRLead, SDRLeadResearchJob,
+    SDRIcpProfile, SDRLead, SDRLeadImportJob, SDRLeadResearchJob,
     SDRCampaign, SDRCampaignStep, SDRCampaignEnrollment, SDROutreachLog, SDRMeeting,
     SDRAgentSettings,
 )
@@ -41,15 +40,6 @@ logger = logging.getLogger(__name__)
 # Per-request agent factories — pass company so keys resolve per-company
 # --------------------------------------------------------------------------
 
-def _ensure_https(url: str) -> str:
-    """Add https:// prefix if a URL has no protocol."""
-    if not url:
-        return url
-    url = url.strip()
-    if url and not url.startswith(('http://', 'https://')):
-        return f'https://{url}'
-    return url
-
 
 _EMAIL_RE = re.compile(r'^[^\s@]+@[^\s@]+\.[^\s@]+$')
 
@@ -546,9 +536,12 @@ def research_sources(request):
 @permission_classes([IsCompanyUserOnly])
 def research_leads(request):
     """
-    Find new leads from Apollo.io (if key configured) or generate via Groq AI.
-    Auto-qualifies found leads immediately.
+    Start a background lead research job — Apollo.io search, an Apify actor
+    run or Groq AI generation (ai_sdr_agent/lead_research.py). Found leads
+    are queued for qualification; poll research_leads_status for the result.
     """
+    from ai_sdr_agent.lead_research import create_research_job, job_payload, start_research_job
+
     company_user = request.user
     try:
         count = min(int(request.data.get('count', 20)), 50)
@@ -561,173 +554,22 @@ def research_leads(request):
         if not icp:
             return Response({'status': 'error', 'message': 'Set up your ICP profile first.'}, status=400)
 
-        job = SDRLeadResearchJob.objects.create(
-            company_user=company_user,
-            icp_profile=icp,
-            status='running',
-            search_params={'industries': icp.industries, 'job_titles': icp.job_titles, 'count': count, 'source': source},
-            started_at=timezone.now(),
-        )
-
+        researcher = _get_research_agent(company_user.company, company_user=company_user)
         try:
-            researcher = _get_research_agent(company_user.company, company_user=company_user)
-            raw_leads = researcher.search_leads(icp, count=count, source=source)
-
-            created = 0
-            created_ids = []
-            skipped_dupes = 0
-
-            # Pre-load existing keys to catch dupes. LinkedIn URL is the most
-            # reliable (unique per profile) — essential for no-email sources like
-            # the Google scraper, where company often doesn't parse and name+company
-            # dedup misses. Also track email, name+company, and name-only.
-            existing_leads_qs = SDRLead.objects.filter(company_user=company_user).values_list(
-                'email', 'full_name', 'company_name', 'linkedin_url'
+            resolved = researcher.resolve_source(source)
+        except ValueError as exc:
+            return Response({'status': 'error', 'message': str(exc)}, status=400)
+
+        with transaction.atomic():
+            job = create_research_job(
+                company_user, icp, count,
+                source='ai_generated' if resolved == 'ai' else resolved,
+                requested_source=source,
             )
-            existing_emails_lower = set()
-            existing_name_company = set()
-            existing_linkedin = set()
-            existing_names = set()
-
-            def _norm_li(url):
-                u = (url or '').strip().lower().rstrip('/')
-                return u.split('?')[0] if u else ''
-
-            for em, fn, cn, li in existing_leads_qs:
-                if em:
-                    existing_emails_lower.add(em.lower())
-                if fn and cn:
-                    existing_name_company.add((fn.lower().strip(), cn.lower().strip()))
-                if fn:
-                    existing_names.add(fn.lower().strip())
-                nli = _norm_li(li)
-                if nli:
-                    existing_linkedin.add(nli)
-
-            from ai_sdr_agent.agents.lead_validator import validate_lead
-            for ld in raw_leads:
-                full_name = ld.get('full_name') or f"{ld.get('first_name','')} {ld.get('last_name','')}".strip()
-                lead_email = (ld.get('email') or '').strip().lower()
-                company_name = (ld.get('company_name') or '').strip()
-                linkedin = _norm_li(ld.get('linkedin_url'))
-
-                # ── Reject leads with no name and no company (totally empty) ──
-                if not full_name.strip() and not company_name:
-                    logger.info("SDR [research] SKIPPING empty lead (no name, no company)")
-                    skipped_dupes += 1
-                    continue
+            start_research_job(job.id)
 
-                # ── Duplicate guard — linkedin > email > name+company > name ──
-                if linkedin and linkedin in existing_linkedin:
-                    logger.info("SDR [research] SKIPPING duplicate linkedin=%s", linkedin)
-                    skipped_dupes += 1
-                    continue
-                if lead_email and lead_email in existing_emails_lower:
-                    logger.info("SDR [research] SKIPPING duplicate email=%s", lead_email)
-                    skipped_dupes += 1
-                    continue
-                name_company_key = (full_name.lower().strip(), company_name.lower().strip())
-                if full_name and company_name and name_company_key in existing_name_company:
-                    logger.info("SDR [research] SKIPPING duplicate name+company: %s @ %s", full_name, company_name)
-                    skipped_dupes += 1
-                    continue
-                # No email/company (Google scraper) → fall back to name-only so
-                # the same profile scraped twice isn't inserted again.
-                name_key = full_name.lower().strip()
-                if not lead_email and not company_name and not linkedin and name_key and name_key in existing_names:
-                    logger.info("SDR [research] SKIPPING duplicate name-only: %s", full_name)
-                    skipped_dupes += 1
-                    continue
-
-                # Track all keys for intra-batch dedup
-                if linkedin:
-                    existing_linkedin.add(linkedin)
-                if lead_email:
-                    existing_emails_lower.add(lead_email)
-                if full_name and company_name:
-                    existing_name_company.add(name_company_key)
-                if name_key:
-                    existing_names.add(name_key)
-                # ─────────────────────────────────────────────────────────────
-
-                validation = validate_lead({**ld, 'full_name': full_name})
-
-                new_lead = SDRLead.objects.create(
-                    company_user=company_user,
-                    icp_profile=icp,
-                    first_name=ld.get('first_name', ''),
-                    last_name=ld.get('last_name', ''),
-                    full_name=full_name,
-                    email=lead_email or ld.get('email', ''),
-                    phone=ld.get('phone', ''),
-                    job_title=ld.get('job_title', ''),
-                    seniority_level=ld.get('seniority_level', ''),
-                    department=ld.get('department', ''),
-                    company_name=ld.get('company_name', ''),
-                    company_domain=ld.get('company_domain', ''),
-                    company_industry=ld.get('company_industry', ''),
-                    company_size=ld.get('company_size') or None,
-                    company_size_range=ld.get('company_size_range', ''),
-                    company_location=ld.get('company_location', ''),
-                    company_technologies=ld.get('company_technologies', []),
-                    linkedin_url=_ensure_https(ld.get('linkedin_url', '')),
-                    company_linkedin_url=_ensure_https(ld.get('company_linkedin_url', '')),
-                    company_website=_ensure_https(ld.get('company_website', '')),
-                    recent_news=ld.get('recent_news', []),
-                    buying_signals=ld.get('buying_signals', []),
-                    apollo_id=ld.get('apollo_id', ''),
-                    raw_data=ld.get('raw_data', {}),
-                    source=ld.get('source', 'ai_generated'),
-                    status='new',
-                    confidence_score=validation['confidence_score'],
-                    data_quality_flags=validation['data_quality_flags'],
-                )
-                created += 1
-                created_ids.append(new_lead.pk)
-
-            # Queue ONLY the leads created by this run for background
-            # qualification — the scheduler drains the queue in small batches so
-            # AI tokens aren't exhausted in one burst, and retries failures
-            # automatically. Scoping to created_ids avoids sweeping up unrelated
-            # pre-existing unscored leads (e.g. CSV/manual imports).
-            queued = SDRLead.objects.filter(
-                pk__in=created_ids, score__isnull=True, qualification_status='none',
-            ).update(qualification_status='pending', qualification_queued_at=timezone.now())
-
-            job.status = 'completed'
-            job.total_found = len(raw_leads)
-            job.leads_created = created
-            job.leads_qualified = 0
-            job.source = researcher.source_label
-            job.completed_at = timezone.now()
-            job.save()
-
-            if queued:
-                message = (
-                    f'Found {created} leads. Qualifying {queued} in the background — '
-                    f'scores will appear shortly. Skipped {skipped_dupes} duplicates.'
-                )
-            else:
-                message = f'Found {created} leads. Skipped {skipped_dupes} duplicates.'
-
-            return Response({
-                'status': 'success',
-                'message': message,
-                'leads_created': created,
-                'leads_queued': queued,
-                'skipped_duplicates': skipped_dupes,
-                'source': job.source,
-                'stats': _lead_stats(company_user),
-            })
-
-        except KeyServiceError:
-            raise
-        except Exception as exc:
-            job.status = 'failed'
-            job.error_message = str(exc)
-            job.completed_at = timezone.now()
-            job.save()
-            raise
+        payload = job_payload(job)
+        return Response({'status': 'success', 'message': payload['message'], 'job': payload}, status=202)
 
     except KeyServiceError:
         raise
@@ -736,6 +578,23 @@ def research_leads(request):
         return Response({'status': 'error', 'message': str(exc)}, status=500)
 
 
+@api_view(['GET'])
+@authentication_classes([CompanyUserTokenAuthentication])
+@permission_classes([IsCompanyUserOnly])
+def research_leads_status(request, job_id):
+    """Progress / result of a research job started by research_leads."""
+    from ai_sdr_agent.lead_research import job_payload
+
+    job = SDRLeadResearchJob.objects.filter(pk=job_id, company_user=request.user).first()
+    if not job:
+        return Response({'status': 'error', 'message': 'Research job not found.'}, status=404)
+    payload = job_payload(job)
+    response = {'status': 'success', 'message': payload['message'], 'job': payload}
+    if job.status == 'completed':
+        response['stats'] = _lead_stats(request.user)
+    return Response(response)
+
+
 @api_view(['POST'])
 @authentication_classes([CompanyUserTokenAuthentication])
 @permission_classes([IsCompanyUserOnly])
@@ -745,6 +604,8 @@ def fetch_apify_leads(request):
     API but CAN read finished runs' datasets. No ICP filtering — pulls whatever
     the user already generated. Auto-qualify is best-effort (skipped silently if
     platform AI tokens are exhausted, so the import never fails on that)."""
+    from ai_sdr_agent.lead_research import import_raw_leads
+
     company_user = request.user
     try:
         max_leads = min(int(request.data.get('count', 200)), 500)
@@ -756,92 +617,9 @@ def fetch_apify_leads(request):
         if not raw_leads:
             return Response({'status': 'error', 'message': 'No leads found in your Apify runs.'}, status=400)
 
-        # ── Dedup against existing leads (linkedin > email > name+company > name) ──
-        existing_qs = SDRLead.objects.filter(company_user=company_user).values_list(
-            'email', 'full_name', 'company_name', 'linkedin_url'
-        )
-
-        def _norm_li(url):
-            u = (url or '').strip().lower().rstrip('/')
-            return u.split('?')[0] if u else ''
-
-        seen_email, seen_nc, seen_li, seen_name = set(), set(), set(), set()
-        for em, fn, cn, li in existing_qs:
-            if em:
-                seen_email.add(em.lower())
-            if fn and cn:
-                seen_nc.add((fn.lower().strip(), cn.lower().strip()))
-            if fn:
-                seen_name.add(fn.lower().strip())
-            nli = _norm_li(li)
-            if nli:
-                seen_li.add(nli)
-
-        from ai_sdr_agent.agents.lead_validator import validate_lead
-        created = 0
-        skipped = 0
-        for ld in raw_leads:
-            full_name = ld.get('full_name') or f"{ld.get('first_name','')} {ld.get('last_name','')}".strip()
-            email = (ld.get('email') or '').strip().lower()
-            company_name = (ld.get('company_name') or '').strip()
-            linkedin = _norm_li(ld.get('linkedin_url'))
-            name_key = full_name.lower().strip()
-
-            if not full_name.strip() and not company_name:
-                skipped += 1
-                continue
-            if linkedin and linkedin in seen_li:
-                skipped += 1; continue
-            if email and email in seen_email:
-                skipped += 1; continue
-            nc = (name_key, company_name.lower().strip())
-            if full_name and company_name and nc in seen_nc:
-                skipped += 1; continue
-            if not email and not company_name and not linkedin and name_key and name_key in seen_name:
-                skipped += 1; continue
-
-            if linkedin: seen_li.add(linkedin)
-            if email: seen_email.add(email)
-            if full_name and company_name: seen_nc.add(nc)
-            if name_key: seen_name.add(name_key)
-
-            validation = validate_lead({**ld, 'full_name': full_name})
-            SDRLead.objects.create(
-                company_user=company_user,
-                icp_profile=icp,
-                first_name=ld.get('first_name', ''),
-                last_name=ld.get('last_name', ''),
-                full_name=full_name,
-                email=email or ld.get('email', ''),
-                phone=ld.get('phone', ''),
-                job_title=ld.get('job_title', ''),
-                seniority_level=ld.get('seniority_level', ''),
-                department=ld.get('department', ''),
-                company_name=ld.get('company_name', ''),
-                company_domain=ld.get('company_domain', ''),
-                company_industry=ld.get('company_industry', ''),
-                company_size=ld.get('company_size') or None,
-                company_size_range=ld.get('company_size_range', ''),
-                company_location=ld.get('company_location', ''),
-                company_technologies=ld.get('company_technologies', []),
-                linkedin_url=_ensure_https(ld.get('linkedin_url', '')),
-                company_linkedin_url=_ensure_https(ld.get('company_linkedin_url', '')),
-                company_website=_ensure_https(ld.get('company_website', '')),
-                recent_news=ld.get('recent_news', []),
-                buying_signals=ld.get('buying_signals', []),
-                apollo_id=ld.get('apollo_id', ''),
-                raw_data=ld.get('raw_data', {}),
-                source='apify',
-                status='new',
-                confidence_score=validation['confidence_score'],
-                data_quality_flags=validation['data_quality_flags'],
-                # Queue for background qualification instead of scoring inline —
-                # a synchronous loop here blocked the request for minutes and hit
-                # AI token limits. The scheduler drains the queue in small batches.
-                qualification_status='pending',
-                qualification_queued_at=timezone.now(),
-            )
-            created += 1
+        # Deduped (linkedin > email > name+company > name), bulk-created and
+        # queued for background qualification in batches.
+        created, skipped = import_raw_leads(company_user, icp, raw_leads, default_source='apify')
 
         queued = created  # every imported lead is queued for qualification
 
@@ -874,127 +652,34 @@ def fetch_apify_leads(request):
 @authentication_classes([CompanyUserTokenAuthentication])
 @permission_classes([IsCompanyUserOnly])
 def import_leads_csv(request):
-    """Import leads from a CSV file. Accepts multipart/form-data with key 'file'."""
+    """Start a background lead import from a CSV / Excel file.
+
+    Accepts multipart/form-data with key 'file'. The file is stored on an
+    SDRLeadImportJob and imported in chunks (ai_sdr_agent/lead_import.py);
+    poll import_leads_csv_status for progress and the final counts.
+    """
+    from ai_sdr_agent.lead_import import job_payload, start_import_job
+    from core.tabular_import import SUPPORTED_EXTENSIONS, file_extension
+
     company_user = request.user
     try:
         csv_file = request.FILES.get('file')
         if not csv_file:
             return Response({'status': 'error', 'message': 'No file provided.'}, status=400)
+        if file_extension(csv_file.name) not in SUPPORTED_EXTENSIONS:
+            return Response({'status': 'error', 'message': 'Please upload a CSV, XLSX or XLS file.'}, status=400)
 
-        decoded = csv_file.read().decode('utf-8-sig')
-        reader = csv.DictReader(io.StringIO(decoded))
-
-        created = 0
-        skipped_dupes = 0
-        skipped_empty = 0
-        errors = []
-
-        # Pre-load existing emails once to avoid per-row DB hits
-        existing_emails_lower = set(
-            e.lower()
-            for e in SDRLead.objects.filter(company_user=company_user)
-            .values_list('email', flat=True) if e
-        )
-
-        def _norm_key(k):
-            # "Full Name" / "FULL_NAME" / "full-name" → "fullname"
-            return re.sub(r'[^a-z0-9]', '', (k or '').strip().lower())
-
-        # Map each CSV field to the header variations that should feed it.
-        FIELD_ALIASES = {
-            'full_name':        ['fullname', 'name', 'contactname', 'leadname'],
-            'first_name':       ['firstname', 'fname', 'givenname'],
-            'last_name':        ['lastname', 'lname', 'surname', 'familyname'],
-            'email':            ['email', 'emailaddress', 'workemail', 'businessemail', 'mail'],
-            'phone':            ['phone', 'phonenumber', 'mobile', 'mobilenumber', 'tel', 'telephone'],
-            'job_title':        ['jobtitle', 'title', 'position', 'role', 'designation'],
-            'company_name':     ['companyname', 'company', 'organization', 'organisation', 'employer', 'account'],
-            'company_industry': ['companyindustry', 'industry', 'sector', 'vertical'],
-            'company_size':     ['companysize', 'size', 'employees', 'employeecount', 'headcount'],
-            'company_location': ['companylocation', 'location', 'city', 'country', 'region', 'address'],
-            'linkedin_url':     ['linkedinurl', 'linkedin', 'linkedinprofile', 'profileurl'],
-            'company_website':  ['companywebsite', 'website', 'url', 'domain', 'web'],
-        }
-
-        for i, raw_row in enumerate(reader, start=2):
-            try:
-                # Normalise this row's keys once, then pick fields by alias.
-                norm = {_norm_key(k): (v or '').strip() for k, v in raw_row.items() if k}
-
-                def pick(field):
-                    for alias in FIELD_ALIASES.get(field, []):
-                        if norm.get(alias):
-                            return norm[alias]
-                    return ''
-
-                first_name = pick('first_name')
-                last_name = pick('last_name')
-                full_name = pick('full_name') or f"{first_name} {last_name}".strip()
-                company_name = pick('company_name')
-                row_email = pick('email').lower()
-
-                # Skip completely blank rows (no name, no company, no email).
-                if not full_name and not company_name and not row_email:
-                    skipped_empty += 1
-                    continue
-
-                raw_size = pick('company_size')
-                digits = re.sub(r'[^\d]', '', raw_size)
-                company_size = int(digits) if digits else None
-
-                # ── Duplicate guard ──────────────────────────────────────────
-                if row_email and row_email in existing_emails_lower:
-                    skipped_dupes += 1
-                    logger.info("CSV import SKIPPING duplicate email=%s (row %d)", row_email, i)
-                    continue
-                if row_email:
-                    existing_emails_lower.add(row_email)   # prevent intra-file dupes
-                # ─────────────────────────────────────────────────────────────
-
-                SDRLead.objects.create(
-                    company_user=company_user,
-                    first_name=first_name,
-                    last_name=last_name,
-                    full_name=full_name,
-                    email=row_email,
-                    phone=pick('phone'),
-                    job_title=pick('job_title'),
-                    company_name=company_name,
-                    company_industry=pick('company_industry'),
-                    company_size=company_size,
-                    company_location=pick('company_location'),
-                    linkedin_url=pick('linkedin_url'),
-                    company_website=pick('company_website'),
-                    source='csv_import',
-                    status='new',
-                    # Queue for background qualification so imported leads get
-                    # scored automatically instead of sitting permanently unscored.
-                    qualification_status='pending',
-                    qualification_queued_at=timezone.now(),
-                )
-                created += 1
-            except KeyServiceError:
-                raise
-            except Exception as exc:
-                errors.append(f"Row {i}: {exc}")
+        with transaction.atomic():
+            job = SDRLeadImportJob(company_user=company_user, file_name=os.path.basename(csv_file.name)[:255])
+            job.file.save(job.file_name, csv_file, save=False)
+            job.save()
+            start_import_job(job.id)
 
-        msg = f'Imported {created} leads. Skipped {skipped_dupes} duplicates'
-        if skipped_empty:
-            msg += f', {skipped_empty} empty rows'
-        msg += '.'
-        if created:
-            msg += ' Qualifying them in the background — scores will appear shortly.'
-        if created == 0 and not errors:
-            msg = ('No leads imported — check the CSV has a header row with columns like '
-                   'full_name / email / company_name (any capitalisation).')
         return Response({
             'status': 'success',
-            'message': msg,
-            'created': created,
-            'skipped_duplicates': skipped_dupes,
-            'skipped_empty': skipped_empty,
-            'errors': errors[:5],
-        })
+            'message': 'Import started — leads will appear as they are processed.',
+            'job': job_payload(job),
+        }, status=202)
     except KeyServiceError:
         raise
     except Exception as exc:
@@ -1002,6 +687,20 @@ def import_leads_csv(request):
         return Response({'status': 'error', 'message': str(exc)}, status=500)
 
 
+@api_view(['GET'])
+@authentication_classes([CompanyUserTokenAuthentication])
+@permission_classes([IsCompanyUserOnly])
+def import_leads_csv_status(request, job_id):
+    """Progress / result of a lead import started by import_leads_csv."""
+    from ai_sdr_agent.lead_import import job_payload
+
+    job = SDRLeadImportJob.objects.filter(pk=job_id, company_user=request.user).first()
+    if not job:
+        return Response({'status': 'error', 'message': 'Import not found.'}, status=404)
+    payload = job_payload(job)
+    return Response({'status': 'success', 'message': payload['message'], 'job': payload})
+
+
 # ==========================================================================
 # Bulk lead operations
 # ==========================================================================
@@ -1095,11 +794,15 @@ def sdr_bulk_restore_leads(request):
 def sdr_scheduler_status(request):
     """
     Health-check endpoint — returns whether the embedded APScheduler is running
-    and when each job is next scheduled.
+    in this process, which process holds the leader lease, and each job's next
+    run and run-time stats.
 
     GET /api/sdr/scheduler-status/
     Response:
-      { "running": true, "jobs": [{"id": "...", "name": "...", "next_run": "..."}, ...] }
+      { "running": true, "instance": "...", "is_leader": false,
+        "leader": {"holder": "...", "acquired_at": "...", "expires_at": "...", ...},
+        "jobs": [{"id": "...", "name": "...", "next_run": "...", "last_status": "...",
+                  "last_duration_ms": 0, "avg_duration_ms": 0, "run_count": 0, ...}, ...] }
     """
     try:
         from ai_sdr_agent.scheduler import scheduler_status
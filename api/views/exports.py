@@ -0,0 +1,30 @@
+"""
+Status of background CSV / Excel exports (see core.tabular_export).
+"""
+import logging
+
+from celery.result import AsyncResult
+from rest_framework import status
+from rest_framework.decorators import api_view, authentication_classes, permission_classes
+from rest_framework.response import Response
+
+from api.authentication import CompanyUserTokenAuthentication
+from api.permissions import IsCompanyUserOnly
+from core.tabular_export import export_status as _export_status
+
+logger = logging.getLogger(__name__)
+
+
+@api_view(['GET'])
+@authentication_classes([CompanyUserTokenAuthentication])
+@permission_classes([IsCompanyUserOnly])
+def export_status(request, export_id):
+    """Poll an export started with ?async=1. Returns status pending | ready |
+    failed | expired, and download_url once ready (only to the user who
+    started it)."""
+    try:
+        data = _export_status(AsyncResult(export_id), request.user.id)
+        return Response({'status': 'success', 'data': {'export_id': export_id, **data}})
+    except Exception as e:
+        logger.exception("export_status failed")
+        return Response({'status': 'error', 'message': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
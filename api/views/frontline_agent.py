@@ -18,12 +18,10 @@ from django.utils import timezone
 from django.db import IntegrityError
 from django.db.models import Q, Count
 from django.contrib.auth.models import User
-from django.http import HttpResponse
 from django.conf import settings
 from datetime import timedelta, datetime
 import json
 import logging
-import csv
 import re
 import os
 import hashlib
@@ -48,6 +46,13 @@ from Frontline_agent.models import (
     KBCoverageDismissal,
 )
 from Frontline_agent.document_processor import DocumentProcessor
+from Frontline_agent.workflow_conditions import steps_condition_error
+from Frontline_agent.exports import meeting_export, ticket_export
+from Frontline_agent.ticket_index import filter_search, filter_tags
+from core.keyset_pagination import InvalidCursor, cached_count, keyset_page
+from core.tabular_export import (
+    TabularExportError, async_requested, export_format, start_async_export, streaming_response,
+)
 from core.Frontline_agent.frontline_agent import FrontlineAgent
 from core.Frontline_agent.embedding_service import EmbeddingService
 
@@ -296,95 +301,19 @@ def _create_scheduled_notification_dedup(*, company_id, template, scheduled_at,
 
 def _run_workflow_triggers(company_id, event_type, ticket, executed_by_user, old_status=None):
     """
-    Run workflows whose trigger_conditions match this ticket event.
+    Queue the workflows whose trigger_conditions match this ticket event.
     trigger_conditions: {"on": "ticket_created"|"ticket_updated", "category": "...", "priority": "...", "status": "..." (for ticket_updated = new status)}.
     executed_by_user: Django User (e.g. from _get_or_create_user_for_company_user(company_user)).
+    Matching uses the company's cached trigger index; the executions are
+    created and run by the run_triggered_workflows task after commit (see
+    Frontline_agent.workflow_triggers).
     """
+    from Frontline_agent.workflow_triggers import dispatch_workflow_triggers
     try:
-        workflows = FrontlineWorkflow.objects.filter(company_id=company_id, is_active=True)
-        for w in workflows:
-            tc = (w.trigger_conditions or {})
-            if tc.get('on') != event_type:
-                continue
-            if tc.get('category') is not None and ticket.category != tc.get('category'):
-                continue
-            if tc.get('priority') is not None and ticket.priority != tc.get('priority'):
-                continue
-            if event_type == 'ticket_updated' and tc.get('status') is not None and ticket.status != tc.get('status'):
-                continue
-            context_data = {
-                'ticket_id': ticket.id,
-                'ticket_title': ticket.title,
-                'description': getattr(ticket, 'description', '') or '',
-                'resolution': (ticket.resolution or ''),
-                'customer_name': getattr(ticket.created_by, 'email', '') or '',
-                'recipient_email': getattr(ticket.created_by, 'email', '') or '',
-                'status': ticket.status,
-                'priority': ticket.priority,
-                'category': ticket.category,
-            }
-            if event_type == 'ticket_updated' and old_status is not None:
-                context_data['old_status'] = old_status
-            try:
-                # Idempotency — a webhook provider redelivering the same event
-                # would otherwise create a second execution. The unique
-                # constraint on (workflow, idempotency_key) turns the second
-                # arrival into a 200 no-op via the IntegrityError handler below.
-                idem_key = _idempotency_key_for_event(
-                    w.id, event_type, ticket.id,
-                )
-                # Pre-check is cheap and lets us log/return cleanly without
-                # relying solely on the constraint race.
-                if FrontlineWorkflowExecution.objects.filter(
-                    workflow=w, idempotency_key=idem_key,
-                ).exists():
-                    logger.info(
-                        "Workflow trigger: skipping duplicate (workflow=%s event=%s ticket=%s) — already executed",
-                        w.id, event_type, ticket.id,
-                    )
-                    continue
-                exec_obj = FrontlineWorkflowExecution.objects.create(
-                    workflow=w,
-                    workflow_name=w.name,
-                    workflow_description=w.description or '',
-                    executed_by=executed_by_user,
-                    status='awaiting_approval' if w.requires_approval else 'in_progress',
-                    context_data=context_data,
-                    idempotency_key=idem_key,
-                )
-                if w.requires_approval:
-                    logger.info(f"Workflow trigger: workflow {w.id} requires approval. Status: awaiting_approval.")
-                else:
-                    success, result_data, err = _execute_workflow_steps(
-                        w, context_data, executed_by_user, execution=exec_obj,
-                    )
-                    # If the run paused on a `wait`, _execute_workflow_steps already
-                    # persisted pause_state + status='paused' + scheduled the resume
-                    # task. Don't stamp completed/failed in that case.
-                    if result_data and result_data.get('paused'):
-                        logger.info(
-                            f"Workflow trigger: workflow {w.id} paused for "
-                            f"{result_data.get('wait_seconds')}s (exec={exec_obj.id})"
-                        )
-                    else:
-                        exec_obj.status = 'completed' if success else 'failed'
-                        exec_obj.result_data = result_data or {}
-                        exec_obj.error_message = err
-                        exec_obj.completed_at = timezone.now()
-                        exec_obj.save()
-                        logger.info(f"Workflow trigger: executed workflow {w.id} ({w.name}) for event={event_type} ticket={ticket.id}, status={exec_obj.status}")
-            except IntegrityError:
-                # Lost the idempotency race — a concurrent request beat us to
-                # the create. The other call's execution is authoritative;
-                # we silently drop this one.
-                logger.info(
-                    "Workflow trigger: idempotency-key collision for workflow=%s ticket=%s — skipped",
-                    w.id, ticket.id,
-                )
-            except Exception as e:
-                logger.exception("Workflow trigger: execution failed for workflow %s (ticket %s): %s", w.id, ticket.id, e)
-    except KeyServiceError:
-        raise
+        dispatch_workflow_triggers(
+            company_id, event_type, ticket,
+            getattr(executed_by_user, 'id', None), old_status=old_status,
+        )
     except Exception as e:
         logger.exception("_run_workflow_triggers failed: %s", e)
 
@@ -452,6 +381,17 @@ def _celery_broker_ready(timeout_seconds: float = 1.0) -> bool:
 _SLA_HOURS_BY_PRIORITY = {'urgent': 4, 'high': 8, 'medium': 24, 'low': 48}
 
 
+def _business_calendar_for(company):
+    """The company's compiled business-hours calendar, or None when
+    operating hours are off (SLA clocks run on wall-clock time)."""
+    from Frontline_agent.widget_utils import resolved_widget_config
+    from Frontline_agent.business_calendar import business_calendar
+    cfg = (resolved_widget_config(company) or {}).get('operating_hours') or {}
+    if not cfg.get('enabled'):
+        return None
+    return business_calendar(cfg)
+
+
 def _sla_due_at_for_priority(priority, company=None):
     """Return SLA due datetime for a ticket priority.
 
@@ -468,69 +408,34 @@ def _sla_due_at_for_priority(priority, company=None):
     if company is None:
         return now + timedelta(hours=hours)
     try:
-        from Frontline_agent.widget_utils import resolved_widget_config
-        cfg = (resolved_widget_config(company) or {}).get('operating_hours') or {}
-        if not cfg.get('enabled'):
+        calendar = _business_calendar_for(company)
+        if calendar is None:
             return now + timedelta(hours=hours)
-        return _add_business_hours(now, hours, cfg)
+        return calendar.add_hours(now, hours)
     except Exception:
         # Never let SLA computation crash a ticket create — fall back to wall-clock.
         logger.exception("_sla_due_at_for_priority: business-hours calc failed, falling back to wall-clock")
         return now + timedelta(hours=hours)
 
 
-def _add_business_hours(now, hours_to_add, oh_cfg):
-    """Walk forward from ``now`` consuming ``hours_to_add`` of business-hour
-    budget, skipping nights / closed days. ``oh_cfg`` is the
-    operating_hours config dict (timezone_name, schedule).
-
-    Implementation: minute-by-minute walk to keep the code obvious. SLA windows
-    are small (≤48h) so the loop bound is fine. Falls through to wall-clock if
-    the company has no open hours at all (misconfigured), to avoid hanging.
-    """
-    from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
-    try:
-        tz = ZoneInfo((oh_cfg.get('timezone_name') or 'UTC'))
-    except (ZoneInfoNotFoundError, Exception):
-        tz = timezone.utc
-    schedule = oh_cfg.get('schedule') or {}
-    day_keys = ('mon', 'tue', 'wed', 'thu', 'fri', 'sat', 'sun')
-    # Quick "no open time at all" guard
-    if not any((schedule.get(d) or []) for d in day_keys):
-        return now + timedelta(hours=hours_to_add)
-
-    def _windows_for_day(local_dt):
-        return schedule.get(day_keys[local_dt.weekday()]) or []
-
-    def _in_open_window(local_dt):
-        cur = local_dt.time()
-        for start_s, end_s in _windows_for_day(local_dt):
-            try:
-                sh, sm = [int(x) for x in start_s.split(':')]
-                eh, em = [int(x) for x in end_s.split(':')]
-            except (TypeError, ValueError):
-                continue
-            from datetime import time as _time
-            if _time(sh, sm) <= cur < _time(eh, em):
-                return True
-        return False
-
-    remaining_minutes = int(round(hours_to_add * 60))
-    cursor = now.astimezone(tz)
-    # Cap the loop at 90 calendar days as a sanity bound — anything longer than
-    # that means a config bug; better to return *something* than to spin.
-    max_iter = 60 * 24 * 90
-    iters = 0
-    while remaining_minutes > 0 and iters < max_iter:
-        iters += 1
-        if _in_open_window(cursor):
-            cursor += timedelta(minutes=1)
-            remaining_minutes -= 1
-        else:
-            # Jump to the next minute. The next-open-window seek is also valid
-            # but the minute increments keep the code simple.
-            cursor += timedelta(minutes=1)
-    return cursor.astimezone(timezone.utc)
+def _sla_due_at_after_pause(ticket, paused_at, now):
+    """New sla_due_at for a ticket resumed at ``now`` after a pause from
+    ``paused_at``. With business hours on, the business time that was left
+    on the clock at pause is re-applied from ``now``; otherwise (or when the
+    SLA had already breached) the due date moves by the paused duration."""
+    if not ticket.sla_due_at:
+        return None
+    wall_clock = ticket.sla_due_at + (now - paused_at)
+    if ticket.sla_due_at <= paused_at:
+        return wall_clock
+    try:
+        calendar = _business_calendar_for(ticket.company)
+        if calendar is None:
+            return wall_clock
+        return calendar.add(now, calendar.between(paused_at, ticket.sla_due_at))
+    except Exception:
+        logger.exception("_sla_due_at_after_pause: business-hours calc failed, falling back to wall-clock")
+        return wall_clock
 
 
 def _should_send_notification_to_recipient(company_id, recipient_email, channel, event_type=None):
@@ -2181,18 +2086,34 @@ def search_knowledge(request):
         )
 
 
+def _keyset_limit(request, default=100, maximum=200):
+    """Page size for a cursor-paginated list, or None (every row) when the
+    caller sent neither `limit` nor `cursor` — what those lists returned
+    before they were paginated."""
+    if 'limit' not in request.GET and not request.GET.get('cursor'):
+        return None
+    return min(maximum, max(1, int(request.GET.get('limit', default))))
+
+
 @api_view(["GET"])
 @authentication_classes([CompanyUserTokenAuthentication])
 @permission_classes([IsCompanyUserOnly])
 def list_ticket_tasks(request):
-    """List ticket tasks (KB-gap tasks) assigned to this company user. Shown in Ticket Tasks tab."""
+    """List ticket tasks (KB-gap tasks) assigned to this company user. Shown in Ticket Tasks tab.
+    Newest first. Every task unless `limit` (max 200) or `cursor` is given; then one page at a
+    time, with `pagination.next_cursor` to pass back as `cursor` for the next."""
     try:
         company_user = request.user
         user = _get_or_create_user_for_company_user(company_user)
-        tickets = Ticket.objects.filter(
+        qs = Ticket.objects.filter(
             assigned_to=user,
             category='knowledge_gap',
-        ).order_by('-created_at')
+        )
+        limit = _keyset_limit(request)
+        try:
+            tickets, next_cursor = keyset_page(qs, ('-created_at', '-id'), request.GET.get('cursor'), limit)
+        except InvalidCursor as e:
+            return Response({'status': 'error', 'message': str(e)}, status=status.HTTP_400_BAD_REQUEST)
         data = [
             {
                 'id': t.id,
@@ -2205,7 +2126,11 @@ def list_ticket_tasks(request):
             }
             for t in tickets
         ]
-        return Response({'status': 'success', 'data': data})
+        return Response({
+            'status': 'success',
+            'data': data,
+            'pagination': {'limit': limit, 'next_cursor': next_cursor},
+        })
     except KeyServiceError:
         raise
     except Exception as e:
@@ -2220,7 +2145,12 @@ def list_ticket_tasks(request):
 @authentication_classes([CompanyUserTokenAuthentication])
 @permission_classes([IsCompanyUserOnly])
 def list_tickets(request):
-    """List support tickets with filters and pagination. Scoped to tickets created by this company user."""
+    """List support tickets with filters and pagination. Scoped to tickets created by this company user.
+
+    Newest first. `cursor` (from `pagination.next_cursor`) continues after the
+    last ticket of the previous page with an index seek; `page` still works
+    and is served by offset. `pagination.total` is cached for a few seconds
+    (see core.keyset_pagination)."""
     try:
         company_user = request.user
         user = _get_or_create_user_for_company_user(company_user)
@@ -2229,7 +2159,7 @@ def list_tickets(request):
         # tenant's tickets. Belt-and-suspenders alongside created_by.
         qs = Ticket.objects.filter(
             company=company_user.company, created_by=user,
-        ).order_by('-created_at')
+        )
 
         status_filter = request.GET.get('status')
         if status_filter:
@@ -2240,17 +2170,16 @@ def list_tickets(request):
         category_filter = request.GET.get('category')
         if category_filter:
             qs = qs.filter(category=category_filter)
-        # T2 — substring search across title AND description so agents can find
-        # tickets by content, not just headline. Capped at 80 chars to keep the
-        # LIKE pattern bounded (DB optimiser hates long ILIKE prefixes).
+        # T2 — word search across title AND description so agents can find
+        # tickets by content, not just headline. Matched against the per-company
+        # token index (Frontline_agent.ticket_index). Capped at 80 chars.
         q_term = (request.GET.get('q') or '').strip()[:80]
         if q_term:
-            qs = qs.filter(Q(title__icontains=q_term) | Q(description__icontains=q_term))
+            qs = filter_search(qs, company_user.company_id, q_term)
         # T1 — filter by tag. Accept multiple ?tag=foo&tag=bar to require ALL.
         tag_filters = [t for t in request.GET.getlist('tag') if t]
-        for t in tag_filters:
-            # SQL Server JSONField __contains works with list-of-strings.
-            qs = qs.filter(tags__contains=[t])
+        if tag_filters:
+            qs = filter_tags(qs, company_user.company_id, tag_filters)
         date_from = request.GET.get('date_from')
         if date_from:
             try:
@@ -2268,12 +2197,17 @@ def list_tickets(request):
             except ValueError:
                 pass
 
-        page = max(1, int(request.GET.get('page', 1)))
+        cursor = request.GET.get('cursor')
+        page = 1 if cursor else max(1, int(request.GET.get('page', 1)))
         limit = min(100, max(1, int(request.GET.get('limit', 20))))
-        total = qs.count()
+        try:
+            tickets, next_cursor = keyset_page(
+                qs, ('-created_at', '-id'), cursor, limit, offset=(page - 1) * limit,
+            )
+        except InvalidCursor as e:
+            return Response({'status': 'error', 'message': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        total = cached_count(qs)
         total_pages = (total + limit - 1) // limit if limit else 1
-        offset = (page - 1) * limit
-        tickets = list(qs[offset:offset + limit])
         now = timezone.now()
         at_risk_threshold = now + timedelta(hours=2)  # due within 2 hours = at risk
         resolved_statuses = {'resolved', 'closed', 'auto_resolved'}
@@ -2333,10 +2267,11 @@ def list_tickets(request):
             'status': 'success',
             'data': data,
             'pagination': {
-                'page': page,
+                'page': None if cursor else page,
                 'limit': limit,
                 'total': total,
                 'total_pages': total_pages,
+                'next_cursor': next_cursor,
             },
         })
     except KeyServiceError:
@@ -2353,7 +2288,12 @@ def list_tickets(request):
 @authentication_classes([CompanyUserTokenAuthentication])
 @permission_classes([IsCompanyUserOnly])
 def list_tickets_aging(request):
-    """List tickets that are SLA breached or at risk (due within 2 hours). Same scope as list_tickets."""
+    """List tickets that are SLA breached or at risk (due within 2 hours). Same scope as list_tickets.
+
+    Most overdue first. Every ticket unless `limit` (max 200) or `cursor` is
+    given; then one page at a time across both lists, with
+    `pagination.next_cursor` to pass back as `cursor` for the next. The counts
+    cover every page."""
     try:
         company_user = request.user
         user = _get_or_create_user_for_company_user(company_user)
@@ -2361,21 +2301,36 @@ def list_tickets_aging(request):
         at_risk_threshold = now + timedelta(hours=2)
         resolved_statuses = {'resolved', 'closed', 'auto_resolved'}
         qs = Ticket.objects.filter(
+            company=company_user.company,
             created_by=user,
             sla_due_at__isnull=False,
+            sla_due_at__lte=at_risk_threshold,
             sla_paused_at__isnull=True,  # paused tickets don't age
-        ).exclude(status__in=resolved_statuses).order_by('sla_due_at')
+        ).exclude(status__in=resolved_statuses)
         # Exclude snoozed tickets (snoozed_until in the future)
         qs = qs.filter(Q(snoozed_until__isnull=True) | Q(snoozed_until__lte=now))
-        breached = [t for t in qs if t.sla_due_at < now]
-        at_risk = [t for t in qs if t.sla_due_at >= now and t.sla_due_at <= at_risk_threshold]
+        limit = _keyset_limit(request)
+        try:
+            tickets, next_cursor = keyset_page(qs, ('sla_due_at', 'id'), request.GET.get('cursor'), limit)
+        except InvalidCursor as e:
+            return Response({'status': 'error', 'message': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        counts = qs.aggregate(
+            breached=Count('id', filter=Q(sla_due_at__lt=now)),
+            at_risk=Count('id', filter=Q(sla_due_at__gte=now)),
+        )
+        breached = [t for t in tickets if t.sla_due_at < now]
+        at_risk = [t for t in tickets if t.sla_due_at >= now]
         data = {
             'breached': [{'id': t.id, 'title': t.title, 'status': t.status, 'priority': t.priority, 'sla_due_at': t.sla_due_at.isoformat(), 'intent': t.intent, 'entities': t.entities} for t in breached],
             'at_risk': [{'id': t.id, 'title': t.title, 'status': t.status, 'priority': t.priority, 'sla_due_at': t.sla_due_at.isoformat(), 'intent': t.intent, 'entities': t.entities} for t in at_risk],
-            'count_breached': len(breached),
-            'count_at_risk': len(at_risk),
+            'count_breached': counts['breached'],
+            'count_at_risk': counts['at_risk'],
         }
-        return Response({'status': 'success', 'data': data})
+        return Response({
+            'status': 'success',
+            'data': data,
+            'pagination': {'limit': limit, 'next_cursor': next_cursor},
+        })
     except KeyServiceError:
         raise
     except Exception as e:
@@ -2696,12 +2651,13 @@ def resume_ticket_sla(request, ticket_id):
                 'sla_paused_accumulated_seconds': ticket.sla_paused_accumulated_seconds,
                 'message': 'SLA was not paused',
             }})
-        paused_for = (timezone.now() - ticket.sla_paused_at).total_seconds()
+        now = timezone.now()
+        paused_for = (now - ticket.sla_paused_at).total_seconds()
         paused_for = max(0, int(paused_for))
         ticket.sla_paused_accumulated_seconds = (ticket.sla_paused_accumulated_seconds or 0) + paused_for
-        # Push the due date out by the paused duration so SLA math is preserved
+        # Push the due date out so the time left on the SLA is preserved
         if ticket.sla_due_at:
-            ticket.sla_due_at = ticket.sla_due_at + timedelta(seconds=paused_for)
+            ticket.sla_due_at = _sla_due_at_after_pause(ticket, ticket.sla_paused_at, now)
         ticket.sla_paused_at = None
         ticket.save(update_fields=['sla_paused_at', 'sla_paused_accumulated_seconds', 'sla_due_at', 'updated_at'])
         return Response({'status': 'success', 'data': {
@@ -4689,6 +4645,9 @@ def create_workflow(request):
         name = (data.get('name') or '').strip()
         if not name:
             return Response({'status': 'error', 'message': 'name is required'}, status=status.HTTP_400_BAD_REQUEST)
+        condition_error = steps_condition_error(data.get('steps'))
+        if condition_error:
+            return Response({'status': 'error', 'message': condition_error}, status=status.HTTP_400_BAD_REQUEST)
         w = FrontlineWorkflow.objects.create(
             company=company, name=name, description=data.get('description') or '',
             trigger_conditions=data.get('trigger_conditions') or {}, steps=data.get('steps') or [], is_active=data.get('is_active', True),
@@ -4755,6 +4714,10 @@ def update_workflow(request, workflow_id):
         if not w:
             return Response({'status': 'error', 'message': 'Workflow not found'}, status=status.HTTP_404_NOT_FOUND)
         data = request.data if isinstance(request.data, dict) else (json.loads(request.body or '{}'))
+        if 'steps' in data:
+            condition_error = steps_condition_error(data['steps'])
+            if condition_error:
+                return Response({'status': 'error', 'message': condition_error}, status=status.HTTP_400_BAD_REQUEST)
 
         # Snapshot the current state before mutating so we can roll back.
         user = _get_or_create_user_for_company_user(request.user)
@@ -5034,77 +4997,33 @@ def list_workflow_company_users(request):
 # ---------- Advanced Analytics & Export ----------
 
 def _compute_frontline_analytics_data(company_user, date_from_str=None, date_to_str=None):
-    """Compute analytics data for the company user's tickets (same logic as frontline_analytics). Returns dict."""
+    """Compute analytics data for the company user's tickets (same logic as frontline_analytics). Returns dict.
+
+    Ticket metrics are summed from the daily rollups and document counts
+    come from grouped queries, so any date range (years included) costs a
+    bounded number of rows. See Frontline_agent.analytics_rollup."""
+    from Frontline_agent.analytics_rollup import document_analytics, ticket_analytics
+
     user = _get_or_create_user_for_company_user(company_user)
-    qs = Ticket.objects.filter(created_by=user)
+    date_from = date_to = None
     if date_from_str:
         try:
-            qs = qs.filter(created_at__date__gte=datetime.strptime(date_from_str, '%Y-%m-%d').date())
+            date_from = datetime.strptime(date_from_str, '%Y-%m-%d').date()
         except ValueError:
             pass
     if date_to_str:
         try:
-            qs = qs.filter(created_at__date__lte=datetime.strptime(date_to_str, '%Y-%m-%d').date())
+            date_to = datetime.strptime(date_to_str, '%Y-%m-%d').date()
         except ValueError:
             pass
-    tickets = list(qs)
-    by_date = {}
-    by_status = {}
-    by_category = {}
-    by_priority = {}
-    resolution_times = []
-    for t in tickets:
-        d = t.created_at.date().isoformat()
-        by_date[d] = by_date.get(d, 0) + 1
-        by_status[t.status] = by_status.get(t.status, 0) + 1
-        by_category[t.category] = by_category.get(t.category, 0) + 1
-        by_priority[t.priority] = by_priority.get(t.priority, 0) + 1
-        if t.resolved_at and t.created_at:
-            delta = (t.resolved_at - t.created_at).total_seconds() / 3600
-            resolution_times.append(delta)
-    avg_resolution_hours = sum(resolution_times) / len(resolution_times) if resolution_times else None
-    # Line/area charts need [{ label, value }]; bar/pie can use object { "Label": count }
-    tickets_by_date_sorted = sorted(by_date.items())
+    data = ticket_analytics(getattr(user, 'id', None), date_from, date_to)
 
     # FRONTLINE-BUG-10: include documents dimension so the analytics agent
     # can answer "how many documents" without confusing docs with tickets.
     # Scope: uploaded_by the same Django user we resolved above (matches
     # how `list_documents` builds its per-user KB view).
     try:
-        from Frontline_agent.models import Document as _FLDocument
-        doc_qs = _FLDocument.objects.filter(uploaded_by=user)
-        if date_from_str:
-            try:
-                doc_qs = doc_qs.filter(uploaded_at__date__gte=datetime.strptime(date_from_str, '%Y-%m-%d').date())
-            except Exception:
-                pass
-        if date_to_str:
-            try:
-                doc_qs = doc_qs.filter(uploaded_at__date__lte=datetime.strptime(date_to_str, '%Y-%m-%d').date())
-            except Exception:
-                pass
-        docs = list(doc_qs.only(
-            'id', 'file_format', 'processing_status', 'is_outdated',
-        ))
-        docs_by_format = {}
-        docs_by_status = {}
-        outdated_docs_count = 0
-        for d in docs:
-            fmt = getattr(d, 'file_format', None) or 'other'
-            docs_by_format[fmt] = docs_by_format.get(fmt, 0) + 1
-            st = getattr(d, 'processing_status', None) or 'ready'
-            docs_by_status[st] = docs_by_status.get(st, 0) + 1
-            if getattr(d, 'is_outdated', False):
-                outdated_docs_count += 1
-        docs_summary = {
-            'total_documents': len(docs),
-            'ready_documents': docs_by_status.get('ready', 0),
-            'outdated_documents': outdated_docs_count,
-            'documents_by_format': [{'format': k, 'count': v} for k, v in docs_by_format.items()],
-            'documents_by_format_obj': dict(docs_by_format),
-            'documents_by_status': [{'status': k, 'count': v} for k, v in docs_by_status.items()],
-            'documents_by_status_obj': dict(docs_by_status),
-        }
+        docs_summary = document_analytics(getattr(user, 'id', None), date_from, date_to)
     except Exception:
         # Analytics is best-effort — never let a docs-count failure break
         # the whole tickets payload.
@@ -5119,22 +5038,9 @@ def _compute_frontline_analytics_data(company_user, date_from_str=None, date_to_
             'documents_by_status_obj': {},
         }
 
-    return {
-        'tickets_by_date': [{'date': k, 'count': v} for k, v in tickets_by_date_sorted],
-        'tickets_by_date_line': [{'label': k, 'value': v} for k, v in tickets_by_date_sorted],
-        'tickets_by_status': [{'status': k, 'count': v} for k, v in by_status.items()],
-        'tickets_by_status_obj': dict(by_status),
-        'tickets_by_category': [{'category': k, 'count': v} for k, v in by_category.items()],
-        'tickets_by_category_obj': dict(by_category),
-        'tickets_by_priority': [{'priority': k, 'count': v} for k, v in by_priority.items()],
-        'tickets_by_priority_obj': dict(by_priority),
-        'total_tickets': len(tickets),
-        'avg_resolution_hours': round(avg_resolution_hours, 2) if avg_resolution_hours is not None else None,
-        'auto_resolved_count': sum(1 for t in tickets if t.auto_resolved),
-        # BUG-10: documents dimension, so the analytics LLM knows the
-        # difference between docs and tickets.
-        **docs_summary,
-    }
+    # BUG-10: documents dimension, so the analytics LLM knows the
+    # difference between docs and tickets.
+    return {**data, **docs_summary}
 
 
 @api_view(["POST"])
@@ -5365,120 +5271,57 @@ def frontline_analytics(request):
 @authentication_classes([CompanyUserTokenAuthentication])
 @permission_classes([IsCompanyUserOnly])
 def frontline_analytics_export(request):
-    """Export analytics as CSV.
+    """Export analytics as CSV or Excel.
 
     Query params:
       - entity: tickets (default) | meetings
+      - file_format: csv (default) | xlsx
+      - async: 1 to build the file in the background; the response is then
+        202 with an export_id to poll at exports/<export_id>/ for the
+        download link.
       - date_from / date_to: YYYY-MM-DD
       - status:   applied to BOTH tickets and meetings (they share the field name).
       - priority: tickets only — silently ignored on meetings (they don't have priority).
       - category: tickets only — silently ignored on meetings (they don't have category).
       - organizer_id: meetings only — filters by organizer.
 
-    Now correctly scoped to the caller's company instead of just their own tickets."""
+    Now correctly scoped to the caller's company instead of just their own tickets.
+    The file is streamed (see core.tabular_export), so there is no row cap."""
     try:
         company = request.user.company
         entity = (request.GET.get('entity') or 'tickets').lower()
-        date_from_str = request.GET.get('date_from')
-        date_to_str = request.GET.get('date_to')
-
-        def _apply_date_range(qs, field='created_at'):
-            if date_from_str:
-                try:
-                    qs = qs.filter(**{f"{field}__date__gte": datetime.strptime(date_from_str, '%Y-%m-%d').date()})
-                except ValueError:
-                    pass
-            if date_to_str:
-                try:
-                    qs = qs.filter(**{f"{field}__date__lte": datetime.strptime(date_to_str, '%Y-%m-%d').date()})
-                except ValueError:
-                    pass
-            return qs
-
-        response = HttpResponse(content_type='text/csv')
-        writer = csv.writer(response)
+        try:
+            fmt = export_format(request.GET.get('file_format'))
+        except TabularExportError as e:
+            return Response({'status': 'error', 'message': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        filters = {
+            key: request.GET.get(key)
+            for key in ('date_from', 'date_to', 'status', 'priority', 'category', 'organizer_id')
+            if request.GET.get(key)
+        }
 
         if entity == 'meetings':
-            qs = FrontlineMeeting.objects.filter(company=company).order_by('-scheduled_at')
-            qs = _apply_date_range(qs, field='scheduled_at')
-
-            # Apply the filters that are legal on FrontlineMeeting. Previously
-            # this branch exited without touching status/priority/category, so
-            # an export with ?status=scheduled returned every meeting rather
-            # than only scheduled ones — the bug flagged in the audit.
-            meeting_status = request.GET.get('status')
-            if meeting_status:
-                qs = qs.filter(status=meeting_status)
-            organizer_id = request.GET.get('organizer_id')
-            if organizer_id:
-                try:
-                    qs = qs.filter(organizer_id=int(organizer_id))
-                except (TypeError, ValueError):
-                    pass
             # `priority` / `category` don't exist on meetings. If the caller
             # sent them anyway, log so the frontend team notices — but don't
             # fail the request (the export otherwise still works and it's
             # unfriendly to reject over a stray irrelevant param).
             for f in ('priority', 'category'):
-                if request.GET.get(f):
+                if filters.get(f):
                     logger.info(
                         "frontline_analytics_export: '%s' filter is ticket-only; "
                         "ignored for entity=meetings", f,
                     )
-
-            response['Content-Disposition'] = 'attachment; filename="frontline_meetings_export.csv"'
-            writer.writerow(['id', 'title', 'scheduled_at', 'duration_minutes', 'status',
-                             'organizer_id', 'participant_count', 'action_item_count',
-                             'reminder_24h_sent_at', 'reminder_15m_sent_at', 'created_at'])
-            for m in qs[:5000].iterator():
-                writer.writerow([
-                    m.id, m.title, m.scheduled_at.isoformat() if m.scheduled_at else '',
-                    m.duration_minutes, m.status, m.organizer_id,
-                    m.participants.count(),
-                    len(m.action_items or []),
-                    m.reminder_24h_sent_at.isoformat() if m.reminder_24h_sent_at else '',
-                    m.reminder_15m_sent_at.isoformat() if m.reminder_15m_sent_at else '',
-                    m.created_at.isoformat(),
-                ])
-            return response
-
-        # Default: tickets — company-scoped
-        qs = Ticket.objects.filter(company=company).order_by('-created_at')
-        qs = _apply_date_range(qs, field='created_at')
-        for f in ('status', 'priority', 'category'):
-            v = request.GET.get(f)
-            if v:
-                qs = qs.filter(**{f: v})
-        qs = qs[:5000]
-        response['Content-Disposition'] = 'attachment; filename="frontline_tickets_export.csv"'
-        writer.writerow([
-            'id', 'title', 'description', 'status', 'priority', 'category',
-            'auto_resolved', 'resolution_confidence', 'assigned_to_id',
-            'created_by_id', 'intent', 'created_at', 'updated_at', 'resolved_at',
-            'sla_due_at', 'notes_count',
-        ])
-        # Bulk-count notes in one query to avoid N+1.
-        from django.db.models import Count as _Count
-        ticket_ids = list(qs.values_list('id', flat=True))
-        notes_map = dict(
-            TicketNote.objects.filter(ticket_id__in=ticket_ids)
-            .order_by()  # strip Meta.ordering so MSSQL doesn't reject the GROUP BY
-            .values_list('ticket_id')
-            .annotate(c=_Count('id'))
-            .values_list('ticket_id', 'c')
-        ) if ticket_ids else {}
-        for t in Ticket.objects.filter(id__in=ticket_ids).order_by('-created_at').iterator():
-            writer.writerow([
-                t.id, t.title, (t.description or '')[:500],
-                t.status, t.priority, t.category,
-                t.auto_resolved, t.resolution_confidence, t.assigned_to_id,
-                t.created_by_id, t.intent or '',
-                t.created_at.isoformat(), t.updated_at.isoformat(),
-                t.resolved_at.isoformat() if t.resolved_at else '',
-                t.sla_due_at.isoformat() if t.sla_due_at else '',
-                notes_map.get(t.id, 0),
-            ])
-        return response
+            source = 'Frontline_agent.exports.meeting_export'
+            export = meeting_export(company.id, filters)
+        else:
+            # Default: tickets — company-scoped
+            source = 'Frontline_agent.exports.ticket_export'
+            export = ticket_export(company.id, filters)
+
+        if async_requested(request.GET.get('async')):
+            payload = start_async_export(source, {'company_id': company.id, 'filters': filters}, fmt, request.user.id)
+            return Response({'status': 'success', 'data': payload}, status=status.HTTP_202_ACCEPTED)
+        return streaming_response(export, fmt)
     except KeyServiceError:
         raise
     except Exception as e:
@@ -49,6 +49,7 @@ from core.HR_agent.hr_agent import HRAgent
 from core.api_key_service import KeyServiceError
 # Re-use Frontline's hardened helpers — file validation + broker probe.
 from Frontline_agent.document_processor import DocumentProcessor
+from Frontline_agent.workflow_conditions import steps_condition_error
 
 logger = logging.getLogger(__name__)
 
@@ -1361,6 +1362,10 @@ def update_hr_workflow(request, workflow_id):
         if not isinstance(steps, list):
             return Response({'status': 'error', 'message': 'steps must be a list'},
                             status=status.HTTP_400_BAD_REQUEST)
+        condition_error = steps_condition_error(steps)
+        if condition_error:
+            return Response({'status': 'error', 'message': condition_error},
+                            status=status.HTTP_400_BAD_REQUEST)
         w.steps = steps
         dirty.append('steps')
     if 'is_active' in d:
@@ -1447,6 +1452,10 @@ def create_hr_workflow(request):
     if not name:
         return Response({'status': 'error', 'message': 'name is required'},
                         status=status.HTTP_400_BAD_REQUEST)
+    condition_error = steps_condition_error(d.get('steps'))
+    if condition_error:
+        return Response({'status': 'error', 'message': condition_error},
+                        status=status.HTTP_400_BAD_REQUEST)
     w = HRWorkflow.objects.create(
         company=company, name=name, description=d.get('description') or '',
         trigger_conditions=d.get('trigger_conditions') or {},
@@ -10,15 +10,13 @@ from rest_framework.permissions import IsAuthenticated
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
 from django.core.paginator import Paginator
-from django.db.models import Q, Count, Sum, Avg
+from django.db.models import Q, Sum, Avg
 from django.contrib.auth.models import User
-from django.http import HttpResponse
 from datetime import timedelta, datetime
 import imaplib
 import inspect
 import json
 import logging
-import csv
 import smtplib
 import socket
 
@@ -31,9 +29,16 @@ from marketing_agent.models import (
     MarketingQAChat, MarketingQAChatMessage,
     MarketResearchChat, MarketResearchChatMessage,
 )
+from marketing_agent import campaign_rollups
 from marketing_agent.services.email_service import EmailService
+from marketing_agent.services.lead_import import import_campaign_leads
+from marketing_agent.exports import campaign_lead_export
 from project_manager_agent.ai_agents.agents_registry import AgentRegistry
 from core.api_key_service import KeyServiceError
+from core.tabular_export import (
+    TabularExportError, async_requested, export_format, start_async_export, streaming_response,
+)
+from core.tabular_import import TabularImportError
 
 logger = logging.getLogger(__name__)
 
@@ -300,41 +305,29 @@ def _build_campaign_detail(campaign, user):
     all_email_sends = EmailSendHistory.objects.filter(
         campaign=campaign, email_template__isnull=False
     )
-    total_sent = all_email_sends.filter(status__in=['sent', 'delivered', 'opened', 'clicked']).count()
-    total_opened = all_email_sends.filter(status__in=['opened', 'clicked']).count()
-    total_clicked = all_email_sends.filter(status='clicked').count()
-    # Use Reply model so total matches Email Sending page (count of reply events, not unique contacts)
-    total_replied = Reply.objects.filter(campaign=campaign).count()
-    total_failed = all_email_sends.filter(status='failed').count()
-    total_bounced = all_email_sends.filter(status='bounced').count()
+    # Counters come from the per-day campaign rollups (campaign_rollups.py),
+    # which apply the same status sets and template exclusion as above.
+    totals = campaign_rollups.campaign_totals([campaign.id])[campaign.id]
+    total_sent = totals['sent']
+    total_opened = totals['opened']
+    total_clicked = totals['clicked']
+    # Reply events, not unique contacts, so total matches Email Sending page
+    total_replied = totals['replies']
+    total_failed = totals['failed']
+    total_bounced = totals['bounced']
     # Positive = interested, requested_info, neutral, objection (show as Positive/Neutral on dashboard)
-    positive_replies = Reply.objects.filter(
-        campaign=campaign,
-        interest_level__in=['positive', 'neutral', 'requested_info', 'objection']
-    ).count()
+    positive_replies = totals['positive_replies']
     # Negative = not interested + unsubscribe
-    negative_replies = Reply.objects.filter(
-        campaign=campaign,
-        interest_level__in=['negative', 'unsubscribe']
-    ).count()
+    negative_replies = totals['negative_replies']
     # Per-type reply breakdown (how many of each interest_level) for the dashboard.
-    _breakdown_counts = dict(
-        Reply.objects.filter(campaign=campaign)
-        .order_by()  # clear model default ordering (replied_at) so GROUP BY is valid on SQL Server
-        .values_list('interest_level')
-        .annotate(c=Count('id'))
-        .values_list('interest_level', 'c')
-    )
     reply_breakdown = {
-        'positive': _breakdown_counts.get('positive', 0),
-        'neutral': _breakdown_counts.get('neutral', 0),
-        'requested_info': _breakdown_counts.get('requested_info', 0),
-        'objection': _breakdown_counts.get('objection', 0),
-        'negative': _breakdown_counts.get('negative', 0),
-        'unsubscribe': _breakdown_counts.get('unsubscribe', 0),
-        'not_analyzed': _breakdown_counts.get('not_analyzed', 0)
-                        + _breakdown_counts.get(None, 0)
-                        + _breakdown_counts.get('', 0),
+        'positive': totals['replies_positive'],
+        'neutral': totals['replies_neutral'],
+        'requested_info': totals['replies_requested_info'],
+        'objection': totals['replies_objection'],
+        'negative': totals['replies_negative'],
+        'unsubscribe': totals['replies_unsubscribe'],
+        'not_analyzed': totals['replies_not_analyzed'],
     }
     open_rate = (total_opened / total_sent * 100) if total_sent > 0 else 0
     click_rate = (total_clicked / total_sent * 100) if total_sent > 0 else 0
@@ -384,34 +377,16 @@ def _build_campaign_detail(campaign, user):
         'leads_sent_to': leads_sent_to,
     }
 
-    # Chart data (last 30 days)
-    thirty_days_ago = timezone.now() - timedelta(days=30)
-    recent_email_sends = all_email_sends.filter(
-        Q(sent_at__gte=thirty_days_ago) | Q(created_at__gte=thirty_days_ago, sent_at__isnull=True)
-    )
-    metrics_by_date = {}
-    for i in range(30):
-        date_obj = (timezone.now().date() - timedelta(days=i))
-        date_str = date_obj.strftime('%Y-%m-%d')
-        metrics_by_date[date_str] = {'sent': 0, 'opened': 0, 'clicked': 0, 'replied': 0}
-    for email_send in recent_email_sends:
-        email_date = email_send.sent_at.date() if email_send.sent_at else email_send.created_at.date()
-        date_str = email_date.strftime('%Y-%m-%d')
-        if date_str in metrics_by_date:
-            if email_send.status in ['sent', 'delivered', 'opened', 'clicked']:
-                metrics_by_date[date_str]['sent'] += 1
-            if email_send.status in ['opened', 'clicked']:
-                metrics_by_date[date_str]['opened'] += 1
-            if email_send.status == 'clicked':
-                metrics_by_date[date_str]['clicked'] += 1
-    recent_replies = Reply.objects.filter(
-        campaign=campaign, replied_at__isnull=False, replied_at__gte=thirty_days_ago
-    )
-    for reply in recent_replies:
-        if reply.replied_at:
-            date_str = reply.replied_at.date().strftime('%Y-%m-%d')
-            if date_str in metrics_by_date:
-                metrics_by_date[date_str]['replied'] += 1
+    # Chart data (last 30 days), one rollup row per day
+    metrics_by_date = {
+        day.strftime('%Y-%m-%d'): {
+            'sent': day_totals['sent'],
+            'opened': day_totals['opened'],
+            'clicked': day_totals['clicked'],
+            'replied': day_totals['replies'],
+        }
+        for day, day_totals in campaign_rollups.daily_totals(campaign.id, days=30).items()
+    }
     sorted_dates = sorted(metrics_by_date.keys())
     dates_formatted = []
     impressions_list = []
@@ -962,115 +937,19 @@ def _upload_leads_from_file(campaign, user, uploaded_file):
             'created_count': int,        # rows successfully added/updated
             'rejected_count': int,       # rows skipped — missing required fields
             'rejected_reasons': {'missing_email': int, 'missing_name': int, 'other': int},
+            'rejected_rows': [...],      # per-row detail, capped at 200
         }
+    Row numbers are spreadsheet-friendly: header = row 1, so the first data
+    row is row 2. Rows are streamed and written in chunks
+    (marketing_agent/services/lead_import.py).
     """
     try:
-        import pandas as pd
-    except ImportError:
-        return (None, 'pandas is required for Excel files. For CSV only, use csv module.')
-    file_extension = (uploaded_file.name or '').split('.')[-1].lower()
-    if file_extension not in ['csv', 'xlsx', 'xls']:
-        return (None, 'Invalid file format. Please upload CSV, XLSX, or XLS files.')
-    from django.db import transaction
-    if file_extension == 'csv':
-        df = pd.read_csv(uploaded_file)
-    else:
-        df = pd.read_excel(uploaded_file)
-    if df.empty:
-        return (None, 'File is empty')
-    df.columns = df.columns.str.lower().str.strip()
-    if 'email' not in df.columns:
-        return (None, 'Email column is required in the file')
-    # Support "first name"/"last name" (with space) and "name" columns
-    def _get(row, *keys):
-        for k in keys:
-            if k in row and pd.notna(row.get(k)) and str(row.get(k)).strip():
-                return str(row.get(k)).strip()
-        return ''
-    total_rows = len(df)
-    created_count = 0
-    rejected_reasons = {'missing_email': 0, 'missing_name': 0, 'other': 0}
-    # Per-row rejection detail so the UI can tell the user exactly which row /
-    # field / reason failed. Row number is spreadsheet-friendly: header = row 1,
-    # so the first data row is row 2 (index 0 → row 2).
-    rejected_rows = []
-    with transaction.atomic():
-        for index, row in df.iterrows():
-            row_no = int(index) + 2
-            try:
-                email = '' if 'email' not in row else str(row['email']).strip().lower()
-                if not email or ('email' in row and pd.isna(row['email'])) or email == 'nan':
-                    rejected_reasons['missing_email'] += 1
-                    rejected_rows.append({'row': row_no, 'field': 'email', 'reason': 'Missing email', 'value': ''})
-                    continue
-                first = _get(row, 'first_name', 'first name')
-                last = _get(row, 'last_name', 'last name')
-                if not first and not last:
-                    name_val = _get(row, 'name')
-                    if name_val:
-                        parts = name_val.split(None, 1)
-                        first = parts[0] or ''
-                        last = parts[1] if len(parts) > 1 else ''
-                # First and last name are required (directly, or via a "name" column
-                # split into both) — a row with neither is skipped, same as a
-                # missing email, so personalization tokens are never silently blank.
-                if not first and not last:
-                    rejected_reasons['missing_name'] += 1
-                    rejected_rows.append({'row': row_no, 'field': 'name', 'reason': 'Missing name (first/last or name)', 'value': email})
-                    continue
-                lead, created = Lead.objects.get_or_create(
-                    email=email, owner=user,
-                    defaults={
-                        'first_name': first,
-                        'last_name': last,
-                        'phone': _get(row, 'phone'),
-                        'company': _get(row, 'company'),
-                        'job_title': _get(row, 'job_title'),
-                        'source': _get(row, 'source'),
-                    }
-                )
-                if created:
-                    created_count += 1
-                else:
-                    if not lead.first_name and first:
-                        lead.first_name = first
-                    if not lead.last_name and last:
-                        lead.last_name = last
-                    v = _get(row, 'phone')
-                    if not lead.phone and v:
-                        lead.phone = v
-                    v = _get(row, 'company')
-                    if not lead.company and v:
-                        lead.company = v
-                    v = _get(row, 'job_title', 'job title')
-                    if not lead.job_title and v:
-                        lead.job_title = v
-                    v = _get(row, 'source')
-                    if not lead.source and v:
-                        lead.source = v
-                    lead.save()
-                    created_count += 1
-                campaign.leads.add(lead)
-                CampaignContact.objects.get_or_create(
-                    campaign=campaign, lead=lead,
-                    defaults={
-                        'sequence': EmailSequence.objects.filter(campaign=campaign, is_active=True).first(),
-                        'current_step': 0,
-                    }
-                )
-            except Exception as row_exc:
-                rejected_reasons['other'] += 1
-                rejected_rows.append({'row': row_no, 'field': '', 'reason': f'Error: {str(row_exc)[:120]}', 'value': ''})
-                continue
-    rejected_count = sum(rejected_reasons.values())
-    return ({
-        'total_rows': total_rows,
-        'created_count': created_count,
-        'rejected_count': rejected_count,
-        'rejected_reasons': rejected_reasons,
-        # Cap the list so a huge bad file doesn't bloat the response.
-        'rejected_rows': rejected_rows[:200],
-    }, None)
+        result = import_campaign_leads(campaign, user, uploaded_file, uploaded_file.name or '')
+    except TabularImportError as e:
+        return (None, str(e))
+    except UnicodeDecodeError:
+        return (None, 'The file is not UTF-8 encoded. Save it as "CSV UTF-8" and try again.')
+    return (result, None)
 
 
 @api_view(["POST"])
@@ -1125,23 +1004,24 @@ def upload_campaign_leads(request, campaign_id):
 @authentication_classes([CompanyUserTokenAuthentication])
 @permission_classes([IsCompanyUserOnly])
 def export_campaign_leads(request, campaign_id):
-    """Export campaign leads as CSV"""
+    """Export campaign leads as CSV (or ?file_format=xlsx). Streamed; ?async=1
+    builds it in the background instead and answers 202 with an export_id to
+    poll at exports/<export_id>/."""
     try:
         company_user = request.user
         user = _get_or_create_user_for_company_user(company_user)
         campaign = get_object_or_404(Campaign, id=campaign_id, owner=user)
-        leads = campaign.leads.all().order_by('-created_at')
-        response = HttpResponse(content_type='text/csv')
-        response['Content-Disposition'] = f'attachment; filename="campaign_{campaign.id}_leads.csv"'
-        writer = csv.writer(response)
-        writer.writerow(['Email', 'First Name', 'Last Name', 'Phone', 'Company', 'Job Title', 'Status', 'Source'])
-        for lead in leads:
-            writer.writerow([
-                lead.email, lead.first_name or '', lead.last_name or '',
-                lead.phone or '', lead.company or '', lead.job_title or '',
-                lead.status, lead.source or ''
-            ])
-        return response
+        try:
+            fmt = export_format(request.GET.get('file_format'))
+        except TabularExportError as e:
+            return Response({'status': 'error', 'message': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        export = campaign_lead_export(campaign.id)
+        if async_requested(request.GET.get('async')):
+            payload = start_async_export(
+                'marketing_agent.exports.campaign_lead_export', {'campaign_id': campaign.id}, fmt, company_user.id,
+            )
+            return Response({'status': 'success', 'data': payload}, status=status.HTTP_202_ACCEPTED)
+        return streaming_response(export, fmt)
     except KeyServiceError:
         raise
     except Exception as e:
@@ -1779,16 +1659,16 @@ def list_sequences(request, campaign_id):
             is_sub_sequence=False
         ).prefetch_related('steps__template', 'email_account', 'sub_sequences__steps__template')
         templates = EmailTemplate.objects.filter(campaign=campaign, is_active=True).order_by('name')
+        # Per-sequence counters from the campaign rollups — one query for
+        # every sequence and sub-sequence instead of three each.
+        seq_totals = campaign_rollups.sequence_totals(campaign.id)
         sequences_data = []
         for sequence in main_sequences:
             steps = sequence.steps.all().order_by('step_order')
-            sequence_emails_sent = EmailSendHistory.objects.filter(
-                campaign=campaign,
-                email_template__sequence_steps__sequence=sequence
-            )
-            total_sent = sequence_emails_sent.count()
-            total_opened = sequence_emails_sent.filter(status__in=['opened', 'clicked']).count()
-            total_clicked = sequence_emails_sent.filter(status='clicked').count()
+            totals = seq_totals.get(sequence.id) or campaign_rollups.empty_totals()
+            total_sent = totals['sent'] + totals['bounced'] + totals['failed']
+            total_opened = totals['opened']
+            total_clicked = totals['clicked']
             open_rate = (total_opened / total_sent * 100) if total_sent > 0 else 0
             click_rate = (total_clicked / total_sent * 100) if total_sent > 0 else 0
             campaign_is_active = campaign.status == 'active'
@@ -1796,13 +1676,10 @@ def list_sequences(request, campaign_id):
             sub_sequences_data = []
             for sub_seq in sequence.sub_sequences.all().order_by('id'):
                 sub_steps = sub_seq.steps.all().order_by('step_order')
-                sub_emails_sent = EmailSendHistory.objects.filter(
-                    campaign=campaign,
-                    email_template__sequence_steps__sequence=sub_seq
-                )
-                sub_sent = sub_emails_sent.count()
-                sub_opened = sub_emails_sent.filter(status__in=['opened', 'clicked']).count()
-                sub_clicked = sub_emails_sent.filter(status='clicked').count()
+                sub_totals = seq_totals.get(sub_seq.id) or campaign_rollups.empty_totals()
+                sub_sent = sub_totals['sent'] + sub_totals['bounced'] + sub_totals['failed']
+                sub_opened = sub_totals['opened']
+                sub_clicked = sub_totals['clicked']
                 sub_open_rate = (sub_opened / sub_sent * 100) if sub_sent > 0 else 0
                 sub_click_rate = (sub_clicked / sub_sent * 100) if sub_sent > 0 else 0
                 sub_effective = campaign_is_active and sub_seq.is_active
@@ -2039,13 +1916,10 @@ def get_sequence_details(request, campaign_id, sequence_id):
                 status=status.HTTP_404_NOT_FOUND
             )
         steps = sequence.steps.all().order_by('step_order')
-        sequence_emails_sent = EmailSendHistory.objects.filter(
-            campaign=campaign,
-            email_template__sequence_steps__sequence=sequence
-        )
-        total_sent = sequence_emails_sent.count()
-        total_opened = sequence_emails_sent.filter(status__in=['opened', 'clicked']).count()
-        total_clicked = sequence_emails_sent.filter(status='clicked').count()
+        totals = campaign_rollups.sequence_totals(campaign.id).get(sequence.id) or campaign_rollups.empty_totals()
+        total_sent = totals['sent'] + totals['bounced'] + totals['failed']
+        total_opened = totals['opened']
+        total_clicked = totals['clicked']
         open_rate = (total_opened / total_sent * 100) if total_sent > 0 else 0
         click_rate = (total_clicked / total_sent * 100) if total_sent > 0 else 0
         steps_data = [{
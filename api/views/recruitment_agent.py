@@ -42,10 +42,14 @@ from recruitment_agent.models import (
     RecruitmentQAChat,
     RecruitmentQAChatMessage,
 )
+from recruitment_agent.exports import candidate_export, interview_export
 
 from api.authentication import CompanyUserTokenAuthentication
 from api.permissions import IsCompanyUserOnly
 from core.api_key_service import KeyServiceError
+from core.tabular_export import (
+    TabularExportError, async_requested, export_format, start_async_export, streaming_response,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -3104,82 +3108,32 @@ def recruitment_analytics(request):
 @authentication_classes([CompanyUserTokenAuthentication])
 @permission_classes([IsCompanyUserOnly])
 def export_candidates_csv(request):
-    """Export CVRecord candidates as CSV, optionally filtered by job_id."""
-    import csv
-    from django.http import HttpResponse
-    company_user = request.user
-    job_id = request.query_params.get('job_id')
-
-    qs = CVRecord.objects.filter(
-        job_description__company_user=company_user
-    ).select_related('job_description').order_by('-created_at')
-    if job_id:
-        qs = qs.filter(job_description_id=job_id)
-
-    response = HttpResponse(content_type='text/csv')
-    fname = f'candidates_{job_id or "all"}.csv'
-    response['Content-Disposition'] = f'attachment; filename="{fname}"'
-
-    writer = csv.writer(response)
-    writer.writerow(['ID', 'File Name', 'Job Title', 'Role Fit Score', 'Rank',
-                     'Qualification Decision', 'Qualification Confidence', 'Created At'])
-    for cv in qs:
-        import json as _json
-        parsed = {}
-        try:
-            parsed = _json.loads(cv.parsed_json) if cv.parsed_json else {}
-        except Exception:
-            pass
-        writer.writerow([
-            cv.id,
-            parsed.get('name') or cv.file_name,
-            cv.job_description.title if cv.job_description else '',
-            cv.role_fit_score or '',
-            cv.rank or '',
-            cv.qualification_decision or '',
-            cv.qualification_confidence or '',
-            cv.created_at.strftime('%Y-%m-%d %H:%M') if cv.created_at else '',
-        ])
-    return response
+    """Export CVRecord candidates as CSV (or ?file_format=xlsx), optionally filtered by job_id.
+    Streamed; ?async=1 builds it in the background instead
+    and answers 202 with an export_id to poll at exports/<export_id>/."""
+    return _tabular_export_response(request, 'recruitment_agent.exports.candidate_export', candidate_export)
 
 
 @api_view(['GET'])
 @authentication_classes([CompanyUserTokenAuthentication])
 @permission_classes([IsCompanyUserOnly])
 def export_interviews_csv(request):
-    """Export interviews as CSV, optionally filtered by job_id."""
-    import csv
-    from django.http import HttpResponse
-    company_user = request.user
-    job_id = request.query_params.get('job_id')
-
-    qs = Interview.objects.filter(company_user=company_user).order_by('-created_at')
-    if job_id:
-        qs = qs.filter(cv_record__job_description_id=job_id)
-
-    response = HttpResponse(content_type='text/csv')
-    fname = f'interviews_{job_id or "all"}.csv'
-    response['Content-Disposition'] = f'attachment; filename="{fname}"'
-
-    writer = csv.writer(response)
-    writer.writerow(['ID', 'Candidate Name', 'Candidate Email', 'Candidate Phone',
-                     'Job Role', 'Interview Type', 'Status', 'Outcome',
-                     'Scheduled Date/Time', 'Selected Slot', 'Created At'])
-    for iv in qs:
-        writer.writerow([
-            iv.id,
-            iv.candidate_name or '',
-            iv.candidate_email or '',
-            iv.candidate_phone or '',
-            iv.job_role or '',
-            iv.interview_type or '',
-            iv.status or '',
-            iv.outcome or '',
-            iv.scheduled_datetime.strftime('%Y-%m-%d %H:%M') if iv.scheduled_datetime else '',
-            iv.selected_slot or '',
-            iv.created_at.strftime('%Y-%m-%d %H:%M') if iv.created_at else '',
-        ])
-    return response
+    """Export interviews as CSV (or ?file_format=xlsx), optionally filtered by job_id.
+    Delivered like export_candidates_csv."""
+    return _tabular_export_response(request, 'recruitment_agent.exports.interview_export', interview_export)
+
+
+def _tabular_export_response(request, source, build):
+    try:
+        fmt = export_format(request.query_params.get('file_format'))
+    except TabularExportError as e:
+        return Response({'status': 'error', 'message': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    params = {'company_user_id': request.user.id, 'job_id': request.query_params.get('job_id')}
+    export = build(**params)
+    if async_requested(request.query_params.get('async')):
+        payload = start_async_export(source, params, fmt, request.user.id)
+        return Response({'status': 'success', 'data': payload}, status=status.HTTP_202_ACCEPTED)
+    return streaming_response(export, fmt)
 
 
 # ---------- AI Interview Questions (no history saved) ----------
@@ -0,0 +1,234 @@
+"""Streaming CSV / Excel exports.
+
+Export views used to build the whole file in an ``HttpResponse`` before
+sending the first byte: every model instance loaded, every row formatted and
+the finished file held in memory. Large tenants hit memory spikes and gateway
+timeouts. An export is now a ``TabularExport``: a header plus a lazy row
+generator, usually fed from ``iter_chunks`` (a ``.values()`` projection read
+through ``queryset.iterator(chunk_size=...)``, so per-chunk lookups such as
+related counts cost one query per chunk, not one per row). It is delivered in
+one of two ways:
+
+- ``streaming_response`` writes it through a ``StreamingHttpResponse``. CSV
+  flushes every ~64 KB as rows are produced. .xlsx goes through openpyxl's
+  write-only workbook, which spools rows to disk as they are appended; the
+  finished file is then streamed from disk in blocks (a zip can't be sent
+  before it is complete).
+- ``start_async_export`` hands it to the ``core.tasks.build_tabular_export``
+  Celery task, which writes the file to ``default_storage`` under
+  ``exports/<owner id>/``. The requester (the owner) polls ``export_status``
+  for a download link. Only used when the caller asks for it (``?async=1``):
+  clients that don't poll expect the file bytes in the response, and
+  streaming already bounds memory. When the broker is unreachable the task
+  runs inline and the link comes back at once.
+
+Stored files hold customer data, so ``purge_expired_exports`` (the hourly
+``core.tasks.purge_tabular_exports`` task) deletes them once they are older
+than TABULAR_EXPORT_RETENTION_HOURS (default 24); their status then reads
+``expired``.
+
+The task rebuilds the export by importing ``source`` (a dotted path to a
+function returning a TabularExport) and calling it with ``params``, so both
+must be JSON-serialisable.
+"""
+import csv
+import logging
+import os
+import tempfile
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+from core.tabular_import import chunked
+
+logger = logging.getLogger(__name__)
+
+EXPORT_CHUNK_SIZE = 2000
+# Bytes gathered before a streamed block is handed to the server.
+FLUSH_BYTES = 64 * 1024
+FORMATS = {
+    'csv': 'text/csv',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+}
+EXPORT_DIR = 'exports'
+
+
+class TabularExportError(ValueError):
+    """The export can't be produced as asked (unknown format)."""
+
+
+class TabularExport:
+    """One export: ``filename`` without extension, the header row and a row
+    iterable (consumed once)."""
+
+    def __init__(self, filename, header, rows):
+        self.filename = filename
+        self.header = list(header)
+        self.rows = rows
+
+
+def export_format(value):
+    """Normalise a ``?file_format=`` value (default csv). Views don't read
+    ``?format=``: DRF reserves it for picking a renderer."""
+    fmt = (value or 'csv').strip().lower()
+    if fmt not in FORMATS:
+        raise TabularExportError(f"Unsupported export format '{fmt}'. Use csv or xlsx.")
+    return fmt
+
+
+def iter_chunks(queryset, fields, chunk_size=EXPORT_CHUNK_SIZE):
+    """Yield lists of ``.values(*fields)`` dicts, ``chunk_size`` at a time,
+    read through one iterator so the result set is never held whole."""
+    return chunked(queryset.values(*fields).iterator(chunk_size=chunk_size), chunk_size)
+
+
+class _Echo:
+    """File-like object whose ``write`` hands back what it was given, so
+    csv.writer produces strings instead of writing them anywhere."""
+
+    def write(self, value):
+        return value
+
+
+def csv_chunks(header, rows):
+    """Encoded CSV for ``header`` and ``rows`` in blocks of ~FLUSH_BYTES."""
+    writer = csv.writer(_Echo())
+    buffer = [writer.writerow(header)]
+    size = len(buffer[0])
+    for row in rows:
+        line = writer.writerow(row)
+        buffer.append(line)
+        size += len(line)
+        if size >= FLUSH_BYTES:
+            yield ''.join(buffer).encode('utf-8')
+            buffer, size = [], 0
+    if buffer:
+        yield ''.join(buffer).encode('utf-8')
+
+
+def _xlsx_cell(value):
+    if isinstance(value, str):
+        from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+
+        # Control characters make openpyxl refuse the whole row.
+        return ILLEGAL_CHARACTERS_RE.sub('', value)
+    return value
+
+
+def xlsx_chunks(header, rows):
+    """An .xlsx file for ``header`` and ``rows`` in blocks of FLUSH_BYTES."""
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet('Export')
+    sheet.append(header)
+    for row in rows:
+        sheet.append([_xlsx_cell(value) for value in row])
+    with tempfile.TemporaryFile() as fh:
+        workbook.save(fh)
+        fh.seek(0)
+        while True:
+            block = fh.read(FLUSH_BYTES)
+            if not block:
+                return
+            yield block
+
+
+def _chunks(export, fmt):
+    return xlsx_chunks(export.header, export.rows) if fmt == 'xlsx' else csv_chunks(export.header, export.rows)
+
+
+def streaming_response(export, fmt):
+    """Stream ``export`` to the client as a file download."""
+    response = StreamingHttpResponse(_chunks(export, fmt), content_type=FORMATS[fmt])
+    response['Content-Disposition'] = f'attachment; filename="{export.filename}.{fmt}"'
+    return response
+
+
+def async_requested(value):
+    """Whether a ``?async=`` value asks for background delivery."""
+    return (value or '').strip().lower() in ('1', 'true')
+
+
+def store_export(export, fmt, owner_id):
+    """Write ``export`` to default_storage. Returns the stored name."""
+    name = f'{EXPORT_DIR}/{owner_id}/{uuid.uuid4().hex}/{export.filename}.{fmt}'
+    with tempfile.TemporaryFile() as fh:
+        for block in _chunks(export, fmt):
+            fh.write(block)
+        fh.seek(0)
+        return default_storage.save(name, File(fh, name=os.path.basename(name)))
+
+
+def export_status(result, owner_id):
+    """The client-facing state of an async export from its task result:
+    {'status': pending | ready | failed | expired, 'download_url'?, 'filename'?}.
+    Another requester's results read as pending."""
+    if result.state == 'FAILURE':
+        return {'status': 'failed'}
+    if result.state != 'SUCCESS':
+        return {'status': 'pending'}
+    payload = result.result or {}
+    if payload.get('owner_id') != owner_id:
+        return {'status': 'pending'}
+    if not default_storage.exists(payload['path']):
+        return {'status': 'expired'}
+    return {
+        'status': 'ready',
+        'filename': payload.get('filename'),
+        'download_url': default_storage.url(payload['path']),
+    }
+
+
+def start_async_export(source, params, fmt, owner_id):
+    """Queue ``core.tasks.build_tabular_export`` for ``source(**params)``.
+    Returns the payload for the client: ``export_id`` to poll, plus
+    ``download_url`` when the broker was down and the file was built inline."""
+    from core.tasks import build_tabular_export
+    from api.views.frontline_agent import _celery_broker_ready
+
+    kwargs = {'source': source, 'params': params, 'fmt': fmt, 'owner_id': owner_id}
+    if _celery_broker_ready(timeout_seconds=0.5):
+        try:
+            task = build_tabular_export.apply_async(kwargs=kwargs, retry=False)
+            return {'export_id': task.id, 'status': 'pending'}
+        except Exception:
+            logger.exception("Tabular export: Celery dispatch failed, building inline")
+    else:
+        logger.warning("Tabular export: Celery broker unreachable, building inline")
+    result = build_tabular_export.apply(kwargs=kwargs)
+    return {'export_id': result.id, **export_status(result, owner_id)}
+
+
+def _listdir(path):
+    try:
+        return default_storage.listdir(path)
+    except (FileNotFoundError, NotADirectoryError):
+        return [], []
+
+
+def purge_expired_exports(now=None):
+    """Delete stored exports older than TABULAR_EXPORT_RETENTION_HOURS.
+    Returns the number of files deleted."""
+    hours = float(getattr(settings, 'TABULAR_EXPORT_RETENTION_HOURS', 24))
+    cutoff = (now or timezone.now()) - timedelta(hours=hours)
+    deleted = 0
+    owners, _ = _listdir(EXPORT_DIR)
+    for owner in owners:
+        batches, _ = _listdir(f'{EXPORT_DIR}/{owner}')
+        for batch in batches:
+            _, files = _listdir(f'{EXPORT_DIR}/{owner}/{batch}')
+            for name in files:
+                path = f'{EXPORT_DIR}/{owner}/{batch}/{name}'
+                try:
+                    if default_storage.get_modified_time(path) < cutoff:
+                        default_storage.delete(path)
+                        deleted += 1
+                except Exception:
+                    logger.exception("Tabular export purge: could not remove %s", path)
+    return deleted
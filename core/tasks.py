@@ -1,5 +1,5 @@
 """
-Core periodic tasks for module subscription management.
+Core tasks: module subscription management and background exports.
 """
 import logging
 from datetime import timedelta
@@ -159,3 +159,35 @@ def expire_module_purchases():
         logger.debug('No module purchases to expire.')
 
     return f'Expired {count} purchase(s)'
+
+
+@shared_task(name='core.tasks.build_tabular_export')
+def build_tabular_export(source, params, fmt, owner_id):
+    """
+    Build a large CSV / .xlsx export in the background and write it to
+    default_storage (see core.tabular_export). ``source`` is the dotted path
+    of the function that returns the TabularExport, called with ``params``.
+    ``owner_id`` is the requesting company user; the export status endpoint
+    shows the download link to them only.
+    """
+    from django.utils.module_loading import import_string
+    from core.tabular_export import store_export
+
+    export = import_string(source)(**params)
+    path = store_export(export, fmt, owner_id)
+    logger.info('Tabular export %s stored at %s', source, path)
+    return {'owner_id': owner_id, 'path': path, 'filename': f'{export.filename}.{fmt}'}
+
+
+@shared_task(name='core.tasks.purge_tabular_exports')
+def purge_tabular_exports():
+    """
+    Delete background export files past TABULAR_EXPORT_RETENTION_HOURS.
+    Runs every hour via Celery Beat.
+    """
+    from core.tabular_export import purge_expired_exports
+
+    deleted = purge_expired_exports()
+    if deleted:
+        logger.info('Purged %d expired tabular export file(s).', deleted)
+    return f'Purged {deleted} export file(s)'
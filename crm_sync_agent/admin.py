@@ -12,9 +12,9 @@ class CRMIntegrationAdmin(admin.ModelAdmin):
 
 @admin.register(CRMContactMapping)
 class CRMContactMappingAdmin(admin.ModelAdmin):
-    list_display = ('integration', 'source_type', 'source_id', 'crm_contact_id', 'last_synced_at')
+    list_display = ('integration', 'source_type', 'source_id', 'crm_contact_id', 'email_normalized', 'last_synced_at')
     list_filter = ('source_type', 'integration__provider')
-    search_fields = ('crm_contact_id',)
+    search_fields = ('crm_contact_id', 'email_normalized')
     readonly_fields = ('last_synced_at',)
 
 
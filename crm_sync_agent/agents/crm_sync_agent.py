@@ -10,13 +10,17 @@ Usage:
 """
 from __future__ import annotations
 
+import hashlib
+import json
 import logging
 from datetime import timedelta
 from typing import Optional
 
+from django.db import transaction
+from django.db.models import F, Q
 from django.utils import timezone
 
-from crm_sync_agent.connectors.base import BaseCRMConnector, CRMError
+from crm_sync_agent.connectors.base import BaseCRMConnector, CRMError, rate_limiter
 from crm_sync_agent.connectors.hubspot import HubSpotConnector
 from crm_sync_agent.connectors.salesforce import SalesforceConnector
 from crm_sync_agent.connectors.pipedrive import PipedriveConnector
@@ -32,12 +36,27 @@ logger = logging.getLogger(__name__)
 # Exponential back-off delays (seconds) indexed by attempt number (0-based)
 _BACKOFF_SECONDS = [0, 120, 600, 3600]
 
+_NO_IDENTIFIER = 'Contact has no email, linkedin_url, or name — cannot sync'
+
+# How long a claimed item stays with its worker; after that (worker died
+# mid-cycle) another process_pending may claim it again.
+CLAIM_LEASE = timedelta(minutes=15)
+
 
 def _backoff_delay(attempts: int) -> int:
     idx = min(attempts, len(_BACKOFF_SECONDS) - 1)
     return _BACKOFF_SECONDS[idx]
 
 
+def _normalize_email(email: Optional[str]) -> str:
+    return (email or '').strip().lower()
+
+
+def _contact_hash(payload: dict) -> str:
+    """Stable hash of a contact payload, stored on the mapping after a write."""
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+
 class CRMSyncAgent:
     """
     Company-scoped CRM sync orchestrator.
@@ -52,9 +71,9 @@ class CRMSyncAgent:
             CRMIntegration.objects.filter(company=company, is_active=True)
         )
         self._connector_cache: dict[int, BaseCRMConnector] = {}
-        # Set True mid-cycle when the CRM reports an account object-limit error;
-        # tells the poll loop to stop processing the rest of this batch.
-        self._quota_blocked = False
+        # Integration ids whose CRM reported an account object-limit error
+        # this cycle; the poll loop defers the rest of their items.
+        self._quota_blocked: set[int] = set()
 
     # ------------------------------------------------------------------ #
     # Public enqueue helpers — called by signals
@@ -180,51 +199,162 @@ class CRMSyncAgent:
     # Queue processing
     # ------------------------------------------------------------------ #
 
-    def process_pending(self, limit: int = 50) -> dict:
+    def process_pending(self, limit: int = 50, integration: Optional[CRMIntegration] = None) -> dict:
         """
-        Fetch and process up to `limit` pending/retryable items.
+        Claim and process up to `limit` pending/retryable items, only those
+        of `integration` if given. Several workers can drain the queue at
+        once: items are claimed with row locks, so each goes to one worker.
+        Contact upserts for the same integration go to the CRM in batches
+        of the connector's `batch_size`; other items run one at a time.
         Returns stats: {processed, succeeded, failed, skipped}.
         """
-        now = timezone.now()
-        items = (
-            CRMSyncQueue.objects
-            .filter(
-                company=self.company,
-                status__in=[CRMSyncQueue.STATUS_PENDING, CRMSyncQueue.STATUS_FAILED],
-                scheduled_at__lte=now,
-                attempts__lt=models_max_attempts(),
-            )
-            .select_related('integration')
-            .order_by('priority', 'scheduled_at')[:limit]
-        )
+        items = self._claim_items(timezone.now(), limit, integration)
 
         stats = {'processed': 0, 'succeeded': 0, 'failed': 0, 'skipped': 0}
-        self._quota_blocked = False
-        for item in items:
-            if item.attempts >= item.max_attempts:
-                stats['skipped'] += 1
-                continue
-            stats['processed'] += 1
-            ok = self._process_item(item)
-            if ok:
-                stats['succeeded'] += 1
-            else:
-                stats['failed'] += 1
+        self._quota_blocked = set()
+        deferred = []
+        for batch in self._batches(items):
             # If the CRM told us the account is over its object limit (e.g.
-            # HubSpot free-tier 1000-contact cap), every remaining create in
-            # this cycle will hit the same wall. Stop now instead of burning
-            # API calls and flooding the logs with identical 402s.
-            if self._quota_blocked:
-                remaining = max(0, len(items) - stats['processed'])
+            # HubSpot free-tier 1000-contact cap), every remaining create for
+            # that integration in this cycle will hit the same wall. Skip them
+            # instead of burning API calls and flooding the logs with
+            # identical 402s; other integrations carry on.
+            if batch[0].integration_id in self._quota_blocked:
+                deferred.extend(batch)
+                continue
+            stats['processed'] += len(batch)
+            for ok in self._process_batch(batch):
+                if ok:
+                    stats['succeeded'] += 1
+                else:
+                    stats['failed'] += 1
+
+        if deferred:
+            # Hand them back unchanged (status as claimed from).
+            CRMSyncQueue.objects.bulk_update(deferred, ['status'])
+            for integration_id in sorted({item.integration_id for item in deferred}):
                 logger.warning(
-                    'CRM sync [%s]: account object limit reached — aborting cycle, '
+                    'CRM sync [%s]: account object limit reached on integration %d — '
                     '%d item(s) deferred to next run',
-                    getattr(self.company, 'pk', self.company), remaining,
+                    getattr(self.company, 'pk', self.company), integration_id,
+                    sum(1 for item in deferred if item.integration_id == integration_id),
                 )
-                stats['skipped'] += remaining
-                break
+            stats['skipped'] += len(deferred)
         return stats
 
+    def _claim_items(self, now, limit: int, integration: Optional[CRMIntegration]) -> list:
+        """
+        Lease up to `limit` due items, highest priority first. Candidates
+        are re-selected by id with select_for_update(skip_locked=True) (no
+        joins — mssql can't lock `of=` a subset) and moved to processing
+        with last_attempted_at as the lease stamp. An item left processing
+        for longer than CLAIM_LEASE is claimable again.
+
+        Returns the claimed items, still carrying the status they were
+        claimed from.
+        """
+        claimable = Q(
+            status__in=[CRMSyncQueue.STATUS_PENDING, CRMSyncQueue.STATUS_FAILED],
+            scheduled_at__lte=now,
+        ) | Q(status=CRMSyncQueue.STATUS_PROCESSING, last_attempted_at__lt=now - CLAIM_LEASE)
+        qs = CRMSyncQueue.objects.filter(
+            claimable,
+            company=self.company,
+            attempts__lt=models_max_attempts(),
+        ).filter(attempts__lt=F('max_attempts'))
+        if integration is not None:
+            qs = qs.filter(integration=integration)
+        candidates = list(qs.select_related('integration').order_by('priority', 'scheduled_at')[:limit])
+        if not candidates:
+            return []
+        with transaction.atomic():
+            claimed_ids = set(
+                qs.select_for_update(skip_locked=True)
+                .filter(id__in=[item.pk for item in candidates])
+                .values_list('id', flat=True)
+            )
+            if claimed_ids:
+                CRMSyncQueue.objects.filter(id__in=claimed_ids).update(
+                    status=CRMSyncQueue.STATUS_PROCESSING, last_attempted_at=now,
+                )
+        return [item for item in candidates if item.pk in claimed_ids]
+
+    def _batches(self, items: list) -> list[list]:
+        """
+        Split the due items into the units process_pending runs: contacts
+        for the same integration are grouped up to the connector's batch
+        size, everything else is a batch of one. Batches keep the priority
+        order of their first item.
+        """
+        batches: list[list] = []
+        open_batches: dict[int, list] = {}
+        for item in items:
+            if item.object_type != CRMSyncQueue.TYPE_CONTACT:
+                batches.append([item])
+                continue
+            batch = open_batches.get(item.integration_id)
+            if batch is None or len(batch) >= self._batch_size(item.integration):
+                batch = open_batches[item.integration_id] = []
+                batches.append(batch)
+            batch.append(item)
+        return batches
+
+    def _batch_size(self, integration: CRMIntegration) -> int:
+        try:
+            return max(1, self._get_connector(integration).batch_size)
+        except Exception:
+            # Bad credentials: one at a time, so each item records the error.
+            return 1
+
+    def _process_batch(self, items: list) -> list[bool]:
+        if len(items) == 1:
+            return [self._process_item(items[0])]
+        return self._process_contact_batch(items)
+
+    def _process_contact_batch(self, items: list) -> list[bool]:
+        """Upsert several contacts for one integration in one connector call.
+        Returns one success flag per item, in order."""
+        now = timezone.now()
+        for item in items:
+            item.status = CRMSyncQueue.STATUS_PROCESSING
+            item.attempts += 1
+            item.last_attempted_at = now
+        CRMSyncQueue.objects.bulk_update(items, ['status', 'attempts', 'last_attempted_at'])
+
+        integration = items[0].integration
+        try:
+            connector = self._get_connector(integration)
+        except CRMError as exc:
+            return [self._fail_item(item, str(exc), retriable=exc.retriable) for item in items]
+        except Exception as exc:
+            return [self._fail_item(item, f'Connector init error: {exc}', retriable=False) for item in items]
+
+        outcomes: dict[int, bool] = {}
+        ready = []
+        for item in items:
+            if self._contact_identifiable(item.payload):
+                ready.append(item)
+            else:
+                outcomes[item.pk] = self._fail_item(item, _NO_IDENTIFIER, retriable=False)
+
+        try:
+            results = self._sync_contacts(connector, ready) if ready else []
+        except CRMError as exc:
+            results = [exc] * len(ready)
+        except Exception as exc:
+            logger.exception('Unexpected error processing CRM contact batch for integration %d', integration.pk)
+            results = [CRMError(f'Unexpected: {exc}', retriable=True)] * len(ready)
+
+        for item, result in zip(ready, results):
+            if isinstance(result, CRMError):
+                if self._is_quota_error(result):
+                    self._quota_blocked.add(integration.pk)
+                    self._mark_limit_reached(integration, str(result))
+                outcomes[item.pk] = self._fail_item(item, str(result), retriable=result.retriable)
+            else:
+                outcomes[item.pk] = self._complete_item(item, result)
+        return [outcomes[item.pk] for item in items]
+
     def _process_item(self, item: CRMSyncQueue) -> bool:
         """Process one queue item. Returns True on success."""
         item.status = CRMSyncQueue.STATUS_PROCESSING
@@ -243,13 +373,16 @@ class CRMSyncAgent:
             crm_id = self._dispatch(connector, item)
         except CRMError as exc:
             if self._is_quota_error(exc):
-                self._quota_blocked = True
+                self._quota_blocked.add(item.integration_id)
                 self._mark_limit_reached(item.integration, str(exc))
             return self._fail_item(item, str(exc), retriable=exc.retriable)
         except Exception as exc:
             logger.exception('Unexpected error processing CRM queue item %d', item.pk)
             return self._fail_item(item, f'Unexpected: {exc}', retriable=True)
 
+        return self._complete_item(item, crm_id)
+
+    def _complete_item(self, item: CRMSyncQueue, crm_id: Optional[str]) -> bool:
         # Success — a write went through, so the account is no longer over its
         # limit (user freed up space / upgraded). Clear any stale limit flag.
         self._clear_limit_reached(item.integration)
@@ -280,35 +413,107 @@ class CRMSyncAgent:
     def _sync_contact(
         self, connector: BaseCRMConnector, item: CRMSyncQueue, p: dict
     ) -> Optional[str]:
-        email = p.get('email', '')
-        linkedin_url = p.get('linkedin_url', '')
-        name = p.get('name') or f"{p.get('first_name','')} {p.get('last_name','')}".strip()
-        if not email and not linkedin_url and not name:
-            raise CRMError('Contact has no email, linkedin_url, or name — cannot sync', retriable=False)
+        if not self._contact_identifiable(p):
+            raise CRMError(_NO_IDENTIFIER, retriable=False)
+
+        result = self._sync_contacts(connector, [item])[0]
+        if isinstance(result, CRMError):
+            raise result
+        return result
 
-        crm_id = connector.upsert_contact(email, p)
+    def _sync_contacts(self, connector: BaseCRMConnector, items: list) -> list:
+        """
+        Write contact items for one integration, using the mapping table
+        before the CRM:
+
+        - mapped contacts whose payload hash is unchanged are skipped,
+        - mapped contacts that changed are updated by CRM ID (no search),
+        - the rest go through upsert_contacts, as do mapped contacts the
+          CRM answers 404 for (their mapping is dropped).
+
+        Saves the mappings and returns the CRM ID or CRMError per item.
+        """
+        integration = items[0].integration
+        by_source = {
+            (m.source_type, m.source_id): m
+            for m in CRMContactMapping.objects.filter(
+                integration=integration, source_id__in={item.source_id for item in items},
+            )
+        }
+        emails = {_normalize_email(item.payload.get('email')) for item in items} - {''}
+        by_email: dict[str, CRMContactMapping] = {}
+        if emails:
+            for m in CRMContactMapping.objects.filter(
+                integration=integration, email_normalized__in=emails,
+            ).exclude(crm_contact_id=''):
+                by_email.setdefault(m.email_normalized, m)
+
+        results: dict[int, object] = {}
+        to_update, to_upsert = [], []
+        for item in items:
+            own = by_source.get((item.source_type, item.source_id))
+            mapping = own if own and own.crm_contact_id else by_email.get(_normalize_email(item.payload.get('email')))
+            if not mapping:
+                to_upsert.append(item)
+            elif not self._contact_needs_update(own, item.payload):
+                results[item.pk] = own.crm_contact_id
+            else:
+                to_update.append((item, mapping))
+
+        if to_update:
+            stale = []
+            outcomes = connector.update_contacts([
+                (mapping.crm_contact_id, item.payload.get('email', ''), item.payload)
+                for item, mapping in to_update
+            ])
+            for (item, mapping), result in zip(to_update, outcomes):
+                if isinstance(result, CRMError) and result.status_code == 404:
+                    stale.append(mapping.pk)
+                    to_upsert.append(item)
+                else:
+                    results[item.pk] = result
+            if stale:
+                # Deleted in the CRM: forget it and find or re-create it below.
+                CRMContactMapping.objects.filter(pk__in=stale).delete()
+
+        if to_upsert:
+            outcomes = connector.upsert_contacts([(item.payload.get('email', ''), item.payload) for item in to_upsert])
+            for item, result in zip(to_upsert, outcomes):
+                results[item.pk] = result
+
+        for item in items:
+            if not isinstance(results[item.pk], CRMError):
+                self._save_contact_mapping(item, results[item.pk])
+        return [results[item.pk] for item in items]
+
+    @staticmethod
+    def _contact_needs_update(mapping: Optional[CRMContactMapping], payload: dict) -> bool:
+        """False when this source's mapping already holds exactly this payload."""
+        return not (mapping and mapping.crm_contact_id and mapping.properties_hash == _contact_hash(payload))
+
+    @staticmethod
+    def _contact_identifiable(p: dict) -> bool:
+        name = p.get('name') or f"{p.get('first_name','')} {p.get('last_name','')}".strip()
+        return bool(p.get('email') or p.get('linkedin_url') or name)
 
+    def _save_contact_mapping(self, item: CRMSyncQueue, crm_id: Optional[str]) -> None:
         # Persist mapping so downstream email/meeting syncs can look it up
         if crm_id:
             CRMContactMapping.objects.update_or_create(
                 integration=item.integration,
                 source_type=item.source_type,
                 source_id=item.source_id,
-                defaults={'crm_contact_id': crm_id, 'company': self.company},
+                defaults={
+                    'crm_contact_id': crm_id,
+                    'company': self.company,
+                    'email_normalized': _normalize_email(item.payload.get('email')),
+                    'properties_hash': _contact_hash(item.payload),
+                },
             )
-        return crm_id
 
     def _sync_email(
         self, connector: BaseCRMConnector, item: CRMSyncQueue, p: dict
     ) -> Optional[str]:
-        email = p.get('email', '')
-        crm_contact_id = self._resolve_crm_contact_id(
-            item.integration, CRMContactMapping.SOURCE_SDR_LEAD,
-            email, connector, p
-        )
-        if not crm_contact_id:
-            raise CRMError(f'Cannot resolve CRM contact for email {email}', retriable=True)
-
         from datetime import datetime
         sent_at_str = p.get('sent_at')
         sent_at = None
@@ -319,25 +524,17 @@ class CRMSyncAgent:
             except Exception:
                 pass
 
-        return connector.log_email_activity(
+        return self._log_for_contact(connector, item, p, 'email', lambda crm_contact_id: connector.log_email_activity(
             crm_contact_id=crm_contact_id,
             subject=p.get('subject', ''),
             body=p.get('body', ''),
             sent_at=sent_at,
             direction=p.get('direction', 'OUTBOUND'),
-        )
+        ))
 
     def _sync_meeting(
         self, connector: BaseCRMConnector, item: CRMSyncQueue, p: dict
     ) -> Optional[str]:
-        email = p.get('email', '')
-        crm_contact_id = self._resolve_crm_contact_id(
-            item.integration, CRMContactMapping.SOURCE_SDR_LEAD,
-            email, connector, p
-        )
-        if not crm_contact_id:
-            raise CRMError(f'Cannot resolve CRM contact for meeting {email}', retriable=True)
-
         from django.utils.dateparse import parse_datetime
         start_time = None
         end_time = None
@@ -352,34 +549,49 @@ class CRMSyncAgent:
             except Exception:
                 pass
 
-        return connector.log_meeting(
+        return self._log_for_contact(connector, item, p, 'meeting', lambda crm_contact_id: connector.log_meeting(
             crm_contact_id=crm_contact_id,
             title=p.get('title', 'Meeting'),
             start_time=start_time or timezone.now(),
             end_time=end_time,
             notes=p.get('notes', ''),
-        )
+        ))
 
     def _sync_note(
         self, connector: BaseCRMConnector, item: CRMSyncQueue, p: dict
     ) -> Optional[str]:
-        email = p.get('email', '')
-        crm_contact_id = self._resolve_crm_contact_id(
-            item.integration, CRMContactMapping.SOURCE_SDR_LEAD,
-            email, connector, p
-        )
-        if not crm_contact_id:
-            raise CRMError(f'Cannot resolve CRM contact for note {email}', retriable=True)
-
-        return connector.log_note(
+        return self._log_for_contact(connector, item, p, 'note', lambda crm_contact_id: connector.log_note(
             crm_contact_id=crm_contact_id,
             body=p.get('note_body', ''),
-        )
+        ))
 
     # ------------------------------------------------------------------ #
     # Helpers
     # ------------------------------------------------------------------ #
 
+    def _log_for_contact(self, connector: BaseCRMConnector, item: CRMSyncQueue, p: dict, kind: str, log):
+        """
+        Resolve the item's CRM contact and run `log(crm_contact_id)`. A 404
+        means the contact was deleted in the CRM: its mapping is dropped and
+        the contact resolved (found or re-created) once more.
+        """
+        email = p.get('email', '')
+        for attempt in range(2):
+            crm_contact_id = self._resolve_crm_contact_id(
+                item.integration, CRMContactMapping.SOURCE_SDR_LEAD,
+                email, connector, p
+            )
+            if not crm_contact_id:
+                raise CRMError(f'Cannot resolve CRM contact for {kind} {email}', retriable=True)
+            try:
+                return log(crm_contact_id)
+            except CRMError as exc:
+                if exc.status_code != 404 or attempt:
+                    raise
+                CRMContactMapping.objects.filter(
+                    integration=item.integration, crm_contact_id=crm_contact_id,
+                ).delete()
+
     def _resolve_crm_contact_id(
         self,
         integration: CRMIntegration,
@@ -389,13 +601,26 @@ class CRMSyncAgent:
         props: dict,
     ) -> Optional[str]:
         """
-        Look up the CRM contact ID from the mapping table.
+        Look up the CRM contact ID from the mapping table: by email, then
+        through the SDR lead (LinkedIn-only leads, mappings saved before
+        emails were recorded on them).
         If not found, attempt a just-in-time upsert and persist the mapping.
         Works for leads with email OR linkedin_url (Apify leads often have no email).
         """
         from ai_sdr_agent.models import SDRLead
 
         # Try mapping table first (fast path — no API call)
+        key = _normalize_email(email)
+        if key:
+            crm_id = (
+                CRMContactMapping.objects
+                .filter(integration=integration, email_normalized=key)
+                .exclude(crm_contact_id='')
+                .values_list('crm_contact_id', flat=True)
+                .first()
+            )
+            if crm_id:
+                return crm_id
         try:
             lead = None
             if email:
@@ -414,6 +639,9 @@ class CRMSyncAgent:
                     source_id=lead.pk,
                 ).first()
                 if mapping:
+                    if key and not mapping.email_normalized:
+                        mapping.email_normalized = key
+                        mapping.save(update_fields=['email_normalized'])
                     return mapping.crm_contact_id
         except Exception:
             pass
@@ -437,7 +665,7 @@ class CRMSyncAgent:
                         integration=integration,
                         source_type=source_type,
                         source_id=lead.pk,
-                        defaults={'crm_contact_id': crm_id, 'company': self.company},
+                        defaults={'crm_contact_id': crm_id, 'company': self.company, 'email_normalized': key},
                     )
             except Exception:
                 pass
@@ -463,6 +691,8 @@ class CRMSyncAgent:
         else:
             raise CRMError(f'Unknown CRM provider: {provider}', retriable=False)
 
+        if connector.rate_limit:
+            connector.rate_limiter = rate_limiter(integration.pk, connector.rate_limit)
         self._connector_cache[integration.pk] = connector
         return connector
 
@@ -1,8 +1,91 @@
 """Abstract base for all CRM connectors."""
 from __future__ import annotations
 
+import threading
+import time
 from abc import ABC, abstractmethod
-from typing import Optional
+from typing import Optional, Union
+
+import requests
+from requests.adapters import HTTPAdapter
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+_limiters: dict = {}
+_limiters_lock = threading.Lock()
+
+# A 429 whose Retry-After is at most this long is waited out and the call
+# retried once; longer waits fail the call (retriable) and pause the limiter.
+MAX_RETRY_AFTER = 30
+
+
+def http_session() -> requests.Session:
+    """Process-wide keep-alive Session shared by the connectors.
+
+    Reusing pooled connections saves a TLS handshake per CRM call; the
+    pool is per host, so every provider gets its own connections.
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=10, pool_maxsize=20)
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                _session = session
+    return _session
+
+
+class RateLimiter:
+    """Token bucket for one CRM integration, shared by the threads of this
+    process: at most `max_requests` per `per_seconds`, and nothing while
+    paused after a 429."""
+
+    def __init__(self, max_requests: int, per_seconds: float):
+        self.capacity = max_requests
+        self.rate = max_requests / per_seconds
+        self._tokens = float(max_requests)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if now >= self._paused_until:
+                    self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                    self._updated = now
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        return
+                    wait = (1 - self._tokens) / self.rate
+                else:
+                    wait = self._paused_until - now
+            time.sleep(wait)
+
+    def pause(self, seconds: float) -> None:
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self._tokens = 0.0
+            self._updated = self._paused_until
+
+
+def rate_limiter(key, limit: tuple) -> RateLimiter:
+    """The process-wide limiter for `key` (an integration id)."""
+    with _limiters_lock:
+        if key not in _limiters:
+            _limiters[key] = RateLimiter(*limit)
+        return _limiters[key]
+
+
+def _retry_after(resp, default: float) -> float:
+    try:
+        return max(0.0, float(resp.headers.get('Retry-After', '')))
+    except (TypeError, ValueError):
+        # Missing, or an HTTP date: wait one limit window.
+        return default
 
 
 class CRMError(Exception):
@@ -20,8 +103,42 @@ class BaseCRMConnector(ABC):
 
     All methods raise `CRMError` on failure. Callers should catch it and
     inspect `.retriable` to decide whether to re-queue.
+
+    The batch methods have per-item fallbacks here; connectors whose API
+    has batch endpoints override them and set `batch_size` to the
+    provider's per-request limit.
     """
 
+    # Most contacts sent to upsert_contacts in one call.
+    batch_size = 50
+    # Documented request limit as (max_requests, per_seconds), or None.
+    rate_limit: Optional[tuple] = None
+    # Set by the sync agent: the RateLimiter of the integration this serves.
+    rate_limiter: Optional[RateLimiter] = None
+
+    def _send(self, session: requests.Session, method: str, url: str, **kwargs):
+        """
+        Send one request through the integration's rate limiter. A 429
+        pauses the limiter for Retry-After (one limit window if absent);
+        a short wait is taken here and the request retried once. Returns
+        the response; network errors propagate as RequestException.
+        """
+        default_wait = self.rate_limit[1] if self.rate_limit else MAX_RETRY_AFTER
+        for attempt in range(2):
+            if self.rate_limiter:
+                self.rate_limiter.acquire()
+            resp = session.request(method, url, **kwargs)
+            if resp.status_code != 429:
+                return resp
+            wait = _retry_after(resp, default_wait)
+            if self.rate_limiter:
+                self.rate_limiter.pause(wait)
+            if attempt or wait > MAX_RETRY_AFTER:
+                return resp
+            if not self.rate_limiter:
+                time.sleep(wait)
+        return resp
+
     @abstractmethod
     def ping(self) -> bool:
         """Return True if credentials are valid and the API is reachable."""
@@ -41,6 +158,49 @@ class BaseCRMConnector(ABC):
         Returns the CRM contact ID string.
         """
 
+    def update_contact(self, crm_contact_id: str, email: str, properties: dict) -> str:
+        """
+        Update a contact whose CRM ID is already known, without looking it
+        up first. Raises CRMError with status_code 404 if the CRM no longer
+        has it. Returns the CRM contact ID.
+        """
+        return self.upsert_contact(email, properties)
+
+    def update_contacts(self, updates: list) -> list[Union[str, CRMError]]:
+        """
+        Batch form of update_contact: `updates` is a list of
+        (crm_contact_id, email, properties). Per-contact results and
+        errors as for upsert_contacts.
+        """
+        results = []
+        for crm_contact_id, email, properties in updates:
+            try:
+                results.append(self.update_contact(crm_contact_id, email, properties))
+            except CRMError as exc:
+                if exc.status_code in (None, 401, 403, 429):
+                    raise
+                results.append(exc)
+        return results
+
+    def upsert_contacts(self, contacts: list) -> list[Union[str, CRMError]]:
+        """
+        Create or update several contacts: `contacts` is a list of
+        (email, properties) pairs, at most `batch_size` long.
+
+        Returns one entry per contact, in order: the CRM contact ID, or the
+        CRMError for that contact. An error that affects the whole call
+        (auth, network, rate limit) is raised instead.
+        """
+        results = []
+        for email, properties in contacts:
+            try:
+                results.append(self.upsert_contact(email, properties))
+            except CRMError as exc:
+                if exc.status_code in (None, 401, 403, 429):
+                    raise
+                results.append(exc)
+        return results
+
     @abstractmethod
     def log_email_activity(
         self,
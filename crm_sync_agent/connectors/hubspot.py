@@ -21,12 +21,19 @@ from typing import Optional
 
 import requests
 
-from .base import BaseCRMConnector, CRMError
+from .base import BaseCRMConnector, CRMError, http_session
 
 logger = logging.getLogger(__name__)
 
 HUBSPOT_BASE = 'https://api.hubapi.com'
 DEFAULT_TIMEOUT = 12
+# Inputs per CRM v3 batch request (HubSpot's limit).
+HUBSPOT_BATCH_SIZE = 100
+# Everything _build_contact_props can write, so unchanged contacts are skipped.
+CONTACT_PROPERTIES = [
+    'email', 'firstname', 'lastname', 'phone', 'company', 'jobtitle',
+    'hs_linkedin_url', 'hs_lead_status',
+]
 
 
 def _to_hs_timestamp(dt) -> int:
@@ -43,11 +50,16 @@ def _to_hs_timestamp(dt) -> int:
 class HubSpotConnector(BaseCRMConnector):
     """Full HubSpot connector: contacts + engagements via CRM v3 API."""
 
+    batch_size = HUBSPOT_BATCH_SIZE
+    # Private apps on Free/Starter: 100 requests per 10 seconds.
+    rate_limit = (100, 10)
+
     def __init__(self, access_token: str, timeout: int = DEFAULT_TIMEOUT):
         if not access_token:
             raise CRMError('HubSpot access_token is required', retriable=False)
         self._token = access_token
         self._timeout = timeout
+        self._session = http_session()
 
     # ------------------------------------------------------------------ #
     # BaseCRMConnector interface
@@ -121,6 +133,106 @@ class HubSpotConnector(BaseCRMConnector):
         resp = self._post('/crm/v3/objects/contacts', json={'properties': hs_props})
         return str((resp.json() or {}).get('id', ''))
 
+    def upsert_contacts(self, contacts: list) -> list:
+        """
+        Batch upsert: one batch/read by email for the whole list, then
+        batch/upsert (keyed on email) for the new and changed contacts.
+        Contacts the email lookup misses are matched by LinkedIn URL with
+        one IN search and updated by ID. Contacts without an email go
+        through upsert_contact one by one.
+        """
+        results: list = [None] * len(contacts)
+        by_email: dict[str, list[int]] = {}
+        for i, (email, properties) in enumerate(contacts):
+            key = (email or '').lower().strip()
+            if key:
+                by_email.setdefault(key, []).append(i)
+            else:
+                results[i] = self._upsert_one(email, properties)
+        if not by_email:
+            return results
+
+        existing = self._batch_read_by_email(list(by_email))
+        # The same email queued twice in one batch: the later item is newer.
+        props = {key: self._build_contact_props(*contacts[idxs[-1]]) for key, idxs in by_email.items()}
+        unmatched = {
+            props[key]['hs_linkedin_url']: key
+            for key in by_email
+            if key not in existing and props[key].get('hs_linkedin_url')
+        }
+        if unmatched:
+            for url, record in self._search_by_linkedin(list(unmatched)).items():
+                existing[unmatched[url]] = record
+
+        upserts, updates, written = [], [], {}
+        for key, hs_props in props.items():
+            record = existing.get(key)
+            if not record:
+                upserts.append({'idProperty': 'email', 'id': key, 'properties': hs_props})
+            elif self._contact_needs_update(record.get('properties') or {}, hs_props):
+                # Matched by LinkedIn the record may carry another email; keep it.
+                if str((record.get('properties') or {}).get('email') or '').lower() != key:
+                    hs_props = {k: v for k, v in hs_props.items() if k != 'email'}
+                updates.append({'id': str(record['id']), 'properties': hs_props, '_key': key})
+            else:
+                written[key] = str(record['id'])
+
+        errors = {}
+        if upserts:
+            resp = self._post('/crm/v3/objects/contacts/batch/upsert', json={'inputs': upserts})
+            body = resp.json() or {}
+            for record in body.get('results') or []:
+                key = str((record.get('properties') or {}).get('email') or '').lower()
+                written[key] = str(record.get('id', ''))
+            errors.update(self._batch_errors(body))
+        if updates:
+            resp = self._post('/crm/v3/objects/contacts/batch/update', json={
+                'inputs': [{'id': u['id'], 'properties': u['properties']} for u in updates],
+            })
+            body = resp.json() or {}
+            updated = {str(record.get('id', '')) for record in body.get('results') or []}
+            failed = self._batch_errors(body)
+            for u in updates:
+                if u['id'] in updated:
+                    written[u['_key']] = u['id']
+                elif u['id'].lower() in failed:
+                    errors[u['_key']] = failed[u['id'].lower()]
+
+        for key, idxs in by_email.items():
+            result = written.get(key) or errors.get(key) or CRMError(
+                f'HubSpot batch write failed for {key}: no result returned', retriable=False,
+            )
+            for i in idxs:
+                results[i] = result
+        return results
+
+    def update_contact(self, crm_contact_id: str, email: str, properties: dict) -> str:
+        hs_props = self._build_contact_props(email, properties)
+        # Keyed by ID: leave the email alone, the record may be matched by LinkedIn.
+        hs_props.pop('email', None)
+        self._patch(f'/crm/v3/objects/contacts/{crm_contact_id}', json={'properties': hs_props})
+        return str(crm_contact_id)
+
+    def update_contacts(self, updates: list) -> list:
+        """Batch update by CRM ID: one batch/update call, no lookups."""
+        inputs: dict[str, dict] = {}
+        for crm_contact_id, email, properties in updates:
+            hs_props = self._build_contact_props(email, properties)
+            hs_props.pop('email', None)
+            inputs[str(crm_contact_id)] = hs_props
+        resp = self._post('/crm/v3/objects/contacts/batch/update', json={
+            'inputs': [{'id': hs_id, 'properties': hs_props} for hs_id, hs_props in inputs.items()],
+        })
+        body = resp.json() or {}
+        updated = {str(record.get('id', '')) for record in body.get('results') or []}
+        errors = self._batch_errors(body)
+        return [
+            str(hs_id) if str(hs_id) in updated else errors.get(str(hs_id).lower()) or CRMError(
+                f'HubSpot batch write failed for {hs_id}: no result returned', retriable=False,
+            )
+            for hs_id, _email, _properties in updates
+        ]
+
     def log_email_activity(
         self,
         crm_contact_id: str,
@@ -190,6 +302,70 @@ class HubSpotConnector(BaseCRMConnector):
     # Internal helpers
     # ------------------------------------------------------------------ #
 
+    def _upsert_one(self, email: str, properties: dict):
+        try:
+            return self.upsert_contact(email, properties)
+        except CRMError as exc:
+            if exc.status_code in (None, 401, 403, 429):
+                raise
+            return exc
+
+    def _batch_read_by_email(self, emails: list) -> dict:
+        """email -> contact record for the emails that exist in HubSpot."""
+        resp = self._post('/crm/v3/objects/contacts/batch/read', json={
+            'idProperty': 'email',
+            'properties': CONTACT_PROPERTIES,
+            'inputs': [{'id': email} for email in emails],
+        })
+        found = {}
+        for record in (resp.json() or {}).get('results') or []:
+            email = str((record.get('properties') or {}).get('email') or '').lower()
+            if email:
+                found[email] = record
+        return found
+
+    def _search_by_linkedin(self, urls: list) -> dict:
+        """linkedin URL -> contact record, one IN search for the batch."""
+        body = {
+            'filterGroups': [{
+                'filters': [{
+                    'propertyName': 'hs_linkedin_url',
+                    'operator': 'IN',
+                    'values': urls,
+                }],
+            }],
+            'properties': CONTACT_PROPERTIES,
+            'limit': HUBSPOT_BATCH_SIZE,
+        }
+        try:
+            resp = self._post('/crm/v3/objects/contacts/search', json=body)
+        except CRMError as exc:
+            if exc.status_code in (None, 401, 403, 429):
+                raise
+            return {}
+        found = {}
+        for record in (resp.json() or {}).get('results') or []:
+            url = (record.get('properties') or {}).get('hs_linkedin_url')
+            if url in urls and url not in found:
+                found[url] = record
+        return found
+
+    @staticmethod
+    def _batch_errors(body: dict) -> dict:
+        """Map the IDs named in a 207 multi-status body to a CRMError."""
+        errors = {}
+        for error in body.get('errors') or []:
+            message = str(error.get('message') or error.get('category') or 'error')[:300]
+            status_code = 404 if error.get('category') == 'OBJECT_NOT_FOUND' else None
+            for ids in (error.get('context') or {}).values():
+                for value in ids if isinstance(ids, list) else [ids]:
+                    errors[str(value).lower()] = CRMError(
+                        f'HubSpot batch write failed for {value}: {message}',
+                        retriable=False,
+                        status_code=status_code,
+                    )
+        return errors
+
     @staticmethod
     def _contact_association(contact_id: str, type_id: int) -> list:
         return [{
@@ -256,8 +432,8 @@ class HubSpotConnector(BaseCRMConnector):
     def _request(self, method: str, path: str, params=None, json=None):
         url = f'{HUBSPOT_BASE}{path}'
         try:
-            resp = requests.request(
-                method, url,
+            resp = self._send(
+                self._session, method, url,
                 headers=self._headers(),
                 params=params,
                 json=json,
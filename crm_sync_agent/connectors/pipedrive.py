@@ -11,7 +11,7 @@ from typing import Optional
 
 import requests
 
-from .base import BaseCRMConnector, CRMError
+from .base import BaseCRMConnector, CRMError, http_session
 
 logger = logging.getLogger(__name__)
 
@@ -38,13 +38,21 @@ def _pd_time(dt) -> str:
 
 
 class PipedriveConnector(BaseCRMConnector):
-    """Pipedrive REST API v1 connector."""
+    """Pipedrive REST API v1 connector.
+
+    v1 has no bulk person endpoint, so upsert_contacts keeps the base
+    class's one-by-one fallback (on the shared keep-alive session).
+    """
+
+    # Lowest-plan burst limit: 80 requests per 2 seconds per token.
+    rate_limit = (80, 2)
 
     def __init__(self, api_token: str, timeout: int = DEFAULT_TIMEOUT):
         if not api_token:
             raise CRMError('Pipedrive api_token is required', retriable=False)
         self._token = api_token
         self._timeout = timeout
+        self._session = http_session()
 
     # ------------------------------------------------------------------ #
     # BaseCRMConnector interface
@@ -83,6 +91,10 @@ class PipedriveConnector(BaseCRMConnector):
         resp = self._post('/persons', json=pd_data)
         return str(((resp.json() or {}).get('data') or {}).get('id', ''))
 
+    def update_contact(self, crm_contact_id: str, email: str, properties: dict) -> str:
+        self._put(f'/persons/{crm_contact_id}', json=self._build_person_payload(email, properties))
+        return str(crm_contact_id)
+
     def log_email_activity(
         self,
         crm_contact_id: str,
@@ -174,8 +186,8 @@ class PipedriveConnector(BaseCRMConnector):
         url = f'{PIPEDRIVE_BASE}{path}'
         qp = self._params(params)
         try:
-            resp = requests.request(
-                method, url,
+            resp = self._send(
+                self._session, method, url,
                 params=qp,
                 json=json,
                 timeout=self._timeout,
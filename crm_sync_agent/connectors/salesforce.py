@@ -18,12 +18,22 @@ from typing import Optional
 
 import requests
 
-from .base import BaseCRMConnector, CRMError
+from .base import BaseCRMConnector, CRMError, http_session
 
 logger = logging.getLogger(__name__)
 
 DEFAULT_TIMEOUT = 15
 SF_API_VERSION = 'v58.0'
+# Records per sObject Collections request (Salesforce's limit).
+SF_COLLECTION_SIZE = 200
+# Emails per SOQL IN (...) lookup, keeping the query URL short.
+SF_QUERY_CHUNK = 100
+# Collection error codes meaning the record ID no longer exists.
+SF_MISSING_RECORD_CODES = ('ENTITY_IS_DELETED', 'INVALID_CROSS_REFERENCE_KEY', 'NOT_FOUND')
+
+
+def _soql_quote(value: str) -> str:
+    return "'" + value.replace('\\', '\\\\').replace("'", "\\'") + "'"
 
 
 def _sf_datetime(dt) -> str:
@@ -40,6 +50,11 @@ def _sf_datetime(dt) -> str:
 class SalesforceConnector(BaseCRMConnector):
     """Salesforce REST API connector using the Username-Password OAuth2 flow."""
 
+    batch_size = SF_COLLECTION_SIZE
+    # No per-second cap is published; stay inside the 25 concurrent
+    # long-running request allowance and the daily API budget.
+    rate_limit = (25, 1)
+
     def __init__(self, credentials: dict, timeout: int = DEFAULT_TIMEOUT):
         required = ('client_id', 'client_secret', 'username', 'password', 'security_token')
         missing = [k for k in required if not credentials.get(k)]
@@ -52,6 +67,7 @@ class SalesforceConnector(BaseCRMConnector):
         self._timeout = timeout
         self._access_token: Optional[str] = None
         self._instance_url: Optional[str] = None
+        self._session = http_session()
 
     # ------------------------------------------------------------------ #
     # BaseCRMConnector interface
@@ -91,6 +107,64 @@ class SalesforceConnector(BaseCRMConnector):
         resp = self._post(f'/services/data/{SF_API_VERSION}/sobjects/Contact/', json=sf_data)
         return str((resp.json() or {}).get('id', ''))
 
+    def upsert_contacts(self, contacts: list) -> list:
+        """
+        Batch upsert: SOQL `Email IN (...)` finds the existing contacts,
+        then one sObject Collections POST creates the new ones and one
+        PATCH updates the rest (allOrNone=false, so a bad record fails
+        alone).
+        """
+        self._ensure_token()
+        by_email: dict[str, list[int]] = {}
+        groups: list = []  # (email key, item indexes): one record each
+        for i, (email, _properties) in enumerate(contacts):
+            key = (email or '').lower().strip()
+            if not key:
+                # Nothing to match or merge on: each one is its own new contact.
+                groups.append(('', [i]))
+                continue
+            if key not in by_email:
+                by_email[key] = []
+                groups.append((key, by_email[key]))
+            by_email[key].append(i)
+        existing = self._find_ids_by_email(list(by_email))
+
+        creates, updates = [], []
+        for key, idxs in groups:
+            # The same email queued twice in one batch: the later item is newer.
+            email, properties = contacts[idxs[-1]]
+            record = {'attributes': {'type': 'Contact'}, **self._build_contact_payload(email, properties)}
+            if key and key in existing:
+                updates.append((idxs, {**record, 'Id': existing[key]}))
+            else:
+                creates.append((idxs, record))
+
+        results: list = [None] * len(contacts)
+        for method, batch in (('POST', creates), ('PATCH', updates)):
+            if not batch:
+                continue
+            outcomes = self._write_collection(method, [record for _idxs, record in batch])
+            for (idxs, _record), result in zip(batch, outcomes):
+                for i in idxs:
+                    results[i] = result
+        return results
+
+    def update_contact(self, crm_contact_id: str, email: str, properties: dict) -> str:
+        self._ensure_token()
+        self._patch(
+            f'/services/data/{SF_API_VERSION}/sobjects/Contact/{crm_contact_id}',
+            json=self._build_contact_payload(email, properties),
+        )
+        return crm_contact_id
+
+    def update_contacts(self, updates: list) -> list:
+        """Batch update by Contact Id: one sObject Collections PATCH."""
+        self._ensure_token()
+        return self._write_collection('PATCH', [
+            {'attributes': {'type': 'Contact'}, **self._build_contact_payload(email, properties), 'Id': crm_contact_id}
+            for crm_contact_id, email, properties in updates
+        ])
+
     def log_email_activity(
         self,
         crm_contact_id: str,
@@ -165,7 +239,7 @@ class SalesforceConnector(BaseCRMConnector):
             'password': password,
         }
         try:
-            resp = requests.post(token_url, data=data, timeout=self._timeout)
+            resp = self._session.post(token_url, data=data, timeout=self._timeout)
         except requests.RequestException as exc:
             raise CRMError(f'Salesforce auth network error: {exc}', retriable=True) from exc
 
@@ -183,6 +257,43 @@ class SalesforceConnector(BaseCRMConnector):
     # Internal helpers
     # ------------------------------------------------------------------ #
 
+    def _write_collection(self, method: str, records: list) -> list:
+        """sObject Collections create (POST) or update (PATCH); returns the
+        record ID or a CRMError per record, in order."""
+        resp = self._request(method, f'/services/data/{SF_API_VERSION}/composite/sobjects', json={
+            'allOrNone': False,
+            'records': records,
+        })
+        outcomes = list(resp.json() or [])
+        results: list = []
+        for record, outcome in zip(records, outcomes):
+            if outcome.get('success'):
+                results.append(str(outcome.get('id') or record.get('Id', '')))
+                continue
+            errors = outcome.get('errors') or []
+            message = '; '.join(f"{e.get('statusCode')}: {e.get('message')}" for e in errors)
+            missing = any(e.get('statusCode') in SF_MISSING_RECORD_CODES for e in errors)
+            results.append(CRMError(
+                f'Salesforce contact write failed: {message[:300]}',
+                retriable=False,
+                status_code=404 if missing else None,
+            ))
+        results += [
+            CRMError('Salesforce returned no result for contact', retriable=True)
+        ] * (len(records) - len(results))
+        return results
+
+    def _find_ids_by_email(self, emails: list) -> dict:
+        """email -> Contact Id for the emails that exist in Salesforce."""
+        found: dict = {}
+        for start in range(0, len(emails), SF_QUERY_CHUNK):
+            chunk = emails[start:start + SF_QUERY_CHUNK]
+            q = f"SELECT Id, Email FROM Contact WHERE Email IN ({', '.join(map(_soql_quote, chunk))})"
+            resp = self._get(f'/services/data/{SF_API_VERSION}/query', params={'q': q})
+            for r in (resp.json() or {}).get('records') or []:
+                found.setdefault((r.get('Email') or '').lower(), r['Id'])
+        return found
+
     @staticmethod
     def _build_contact_payload(email: str, props: dict) -> dict:
         out: dict = {'Email': email}
@@ -225,8 +336,8 @@ class SalesforceConnector(BaseCRMConnector):
     def _request(self, method: str, path: str, params=None, json=None):
         url = f'{self._instance_url}{path}'
         try:
-            resp = requests.request(
-                method, url,
+            resp = self._send(
+                self._session, method, url,
                 headers=self._headers(),
                 params=params,
                 json=json,
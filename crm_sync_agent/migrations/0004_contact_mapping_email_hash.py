@@ -0,0 +1,27 @@
+# Generated by Django 4.2.10 on 2026-10-18 22:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crm_sync_agent', '0003_crmintegration_limit_message_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='crmcontactmapping',
+            name='email_normalized',
+            field=models.CharField(blank=True, max_length=254),
+        ),
+        migrations.AddField(
+            model_name='crmcontactmapping',
+            name='properties_hash',
+            field=models.CharField(blank=True, max_length=64),
+        ),
+        migrations.AddIndex(
+            model_name='crmcontactmapping',
+            index=models.Index(fields=['integration', 'email_normalized'], name='crm_contact_integra_6f9190_idx'),
+        ),
+    ]
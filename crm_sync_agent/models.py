@@ -85,6 +85,12 @@ class CRMContactMapping(models.Model):
     crm_contact_id = models.CharField(max_length=255)
     # Optional: deal / opportunity ID created alongside the contact
     crm_deal_id = models.CharField(max_length=255, blank=True)
+    # Lowercased contact email: activity syncs find the CRM contact here
+    # instead of searching the CRM.
+    email_normalized = models.CharField(max_length=254, blank=True)
+    # Hash of the contact payload last written to the CRM. A contact sync
+    # with the same hash is skipped without an API call.
+    properties_hash = models.CharField(max_length=64, blank=True)
     last_synced_at = models.DateTimeField(auto_now=True)
 
     class Meta:
@@ -92,6 +98,7 @@ class CRMContactMapping(models.Model):
         unique_together = ('integration', 'source_type', 'source_id')
         indexes = [
             models.Index(fields=['integration', 'source_type', 'source_id']),
+            models.Index(fields=['integration', 'email_normalized']),
         ]
 
     def __str__(self):
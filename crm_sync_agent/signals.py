@@ -60,6 +60,31 @@ def on_sdr_lead_saved(sender, instance, created, **kwargs):
         logger.exception('CRM signal error on SDRLead save (lead=%s)', getattr(instance, 'pk', '?'))
 
 
+def on_sdr_leads_bulk_created(leads):
+    """CRM sync for leads written with bulk_create, which sends no post_save.
+
+    All leads belong to one company user. Same filtering as on_sdr_lead_saved;
+    the integration lookup and the background queue run happen once for the
+    batch instead of once per lead.
+    """
+    leads = [
+        lead for lead in leads
+        if lead.pk and (lead.email or lead.linkedin_url or lead.full_name or lead.first_name)
+    ]
+    if not leads:
+        return
+    try:
+        company = _company_from_lead(leads[0])
+        if not company or not _has_active_integrations(company):
+            return
+        agent = _get_agent(company)
+        for lead in leads:
+            agent.enqueue_sdr_lead(lead)
+        _process_async(company)
+    except Exception:
+        logger.exception('CRM signal error on SDRLead bulk create (%d leads)', len(leads))
+
+
 # ------------------------------------------------------------------ #
 # SDR Outreach Log — log email activity on successful send
 # ------------------------------------------------------------------ #
@@ -8,12 +8,35 @@ Scheduled via CELERY_BEAT_SCHEDULE in settings.py:
 from __future__ import annotations
 
 import logging
+from concurrent.futures import ThreadPoolExecutor
 
 from celery import shared_task
 from django.utils import timezone
 
 logger = logging.getLogger(__name__)
 
+# Integrations drained in parallel per run. Each integration's items are
+# still processed in order by one worker, so a slow CRM only holds its own.
+CRM_QUEUE_MAX_WORKERS = 4
+# Items claimed per integration per run.
+CRM_QUEUE_ITEMS_PER_INTEGRATION = 100
+
+
+def _drain_integration(integration):
+    """Process one integration's due items (pool worker)."""
+    from django.db import connection
+    from crm_sync_agent.agents.crm_sync_agent import CRMSyncAgent
+
+    try:
+        return CRMSyncAgent(integration.company).process_pending(
+            limit=CRM_QUEUE_ITEMS_PER_INTEGRATION, integration=integration,
+        )
+    except Exception:
+        logger.exception('Error processing CRM sync queue for integration %d', integration.pk)
+        return {}
+    finally:
+        connection.close()
+
 
 @shared_task(bind=True, name='crm_sync_agent.tasks.process_crm_sync_queue', max_retries=0)
 def process_crm_sync_queue(self, company_id: int | None = None):
@@ -21,39 +44,32 @@ def process_crm_sync_queue(self, company_id: int | None = None):
     Process pending CRM sync queue items.
 
     If `company_id` is given, only process items for that company.
-    Otherwise, process all companies with pending items (up to 100 per company).
+    Otherwise, process every integration with pending items (up to 100 per
+    integration), CRM_QUEUE_MAX_WORKERS integrations at a time.
     """
-    from core.models import Company
-    from crm_sync_agent.models import CRMSyncQueue
-    from crm_sync_agent.agents.crm_sync_agent import CRMSyncAgent
+    from crm_sync_agent.models import CRMIntegration, CRMSyncQueue
 
     now = timezone.now()
 
+    # Only fetch integrations that actually have pending work
+    due = CRMSyncQueue.objects.filter(
+        status__in=[CRMSyncQueue.STATUS_PENDING, CRMSyncQueue.STATUS_FAILED],
+        scheduled_at__lte=now,
+    )
     if company_id:
-        companies = Company.objects.filter(pk=company_id)
-    else:
-        # Only fetch companies that actually have pending work
-        company_ids = (
-            CRMSyncQueue.objects
-            .filter(
-                status__in=[CRMSyncQueue.STATUS_PENDING, CRMSyncQueue.STATUS_FAILED],
-                scheduled_at__lte=now,
-            )
-            .values_list('company_id', flat=True)
-            .distinct()
-        )
-        companies = Company.objects.filter(pk__in=company_ids)
+        due = due.filter(company_id=company_id)
+    integrations = list(
+        CRMIntegration.objects
+        .filter(pk__in=due.values_list('integration_id', flat=True).distinct())
+        .select_related('company')
+    )
 
     total_stats = {'processed': 0, 'succeeded': 0, 'failed': 0, 'skipped': 0}
-
-    for company in companies:
-        try:
-            agent = CRMSyncAgent(company)
-            stats = agent.process_pending(limit=100)
-            for k, v in stats.items():
-                total_stats[k] = total_stats.get(k, 0) + v
-        except Exception:
-            logger.exception('Error processing CRM sync queue for company %d', company.pk)
+    if integrations:
+        with ThreadPoolExecutor(max_workers=min(CRM_QUEUE_MAX_WORKERS, len(integrations))) as pool:
+            for stats in pool.map(_drain_integration, integrations):
+                for k, v in stats.items():
+                    total_stats[k] = total_stats.get(k, 0) + v
 
     if total_stats['processed']:
         logger.info(
@@ -139,5 +139,6 @@ class CampaignContactAdmin(admin.ModelAdmin):
     def reset_sequence(self, request, queryset):
         """Reset sequence progress for selected contacts"""
         count = queryset.update(current_step=0, last_sent_at=None, started_at=None, completed=False)
+        CampaignContact.refresh_schedules(queryset.select_related('sequence__campaign'))
         self.message_user(request, f'{count} contact(s) sequence reset.')
     reset_sequence.short_description = 'Reset sequence progress'
@@ -8,9 +8,10 @@ import logging
 import re
 from typing import Any, Dict, List, Optional
 
-from django.db.models import Avg, Count, Q
+from django.db.models import Avg, Count
 from django.utils import timezone
 
+from marketing_agent import campaign_rollups
 from marketing_agent.agents.marketing_base_agent import MarketingBaseAgent
 from marketing_agent.models import (
     Campaign,
@@ -264,51 +265,9 @@ class GraphGeneratorAgent(MarketingBaseAgent):
         )
         campaign_ids = [c.id for c in campaigns]
 
-        email_stats = {}
-        if campaign_ids:
-            sent_statuses = ['sent', 'delivered', 'opened', 'clicked']
-            for row in (
-                EmailSendHistory.objects.filter(campaign_id__in=campaign_ids)
-                .values('campaign_id')
-                .annotate(
-                    total_sent=Count('id', filter=Q(status__in=sent_statuses)),
-                    total_opened=Count('id', filter=Q(status__in=['opened', 'clicked'])),
-                    total_clicked=Count('id', filter=Q(status='clicked')),
-                    total_bounced=Count('id', filter=Q(status='bounced')),
-                    total_failed=Count('id', filter=Q(status='failed')),
-                )
-                .order_by('campaign_id')
-            ):
-                email_stats[row['campaign_id']] = row
-
-        reply_stats = {}
-        if campaign_ids:
-            for row in (
-                Reply.objects.filter(campaign_id__in=campaign_ids)
-                .values('campaign_id')
-                .annotate(
-                    total_replied=Count('id'),
-                    positive_replies=Count(
-                        'id',
-                        filter=Q(
-                            interest_level__in=[
-                                'positive',
-                                'neutral',
-                                'requested_info',
-                                'objection',
-                            ]
-                        ),
-                    ),
-                    negative_replies=Count(
-                        'id',
-                        filter=Q(
-                            interest_level__in=['negative', 'unsubscribe']
-                        ),
-                    ),
-                )
-                .order_by('campaign_id')
-            ):
-                reply_stats[row['campaign_id']] = row
+        # Email/reply counters come from the per-day rollups, not a scan of
+        # EmailSendHistory / Reply (see campaign_rollups.py).
+        rollup_totals = campaign_rollups.campaign_totals(campaign_ids)
 
         lead_counts = {}
         if campaign_ids:
@@ -320,16 +279,15 @@ class GraphGeneratorAgent(MarketingBaseAgent):
         campaigns_data = []
         for campaign in campaigns:
             cid = campaign.id
-            es = email_stats.get(cid, {})
-            rs = reply_stats.get(cid, {})
-            total_sent = es.get('total_sent') or 0
-            total_opened = es.get('total_opened') or 0
-            total_clicked = es.get('total_clicked') or 0
-            total_bounced = es.get('total_bounced') or 0
-            total_failed = es.get('total_failed') or 0
-            total_replied = rs.get('total_replied') or 0
-            positive_replies = rs.get('positive_replies') or 0
-            negative_replies = rs.get('negative_replies') or 0
+            totals = rollup_totals[cid]
+            total_sent = totals['sent']
+            total_opened = totals['opened']
+            total_clicked = totals['clicked']
+            total_bounced = totals['bounced']
+            total_failed = totals['failed']
+            total_replied = totals['replies']
+            positive_replies = totals['positive_replies']
+            negative_replies = totals['negative_replies']
             leads_count = lead_counts.get(cid, 0)
 
             target_leads = getattr(campaign, 'target_leads', None)
@@ -751,6 +709,7 @@ class GraphGeneratorAgent(MarketingBaseAgent):
                 'objection': 'Objection',
                 'unsubscribe': 'Unsubscribe',
                 'not_analyzed': 'Not Analyzed',
+                'pending_analysis': 'Pending Analysis',
             }
             color_map = {
                 'positive': '#10b981',
@@ -760,10 +719,11 @@ class GraphGeneratorAgent(MarketingBaseAgent):
                 'objection': '#f97316',
                 'unsubscribe': '#6b7280',
                 'not_analyzed': '#9ca3af',
+                'pending_analysis': '#d1d5db',
             }
 
             # Build chart data in a consistent order
-            display_order = ['positive', 'neutral', 'negative', 'requested_info', 'objection', 'unsubscribe', 'not_analyzed']
+            display_order = ['positive', 'neutral', 'negative', 'requested_info', 'objection', 'unsubscribe', 'not_analyzed', 'pending_analysis']
             chart_data = []
             colors = []
             for level in display_order:
@@ -608,126 +608,39 @@ Respond with comma-separated category keys only (from: any, positive, negative,
         Returns:
             int: Number of leads successfully processed
         """
-        import pandas as pd
-        from marketing_agent.models import Lead
         from django.contrib.auth.models import User
+        from core.tabular_import import TabularImportError
+        from marketing_agent.services.lead_import import import_campaign_leads
         
         user = User.objects.get(id=user_id)
-        file_extension = leads_file.name.split('.')[-1].lower()
-        
-        if file_extension not in ['csv', 'xlsx', 'xls']:
-            raise ValueError('Invalid file format. Please upload CSV, XLSX, or XLS files.')
-        
-        # Reset file pointer to beginning (in case it was read before)
-        if hasattr(leads_file, 'seek'):
-            leads_file.seek(0)
-        
-        # Read the file - handle Django uploaded files properly
         try:
-            if file_extension == 'csv':
-                # For CSV files, read content and parse
-                import io
-                content = leads_file.read()
-                # Reset again after reading
-                if hasattr(leads_file, 'seek'):
-                    leads_file.seek(0)
-                # Handle both text and bytes
-                if isinstance(content, bytes):
-                    content = content.decode('utf-8')
-                df = pd.read_csv(io.StringIO(content))
-            else:
-                # For Excel files, pandas can read from file object directly
-                if hasattr(leads_file, 'seek'):
-                    leads_file.seek(0)
-                df = pd.read_excel(leads_file)
+            # Existing leads take the file's details. As before, this path
+            # only links leads to the campaign; the m2m_changed receiver adds
+            # contacts for active sequences.
+            result = import_campaign_leads(
+                campaign, user, leads_file, leads_file.name or '',
+                overwrite=True, default_source='campaign_upload', create_contacts=False,
+            )
+        except TabularImportError:
+            raise
         except Exception as e:
             self.log_action("Error reading leads file", {
                 "error": str(e),
                 "file_name": leads_file.name,
-                "file_extension": file_extension
             })
-            import traceback
-            print(f"Error reading leads file: {str(e)}")
-            print(traceback.format_exc())
             raise ValueError(f'Error reading file: {str(e)}. Please ensure the file is a valid CSV or Excel file.')
         
-        if df.empty:
-            raise ValueError('File is empty')
-        
-        # Normalize column names (lowercase, strip spaces)
-        df.columns = df.columns.str.lower().str.strip()
-        
-        # Required: email
-        if 'email' not in df.columns:
-            raise ValueError('Email column is required in the file')
-        
-        # Process leads
-        created_count = 0
-        
-        for index, row in df.iterrows():
-            try:
-                email = str(row['email']).strip().lower()
-                if not email or pd.isna(row['email']):
-                    continue
-
-                first_name = str(row.get('first_name', '')).strip() if pd.notna(row.get('first_name')) else ''
-                last_name = str(row.get('last_name', '')).strip() if pd.notna(row.get('last_name')) else ''
-                # First and last name are required — a row with neither is skipped,
-                # same as a missing email, so personalization tokens are never
-                # silently blank.
-                if not first_name and not last_name:
-                    continue
-
-                # Get or create lead
-                lead, created = Lead.objects.get_or_create(
-                    email=email,
-                    owner=user,
-                    defaults={
-                        'first_name': first_name,
-                        'last_name': last_name,
-                        'phone': str(row.get('phone', '')).strip() if pd.notna(row.get('phone')) else '',
-                        'company': str(row.get('company', '')).strip() if pd.notna(row.get('company')) else '',
-                        'job_title': str(row.get('job_title', '')).strip() if pd.notna(row.get('job_title')) else '',
-                        'source': str(row.get('source', 'campaign_upload')).strip() if pd.notna(row.get('source')) else 'campaign_upload',
-                    }
-                )
-                
-                # Update existing lead if new data provided
-                if not created:
-                    if pd.notna(row.get('first_name')):
-                        lead.first_name = str(row.get('first_name', '')).strip()
-                    if pd.notna(row.get('last_name')):
-                        lead.last_name = str(row.get('last_name', '')).strip()
-                    if pd.notna(row.get('phone')):
-                        lead.phone = str(row.get('phone', '')).strip()
-                    if pd.notna(row.get('company')):
-                        lead.company = str(row.get('company', '')).strip()
-                    if pd.notna(row.get('job_title')):
-                        lead.job_title = str(row.get('job_title', '')).strip()
-                    lead.save()
-                
-                # Associate lead with campaign
-                campaign.leads.add(lead)
-                created_count += 1
-                
-            except Exception as e:
-                self.log_action("Error processing lead row", {"error": str(e), "row_index": index})
-                import traceback
-                print(f"Error processing lead row {index}: {str(e)}")
-                print(traceback.format_exc())
-                continue
-        
         # Log final count for debugging
         final_count = campaign.leads.count()
         self.log_action("Leads file processing complete", {
             "campaign_id": campaign.id,
             "campaign_name": campaign.name,
-            "leads_processed": created_count,
+            "leads_processed": result['created_count'],
             "total_leads_in_campaign": final_count
         })
-        print(f"Processed {created_count} leads. Campaign now has {final_count} total leads.")
+        print(f"Processed {result['created_count']} leads. Campaign now has {final_count} total leads.")
         
-        return created_count
+        return result['created_count']
     
     def generate_leads(self, user_id: int, campaign_data: Dict, campaign_design: Optional[Dict] = None) -> Dict:
         """
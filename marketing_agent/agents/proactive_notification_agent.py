@@ -8,18 +8,189 @@ from .marketing_base_agent import MarketingBaseAgent
 from typing import Dict, Optional, List
 from marketing_agent.models import (
     Campaign, Lead, EmailSendHistory, CampaignPerformance,
-    MarketingNotification, NotificationRule, EmailSequence, Reply
+    MarketingNotification, NotificationRule, EmailSequence, EmailSequenceStep, Reply
 )
+from marketing_agent import campaign_rollups
 from django.contrib.auth.models import User
 from django.utils import timezone
 from datetime import datetime, timedelta
-from django.db.models import Count, Sum, Avg, Q
+from django.db.models import Count, Exists, Min, OuterRef, Sum, Avg, Q
 import json
 import logging
 
 logger = logging.getLogger(__name__)
 
 
+class CampaignSnapshot:
+    """
+    Everything the proactive checks read about one campaign, loaded once.
+
+    check_campaign builds a snapshot with a fixed handful of aggregate queries
+    (rollup totals, one conditional-count pass over EmailSendHistory, replies
+    grouped by interest level, sub-sequence triggers, leads, sequences and the
+    owner's recent notifications for the campaign) and passes it to every
+    _check_* method, so monitoring cost no longer grows with the number of
+    checks. The notification index also answers the "already notified?"
+    lookups that each check used to run as its own query.
+    """
+
+    # Longest look-back any existence check needs (the 3-day opportunity
+    # de-dupes); the 24h duplicate guard and "today" checks fall inside it.
+    NOTIFICATION_WINDOW = timedelta(days=3)
+
+    def __init__(self, campaign: Campaign, user: User, now: Optional[datetime] = None):
+        self.campaign = campaign
+        self.user = user
+        self.now = now or timezone.now()
+        self.day_ago = self.now - timedelta(hours=24)
+        self.week_ago = self.now - timedelta(days=7)
+        self.two_weeks_ago = self.now - timedelta(days=14)
+
+        self.totals = campaign_rollups.campaign_totals([campaign.id])[campaign.id]
+        self._load_sends()
+        self._load_replies()
+        self.leads_count = campaign.leads.count()
+        self.sequences = list(
+            EmailSequence.objects.filter(campaign=campaign)
+            .annotate(has_steps=Exists(EmailSequenceStep.objects.filter(sequence=OuterRef('pk'))))
+            .values('id', 'name', 'is_active', 'has_steps')
+        )
+        # Newest first, so the first match is the one .first() used to return.
+        self.notifications = list(
+            MarketingNotification.objects.filter(
+                user=user,
+                campaign=campaign,
+                created_at__gte=self.now - self.NOTIFICATION_WINDOW,
+            ).order_by('-created_at').values('notification_type', 'title', 'is_read', 'created_at')
+        )
+
+    def _load_sends(self):
+        opened = Q(status__in=['opened', 'clicked'])
+        clicked = Q(status='clicked')
+        delivered = Q(status__in=['delivered', 'opened', 'clicked'])
+        last_day = Q(sent_at__gte=self.day_ago)
+        last_week = Q(sent_at__gte=self.week_ago)
+        previous_week = Q(sent_at__gte=self.two_weeks_ago, sent_at__lt=self.week_ago)
+        stats = EmailSendHistory.objects.filter(campaign=self.campaign).aggregate(
+            total=Count('id'),
+            opened=Count('id', filter=opened),
+            clicked=Count('id', filter=clicked),
+            delivered=Count('id', filter=delivered),
+            contacted=Count('recipient_email', filter=delivered, distinct=True),
+            first_sent_at=Min('sent_at'),
+            sent_24h=Count('id', filter=last_day),
+            failed_24h=Count('id', filter=last_day & Q(status__in=['failed', 'bounced'])),
+            sent_7d=Count('id', filter=last_week),
+            opened_7d=Count('id', filter=last_week & opened),
+            clicked_7d=Count('id', filter=last_week & clicked),
+            sent_prev_7d=Count('id', filter=previous_week),
+            opened_prev_7d=Count('id', filter=previous_week & opened),
+        )
+        self.sends_total = stats['total']
+        self.sends_opened = stats['opened']
+        self.sends_clicked = stats['clicked']
+        self.sends_delivered = stats['delivered']
+        self.contacted_leads = stats['contacted']
+        self.first_sent_at = stats['first_sent_at']
+        self.sent_24h = stats['sent_24h']
+        self.failed_24h = stats['failed_24h']
+        self.sent_7d = stats['sent_7d']
+        self.opened_7d = stats['opened_7d']
+        self.clicked_7d = stats['clicked_7d']
+        self.sent_prev_7d = stats['sent_prev_7d']
+        self.opened_prev_7d = stats['opened_prev_7d']
+
+    def _load_replies(self):
+        last_week = Q(replied_at__gte=self.week_ago)
+        self.replies_total = 0
+        self.replies_7d = 0
+        self.replies_by_level = {}
+        # interest_level -> {'count', 'leads'} over the last 7 days
+        self.recent_replies = {}
+        for row in (
+            Reply.objects.filter(campaign=self.campaign)
+            .order_by()
+            .values('interest_level')
+            .annotate(
+                total=Count('id'),
+                recent=Count('id', filter=last_week),
+                recent_leads=Count('lead__email', filter=last_week, distinct=True),
+            )
+        ):
+            self.replies_total += row['total']
+            self.replies_7d += row['recent']
+            self.replies_by_level[row['interest_level']] = row['total']
+            if row['recent']:
+                self.recent_replies[row['interest_level']] = {
+                    'count': row['recent'], 'leads': row['recent_leads'],
+                }
+
+        self.latest_positive_reply = None
+        if 'positive' in self.recent_replies:
+            self.latest_positive_reply = (
+                Reply.objects.filter(
+                    campaign=self.campaign, interest_level='positive', replied_at__gte=self.week_ago,
+                ).order_by('-replied_at').values('lead__email', 'replied_at').first()
+            )
+
+        triggered = list(
+            Reply.objects.filter(
+                campaign=self.campaign, sub_sequence__isnull=False, replied_at__gte=self.week_ago,
+            ).order_by('-replied_at').values_list('lead__email', 'sub_sequence__name')
+        )
+        self.sub_sequence_triggers = len(triggered)
+        self.sub_sequence_trigger_leads = len({email for email, _ in triggered})
+        self.sub_sequence_trigger_names = list(dict.fromkeys(name for _, name in triggered if name))
+
+    def recent_reply_count(self, interest_level: str) -> int:
+        return self.recent_replies.get(interest_level, {}).get('count', 0)
+
+    @property
+    def sequences_count(self) -> int:
+        return len(self.sequences)
+
+    @property
+    def active_sequences_count(self) -> int:
+        return sum(1 for seq in self.sequences if seq['is_active'])
+
+    @property
+    def followup_sequences_count(self) -> int:
+        return sum(1 for seq in self.sequences if 'follow' in (seq['name'] or '').lower())
+
+    @property
+    def has_sequence_with_steps(self) -> bool:
+        return any(seq['has_steps'] for seq in self.sequences)
+
+    def has_notification(self, notification_type: str, title_contains: str, since: datetime) -> bool:
+        """In-memory ``title__icontains`` / ``created_at__gte`` existence check."""
+        needle = title_contains.lower()
+        return any(
+            n['notification_type'] == notification_type
+            and needle in n['title'].lower()
+            and n['created_at'] >= since
+            for n in self.notifications
+        )
+
+    def has_unread_duplicate(self, notification_type: str, title: str) -> bool:
+        """True if the newest same-type, same-title notification from the last
+        24 hours is still unread (the _create_notification duplicate guard)."""
+        for n in self.notifications:
+            if n['created_at'] < self.day_ago:
+                break
+            if n['notification_type'] == notification_type and n['title'] == title:
+                return not n['is_read']
+        return False
+
+    def remember(self, notification: MarketingNotification):
+        """Index a notification created during this check run."""
+        self.notifications.insert(0, {
+            'notification_type': notification.notification_type,
+            'title': notification.title,
+            'is_read': notification.is_read,
+            'created_at': notification.created_at,
+        })
+
+
 class ProactiveNotificationAgent(MarketingBaseAgent):
     """
     Proactive Notification Agent
@@ -143,43 +314,47 @@ class ProactiveNotificationAgent(MarketingBaseAgent):
             user = User.objects.get(id=user_id)
             campaign = Campaign.objects.get(id=campaign_id, owner=user)
             
+            # One snapshot per run: every check below reads from it instead of
+            # re-querying sends, replies, leads, sequences and notifications.
+            snapshot = CampaignSnapshot(campaign, user)
+            
             notifications_created = []
             issues = []
             opportunities = []
             
             # Check performance metrics
-            perf_result = self._check_performance_metrics(campaign, user)
+            perf_result = self._check_performance_metrics(campaign, user, snapshot)
             if perf_result:
                 notifications_created.extend(perf_result.get('notifications', []))
                 issues.extend(perf_result.get('issues', []))
                 opportunities.extend(perf_result.get('opportunities', []))
             
             # Check email delivery
-            delivery_result = self._check_email_delivery(campaign, user)
+            delivery_result = self._check_email_delivery(campaign, user, snapshot)
             if delivery_result:
                 notifications_created.extend(delivery_result.get('notifications', []))
                 issues.extend(delivery_result.get('issues', []))
             
             # Check milestones
-            milestone_result = self._check_milestones(campaign, user)
+            milestone_result = self._check_milestones(campaign, user, snapshot)
             if milestone_result:
                 notifications_created.extend(milestone_result.get('notifications', []))
                 opportunities.extend(milestone_result.get('opportunities', []))
             
             # Check anomalies
-            anomaly_result = self._check_anomalies(campaign, user)
+            anomaly_result = self._check_anomalies(campaign, user, snapshot)
             if anomaly_result:
                 notifications_created.extend(anomaly_result.get('notifications', []))
                 issues.extend(anomaly_result.get('issues', []))
             
             # Check campaign setup and actionable recommendations
-            setup_result = self._check_campaign_setup(campaign, user)
+            setup_result = self._check_campaign_setup(campaign, user, snapshot)
             if setup_result:
                 notifications_created.extend(setup_result.get('notifications', []))
                 issues.extend(setup_result.get('issues', []))
             
             # Check for actionable recommendations
-            recommendations_result = self._check_actionable_recommendations(campaign, user)
+            recommendations_result = self._check_actionable_recommendations(campaign, user, snapshot)
             if recommendations_result:
                 notifications_created.extend(recommendations_result.get('notifications', []))
                 opportunities.extend(recommendations_result.get('opportunities', []))
@@ -187,7 +362,7 @@ class ProactiveNotificationAgent(MarketingBaseAgent):
             # Comprehensive checks for ALL campaigns (active, scheduled, paused, draft)
             # Check all reply types (positive, negative, neutral, objections, unsubscribe)
             # Works for any campaign that has sent emails
-            all_replies_result = self._check_all_reply_types(campaign, user)
+            all_replies_result = self._check_all_reply_types(campaign, user, snapshot)
             if all_replies_result:
                 notifications_created.extend(all_replies_result.get('notifications', []))
                 opportunities.extend(all_replies_result.get('opportunities', []))
@@ -195,7 +370,7 @@ class ProactiveNotificationAgent(MarketingBaseAgent):
             
             # Check open/click rates and engagement metrics
             # Works for any campaign that has sent emails
-            engagement_result = self._check_active_campaign_engagement(campaign, user)
+            engagement_result = self._check_active_campaign_engagement(campaign, user, snapshot)
             if engagement_result:
                 notifications_created.extend(engagement_result.get('notifications', []))
                 opportunities.extend(engagement_result.get('opportunities', []))
@@ -203,7 +378,7 @@ class ProactiveNotificationAgent(MarketingBaseAgent):
             
             # Check sequence status and email sending
             # Works for all campaign statuses
-            sequence_status_result = self._check_active_campaign_sequences(campaign, user)
+            sequence_status_result = self._check_active_campaign_sequences(campaign, user, snapshot)
             if sequence_status_result:
                 notifications_created.extend(sequence_status_result.get('notifications', []))
                 issues.extend(sequence_status_result.get('issues', []))
@@ -211,25 +386,25 @@ class ProactiveNotificationAgent(MarketingBaseAgent):
             # Check campaign progress (weekly updates, milestones)
             # Only for active campaigns (they're the ones running)
             if campaign.status == 'active':
-                progress_result = self._check_campaign_progress(campaign, user)
+                progress_result = self._check_campaign_progress(campaign, user, snapshot)
                 if progress_result:
                     notifications_created.extend(progress_result.get('notifications', []))
                     opportunities.extend(progress_result.get('opportunities', []))
             
             # Recent activity summary (opens, clicks, replies) - any campaign with sends or replies
-            activity_result = self._check_recent_activity_summary(campaign, user)
+            activity_result = self._check_recent_activity_summary(campaign, user, snapshot)
             if activity_result:
                 notifications_created.extend(activity_result.get('notifications', []))
                 opportunities.extend(activity_result.get('opportunities', []))
             
             # First open / first click milestones (low threshold so new campaigns get feedback)
-            milestones_result = self._check_first_milestones(campaign, user)
+            milestones_result = self._check_first_milestones(campaign, user, snapshot)
             if milestones_result:
                 notifications_created.extend(milestones_result.get('notifications', []))
                 opportunities.extend(milestones_result.get('opportunities', []))
             
             # Sub-sequence triggered by reply (reply triggered a follow-up sequence)
-            subseq_result = self._check_sub_sequence_triggered(campaign, user)
+            subseq_result = self._check_sub_sequence_triggered(campaign, user, snapshot)
             if subseq_result:
                 notifications_created.extend(subseq_result.get('notifications', []))
                 opportunities.extend(subseq_result.get('opportunities', []))
@@ -287,23 +462,25 @@ class ProactiveNotificationAgent(MarketingBaseAgent):
         """
         return self.monitor_all_campaigns(user_id)
     
-    def _check_performance_metrics(self, campaign: Campaign, user: User) -> Optional[Dict]:
+    def _check_performance_metrics(self, campaign: Campaign, user: User,
+                                   snapshot: CampaignSnapshot) -> Optional[Dict]:
         """Check campaign performance metrics for issues and opportunities"""
         notifications = []
         issues = []
         opportunities = []
         
-        # Get email statistics
-        email_sends = EmailSendHistory.objects.filter(campaign=campaign)
-        total_sent = email_sends.count()
+        # Get email statistics from the per-day campaign rollups
+        totals = snapshot.totals
+        # Attempted sends: delivered-or-better plus bounced and failed
+        total_sent = totals['sent'] + totals['bounced'] + totals['failed']
         
         if total_sent == 0:
             return None
         
-        emails_opened = email_sends.filter(status__in=['opened', 'clicked']).count()
-        emails_clicked = email_sends.filter(status='clicked').count()
-        emails_bounced = email_sends.filter(status='bounced').count()
-        emails_failed = email_sends.filter(status='failed').count()
+        emails_opened = totals['opened']
+        emails_clicked = totals['clicked']
+        emails_bounced = totals['bounced']
+        emails_failed = totals['failed']
         
         open_rate = (emails_opened / total_sent * 100) if total_sent > 0 else 0
         click_rate = (emails_clicked / total_sent * 100) if total_sent > 0 else 0
@@ -314,6 +491,7 @@ class ProactiveNotificationAgent(MarketingBaseAgent):
         if open_rate < 15 and total_sent >= 5:
             notification = self._create_notification(
                 user=user,
+                snapshot=snapshot,
                 campaign=campaign,
                 notification_type='performance_alert',
                 priority='high',
@@ -340,6 +518,7 @@ class ProactiveNotificationAgent(MarketingBaseAgent):
         if bounce_rate > 5:
             notification = self._create_notification(
                 user=user,
+                snapshot=snapshot,
                 campaign=campaign,
                 notification_type='email_delivery',
                 priority='high',
@@ -366,6 +545,7 @@ class ProactiveNotificationAgent(MarketingBaseAgent):
         if failure_rate > 2:
             notification = self._create_notification(
                 user=user,
+                snapshot=snapshot,
                 campaign=campaign,
                 notification_type='email_delivery',
                 priority='critical',
@@ -392,6 +572,7 @@ class ProactiveNotificationAgent(MarketingBaseAgent):
         if open_rate > 30 and total_sent >= 10:
             notification = self._create_notification(
                 user=user,
+                snapshot=snapshot,
                 campaign=campaign,
                 notification_type='opportunity',
                 priority='low',
@@ -417,6 +598,7 @@ class ProactiveNotificationAgent(MarketingBaseAgent):
         if click_rate > 5 and total_sent >= 10:
             notification = self._create_notification(
                 user=user,
+                snapshot=snapshot,
                 campaign=campaign,
                 notification_type='opportunity',
                 priority='low',
@@ -441,21 +623,17 @@ class ProactiveNotificationAgent(MarketingBaseAgent):
         
         # Check for zero engagement: All emails sent but no replies or clicks
         if total_sent >= 10:  # Only check if significant number of emails sent
-            emails_clicked = email_sends.filter(status='clicked').count()
-            emails_opened = email_sends.filter(status__in=['opened', 'clicked']).count()
-            
-            # Check for replies (using Reply model)
-            replies_count = Reply.objects.filter(campaign=campaign).count()
+            replies_count = totals['replies']
             
             # If no clicks AND no replies after sending multiple emails
             if emails_clicked == 0 and replies_count == 0 and total_sent >= 5:
                 # Check if emails were sent at least 24 hours ago (give time for engagement)
-                oldest_email = email_sends.order_by('sent_at').first()
-                if oldest_email and oldest_email.sent_at:
-                    hours_since_first = (timezone.now() - oldest_email.sent_at).total_seconds() / 3600
+                if snapshot.first_sent_at:
+                    hours_since_first = (snapshot.now - snapshot.first_sent_at).total_seconds() / 3600
                     if hours_since_first >= 24:  # At least 24 hours since first email
                         notification = self._create_notification(
                             user=user,
+                            snapshot=snapshot,
                             campaign=campaign,
                             notification_type='engagement',
                             priority='high',
@@ -483,12 +661,12 @@ class ProactiveNotificationAgent(MarketingBaseAgent):
             
             # If emails opened but no clicks and no replies
             elif emails_opened > 0 and emails_clicked == 0 and replies_count == 0 and total_sent >= 8:
-                oldest_email = email_sends.order_by('sent_at').first()
-                if oldest_email and oldest_email.sent_at:
-                    hours_since_first = (timezone.now() - oldest_email.sent_at).total_seconds() / 3600
+                if snapshot.first_sent_at:
+                    hours_since_first = (snapshot.now - snapshot.first_sent_at).total_seconds() / 3600
                     if hours_since_first >= 48:  # At least 48 hours since first email
                         notification = self._create_notification(
                             user=user,
+                            snapshot=snapshot,
                             campaign=campaign,
                             notification_type='engagement',
                             priority='medium',
@@ -522,40 +700,37 @@ class ProactiveNotificationAgent(MarketingBaseAgent):
             }
         return None
     
-    def _check_email_delivery(self, campaign: Campaign, user: User) -> Optional[Dict]:
+    def _check_email_delivery(self, campaign: Campaign, user: User,
+                              snapshot: CampaignSnapshot) -> Optional[Dict]:
         """Check email delivery issues"""
         notifications = []
         issues = []
         
         # Check recent email sends (last 24 hours)
-        recent_cutoff = timezone.now() - timedelta(hours=24)
-        recent_emails = EmailSendHistory.objects.filter(
-            campaign=campaign,
-            sent_at__gte=recent_cutoff
-        )
+        recent_count = snapshot.sent_24h
         
-        if recent_emails.count() == 0:
+        if recent_count == 0:
             return None
         
-        failed_emails = recent_emails.filter(status__in=['failed', 'bounced'])
-        failure_count = failed_emails.count()
-        failure_rate = (failure_count / recent_emails.count() * 100) if recent_emails.count() > 0 else 0
+        failure_count = snapshot.failed_24h
+        failure_rate = (failure_count / recent_count * 100) if recent_count > 0 else 0
         
         # Alert if high failure rate in last 24 hours
-        if failure_rate > 10 and recent_emails.count() >= 5:
+        if failure_rate > 10 and recent_count >= 5:
             notification = self._create_notification(
                 user=user,
+                snapshot=snapshot,
                 campaign=campaign,
                 notification_type='email_delivery',
                 priority='high',
                 title=f'Email Delivery Issues: {campaign.name}',
-                message=f'High email delivery failure rate ({failure_rate:.1f}%) in the last 24 hours. {failure_count} out of {recent_emails.count()} emails failed.',
+                message=f'High email delivery failure rate ({failure_rate:.1f}%) in the last 24 hours. {failure_count} out of {recent_count} emails failed.',
                 action_required=True,
                 action_url=f'/marketing/dashboard/campaign/{campaign.id}/',
                 metadata={
                     'failure_rate': failure_rate,
                     'failure_count': failure_count,
-                    'total_recent': recent_emails.count(),
+                    'total_recent': recent_count,
                     'timeframe': '24_hours'
                 }
             )
@@ -573,17 +748,19 @@ class ProactiveNotificationAgent(MarketingBaseAgent):
             }
         return None
     
-    def _check_milestones(self, campaign: Campaign, user: User) -> Optional[Dict]:
+    def _check_milestones(self, campaign: Campaign, user: User,
+                          snapshot: CampaignSnapshot) -> Optional[Dict]:
         """Check if campaign milestones are reached"""
         notifications = []
         opportunities = []
         
         # Check lead targets
         if campaign.target_leads:
-            actual_leads = campaign.leads.count()
+            actual_leads = snapshot.leads_count
             if actual_leads >= campaign.target_leads:
                 notification = self._create_notification(
                     user=user,
+                    snapshot=snapshot,
                     campaign=campaign,
                     notification_type='milestone',
                     priority='low',
@@ -612,41 +789,32 @@ class ProactiveNotificationAgent(MarketingBaseAgent):
             }
         return None
     
-    def _check_anomalies(self, campaign: Campaign, user: User) -> Optional[Dict]:
+    def _check_anomalies(self, campaign: Campaign, user: User,
+                         snapshot: CampaignSnapshot) -> Optional[Dict]:
         """Check for performance anomalies"""
         notifications = []
         issues = []
         
-        # Get email statistics for last 7 days vs previous 7 days
-        now = timezone.now()
-        last_7_days = now - timedelta(days=7)
-        previous_7_days_start = last_7_days - timedelta(days=7)
+        # Email statistics for last 7 days vs previous 7 days
+        recent_sent = snapshot.sent_7d
+        previous_sent = snapshot.sent_prev_7d
         
-        recent_emails = EmailSendHistory.objects.filter(
-            campaign=campaign,
-            sent_at__gte=last_7_days
-        )
-        previous_emails = EmailSendHistory.objects.filter(
-            campaign=campaign,
-            sent_at__gte=previous_7_days_start,
-            sent_at__lt=last_7_days
-        )
-        
-        if recent_emails.count() < 10 or previous_emails.count() < 10:
+        if recent_sent < 10 or previous_sent < 10:
             return None
         
         # Calculate open rates
-        recent_opened = recent_emails.filter(status__in=['opened', 'clicked']).count()
-        previous_opened = previous_emails.filter(status__in=['opened', 'clicked']).count()
+        recent_opened = snapshot.opened_7d
+        previous_opened = snapshot.opened_prev_7d
         
-        recent_open_rate = (recent_opened / recent_emails.count() * 100) if recent_emails.count() > 0 else 0
-        previous_open_rate = (previous_opened / previous_emails.count() * 100) if previous_emails.count() > 0 else 0
+        recent_open_rate = (recent_opened / recent_sent * 100) if recent_sent > 0 else 0
+        previous_open_rate = (previous_opened / previous_sent * 100) if previous_sent > 0 else 0
         
         # Detect significant drop (> 30% decrease)
         if previous_open_rate > 0 and recent_open_rate < (previous_open_rate * 0.7):
             drop_percentage = ((previous_open_rate - recent_open_rate) / previous_open_rate) * 100
             notification = self._create_notification(
                 user=user,
+                snapshot=snapshot,
                 campaign=campaign,
                 notification_type='anomaly',
                 priority='high',
@@ -676,21 +844,23 @@ class ProactiveNotificationAgent(MarketingBaseAgent):
             }
         return None
     
-    def _check_campaign_setup(self, campaign: Campaign, user: User) -> Optional[Dict]:
+    def _check_campaign_setup(self, campaign: Campaign, user: User,
+                              snapshot: CampaignSnapshot) -> Optional[Dict]:
         """Check campaign setup and provide actionable recommendations"""
         notifications = []
         issues = []
+        opportunities = []
         
         # Check PAUSED campaigns - provide actionable steps
         if campaign.status == 'paused':
-            leads_count = campaign.leads.count()
-            sequences = EmailSequence.objects.filter(campaign=campaign)
-            emails_sent = EmailSendHistory.objects.filter(campaign=campaign).count()
+            leads_count = snapshot.leads_count
+            emails_sent = snapshot.sends_total
             
             # If paused with no leads
             if leads_count == 0:
                 notification = self._create_notification(
                     user=user,
+                    snapshot=snapshot,
                     campaign=campaign,
                     notification_type='campaign_status',
                     priority='high',
@@ -709,9 +879,10 @@ class ProactiveNotificationAgent(MarketingBaseAgent):
                     issues.append({'type': 'paused_no_leads'})
             
             # If paused with leads but no sequences
-            elif leads_count > 0 and sequences.count() == 0:
+            elif leads_count > 0 and snapshot.sequences_count == 0:
                 notification = self._create_notification(
                     user=user,
+                    snapshot=snapshot,
                     campaign=campaign,
                     notification_type='campaign_status',
                     priority='high',
@@ -730,21 +901,22 @@ class ProactiveNotificationAgent(MarketingBaseAgent):
                     issues.append({'type': 'paused_no_sequences'})
             
             # If paused with leads and sequences - ready to launch
-            elif leads_count > 0 and sequences.count() > 0:
+            elif leads_count > 0 and snapshot.sequences_count > 0:
                 notification = self._create_notification(
                     user=user,
+                    snapshot=snapshot,
                     campaign=campaign,
                     notification_type='campaign_status',
                     priority='medium',
                     title=f'🚀 Launch Campaign: {campaign.name}',
-                    message=f'Campaign "{campaign.name}" is paused but ready to launch! It has {leads_count} leads and {sequences.count()} email sequence(s). Activate the campaign to start sending emails.',
+                    message=f'Campaign "{campaign.name}" is paused but ready to launch! It has {leads_count} leads and {snapshot.sequences_count} email sequence(s). Activate the campaign to start sending emails.',
                     action_required=True,
                     action_url=f'/marketing/dashboard/campaign/{campaign.id}/edit/',
                     metadata={
                         'action': 'launch_paused_campaign',
                         'status': 'paused',
                         'leads_count': leads_count,
-                        'sequences_count': sequences.count()
+                        'sequences_count': snapshot.sequences_count
                     }
                 )
                 if notification:
@@ -753,15 +925,15 @@ class ProactiveNotificationAgent(MarketingBaseAgent):
         
         # Check SCHEDULED campaigns
         if campaign.status == 'scheduled':
-            leads_count = campaign.leads.count()
-            sequences = EmailSequence.objects.filter(campaign=campaign)
-            has_sequence_with_steps = any(seq.steps.exists() for seq in sequences)
+            leads_count = snapshot.leads_count
+            has_sequence_with_steps = snapshot.has_sequence_with_steps
             date_arrived = campaign.start_date and campaign.start_date <= timezone.now().date()
             
             # SCHEDULED DATE HAS ARRIVED but cannot auto-activate (no sequences or no leads)
             if date_arrived and (leads_count == 0 or not has_sequence_with_steps):
                 notification = self._create_notification(
                     user=user,
+                    snapshot=snapshot,
                     campaign=campaign,
                     notification_type='campaign_status',
                     priority='high',
@@ -785,6 +957,7 @@ class ProactiveNotificationAgent(MarketingBaseAgent):
             elif leads_count == 0:
                 notification = self._create_notification(
                     user=user,
+                    snapshot=snapshot,
                     campaign=campaign,
                     notification_type='campaign_status',
                     priority='high',
@@ -804,9 +977,10 @@ class ProactiveNotificationAgent(MarketingBaseAgent):
                     issues.append({'type': 'scheduled_no_leads'})
             
             # Scheduled with leads but no sequences
-            elif leads_count > 0 and sequences.count() == 0:
+            elif leads_count > 0 and snapshot.sequences_count == 0:
                 notification = self._create_notification(
                     user=user,
+                    snapshot=snapshot,
                     campaign=campaign,
                     notification_type='campaign_status',
                     priority='high',
@@ -826,23 +1000,24 @@ class ProactiveNotificationAgent(MarketingBaseAgent):
                     issues.append({'type': 'scheduled_no_sequences'})
             
             # Scheduled campaign ready to launch (has leads and sequences but not launched)
-            elif leads_count > 0 and sequences.count() > 0:
+            elif leads_count > 0 and snapshot.sequences_count > 0:
                 # Check if start date has passed but campaign is still scheduled
                 if campaign.start_date and campaign.start_date <= timezone.now().date():
                     notification = self._create_notification(
                         user=user,
+                        snapshot=snapshot,
                         campaign=campaign,
                         notification_type='campaign_status',
                         priority='high',
                         title=f'⏰ Scheduled Campaign Not Launched: {campaign.name}',
-                        message=f'Campaign "{campaign.name}" is scheduled with start date {campaign.start_date} but has NOT been launched yet! It has {leads_count} leads and {sequences.count()} sequence(s) ready. Launch the campaign now to start sending emails.',
+                        message=f'Campaign "{campaign.name}" is scheduled with start date {campaign.start_date} but has NOT been launched yet! It has {leads_count} leads and {snapshot.sequences_count} sequence(s) ready. Launch the campaign now to start sending emails.',
                         action_required=True,
                         action_url=f'/marketing/dashboard/campaign/{campaign.id}/edit/',
                         metadata={
                             'action': 'launch_scheduled_campaign',
                             'status': 'scheduled',
                             'leads_count': leads_count,
-                            'sequences_count': sequences.count(),
+                            'sequences_count': snapshot.sequences_count,
                             'start_date': campaign.start_date.isoformat(),
                             'days_past_start': (timezone.now().date() - campaign.start_date).days
                         }
@@ -856,18 +1031,19 @@ class ProactiveNotificationAgent(MarketingBaseAgent):
                     if days_until_start <= 1:  # Launch today or tomorrow
                         notification = self._create_notification(
                             user=user,
+                            snapshot=snapshot,
                             campaign=campaign,
                             notification_type='campaign_status',
                             priority='medium',
                             title=f'🚀 Campaign Ready to Launch: {campaign.name}',
-                            message=f'Campaign "{campaign.name}" is scheduled to start {campaign.start_date.strftime("%B %d, %Y")} ({days_until_start} day{"s" if days_until_start != 0 else ""} away). It has {leads_count} leads and {sequences.count()} sequence(s) ready. You can launch it now or wait for the scheduled date.',
+                            message=f'Campaign "{campaign.name}" is scheduled to start {campaign.start_date.strftime("%B %d, %Y")} ({days_until_start} day{"s" if days_until_start != 0 else ""} away). It has {leads_count} leads and {snapshot.sequences_count} sequence(s) ready. You can launch it now or wait for the scheduled date.',
                             action_required=False,
                             action_url=f'/marketing/dashboard/campaign/{campaign.id}/edit/',
                             metadata={
                                 'action': 'campaign_ready_to_launch',
                                 'status': 'scheduled',
                                 'leads_count': leads_count,
-                                'sequences_count': sequences.count(),
+                                'sequences_count': snapshot.sequences_count,
                                 'start_date': campaign.start_date.isoformat(),
                                 'days_until_start': days_until_start
                             }
@@ -879,22 +1055,23 @@ class ProactiveNotificationAgent(MarketingBaseAgent):
         # Check if campaign is in draft but ready to activate
         if campaign.status == 'draft':
             # Check if campaign has required setup
-            has_leads = campaign.leads.count() > 0
+            has_leads = snapshot.leads_count > 0
             has_dates = campaign.start_date is not None
             
             if has_leads and has_dates:
                 notification = self._create_notification(
                     user=user,
+                    snapshot=snapshot,
                     campaign=campaign,
                     notification_type='campaign_status',
                     priority='medium',
                     title=f'🚀 Activate Campaign: {campaign.name}',
-                    message=f'Your campaign "{campaign.name}" is ready to activate! It has {campaign.leads.count()} leads and dates configured. Click to activate and start sending emails.',
+                    message=f'Your campaign "{campaign.name}" is ready to activate! It has {snapshot.leads_count} leads and dates configured. Click to activate and start sending emails.',
                     action_required=True,
                     action_url=f'/marketing/dashboard/campaign/{campaign.id}/edit/',
                     metadata={
                         'action': 'activate_campaign',
-                        'leads_count': campaign.leads.count(),
+                        'leads_count': snapshot.leads_count,
                         'has_dates': has_dates
                     }
                 )
@@ -910,6 +1087,7 @@ class ProactiveNotificationAgent(MarketingBaseAgent):
             if campaign.start_date < timezone.now().date():
                 notification = self._create_notification(
                     user=user,
+                    snapshot=snapshot,
                     campaign=campaign,
                     notification_type='campaign_status',
                     priority='high',
@@ -930,20 +1108,20 @@ class ProactiveNotificationAgent(MarketingBaseAgent):
                     })
         
         # Check if campaign has no email sequences
-        sequences = EmailSequence.objects.filter(campaign=campaign)
-        if sequences.count() == 0 and campaign.status in ['active', 'scheduled']:
+        if snapshot.sequences_count == 0 and campaign.status in ['active', 'scheduled']:
             notification = self._create_notification(
                 user=user,
+                snapshot=snapshot,
                 campaign=campaign,
                 notification_type='campaign_status',
                 priority='high',
                 title=f'📧 Create Email Sequences: {campaign.name}',
-                message=f'Campaign "{campaign.name}" has no email sequences set up! Create follow-up email sequences to engage with your {campaign.leads.count()} leads. Click to create sequences.',
+                message=f'Campaign "{campaign.name}" has no email sequences set up! Create follow-up email sequences to engage with your {snapshot.leads_count} leads. Click to create sequences.',
                 action_required=True,
                 action_url=f'/marketing/dashboard/campaign/{campaign.id}/sequences/',
                 metadata={
                     'action': 'create_email_sequences',
-                    'leads_count': campaign.leads.count(),
+                    'leads_count': snapshot.leads_count,
                     'sequences_count': 0
                 }
             )
@@ -951,19 +1129,19 @@ class ProactiveNotificationAgent(MarketingBaseAgent):
                 notifications.append(notification)
                 issues.append({
                     'type': 'no_email_sequences',
-                    'leads_count': campaign.leads.count()
+                    'leads_count': snapshot.leads_count
                 })
         
         # Check ACTIVE campaigns - comprehensive analysis
         if campaign.status == 'active':
-            leads_count = campaign.leads.count()
-            sequences = EmailSequence.objects.filter(campaign=campaign)
-            emails_sent = EmailSendHistory.objects.filter(campaign=campaign).count()
+            leads_count = snapshot.leads_count
+            emails_sent = snapshot.sends_total
             
             # Active campaign with no leads
             if leads_count == 0:
                 notification = self._create_notification(
                     user=user,
+                    snapshot=snapshot,
                     campaign=campaign,
                     notification_type='campaign_status',
                     priority='high',
@@ -982,9 +1160,10 @@ class ProactiveNotificationAgent(MarketingBaseAgent):
                     issues.append({'type': 'active_no_leads'})
             
             # Active campaign with leads but no sequences
-            elif leads_count > 0 and sequences.count() == 0:
+            elif leads_count > 0 and snapshot.sequences_count == 0:
                 notification = self._create_notification(
                     user=user,
+                    snapshot=snapshot,
                     campaign=campaign,
                     notification_type='campaign_status',
                     priority='high',
@@ -1003,20 +1182,21 @@ class ProactiveNotificationAgent(MarketingBaseAgent):
                     issues.append({'type': 'active_no_sequences'})
             
             # Active campaign with leads and sequences but no emails sent
-            elif leads_count > 0 and sequences.count() > 0 and emails_sent == 0:
+            elif leads_count > 0 and snapshot.sequences_count > 0 and emails_sent == 0:
                 notification = self._create_notification(
                     user=user,
+                    snapshot=snapshot,
                     campaign=campaign,
                     notification_type='campaign_status',
                     priority='high',
                     title=f'📬 Start Sending Emails: {campaign.name}',
-                    message=f'Campaign "{campaign.name}" is active with {leads_count} leads and {sequences.count()} sequence(s) but no emails have been sent yet! Trigger email sequences to start engaging with your leads.',
+                    message=f'Campaign "{campaign.name}" is active with {leads_count} leads and {snapshot.sequences_count} sequence(s) but no emails have been sent yet! Trigger email sequences to start engaging with your leads.',
                     action_required=True,
                     action_url=f'/marketing/dashboard/campaign/{campaign.id}/',
                     metadata={
                         'action': 'start_sending_emails',
                         'leads_count': leads_count,
-                        'sequences_count': sequences.count(),
+                        'sequences_count': snapshot.sequences_count,
                         'emails_sent': 0
                     }
                 )
@@ -1030,13 +1210,13 @@ class ProactiveNotificationAgent(MarketingBaseAgent):
             # Active campaign with low lead count (needs more leads)
             elif leads_count > 0 and leads_count < 10 and emails_sent > 0:
                 # Check if campaign is performing well but needs more leads
-                email_sends = EmailSendHistory.objects.filter(campaign=campaign)
-                emails_opened = email_sends.filter(status__in=['opened', 'clicked']).count()
+                emails_opened = snapshot.sends_opened
                 open_rate = (emails_opened / emails_sent * 100) if emails_sent > 0 else 0
                 
                 if open_rate >= 20:  # Good engagement, can scale
                     notification = self._create_notification(
                         user=user,
+                        snapshot=snapshot,
                         campaign=campaign,
                         notification_type='opportunity',
                         priority='medium',
@@ -1066,14 +1246,14 @@ class ProactiveNotificationAgent(MarketingBaseAgent):
             }
         return None
     
-    def _check_actionable_recommendations(self, campaign: Campaign, user: User) -> Optional[Dict]:
+    def _check_actionable_recommendations(self, campaign: Campaign, user: User,
+                                          snapshot: CampaignSnapshot) -> Optional[Dict]:
         """Check for actionable recommendations to improve campaign"""
         notifications = []
         opportunities = []
         
         # Get email statistics
-        email_sends = EmailSendHistory.objects.filter(campaign=campaign)
-        total_sent = email_sends.count()
+        total_sent = snapshot.sends_total
         
         # For active campaigns, check even if no emails sent yet
         if total_sent == 0:
@@ -1081,12 +1261,12 @@ class ProactiveNotificationAgent(MarketingBaseAgent):
             if campaign.status != 'active':
                 return None
             # For active campaigns with no emails, provide setup recommendations
-            leads_count = campaign.leads.count()
-            sequences = EmailSequence.objects.filter(campaign=campaign)
+            leads_count = snapshot.leads_count
             
             if leads_count == 0:
                 notification = self._create_notification(
                     user=user,
+                    snapshot=snapshot,
                     campaign=campaign,
                     notification_type='engagement',
                     priority='high',
@@ -1097,7 +1277,7 @@ class ProactiveNotificationAgent(MarketingBaseAgent):
                     metadata={
                         'action': 'add_leads_to_active',
                         'leads_count': 0,
-                        'sequences_count': sequences.count()
+                        'sequences_count': snapshot.sequences_count
                     }
                 )
                 if notification:
@@ -1106,9 +1286,10 @@ class ProactiveNotificationAgent(MarketingBaseAgent):
                         'type': 'add_leads_to_active',
                         'leads_count': 0
                     })
-            elif sequences.count() == 0:
+            elif snapshot.sequences_count == 0:
                 notification = self._create_notification(
                     user=user,
+                    snapshot=snapshot,
                     campaign=campaign,
                     notification_type='engagement',
                     priority='high',
@@ -1136,8 +1317,8 @@ class ProactiveNotificationAgent(MarketingBaseAgent):
                 }
             return None
         
-        emails_opened = email_sends.filter(status__in=['opened', 'clicked']).count()
-        emails_clicked = email_sends.filter(status='clicked').count()
+        emails_opened = snapshot.sends_opened
+        emails_clicked = snapshot.sends_clicked
         open_rate = (emails_opened / total_sent * 100) if total_sent > 0 else 0
         click_rate = (emails_clicked / total_sent * 100) if total_sent > 0 else 0
         
@@ -1145,6 +1326,7 @@ class ProactiveNotificationAgent(MarketingBaseAgent):
         if open_rate < 20 and total_sent >= 5:
             notification = self._create_notification(
                 user=user,
+                snapshot=snapshot,
                 campaign=campaign,
                 notification_type='engagement',
                 priority='medium',
@@ -1174,6 +1356,7 @@ class ProactiveNotificationAgent(MarketingBaseAgent):
         if open_rate >= 20 and click_rate < 3 and total_sent >= 5:
             notification = self._create_notification(
                 user=user,
+                snapshot=snapshot,
                 campaign=campaign,
                 notification_type='engagement',
                 priority='medium',
@@ -1202,21 +1385,17 @@ class ProactiveNotificationAgent(MarketingBaseAgent):
                 })
         
         # Check for follow-up email opportunities
-        sequences = EmailSequence.objects.filter(campaign=campaign)
-        
         # Check if campaign needs follow-up emails (leads contacted but no follow-ups)
-        if sequences.count() > 0 and total_sent > 0:
+        if snapshot.sequences_count > 0 and total_sent > 0:
             # Check if there are leads that were contacted but haven't received follow-ups
-            contacted_leads = EmailSendHistory.objects.filter(
-                campaign=campaign,
-                status__in=['delivered', 'opened', 'clicked']
-            ).values('recipient_email').distinct().count()
+            contacted_leads = snapshot.contacted_leads
             
             # Check if follow-up sequences exist but haven't been triggered
-            followup_sequences = sequences.filter(name__icontains='follow').count()
+            followup_sequences = snapshot.followup_sequences_count
             if followup_sequences == 0 and contacted_leads > 0:
                 notification = self._create_notification(
                     user=user,
+                    snapshot=snapshot,
                     campaign=campaign,
                     notification_type='engagement',
                     priority='medium',
@@ -1227,7 +1406,7 @@ class ProactiveNotificationAgent(MarketingBaseAgent):
                     metadata={
                         'action': 'create_followup_sequences',
                         'contacted_leads': contacted_leads,
-                        'current_sequences': sequences.count()
+                        'current_sequences': snapshot.sequences_count
                     }
                 )
                 if notification:
@@ -1238,20 +1417,21 @@ class ProactiveNotificationAgent(MarketingBaseAgent):
                     })
         
         # Recommendation: Add more follow-up sequences if campaign has good engagement
-        if open_rate >= 25 and sequences.count() < 3 and total_sent >= 20:
+        if open_rate >= 25 and snapshot.sequences_count < 3 and total_sent >= 20:
             notification = self._create_notification(
                 user=user,
+                snapshot=snapshot,
                 campaign=campaign,
                 notification_type='opportunity',
                 priority='low',
                 title=f'🔄 Add More Follow-up Sequences: {campaign.name}',
-                message=f'Great engagement ({open_rate:.1f}% open rate)! Consider adding more follow-up email sequences to nurture leads further. You currently have {sequences.count()} sequence(s).',
+                message=f'Great engagement ({open_rate:.1f}% open rate)! Consider adding more follow-up email sequences to nurture leads further. You currently have {snapshot.sequences_count} sequence(s).',
                 action_required=False,
                 action_url=f'/marketing/dashboard/campaign/{campaign.id}/sequences/',
                 metadata={
                     'action': 'add_followup_sequences',
                     'open_rate': open_rate,
-                    'current_sequences': sequences.count(),
+                    'current_sequences': snapshot.sequences_count,
                     'recommended_sequences': 3
                 }
             )
@@ -1264,14 +1444,12 @@ class ProactiveNotificationAgent(MarketingBaseAgent):
         
         # Recommendation: Schedule more emails if campaign is performing well
         if open_rate >= 30 and click_rate >= 5 and campaign.status == 'active':
-            recent_emails = EmailSendHistory.objects.filter(
-                campaign=campaign,
-                sent_at__gte=timezone.now() - timedelta(days=7)
-            ).count()
+            recent_emails = snapshot.sent_7d
             
             if recent_emails < 5:
                 notification = self._create_notification(
                     user=user,
+                    snapshot=snapshot,
                     campaign=campaign,
                     notification_type='opportunity',
                     priority='low',
@@ -1301,34 +1479,29 @@ class ProactiveNotificationAgent(MarketingBaseAgent):
             }
         return None
     
-    def _check_all_reply_types(self, campaign: Campaign, user: User) -> Optional[Dict]:
+    def _check_all_reply_types(self, campaign: Campaign, user: User,
+                               snapshot: CampaignSnapshot) -> Optional[Dict]:
         """Check for ALL types of replies (positive, negative, neutral, objections, unsubscribe)"""
         notifications = []
         opportunities = []
         issues = []
         
-        # Get recent replies (last 7 days)
-        recent_cutoff = timezone.now() - timedelta(days=7)
-        recent_replies = Reply.objects.filter(
-            campaign=campaign,
-            replied_at__gte=recent_cutoff
-        )
-        
-        if recent_replies.exists():
+        # Recent replies (last 7 days) by interest level
+        if snapshot.recent_replies:
             # Positive replies
-            positive_replies = recent_replies.filter(interest_level='positive')
-            if positive_replies.exists():
-                reply_count = positive_replies.count()
-                latest_reply = positive_replies.first()
-                unique_leads = positive_replies.values('lead__email').distinct().count()
+            if snapshot.recent_reply_count('positive'):
+                reply_count = snapshot.recent_reply_count('positive')
+                latest_reply = snapshot.latest_positive_reply
+                unique_leads = snapshot.recent_replies['positive']['leads']
                 
                 notification = self._create_notification(
                     user=user,
+                    snapshot=snapshot,
                     campaign=campaign,
                     notification_type='opportunity',
                     priority='medium',
                     title=f'🎉 Positive Replies: {campaign.name}',
-                    message=f'Campaign "{campaign.name}" received {reply_count} positive reply/replies from {unique_leads} lead(s) in the last 7 days! Latest from {latest_reply.lead.email}. Follow up to convert them.',
+                    message=f'Campaign "{campaign.name}" received {reply_count} positive reply/replies from {unique_leads} lead(s) in the last 7 days! Latest from {latest_reply['lead__email']}. Follow up to convert them.',
                     action_required=True,
                     action_url=f'/marketing/dashboard/campaign/{campaign.id}/',
                     metadata={'action': 'positive_replies', 'count': reply_count, 'unique_leads': unique_leads}
@@ -1338,11 +1511,11 @@ class ProactiveNotificationAgent(MarketingBaseAgent):
                     opportunities.append({'type': 'positive_replies', 'count': reply_count})
             
             # Negative replies (not interested)
-            negative_replies = recent_replies.filter(interest_level='negative')
-            if negative_replies.exists():
-                reply_count = negative_replies.count()
+            if snapshot.recent_reply_count('negative'):
+                reply_count = snapshot.recent_reply_count('negative')
                 notification = self._create_notification(
                     user=user,
+                    snapshot=snapshot,
                     campaign=campaign,
                     notification_type='engagement',
                     priority='low',
@@ -1357,11 +1530,11 @@ class ProactiveNotificationAgent(MarketingBaseAgent):
                     issues.append({'type': 'negative_replies', 'count': reply_count})
             
             # Objections/Concerns
-            objection_replies = recent_replies.filter(interest_level='objection')
-            if objection_replies.exists():
-                reply_count = objection_replies.count()
+            if snapshot.recent_reply_count('objection'):
+                reply_count = snapshot.recent_reply_count('objection')
                 notification = self._create_notification(
                     user=user,
+                    snapshot=snapshot,
                     campaign=campaign,
                     notification_type='engagement',
                     priority='medium',
@@ -1376,11 +1549,11 @@ class ProactiveNotificationAgent(MarketingBaseAgent):
                     issues.append({'type': 'objections', 'count': reply_count})
             
             # Unsubscribe requests
-            unsubscribe_replies = recent_replies.filter(interest_level='unsubscribe')
-            if unsubscribe_replies.exists():
-                reply_count = unsubscribe_replies.count()
+            if snapshot.recent_reply_count('unsubscribe'):
+                reply_count = snapshot.recent_reply_count('unsubscribe')
                 notification = self._create_notification(
                     user=user,
+                    snapshot=snapshot,
                     campaign=campaign,
                     notification_type='engagement',
                     priority='high',
@@ -1395,11 +1568,11 @@ class ProactiveNotificationAgent(MarketingBaseAgent):
                     issues.append({'type': 'unsubscribes', 'count': reply_count})
             
             # Information requests
-            info_requests = recent_replies.filter(interest_level='requested_info')
-            if info_requests.exists():
-                reply_count = info_requests.count()
+            if snapshot.recent_reply_count('requested_info'):
+                reply_count = snapshot.recent_reply_count('requested_info')
                 notification = self._create_notification(
                     user=user,
+                    snapshot=snapshot,
                     campaign=campaign,
                     notification_type='opportunity',
                     priority='medium',
@@ -1414,11 +1587,11 @@ class ProactiveNotificationAgent(MarketingBaseAgent):
                     opportunities.append({'type': 'info_requests', 'count': reply_count})
             
             # Neutral replies
-            neutral_replies = recent_replies.filter(interest_level='neutral')
-            if neutral_replies.exists() and neutral_replies.count() >= 5:
-                reply_count = neutral_replies.count()
+            if snapshot.recent_reply_count('neutral') >= 5:
+                reply_count = snapshot.recent_reply_count('neutral')
                 notification = self._create_notification(
                     user=user,
+                    snapshot=snapshot,
                     campaign=campaign,
                     notification_type='engagement',
                     priority='low',
@@ -1439,22 +1612,22 @@ class ProactiveNotificationAgent(MarketingBaseAgent):
             }
         return None
     
-    def _check_active_campaign_engagement(self, campaign: Campaign, user: User) -> Optional[Dict]:
+    def _check_active_campaign_engagement(self, campaign: Campaign, user: User,
+                                          snapshot: CampaignSnapshot) -> Optional[Dict]:
         """Check open/click rates and engagement metrics for ALL campaigns (active, scheduled, paused)"""
         notifications = []
         opportunities = []
         issues = []
         
         # Get email statistics
-        email_sends = EmailSendHistory.objects.filter(campaign=campaign)
-        total_sent = email_sends.count()
+        total_sent = snapshot.sends_total
         
         if total_sent == 0:
             return None
         
-        emails_opened = email_sends.filter(status__in=['opened', 'clicked']).count()
-        emails_clicked = email_sends.filter(status='clicked').count()
-        emails_delivered = email_sends.filter(status__in=['delivered', 'opened', 'clicked']).count()
+        emails_opened = snapshot.sends_opened
+        emails_clicked = snapshot.sends_clicked
+        emails_delivered = snapshot.sends_delivered
         
         open_rate = (emails_opened / total_sent * 100) if total_sent > 0 else 0
         click_rate = (emails_clicked / total_sent * 100) if total_sent > 0 else 0
@@ -1462,17 +1635,14 @@ class ProactiveNotificationAgent(MarketingBaseAgent):
         
         # Check for excellent open rate (opportunity)
         if open_rate >= 30 and total_sent >= 20:
-            existing_notif = MarketingNotification.objects.filter(
-                user=user,
-                campaign=campaign,
-                notification_type='opportunity',
-                title__icontains='Excellent Open Rate',
-                created_at__gte=timezone.now() - timedelta(days=3)
-            ).exists()
+            existing_notif = snapshot.has_notification(
+                'opportunity', 'Excellent Open Rate', since=snapshot.now - timedelta(days=3)
+            )
             
             if not existing_notif:
                 notification = self._create_notification(
                     user=user,
+                    snapshot=snapshot,
                     campaign=campaign,
                     notification_type='opportunity',
                     priority='low',
@@ -1488,17 +1658,14 @@ class ProactiveNotificationAgent(MarketingBaseAgent):
         
         # Check for good click rate (opportunity)
         if click_rate >= 5 and total_sent >= 20:
-            existing_notif = MarketingNotification.objects.filter(
-                user=user,
-                campaign=campaign,
-                notification_type='opportunity',
-                title__icontains='Good Click Rate',
-                created_at__gte=timezone.now() - timedelta(days=3)
-            ).exists()
+            existing_notif = snapshot.has_notification(
+                'opportunity', 'Good Click Rate', since=snapshot.now - timedelta(days=3)
+            )
             
             if not existing_notif:
                 notification = self._create_notification(
                     user=user,
+                    snapshot=snapshot,
                     campaign=campaign,
                     notification_type='opportunity',
                     priority='low',
@@ -1514,17 +1681,14 @@ class ProactiveNotificationAgent(MarketingBaseAgent):
         
         # Check for low open rate (issue)
         if open_rate < 15 and total_sent >= 10:
-            existing_notif = MarketingNotification.objects.filter(
-                user=user,
-                campaign=campaign,
-                notification_type='performance_alert',
-                title__icontains='Low Open Rate',
-                created_at__gte=timezone.now() - timedelta(days=2)
-            ).exists()
+            existing_notif = snapshot.has_notification(
+                'performance_alert', 'Low Open Rate', since=snapshot.now - timedelta(days=2)
+            )
             
             if not existing_notif:
                 notification = self._create_notification(
                     user=user,
+                    snapshot=snapshot,
                     campaign=campaign,
                     notification_type='performance_alert',
                     priority='high',
@@ -1540,17 +1704,14 @@ class ProactiveNotificationAgent(MarketingBaseAgent):
         
         # Check for low click rate (issue)
         if open_rate >= 20 and click_rate < 2 and total_sent >= 15:
-            existing_notif = MarketingNotification.objects.filter(
-                user=user,
-                campaign=campaign,
-                notification_type='performance_alert',
-                title__icontains='Low Click Rate',
-                created_at__gte=timezone.now() - timedelta(days=2)
-            ).exists()
+            existing_notif = snapshot.has_notification(
+                'performance_alert', 'Low Click Rate', since=snapshot.now - timedelta(days=2)
+            )
             
             if not existing_notif:
                 notification = self._create_notification(
                     user=user,
+                    snapshot=snapshot,
                     campaign=campaign,
                     notification_type='performance_alert',
                     priority='medium',
@@ -1572,20 +1733,20 @@ class ProactiveNotificationAgent(MarketingBaseAgent):
             }
         return None
     
-    def _check_active_campaign_sequences(self, campaign: Campaign, user: User) -> Optional[Dict]:
+    def _check_active_campaign_sequences(self, campaign: Campaign, user: User,
+                                         snapshot: CampaignSnapshot) -> Optional[Dict]:
         """Check sequence status and email sending for ALL campaigns (active, scheduled, paused, draft)"""
         notifications = []
         issues = []
         
         # Check if campaign has sequences
-        sequences = EmailSequence.objects.filter(campaign=campaign)
-        sequences_count = sequences.count()
-        active_sequences = sequences.filter(is_active=True).count()
+        sequences_count = snapshot.sequences_count
+        active_sequences = snapshot.active_sequences_count
         
         # No sequences at all - use actual campaign status and actionable copy
         if sequences_count == 0:
             status_label = campaign.get_status_display()
-            leads_count = campaign.leads.count()
+            leads_count = snapshot.leads_count
             if campaign.status == 'draft':
                 if leads_count == 0:
                     title = f'📧 Setup draft campaign: {campaign.name}'
@@ -1617,6 +1778,7 @@ class ProactiveNotificationAgent(MarketingBaseAgent):
                     action_url = f'/marketing/dashboard/campaign/{campaign.id}/sequences/'
             notification = self._create_notification(
                 user=user,
+                snapshot=snapshot,
                 campaign=campaign,
                 notification_type='campaign_status',
                 priority='high',
@@ -1635,6 +1797,7 @@ class ProactiveNotificationAgent(MarketingBaseAgent):
             status_text = campaign.get_status_display()
             notification = self._create_notification(
                 user=user,
+                snapshot=snapshot,
                 campaign=campaign,
                 notification_type='campaign_status',
                 priority='high',
@@ -1649,20 +1812,18 @@ class ProactiveNotificationAgent(MarketingBaseAgent):
                 issues.append({'type': 'no_active_sequences', 'total': sequences_count})
         
         # Check if emails are being sent
-        total_emails_sent = EmailSendHistory.objects.filter(campaign=campaign).count()
-        recent_emails = EmailSendHistory.objects.filter(
-            campaign=campaign,
-            sent_at__gte=timezone.now() - timedelta(days=7)
-        ).count()
+        total_emails_sent = snapshot.sends_total
+        recent_emails = snapshot.sent_7d
         
         # Has active sequences but no emails sent (only for active/scheduled campaigns)
         if active_sequences > 0 and total_emails_sent == 0 and campaign.status in ['active', 'scheduled']:
             # Check if campaign has leads
-            leads_count = campaign.leads.count()
+            leads_count = snapshot.leads_count
             if leads_count > 0:
                 status_text = campaign.get_status_display()
                 notification = self._create_notification(
                     user=user,
+                    snapshot=snapshot,
                     campaign=campaign,
                     notification_type='campaign_status',
                     priority='high',
@@ -1682,6 +1843,7 @@ class ProactiveNotificationAgent(MarketingBaseAgent):
             status_label = campaign.get_status_display()
             notification = self._create_notification(
                 user=user,
+                snapshot=snapshot,
                 campaign=campaign,
                 notification_type='campaign_status',
                 priority='medium',
@@ -1702,41 +1864,36 @@ class ProactiveNotificationAgent(MarketingBaseAgent):
             }
         return None
     
-    def _check_positive_replies(self, campaign: Campaign, user: User) -> Optional[Dict]:
+    def _check_positive_replies(self, campaign: Campaign, user: User,
+                                snapshot: CampaignSnapshot) -> Optional[Dict]:
         """Check for positive replies from leads and notify about them"""
         notifications = []
         opportunities = []
         
-        # Get recent positive replies (last 7 days)
-        recent_cutoff = timezone.now() - timedelta(days=7)
-        positive_replies = Reply.objects.filter(
-            campaign=campaign,
-            interest_level='positive',
-            replied_at__gte=recent_cutoff
-        ).order_by('-replied_at')
-        
-        if positive_replies.exists():
-            reply_count = positive_replies.count()
-            latest_reply = positive_replies.first()
+        # Recent positive replies (last 7 days)
+        if snapshot.recent_reply_count('positive'):
+            reply_count = snapshot.recent_reply_count('positive')
+            latest_reply = snapshot.latest_positive_reply
             
-            # Get unique leads who replied positively
-            unique_leads = positive_replies.values('lead__email').distinct().count()
+            # Unique leads who replied positively
+            unique_leads = snapshot.recent_replies['positive']['leads']
             
             notification = self._create_notification(
                 user=user,
+                snapshot=snapshot,
                 campaign=campaign,
                 notification_type='opportunity',
                 priority='medium',
                 title=f'🎉 Positive Replies Received: {campaign.name}',
-                message=f'Great news! Campaign "{campaign.name}" received {reply_count} positive reply/replies from {unique_leads} lead(s) in the last 7 days! Latest reply from {latest_reply.lead.email}. Follow up with these interested leads to convert them.',
+                message=f'Great news! Campaign "{campaign.name}" received {reply_count} positive reply/replies from {unique_leads} lead(s) in the last 7 days! Latest reply from {latest_reply['lead__email']}. Follow up with these interested leads to convert them.',
                 action_required=True,
                 action_url=f'/marketing/dashboard/campaign/{campaign.id}/',
                 metadata={
                     'action': 'positive_replies_received',
                     'reply_count': reply_count,
                     'unique_leads': unique_leads,
-                    'latest_reply_date': latest_reply.replied_at.isoformat() if latest_reply.replied_at else None,
-                    'latest_reply_from': latest_reply.lead.email
+                    'latest_reply_date': latest_reply['replied_at'].isoformat() if latest_reply['replied_at'] else None,
+                    'latest_reply_from': latest_reply['lead__email']
                 }
             )
             if notification:
@@ -1748,15 +1905,12 @@ class ProactiveNotificationAgent(MarketingBaseAgent):
                 })
         
         # Check for replies requesting more information (also positive signal)
-        info_requests = Reply.objects.filter(
-            campaign=campaign,
-            interest_level='requested_info',
-            replied_at__gte=recent_cutoff
-        ).count()
+        info_requests = snapshot.recent_reply_count('requested_info')
         
         if info_requests > 0:
             notification = self._create_notification(
                 user=user,
+                snapshot=snapshot,
                 campaign=campaign,
                 notification_type='opportunity',
                 priority='medium',
@@ -1783,26 +1937,18 @@ class ProactiveNotificationAgent(MarketingBaseAgent):
             }
         return None
     
-    def _check_campaign_progress(self, campaign: Campaign, user: User) -> Optional[Dict]:
+    def _check_campaign_progress(self, campaign: Campaign, user: User,
+                                 snapshot: CampaignSnapshot) -> Optional[Dict]:
         """Check campaign progress and provide regular updates for active campaigns"""
         notifications = []
         opportunities = []
         
         # Get campaign statistics
-        total_emails_sent = EmailSendHistory.objects.filter(campaign=campaign).count()
-        emails_opened = EmailSendHistory.objects.filter(
-            campaign=campaign,
-            status__in=['opened', 'clicked']
-        ).count()
-        emails_clicked = EmailSendHistory.objects.filter(
-            campaign=campaign,
-            status='clicked'
-        ).count()
-        total_replies = Reply.objects.filter(campaign=campaign).count()
-        positive_replies = Reply.objects.filter(
-            campaign=campaign,
-            interest_level='positive'
-        ).count()
+        total_emails_sent = snapshot.sends_total
+        emails_opened = snapshot.sends_opened
+        emails_clicked = snapshot.sends_clicked
+        total_replies = snapshot.replies_total
+        positive_replies = snapshot.replies_by_level.get('positive', 0)
         
         # Calculate rates
         open_rate = (emails_opened / total_emails_sent * 100) if total_emails_sent > 0 else 0
@@ -1818,43 +1964,26 @@ class ProactiveNotificationAgent(MarketingBaseAgent):
             days_running = (timezone.now().date() - campaign.start_date).days
         else:
             # Use first email sent date as proxy
-            first_email = EmailSendHistory.objects.filter(campaign=campaign).order_by('sent_at').first()
-            if first_email and first_email.sent_at:
-                days_running = (timezone.now().date() - first_email.sent_at.date()).days
+            if snapshot.first_sent_at:
+                days_running = (timezone.now().date() - snapshot.first_sent_at.date()).days
             else:
                 days_running = 0
         
         # Weekly progress update (every 7 days)
         if days_running > 0 and days_running % 7 == 0:
             # Check if we already sent a weekly update today (avoid duplicates)
-            today = timezone.now().date()
-            existing_update = MarketingNotification.objects.filter(
-                user=user,
-                campaign=campaign,
-                notification_type='milestone',
-                title__icontains='Weekly Progress',
-                created_at__date=today
-            ).exists()
+            start_of_today = timezone.localtime(snapshot.now).replace(hour=0, minute=0, second=0, microsecond=0)
+            existing_update = snapshot.has_notification('milestone', 'Weekly Progress', since=start_of_today)
             
             if not existing_update:
                 # Calculate weekly stats (last 7 days)
-                week_cutoff = timezone.now() - timedelta(days=7)
-                weekly_sent = EmailSendHistory.objects.filter(
-                    campaign=campaign,
-                    sent_at__gte=week_cutoff
-                ).count()
-                weekly_opened = EmailSendHistory.objects.filter(
-                    campaign=campaign,
-                    status__in=['opened', 'clicked'],
-                    sent_at__gte=week_cutoff
-                ).count()
-                weekly_replies = Reply.objects.filter(
-                    campaign=campaign,
-                    replied_at__gte=week_cutoff
-                ).count()
+                weekly_sent = snapshot.sent_7d
+                weekly_opened = snapshot.opened_7d
+                weekly_replies = snapshot.replies_7d
                 
                 notification = self._create_notification(
                     user=user,
+                    snapshot=snapshot,
                     campaign=campaign,
                     notification_type='milestone',
                     priority='low',
@@ -1882,17 +2011,14 @@ class ProactiveNotificationAgent(MarketingBaseAgent):
         
         # Milestone: First 100 emails sent
         if total_emails_sent >= 100 and total_emails_sent < 110:
-            existing_milestone = MarketingNotification.objects.filter(
-                user=user,
-                campaign=campaign,
-                notification_type='milestone',
-                title__icontains='100 emails',
-                created_at__gte=timezone.now() - timedelta(days=1)
-            ).exists()
+            existing_milestone = snapshot.has_notification(
+                'milestone', '100 emails', since=snapshot.now - timedelta(days=1)
+            )
             
             if not existing_milestone:
                 notification = self._create_notification(
                     user=user,
+                    snapshot=snapshot,
                     campaign=campaign,
                     notification_type='milestone',
                     priority='low',
@@ -1916,17 +2042,14 @@ class ProactiveNotificationAgent(MarketingBaseAgent):
         
         # Good performance opportunity: High engagement
         if open_rate >= 25 and click_rate >= 3 and total_emails_sent >= 20:
-            existing_opportunity = MarketingNotification.objects.filter(
-                user=user,
-                campaign=campaign,
-                notification_type='opportunity',
-                title__icontains='High Performance',
-                created_at__gte=timezone.now() - timedelta(days=3)
-            ).exists()
+            existing_opportunity = snapshot.has_notification(
+                'opportunity', 'High Performance', since=snapshot.now - timedelta(days=3)
+            )
             
             if not existing_opportunity:
                 notification = self._create_notification(
                     user=user,
+                    snapshot=snapshot,
                     campaign=campaign,
                     notification_type='opportunity',
                     priority='low',
@@ -1956,23 +2079,17 @@ class ProactiveNotificationAgent(MarketingBaseAgent):
             }
         return None
     
-    def _check_recent_activity_summary(self, campaign: Campaign, user: User) -> Optional[Dict]:
+    def _check_recent_activity_summary(self, campaign: Campaign, user: User,
+                                       snapshot: CampaignSnapshot) -> Optional[Dict]:
         """Create one notification per campaign: recent stats plus issues, opportunities, and improvement suggestions."""
         notifications = []
         opportunities = []
-        recent_cutoff = timezone.now() - timedelta(days=7)
-        email_sends = EmailSendHistory.objects.filter(campaign=campaign, sent_at__gte=recent_cutoff)
-        total_sent = email_sends.count()
-        if total_sent == 0:
-            replies_recent = Reply.objects.filter(campaign=campaign, replied_at__gte=recent_cutoff)
-            if not replies_recent.exists():
-                return None
-        emails_opened = email_sends.filter(status__in=['opened', 'clicked']).count()
-        emails_clicked = email_sends.filter(status='clicked').count()
-        replies_recent = Reply.objects.filter(campaign=campaign, replied_at__gte=recent_cutoff)
-        reply_count = replies_recent.count()
-        positive_count = replies_recent.filter(interest_level='positive').count()
-        negative_count = replies_recent.filter(interest_level='negative').count()
+        total_sent = snapshot.sent_7d
+        emails_opened = snapshot.opened_7d
+        emails_clicked = snapshot.clicked_7d
+        reply_count = snapshot.replies_7d
+        positive_count = snapshot.recent_reply_count('positive')
+        negative_count = snapshot.recent_reply_count('negative')
         if total_sent == 0 and reply_count == 0:
             return None
         # Build stats line
@@ -2003,6 +2120,7 @@ class ProactiveNotificationAgent(MarketingBaseAgent):
             message += ' ' + ' '.join(improvements)
         notification = self._create_notification(
             user=user,
+            snapshot=snapshot,
             campaign=campaign,
             notification_type='engagement',
             priority='medium',
@@ -2027,19 +2145,20 @@ class ProactiveNotificationAgent(MarketingBaseAgent):
             return {'notifications': notifications, 'opportunities': opportunities}
         return None
     
-    def _check_first_milestones(self, campaign: Campaign, user: User) -> Optional[Dict]:
+    def _check_first_milestones(self, campaign: Campaign, user: User,
+                                snapshot: CampaignSnapshot) -> Optional[Dict]:
         """Notify on first open and first click (low threshold so new campaigns get feedback)."""
         notifications = []
         opportunities = []
-        email_sends = EmailSendHistory.objects.filter(campaign=campaign)
-        total_sent = email_sends.count()
+        total_sent = snapshot.sends_total
         if total_sent < 1:
             return None
-        emails_opened = email_sends.filter(status__in=['opened', 'clicked']).count()
-        emails_clicked = email_sends.filter(status='clicked').count()
+        emails_opened = snapshot.sends_opened
+        emails_clicked = snapshot.sends_clicked
         if emails_opened >= 1:
             n = self._create_notification(
                 user=user,
+                snapshot=snapshot,
                 campaign=campaign,
                 notification_type='engagement',
                 priority='low',
@@ -2055,6 +2174,7 @@ class ProactiveNotificationAgent(MarketingBaseAgent):
         if emails_clicked >= 1:
             n = self._create_notification(
                 user=user,
+                snapshot=snapshot,
                 campaign=campaign,
                 notification_type='engagement',
                 priority='low',
@@ -2071,25 +2191,20 @@ class ProactiveNotificationAgent(MarketingBaseAgent):
             return {'notifications': notifications, 'opportunities': opportunities}
         return None
     
-    def _check_sub_sequence_triggered(self, campaign: Campaign, user: User) -> Optional[Dict]:
+    def _check_sub_sequence_triggered(self, campaign: Campaign, user: User,
+                                      snapshot: CampaignSnapshot) -> Optional[Dict]:
         """Notify when a reply triggered a sub-sequence (follow-up sequence)."""
         notifications = []
         opportunities = []
-        recent_cutoff = timezone.now() - timedelta(days=7)
-        triggered = Reply.objects.filter(
-            campaign=campaign,
-            sub_sequence__isnull=False,
-            replied_at__gte=recent_cutoff
-        )
-        if not triggered.exists():
+        count = snapshot.sub_sequence_triggers
+        if not count:
             return None
-        count = triggered.count()
-        unique_leads = triggered.values('lead__email').distinct().count()
-        sub_names = list(triggered.values_list('sub_sequence__name', flat=True).distinct())
-        sub_names = [n for n in sub_names if n]
+        unique_leads = snapshot.sub_sequence_trigger_leads
+        sub_names = snapshot.sub_sequence_trigger_names
         sub_label = sub_names[0] if len(sub_names) == 1 else f'{len(sub_names)} sub-sequences'
         notification = self._create_notification(
             user=user,
+            snapshot=snapshot,
             campaign=campaign,
             notification_type='engagement',
             priority='medium',
@@ -2110,26 +2225,30 @@ class ProactiveNotificationAgent(MarketingBaseAgent):
                            notification_type: str, priority: str, title: str,
                            message: str, action_required: bool = False,
                            action_url: Optional[str] = None,
-                           metadata: Optional[Dict] = None) -> Optional[MarketingNotification]:
+                           metadata: Optional[Dict] = None,
+                           snapshot: Optional[CampaignSnapshot] = None) -> Optional[MarketingNotification]:
         """
         Create a notification in the database
-        Prevents duplicates by checking if a similar notification was created recently (last 24 hours)
+        Prevents duplicates by checking if a similar notification was created recently (last 24 hours).
+        With a snapshot the check runs against its preloaded notifications instead of the database.
         """
-        from datetime import timedelta
-        
-        # Check for duplicate notification in last 24 hours
-        recent_cutoff = timezone.now() - timedelta(hours=24)
-        duplicate = MarketingNotification.objects.filter(
-            user=user,
-            campaign=campaign,
-            notification_type=notification_type,
-            title=title,
-            created_at__gte=recent_cutoff
-        ).first()
-        
-        # If duplicate exists and is unread, don't create a new one
-        if duplicate and not duplicate.is_read:
-            return None  # Return None to indicate no new notification was created
+        if snapshot is not None:
+            if snapshot.has_unread_duplicate(notification_type, title):
+                return None
+        else:
+            # Check for duplicate notification in last 24 hours
+            recent_cutoff = timezone.now() - timedelta(hours=24)
+            duplicate = MarketingNotification.objects.filter(
+                user=user,
+                campaign=campaign,
+                notification_type=notification_type,
+                title=title,
+                created_at__gte=recent_cutoff
+            ).first()
+            
+            # If duplicate exists and is unread, don't create a new one
+            if duplicate and not duplicate.is_read:
+                return None  # Return None to indicate no new notification was created
         
         # Create new notification (stays unread until user marks as read)
         notification = MarketingNotification.objects.create(
@@ -2143,6 +2262,8 @@ class ProactiveNotificationAgent(MarketingBaseAgent):
             action_url=action_url or '',
             metadata=metadata or {}
         )
+        if snapshot is not None:
+            snapshot.remember(notification)
         return notification
     
     def get_notifications(self, user_id: int, unread_only: bool = False,
@@ -0,0 +1,310 @@
+"""
+Incrementally maintained campaign metrics (CampaignMetricRollup).
+
+Write side:
+- record_send_changes / record_reply_changes apply the difference between a
+  row's old and new state as F() increments on the (campaign, day, sequence)
+  buckets it moves between. signals.py calls them on save/delete; the
+  tracking-event batcher calls record_send_changes for its bulk UPDATEs.
+- reconcile_campaign recomputes one campaign's rows from EmailSendHistory and
+  Reply and replaces them. reconcile_campaign_rollups_task runs it daily to
+  repair drift from .update() writers and lost races.
+
+Read side: campaign_totals, daily_totals and sequence_totals sum rollup rows,
+so analytics cost O(days x sequences) instead of O(emails).
+"""
+from collections import Counter, defaultdict
+from datetime import timedelta
+import logging
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+
+from marketing_agent.models import (
+    CampaignMetricRollup, EmailSendHistory, EmailSequenceStep, Reply,
+)
+
+logger = logging.getLogger(__name__)
+
+# rollup counter -> EmailSendHistory statuses it counts (same sets the
+# dashboard filters on).
+SEND_COUNTERS = {
+    'sent': ('sent', 'delivered', 'opened', 'clicked'),
+    'opened': ('opened', 'clicked'),
+    'clicked': ('clicked',),
+    'bounced': ('bounced',),
+    'failed': ('failed',),
+}
+# Reply.interest_level -> rollup counter; anything else is not_analyzed.
+REPLY_COUNTERS = {
+    'positive': 'replies_positive',
+    'neutral': 'replies_neutral',
+    'requested_info': 'replies_requested_info',
+    'objection': 'replies_objection',
+    'negative': 'replies_negative',
+    'unsubscribe': 'replies_unsubscribe',
+}
+POSITIVE_REPLY_COUNTERS = (
+    'replies_positive', 'replies_neutral', 'replies_requested_info', 'replies_objection',
+)
+NEGATIVE_REPLY_COUNTERS = ('replies_negative', 'replies_unsubscribe')
+COUNTER_FIELDS = tuple(SEND_COUNTERS) + (
+    'replies', *REPLY_COUNTERS.values(), 'replies_not_analyzed',
+)
+
+# Fields whose change can move a row between buckets or counters.
+SEND_STATE_FIELDS = ('campaign_id', 'email_template_id', 'status', 'sent_at', 'created_at')
+REPLY_STATE_FIELDS = ('campaign_id', 'sequence_id', 'sub_sequence_id', 'interest_level', 'replied_at')
+
+
+def send_state(instance):
+    return tuple(getattr(instance, f) for f in SEND_STATE_FIELDS)
+
+
+def reply_state(instance):
+    return tuple(getattr(instance, f) for f in REPLY_STATE_FIELDS)
+
+
+def snapshot_sends(send_ids):
+    """{id: send_state} for ``send_ids`` — for writers that bypass save()."""
+    return {
+        row[0]: row[1:]
+        for row in EmailSendHistory.objects.filter(id__in=send_ids)
+        .order_by()
+        .values_list('id', *SEND_STATE_FIELDS)
+    }
+
+
+def _day(dt):
+    return timezone.localtime(dt).date() if timezone.is_aware(dt) else dt.date()
+
+
+def _template_sequences(template_ids):
+    """template id -> sequence id. A template used by several sequences is
+    attributed to the lowest sequence id so each send lands in one bucket."""
+    mapping = {}
+    if template_ids:
+        for template_id, sequence_id in (
+            EmailSequenceStep.objects.filter(template_id__in=template_ids)
+            .order_by('sequence_id')
+            .values_list('template_id', 'sequence_id')
+        ):
+            mapping.setdefault(template_id, sequence_id)
+    return mapping
+
+
+def _send_counters(state, template_sequences, sign, deltas):
+    campaign_id, template_id, status, sent_at, created_at = state
+    # Reply-agent one-off sends (no template) aren't campaign metrics.
+    if not campaign_id or not template_id:
+        return
+    when = sent_at or created_at
+    if when is None:
+        return
+    bucket = (campaign_id, _day(when), template_sequences.get(template_id))
+    for counter, statuses in SEND_COUNTERS.items():
+        if status in statuses:
+            deltas[bucket][counter] += sign
+
+
+def _reply_counters(state, sign, deltas):
+    campaign_id, sequence_id, sub_sequence_id, interest_level, replied_at = state
+    if not campaign_id or replied_at is None:
+        return
+    bucket = (campaign_id, _day(replied_at), sub_sequence_id or sequence_id)
+    deltas[bucket]['replies'] += sign
+    deltas[bucket][REPLY_COUNTERS.get(interest_level, 'replies_not_analyzed')] += sign
+
+
+def _apply(deltas):
+    now = timezone.now()
+    for (campaign_id, day, sequence_id), counters in deltas.items():
+        counters = {k: v for k, v in counters.items() if v}
+        if not counters:
+            continue
+        rows = CampaignMetricRollup.objects.filter(
+            campaign_id=campaign_id, day=day, sequence_id=sequence_id,
+        )
+        if rows.update(updated_at=now, **{k: F(k) + v for k, v in counters.items()}):
+            continue
+        positive = {k: v for k, v in counters.items() if v > 0}
+        if not positive:
+            # Decrement on a bucket that doesn't exist (e.g. the campaign's
+            # rows are being cascade-deleted) — nothing to do.
+            continue
+        try:
+            with transaction.atomic():
+                CampaignMetricRollup.objects.create(
+                    campaign_id=campaign_id, day=day, sequence_id=sequence_id, **positive,
+                )
+        except IntegrityError:
+            # Another writer created the bucket first.
+            rows.update(updated_at=now, **{k: F(k) + v for k, v in counters.items()})
+
+
+def record_send_changes(changes):
+    """Apply ``[(old_state | None, new_state | None), ...]`` for EmailSendHistory rows."""
+    changes = [(old, new) for old, new in changes if old != new]
+    if not changes:
+        return
+    template_sequences = _template_sequences({
+        state[1] for pair in changes for state in pair if state and state[1]
+    })
+    deltas = defaultdict(Counter)
+    for old, new in changes:
+        if old:
+            _send_counters(old, template_sequences, -1, deltas)
+        if new:
+            _send_counters(new, template_sequences, 1, deltas)
+    _apply(deltas)
+
+
+def record_reply_changes(changes):
+    """Apply ``[(old_state | None, new_state | None), ...]`` for Reply rows."""
+    deltas = defaultdict(Counter)
+    for old, new in changes:
+        if old == new:
+            continue
+        if old:
+            _reply_counters(old, -1, deltas)
+        if new:
+            _reply_counters(new, 1, deltas)
+    _apply(deltas)
+
+
+def reconcile_campaign(campaign_id):
+    """Rebuild a campaign's rollup rows from EmailSendHistory and Reply.
+
+    Returns True if the stored rows differed (drift was repaired).
+    """
+    truth = defaultdict(Counter)
+
+    send_rows = (
+        EmailSendHistory.objects.filter(campaign_id=campaign_id, email_template__isnull=False)
+        .annotate(day=TruncDate(Coalesce('sent_at', 'created_at')))
+        .order_by()
+        .values('day', 'email_template_id', 'status')
+        .annotate(n=Count('id'))
+    )
+    send_rows = list(send_rows)
+    template_sequences = _template_sequences({r['email_template_id'] for r in send_rows})
+    for r in send_rows:
+        bucket = (r['day'], template_sequences.get(r['email_template_id']))
+        for counter, statuses in SEND_COUNTERS.items():
+            if r['status'] in statuses:
+                truth[bucket][counter] += r['n']
+
+    for r in (
+        Reply.objects.filter(campaign_id=campaign_id)
+        .annotate(day=TruncDate('replied_at'))
+        .order_by()
+        .values('day', 'sequence_id', 'sub_sequence_id', 'interest_level')
+        .annotate(n=Count('id'))
+    ):
+        bucket = (r['day'], r['sub_sequence_id'] or r['sequence_id'])
+        truth[bucket]['replies'] += r['n']
+        truth[bucket][REPLY_COUNTERS.get(r['interest_level'], 'replies_not_analyzed')] += r['n']
+    truth = {bucket: c for bucket, c in truth.items() if any(c.values()) and bucket[0]}
+
+    stored = defaultdict(Counter)
+    for row in CampaignMetricRollup.objects.filter(campaign_id=campaign_id).values('day', 'sequence_id', *COUNTER_FIELDS):
+        bucket = (row.pop('day'), row.pop('sequence_id'))
+        stored[bucket].update(row)
+    stored = {bucket: +c for bucket, c in stored.items() if any(c.values())}
+    if stored == {bucket: +c for bucket, c in truth.items()}:
+        return False
+
+    with transaction.atomic():
+        CampaignMetricRollup.objects.filter(campaign_id=campaign_id).delete()
+        CampaignMetricRollup.objects.bulk_create(
+            [
+                CampaignMetricRollup(
+                    campaign_id=campaign_id, day=day, sequence_id=sequence_id,
+                    **{k: v for k, v in counters.items() if v},
+                )
+                for (day, sequence_id), counters in truth.items()
+            ],
+            batch_size=500,
+        )
+    return True
+
+
+def reconcile_all(campaign_ids=None):
+    """Reconcile every campaign (or ``campaign_ids``). Returns (checked, repaired)."""
+    from marketing_agent.models import Campaign
+
+    if campaign_ids is None:
+        campaign_ids = list(Campaign.objects.order_by('id').values_list('id', flat=True))
+    repaired = 0
+    for campaign_id in campaign_ids:
+        try:
+            if reconcile_campaign(campaign_id):
+                repaired += 1
+        except Exception as e:
+            logger.error("[ROLLUPS] Reconcile failed for campaign %s: %s", campaign_id, e, exc_info=True)
+    if repaired:
+        logger.warning("[ROLLUPS] Repaired drift in %d of %d campaign(s)", repaired, len(campaign_ids))
+    return len(campaign_ids), repaired
+
+
+# ---------------------------------------------------------------------------
+# Readers
+# ---------------------------------------------------------------------------
+
+def _with_derived(totals):
+    """Add positive/negative reply totals to a summed counter dict."""
+    totals = {k: (totals.get(k) or 0) for k in COUNTER_FIELDS}
+    totals['positive_replies'] = sum(totals[k] for k in POSITIVE_REPLY_COUNTERS)
+    totals['negative_replies'] = sum(totals[k] for k in NEGATIVE_REPLY_COUNTERS)
+    return totals
+
+
+def empty_totals():
+    return _with_derived({})
+
+
+_SUMS = {k: Sum(k) for k in COUNTER_FIELDS}
+
+
+def campaign_totals(campaign_ids):
+    """{campaign_id: totals} for all time; campaigns without rows get zeros."""
+    totals = {cid: empty_totals() for cid in campaign_ids}
+    if campaign_ids:
+        for row in (
+            CampaignMetricRollup.objects.filter(campaign_id__in=campaign_ids)
+            .order_by()
+            .values('campaign_id')
+            .annotate(**_SUMS)
+        ):
+            totals[row['campaign_id']] = _with_derived(row)
+    return totals
+
+
+def daily_totals(campaign_id, days=30):
+    """{date: totals} for the last ``days`` days (today included), zero-filled."""
+    today = timezone.localdate()
+    start = today - timedelta(days=days - 1)
+    series = {start + timedelta(days=i): empty_totals() for i in range(days)}
+    for row in (
+        CampaignMetricRollup.objects.filter(campaign_id=campaign_id, day__gte=start, day__lte=today)
+        .order_by()
+        .values('day')
+        .annotate(**_SUMS)
+    ):
+        series[row['day']] = _with_derived(row)
+    return series
+
+
+def sequence_totals(campaign_id):
+    """{sequence_id: totals} for a campaign; sends without a sequence are under None."""
+    return {
+        row['sequence_id']: _with_derived(row)
+        for row in (
+            CampaignMetricRollup.objects.filter(campaign_id=campaign_id)
+            .order_by()
+            .values('sequence_id')
+            .annotate(**_SUMS)
+        )
+    }
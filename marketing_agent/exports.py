@@ -0,0 +1,37 @@
+"""
+Tabular export sources for marketing campaigns (see core.tabular_export).
+
+Each function rebuilds an export from JSON-safe arguments, so the same code
+serves the streamed download and the background build.
+"""
+from core.tabular_export import TabularExport, iter_chunks
+
+LEAD_HEADER = ['Email', 'First Name', 'Last Name', 'Phone', 'Company', 'Job Title', 'Status', 'Source']
+DETAILED_LEAD_HEADER = LEAD_HEADER + ['Notes', 'Created At']
+
+
+def campaign_lead_export(campaign_id, detailed=False):
+    """A campaign's leads, newest first. ``detailed`` adds notes and the
+    creation time and shows statuses by label (the web dashboard's export)."""
+    from marketing_agent.models import Lead
+
+    qs = Lead.objects.filter(campaigns__id=campaign_id).order_by('-created_at')
+    status_labels = dict(Lead._meta.get_field('status').choices)
+
+    def rows():
+        fields = ('email', 'first_name', 'last_name', 'phone', 'company', 'job_title',
+                  'status', 'source', 'notes', 'created_at')
+        for chunk in iter_chunks(qs, fields):
+            for lead in chunk:
+                row = [
+                    lead['email'], lead['first_name'] or '', lead['last_name'] or '',
+                    lead['phone'] or '', lead['company'] or '', lead['job_title'] or '',
+                    status_labels.get(lead['status'], lead['status']) if detailed else lead['status'],
+                    lead['source'] or '',
+                ]
+                if detailed:
+                    row += [lead['notes'], lead['created_at'].strftime('%Y-%m-%d %H:%M:%S')]
+                yield row
+
+    header = DETAILED_LEAD_HEADER if detailed else LEAD_HEADER
+    return TabularExport(f'campaign_{campaign_id}_leads', header, rows())
@@ -0,0 +1,107 @@
+"""
+Benchmark per-recipient email rendering: the old parse-per-recipient path vs
+the compiled-template cache (EmailService.render_batch).
+
+Uses an existing EmailTemplate (--template-id) or a built-in sample, and
+unsaved in-memory leads, so nothing is written to the database. Every
+recipient's output is compared between the two paths; any mismatch is
+reported.
+
+Run: python manage.py benchmark_email_render [--recipients 10000] [--template-id ID]
+"""
+import time
+import uuid
+
+from django.core.management.base import BaseCommand, CommandError
+from django.template import Context, Engine
+
+from marketing_agent.models import Campaign, EmailTemplate, Lead
+from marketing_agent.services.email_rendering import apply_tracking, tracking_base_url
+from marketing_agent.services.email_service import EmailService
+
+
+SAMPLE_HTML = """<html><head><title>{{ campaign_name }}</title></head>
+<body>
+<p>Hi {{ first_name }},</p>
+<p>I noticed {{ company }} is growing fast{% if job_title %} and that you lead {{ job_title }}{% endif %}.</p>
+<p><a href="https://example.com/case-study">Read the case study</a> or
+<a href='https://example.com/pricing?ref=email'>see pricing</a>.</p>
+<p><a href="#">Learn more</a> &middot; <a href="mailto:sales@example.com">Email us</a></p>
+<p>Best,<br>The {{ campaign_name }} team</p>
+<p style="font-size:11px"><a href="https://example.com/unsubscribe">Unsubscribe</a></p>
+</body></html>"""
+
+
+class Command(BaseCommand):
+    help = 'Benchmark personalized email rendering (uncached vs compiled template cache).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recipients', type=int, default=10000, help='Number of recipients to render.')
+        parser.add_argument('--template-id', type=int, default=None, help='Use this EmailTemplate instead of the sample.')
+
+    def handle(self, *args, **options):
+        count = options['recipients']
+        template_id = options.get('template_id')
+        if template_id:
+            template = EmailTemplate.objects.select_related('campaign').filter(id=template_id).first()
+            if not template:
+                raise CommandError(f'EmailTemplate {template_id} not found.')
+            campaign = template.campaign
+        else:
+            campaign = Campaign(id=1, name='Benchmark Campaign')
+            template = EmailTemplate(
+                name='Benchmark', subject='Quick question for {{ first_name }} at {{ company }}',
+                html_content=SAMPLE_HTML, text_content='', campaign=campaign,
+            )
+
+        leads = [
+            Lead(
+                id=i + 1, email=f'person{i}@company{i % 97}.com', first_name=f'Name{i}',
+                last_name='Example', company=f'Company {i % 97}', job_title='Sales' if i % 2 else '',
+            )
+            for i in range(count)
+        ]
+        tokens = {lead.id: uuid.uuid4().hex for lead in leads}
+        service = EmailService()
+        base_url = tracking_base_url()
+        self.stdout.write(f'Rendering template "{template.name}" for {count} recipient(s)...')
+
+        # Old path: a new Engine and a parse of every part, per recipient,
+        # then the regex tracking rewrite over the rendered HTML.
+        start = time.perf_counter()
+        legacy = []
+        for lead in leads:
+            context_vars = service._get_lead_context(lead, campaign)
+
+            def render(source):
+                return Engine().from_string(source).render(Context(context_vars, autoescape=False))
+
+            subject = render(template.subject or '')
+            html_content = render(template.html_content or '')
+            text_content = render(template.text_content) if template.text_content else None
+            html_content = apply_tracking(html_content, tokens[lead.id], base_url, campaign.id)
+            legacy.append((subject, html_content, text_content))
+        legacy_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        batch = service.render_batch(template, campaign, leads, tracking_tokens=tokens)
+        batch_seconds = time.perf_counter() - start
+
+        mismatches = sum(
+            1 for old, new in zip(legacy, batch)
+            if old[0] != new['subject'] or old[1] != new['html_content']
+            or (old[2] is not None and old[2] != new['text_content'])
+        )
+
+        self.stdout.write(
+            f'  uncached: {legacy_seconds:.2f}s ({legacy_seconds / count * 1000:.3f} ms/recipient)'
+        )
+        self.stdout.write(
+            f'  compiled: {batch_seconds:.2f}s ({batch_seconds / count * 1000:.3f} ms/recipient)'
+        )
+        if batch_seconds:
+            self.stdout.write(f'  speedup:  {legacy_seconds / batch_seconds:.1f}x')
+        if mismatches:
+            self.stdout.write(self.style.ERROR(f'{mismatches} recipient(s) rendered differently.'))
+        else:
+            self.stdout.write(self.style.SUCCESS('Outputs identical for every recipient.'))
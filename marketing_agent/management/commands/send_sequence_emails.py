@@ -13,11 +13,12 @@ Usage:
 """
 
 from django.core.management.base import BaseCommand
+from django.db import transaction
 from django.utils import timezone
 from django.db.models import Q, F
 from datetime import timedelta, datetime
 from marketing_agent.models import (
-    Campaign, EmailSequence, EmailSequenceStep, EmailSendHistory,
+    Campaign, EmailSequenceStep, EmailSendHistory,
     Lead, CampaignContact, Reply, ReplySubSequenceRun
 )
 from marketing_agent.services.email_service import email_service
@@ -33,6 +34,8 @@ logger = logging.getLogger(__name__)
 # two runs process the same contact before sub_sequence_step is updated and send
 # the SAME email twice (observed: identical sends at the same timestamp). The lock
 # lets only one instance run at a time; a second instance exits immediately.
+# It only covers one host — senders on other workers are kept apart by the
+# row claims in Command._claim_due.
 _LOCK_PATH = os.path.join(tempfile.gettempdir(), 'ppp_send_sequence_emails.lock')
 # If a run crashes without releasing the lock, treat a lock older than this as
 # stale so the command can't get wedged forever.
@@ -42,6 +45,19 @@ _LOCK_STALE_SECONDS = 30 * 60
 class Command(BaseCommand):
     help = 'Automatically send email sequence emails based on delay timing and contact state'
 
+    # Most due rows (per model) claimed by one run; anything beyond stays
+    # due and is picked up by the next run, oldest first.
+    DUE_BATCH_SIZE = 500
+    # While a worker processes a claimed row its next_send_at is pushed
+    # this far out so other workers' due scans skip it. If the worker dies
+    # the row simply becomes due again when the lease runs out.
+    CLAIM_LEASE = timedelta(minutes=10)
+    # A row still due after processing (failed send) waits this long.
+    RETRY_DELAY = timedelta(minutes=5)
+    # Set on a contact/run whose send was deferred by the per-mailbox rate
+    # scheduler; _reschedule makes it due again at that time.
+    DEFERRED_ATTR = '_send_retry_at'
+
     def add_arguments(self, parser):
         parser.add_argument(
             '--dry-run',
@@ -97,109 +113,233 @@ class Command(BaseCommand):
             self._release_lock()
 
     def _run(self, dry_run):
-        campaigns = Campaign.objects.filter(status='active')
-        campaign_count = campaigns.count()
+        campaigns = list(Campaign.objects.filter(status='active'))
 
-        if campaign_count == 0:
+        if not campaigns:
             return
 
         total_sent = 0
         total_checked = 0
         total_skipped = 0
         total_stopped = 0
+        total_deferred = 0
 
         for campaign in campaigns:
             # Get active main sequences (not sub-sequences)
-            sequences = campaign.email_sequences.filter(is_active=True, is_sub_sequence=False)
-
-            # Ensure every lead has a CampaignContact per active MAIN sequence
-            leads = list(campaign.leads.all())
-            for seq in sequences:
-                for lead in leads:
-                    CampaignContact.objects.get_or_create(
-                        campaign=campaign,
-                        lead=lead,
-                        sequence=seq,
-                        defaults={'current_step': 0},
-                    )
-
-            # Clean up: delete contacts in sub-sequences that haven't replied (bug fix)
-            sub_sequences_with_contacts = EmailSequence.objects.filter(
-                campaign=campaign, is_sub_sequence=True, is_active=True
+            sequence_list = list(
+                campaign.email_sequences.filter(is_active=True, is_sub_sequence=False).prefetch_related('steps')
             )
-            for sub_seq in sub_sequences_with_contacts:
-                CampaignContact.objects.filter(
-                    campaign=campaign, sequence=sub_seq, replied=False
-                ).delete()
 
-            sequence_count = sequences.count()
-            if sequence_count == 0:
-                continue
+            # Ensure every lead has a CampaignContact per active MAIN sequence.
+            created = self._materialize_contacts(campaign, sequence_list)
+            if created:
+                self.stdout.write(self.style.SUCCESS(
+                    f'  Enrolled {created} new contact(s) in "{campaign.name}"'
+                ))
 
-            # Reactivate contacts that were marked completed but have more steps now
-            for seq in sequences:
-                total_steps = seq.steps.count()
-                reactivated = CampaignContact.objects.filter(
-                    campaign=campaign, sequence=seq,
-                    completed=True, current_step__lt=total_steps,
-                ).update(completed=False, completed_at=None)
-                if reactivated:
-                    self.stdout.write(self.style.SUCCESS(
-                        f'  Reactivated {reactivated} contact(s) for "{seq.name}" ({total_steps} steps now)'
-                    ))
-
-            # Get main sequence contacts
-            all_contacts = CampaignContact.objects.filter(
-                campaign=campaign, sequence__is_active=True,
-                sequence__isnull=False, sequence__is_sub_sequence=False
-            )
+            # Clean up: delete contacts in sub-sequences that haven't replied (bug fix)
+            CampaignContact.objects.filter(
+                campaign=campaign, replied=False,
+                sequence__is_sub_sequence=True, sequence__is_active=True,
+            ).delete()
+
+            # Contacts marked completed before new steps were added are
+            # reactivated by the EmailSequenceStep signal when the steps
+            # change (marketing_agent/signals.py), not on every run.
+
+        # Due-queue: only rows whose next_send_at has arrived are loaded.
+        # next_send_at is maintained on the rows themselves (see
+        # CampaignContact.save / ReplySubSequenceRun.save and the sequence
+        # signals), so the cost of a run scales with what is due, not with
+        # the size of every active campaign.
+        now = timezone.now()
+        due_contact_ids = self._claim_due(
+            CampaignContact,
+            CampaignContact.objects.filter(
+                campaign__status='active', completed=False, replied=False,
+                sequence__is_active=True, sequence__is_sub_sequence=False,
+            ),
+            now, dry_run,
+        )
+        main_contacts = (
+            CampaignContact.objects.filter(id__in=due_contact_ids)
+            .select_related('lead', 'campaign', 'sequence__campaign')
+            .prefetch_related('sequence__steps__template')
+        )
 
-            main_contacts = all_contacts.filter(
-                completed=False, replied=False
-            ).select_related('lead', 'sequence').prefetch_related('sequence__steps')
-
-            # Per-reply sub-sequence runs (the new model). Each reply that matched
-            # a sub-sequence has its own run row, so a lead's different replies run
-            # their sub-sequences in parallel. Assignment already happened in
-            # reply_processor when the reply came in — the sender just advances runs.
-            reply_runs = ReplySubSequenceRun.objects.filter(
-                campaign=campaign, completed=False, cancelled=False,
-            ).select_related('lead', 'sub_sequence', 'reply', 'contact').prefetch_related('sub_sequence__steps')
-
-            # Process main sequence contacts
-            for contact in main_contacts:
-                total_checked += 1
-                result = self._process_main_sequence_contact(contact, campaign, sequences, dry_run)
-                if result == 'sent':
-                    total_sent += 1
-                elif result == 'skipped':
-                    total_skipped += 1
-                elif result == 'stopped':
-                    total_stopped += 1
-
-            # Process per-reply sub-sequence runs
-            for run in reply_runs:
-                total_checked += 1
-                result = self._process_reply_run(run, campaign, dry_run)
-                if result == 'sent':
-                    total_sent += 1
-                elif result == 'skipped':
-                    total_skipped += 1
-                elif result == 'stopped':
-                    total_stopped += 1
+        # Per-reply sub-sequence runs (the new model). Each reply that matched
+        # a sub-sequence has its own run row, so a lead's different replies run
+        # their sub-sequences in parallel. Assignment already happened in
+        # reply_processor when the reply came in — the sender just advances runs.
+        due_run_ids = self._claim_due(
+            ReplySubSequenceRun,
+            ReplySubSequenceRun.objects.filter(
+                campaign__status='active', completed=False, cancelled=False,
+            ),
+            now, dry_run,
+        )
+        reply_runs = (
+            ReplySubSequenceRun.objects.filter(id__in=due_run_ids)
+            .select_related('lead', 'campaign', 'sub_sequence__campaign', 'reply', 'contact')
+            .prefetch_related('sub_sequence__steps__template')
+        )
+
+        # Process main sequence contacts
+        for contact in main_contacts:
+            total_checked += 1
+            try:
+                result = self._process_main_sequence_contact(contact, contact.campaign, dry_run)
+            except Exception as e:
+                # Leave the claim lease in place — the row becomes due again
+                # once it expires.
+                logger.error('send_sequence_emails: contact %s failed: %s', contact.id, e, exc_info=True)
+                continue
+            if not dry_run:
+                self._reschedule(contact)
+            if result == 'sent':
+                total_sent += 1
+            elif result == 'skipped':
+                total_skipped += 1
+            elif result == 'stopped':
+                total_stopped += 1
+            elif result == 'deferred':
+                total_deferred += 1
+
+        # Process per-reply sub-sequence runs
+        for run in reply_runs:
+            total_checked += 1
+            try:
+                result = self._process_reply_run(run, run.campaign, dry_run)
+            except Exception as e:
+                logger.error('send_sequence_emails: sub-sequence run %s failed: %s', run.id, e, exc_info=True)
+                continue
+            if not dry_run:
+                self._reschedule(run)
+            if result == 'sent':
+                total_sent += 1
+            elif result == 'skipped':
+                total_skipped += 1
+            elif result == 'stopped':
+                total_stopped += 1
+            elif result == 'deferred':
+                total_deferred += 1
 
         # Only print summary if something happened
-        if total_sent > 0 or total_stopped > 0:
+        if total_sent > 0 or total_stopped > 0 or total_deferred > 0:
             self.stdout.write(self.style.SUCCESS(
-                f'[Email Sequences] Sent: {total_sent} | Completed: {total_stopped} | Checked: {total_checked}'
+                f'[Email Sequences] Sent: {total_sent} | Completed: {total_stopped} | '
+                f'Deferred: {total_deferred} | Checked: {total_checked}'
             ))
 
+    def _claim_due(self, model, queryset, now, dry_run):
+        """Claim up to DUE_BATCH_SIZE due rows of ``model``; returns their ids.
+
+        Candidates are picked oldest-due first from the (joined) queryset,
+        then re-selected by id with ``select_for_update(skip_locked=True)``
+        — no joins, since the mssql backend can't lock ``of=`` a subset —
+        and leased by pushing next_send_at CLAIM_LEASE into the future.
+        A concurrent sender on another worker skips locked rows and no
+        longer sees leased ones as due, so each row is sent by one worker.
+        A dry run only reads.
+        """
+        candidate_ids = list(
+            queryset.filter(next_send_at__lte=now)
+            .order_by('next_send_at')
+            .values_list('id', flat=True)[:self.DUE_BATCH_SIZE]
+        )
+        if not candidate_ids or dry_run:
+            return candidate_ids
+        with transaction.atomic():
+            claimed_ids = list(
+                model.objects.select_for_update(skip_locked=True)
+                .filter(id__in=candidate_ids, next_send_at__lte=now)
+                .values_list('id', flat=True)
+            )
+            if claimed_ids:
+                model.objects.filter(id__in=claimed_ids).update(next_send_at=now + self.CLAIM_LEASE)
+        return claimed_ids
+
+    def _reschedule(self, obj):
+        """Release a claimed row by writing its real next due time.
+
+        A row that is still due after processing is pushed out so it is
+        retried on a later run instead of being re-claimed immediately: to
+        the mailbox's next free slot if the send was rate-deferred,
+        otherwise (the send failed) by RETRY_DELAY.
+        """
+        obj.refresh_schedule()
+        now = timezone.now()
+        if obj.next_send_at is not None and obj.next_send_at <= now:
+            retry_at = getattr(obj, self.DEFERRED_ATTR, None)
+            obj.next_send_at = max(retry_at, now) if retry_at else now + self.RETRY_DELAY
+        type(obj).objects.filter(pk=obj.pk).update(
+            next_send_at=obj.next_send_at, email_account=obj.email_account_id,
+        )
+
+    def _materialize_contacts(self, campaign, sequences):
+        """Create the missing (lead, sequence) CampaignContact rows for ``campaign``.
+
+        Set difference instead of get_or_create per pair: existing keys and
+        the campaign's lead ids are loaded with one query each and only the
+        missing pairs are inserted, so a run where nothing changed costs two
+        queries regardless of campaign size. Returns the number created.
+
+        The mssql backend doesn't support ``ignore_conflicts``; the
+        single-run lock in handle() is what keeps two senders from
+        materializing the same pair. If the bulk insert still fails, fall
+        back to per-row get_or_create for just the missing pairs.
+        """
+        if not sequences:
+            return 0
+        sequence_ids = [seq.id for seq in sequences]
+        existing = set(
+            CampaignContact.objects
+            .filter(campaign=campaign, sequence_id__in=sequence_ids)
+            .values_list('lead_id', 'sequence_id')
+        )
+        lead_ids = list(campaign.leads.values_list('id', flat=True))
+        missing = [
+            (lead_id, sequence_id)
+            for sequence_id in sequence_ids
+            for lead_id in lead_ids
+            if (lead_id, sequence_id) not in existing
+        ]
+        if not missing:
+            return 0
+        sequences_by_id = {seq.id: seq for seq in sequences}
+        new_contacts = []
+        for lead_id, sequence_id in missing:
+            contact = CampaignContact(
+                campaign=campaign, lead_id=lead_id,
+                sequence=sequences_by_id[sequence_id], current_step=0,
+            )
+            # bulk_create skips save(), so fill the due-queue columns here.
+            contact.refresh_schedule()
+            new_contacts.append(contact)
+        try:
+            CampaignContact.objects.bulk_create(new_contacts, batch_size=500)
+            return len(new_contacts)
+        except Exception as e:
+            logger.warning(
+                'send_sequence_emails: bulk contact insert failed for campaign %s (%s: %s); '
+                'falling back to get_or_create for %d pair(s)',
+                campaign.id, type(e).__name__, e, len(missing),
+            )
+            created = 0
+            for lead_id, sequence_id in missing:
+                _, was_created = CampaignContact.objects.get_or_create(
+                    campaign=campaign, lead_id=lead_id, sequence_id=sequence_id,
+                    defaults={'current_step': 0},
+                )
+                created += int(was_created)
+            return created
+
     def _process_reply_run(self, run, campaign, dry_run):
         """Send the next step of ONE per-reply sub-sequence run.
 
         Mirrors the old per-contact sender but drives entirely off the run row
         (run.step / run.last_sent_at) and the reply's timestamp — so multiple runs
-        for the same lead advance independently. Returns 'sent'/'skipped'/'stopped'.
+        for the same lead advance independently. Returns 'sent'/'skipped'/'stopped'/'deferred'.
         """
         lead = run.lead
         sub_sequence = run.sub_sequence
@@ -209,8 +349,7 @@ class Command(BaseCommand):
             run.save(update_fields=['cancelled', 'updated_at'])
             return 'skipped'
 
-        steps = sub_sequence.steps.all().order_by('step_order')
-        step_count = steps.count()
+        step_count = sub_sequence.step_count
         if step_count == 0:
             return 'skipped'
 
@@ -220,7 +359,7 @@ class Command(BaseCommand):
             run.save(update_fields=['completed', 'updated_at'])
             return 'stopped'
 
-        next_step = steps.filter(step_order=next_step_number).first()
+        next_step = self._step_at(sub_sequence, next_step_number)
         if not next_step:
             return 'skipped'
 
@@ -267,14 +406,20 @@ class Command(BaseCommand):
                 f'  [SENT] Sub-seq run step {next_step_number} -> {lead.email} ({sub_sequence.name})'
             ))
             return 'stopped' if run.completed else 'sent'
+        elif result.get('deferred'):
+            setattr(run, self.DEFERRED_ATTR, result['retry_at'])
+            self.stdout.write(self.style.WARNING(
+                f'  [DEFERRED] Sub-seq run step {next_step_number} -> {lead.email} until {result["retry_at"]:%H:%M:%S}'
+            ))
+            return 'deferred'
         else:
             self.stdout.write(self.style.ERROR(
                 f'  [FAIL] Sub-seq run step {next_step_number} -> {lead.email}: {result.get("error", "Unknown")}'
             ))
             return 'skipped'
 
-    def _process_main_sequence_contact(self, contact, campaign, sequences, dry_run):
-        """Process a contact in the main sequence. Returns 'sent', 'skipped', or 'stopped'"""
+    def _process_main_sequence_contact(self, contact, campaign, dry_run):
+        """Process a contact in the main sequence. Returns 'sent', 'skipped', 'stopped' or 'deferred'"""
         lead = contact.lead
 
         if contact.replied:
@@ -282,15 +427,9 @@ class Command(BaseCommand):
 
         sequence = contact.sequence
         if not sequence:
-            sequence = sequences.first()
-            if sequence:
-                contact.sequence = sequence
-                contact.save()
-            else:
-                return 'skipped'
+            return 'skipped'
 
-        steps = sequence.steps.all().order_by('step_order')
-        step_count = steps.count()
+        step_count = sequence.step_count
 
         if step_count == 0:
             return 'skipped'
@@ -301,7 +440,7 @@ class Command(BaseCommand):
             contact.mark_completed()
             return 'stopped'
 
-        next_step = steps.filter(step_order=next_step_number).first()
+        next_step = self._step_at(sequence, next_step_number)
         if not next_step:
             return 'skipped'
 
@@ -315,6 +454,15 @@ class Command(BaseCommand):
 
         return self._send_sequence_email(contact, campaign, sequence, next_step, next_step_number, step_count, dry_run)
 
+    @staticmethod
+    def _step_at(sequence, step_order):
+        """Step ``step_order`` of ``sequence``, read from the prefetched
+        ``steps`` when the queryset loaded them (no query per contact)."""
+        for step in sequence.steps.all():
+            if step.step_order == step_order:
+                return step
+        return None
+
     def _should_send_email(self, contact, campaign, next_step):
         """Determine if it's time to send the next email in main sequence"""
         delay = timedelta(
@@ -368,6 +516,12 @@ class Command(BaseCommand):
                     contact.mark_completed()
                     return 'stopped'
                 return 'sent'
+            elif result.get('deferred'):
+                setattr(contact, self.DEFERRED_ATTR, result['retry_at'])
+                self.stdout.write(self.style.WARNING(
+                    f'  [DEFERRED] Step {next_step_number} -> {lead.email} until {result["retry_at"]:%H:%M:%S}'
+                ))
+                return 'deferred'
             else:
                 self.stdout.write(self.style.ERROR(
                     f'  [FAIL] Step {next_step_number} -> {lead.email}: {result.get("error", "Unknown")}'
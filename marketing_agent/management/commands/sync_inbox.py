@@ -100,6 +100,47 @@ def _account_sync_lock(account_id):
                 pass
 
 
+# Replies are deduped on (campaign, lead, subject) with replied_at inside
+# this window — see Command.process_reply.
+_REPLY_DEDUPE_WINDOW = timedelta(minutes=2)
+
+# Subject-fallback reply matching only considers sends this recent.
+_SUBJECT_FALLBACK_DAYS = 14
+
+
+class _ReplyLookup:
+    """In-memory correlation maps for one RFC822 batch.
+
+    Built once per batch by ``Command._build_reply_lookup`` so reply
+    detection and processing resolve Message-IDs, subject fallbacks,
+    contacts and already-stored replies from dicts instead of issuing
+    several queries per incoming message.
+    """
+
+    def __init__(self):
+        # Message-ID (no angle brackets) → newest EmailSendHistory with it.
+        self.sent_by_message_id = {}
+        # Lowercased recipient → up to 10 recent sends, newest first.
+        self.recent_by_recipient = {}
+        # eid → (is_reply, sent_email) for every message in the batch.
+        self.detected = {}
+        # (campaign_id, lead_id) → first CampaignContact (model ordering).
+        self.contacts = {}
+        # (campaign_id, lead_id, subject) → [replied_at, ...] already stored.
+        self.reply_times = {}
+
+    def is_duplicate_reply(self, campaign_id, lead_id, subject, replied_at):
+        for seen_at in self.reply_times.get((campaign_id, lead_id, subject), ()):
+            if abs(seen_at - replied_at) <= _REPLY_DEDUPE_WINDOW:
+                return True
+        return False
+
+    def remember_reply(self, campaign_id, lead_id, subject, replied_at):
+        """Record a reply stored during this batch so a second copy of the
+        same message later in the batch is treated as a duplicate."""
+        self.reply_times.setdefault((campaign_id, lead_id, subject), []).append(replied_at)
+
+
 class Command(BaseCommand):
     help = 'Sync inbox via IMAP and detect email replies automatically'
 
@@ -651,12 +692,27 @@ class Command(BaseCommand):
                     logger.error(f'[{folder_label}] Batched RFC822 fetch failed: {e}', exc_info=True)
                     continue
 
+                parsed_by_eid = {}
+                for eid, msg_bytes in msgs_by_eid.items():
+                    try:
+                        parsed_by_eid[eid] = email.message_from_bytes(msg_bytes)
+                    except Exception as e:
+                        logger.error(f'[{folder_label}] Could not parse email {eid.decode()}: {e}', exc_info=True)
+
+                # Resolve reply correlation for the whole batch up front:
+                # a handful of IN queries instead of several per message.
+                reply_lookup = None
+                if direction == 'in':
+                    try:
+                        reply_lookup = self._build_reply_lookup(parsed_by_eid)
+                    except Exception as e:
+                        logger.error(f'[{folder_label}] Batched reply lookup failed, falling back to per-message: {e}', exc_info=True)
+
                 for eid in sub_chunk:
                     try:
-                        msg_bytes = msgs_by_eid.get(eid)
-                        if not msg_bytes:
+                        msg = parsed_by_eid.get(eid)
+                        if msg is None:
                             continue
-                        msg = email.message_from_bytes(msg_bytes)
 
                         # Direction-aware addressing. For incoming mail the
                         # From: header carries the sender; for outgoing mail
@@ -693,7 +749,10 @@ class Command(BaseCommand):
                         #     two write paths touch the row, only one
                         #     row ends up in InboxEmail per message.
                         if direction == 'in':
-                            is_reply, sent_email = self.detect_reply(msg, account)
+                            if reply_lookup is not None:
+                                is_reply, sent_email = reply_lookup.detected.get(eid, (False, None))
+                            else:
+                                is_reply, sent_email = self.detect_reply(msg, account)
                             if is_reply and sent_email:
                                 replies_found += 1
                                 self.stdout.write(f'\n  [REPLY] Campaign reply detected!')
@@ -703,7 +762,7 @@ class Command(BaseCommand):
                                 if not dry_run:
                                     if pending_inbox_rows:
                                         inbox_stored += self._flush_inbox_rows(pending_inbox_rows)
-                                    if self.process_reply(msg, sent_email, account):
+                                    if self.process_reply(msg, sent_email, account, lookup=reply_lookup):
                                         replies_processed += 1
                                         self.stdout.write(f'     [OK] Reply processed successfully')
                                     else:
@@ -1000,25 +1059,122 @@ class Command(BaseCommand):
         except IntegrityError:
             return False
 
-    def detect_reply(self, msg, account):
+    def _build_reply_lookup(self, msgs_by_eid):
+        """Resolve reply correlation for a whole RFC822 batch at once.
+
+        Collects every In-Reply-To / References Message-ID and every
+        ``Re:`` sender in the batch, resolves them with one ``IN`` query
+        each, runs detect_reply against those maps, then loads the
+        CampaignContact rows and already-stored Reply keys for every
+        matched (campaign, lead) in two more queries. Returns a
+        ``_ReplyLookup`` consumed by _process_folder / process_reply.
+        """
+        lookup = _ReplyLookup()
+
+        ref_ids = set()
+        re_senders = set()
+        for msg in msgs_by_eid.values():
+            ref_ids.update(self._reply_reference_ids(msg))
+            subject = self.decode_header(msg.get('Subject', ''))
+            if subject and subject.lower().startswith('re:'):
+                sender_email = self.get_email_address(msg.get('From', ''))
+                if sender_email:
+                    re_senders.add(sender_email)
+
+        if ref_ids:
+            # Model ordering is -created_at, so setdefault keeps the same row
+            # a per-id ``.first()`` would have returned.
+            sends = (
+                EmailSendHistory.objects
+                .filter(message_id__in=list(ref_ids))
+                .select_related('campaign', 'lead')
+            )
+            for sent in sends:
+                lookup.sent_by_message_id.setdefault(sent.message_id, sent)
+
+        if re_senders:
+            since = timezone.now() - timedelta(days=_SUBJECT_FALLBACK_DAYS)
+            sends = (
+                EmailSendHistory.objects
+                .filter(
+                    recipient_email__in=list(re_senders),
+                    sent_at__gte=since,
+                    status__in=['sent', 'delivered', 'opened', 'clicked'],
+                )
+                .select_related('campaign', 'lead')
+                .order_by('-sent_at')
+            )
+            for sent in sends:
+                bucket = lookup.recent_by_recipient.setdefault((sent.recipient_email or '').lower(), [])
+                if len(bucket) < 10:
+                    bucket.append(sent)
+
+        reply_dates = []
+        for eid, msg in msgs_by_eid.items():
+            is_reply, sent_email = self.detect_reply(msg, None, lookup=lookup)
+            lookup.detected[eid] = (is_reply, sent_email)
+            if is_reply and sent_email:
+                reply_dates.append(self._parse_reply_date(msg))
+
+        matched = [s for _, s in lookup.detected.values() if s is not None]
+        if not matched:
+            return lookup
+
+        campaign_ids = {s.campaign_id for s in matched}
+        lead_ids = {s.lead_id for s in matched}
+        contacts = CampaignContact.objects.filter(campaign_id__in=campaign_ids, lead_id__in=lead_ids)
+        for contact in contacts:
+            lookup.contacts.setdefault((contact.campaign_id, contact.lead_id), contact)
+
+        existing = Reply.objects.filter(
+            campaign_id__in=campaign_ids,
+            lead_id__in=lead_ids,
+            replied_at__gte=min(reply_dates) - _REPLY_DEDUPE_WINDOW,
+            replied_at__lte=max(reply_dates) + _REPLY_DEDUPE_WINDOW,
+        ).values_list('campaign_id', 'lead_id', 'reply_subject', 'replied_at')
+        for campaign_id, lead_id, reply_subject, replied_at in existing:
+            lookup.remember_reply(campaign_id, lead_id, reply_subject, replied_at)
+
+        return lookup
+
+    @staticmethod
+    def _reply_reference_ids(msg):
+        """Message-IDs this message refers to: In-Reply-To first, then References in order."""
+        ids = []
+        in_reply_to = (msg.get('In-Reply-To', '') or '').strip()
+        if in_reply_to:
+            ids.append(in_reply_to.strip('<>'))
+        references = (msg.get('References', '') or '').strip()
+        if references:
+            ids.extend(re.findall(r'<([^>]+)>', references))
+        return ids
+
+    def detect_reply(self, msg, account, lookup=None):
         """
         Detect if email is a reply using professional method:
         1. Check In-Reply-To header (PRIMARY)
         2. Check References header (SECONDARY)
         3. Fallback: Check Subject for "Re:" (optional safety)
+
+        With ``lookup`` (see _build_reply_lookup) every check is answered
+        from the batch's in-memory maps; without it each check queries
+        EmailSendHistory directly.
         """
         in_reply_to = msg.get('In-Reply-To', '').strip()
         references = msg.get('References', '').strip()
         subject = self.decode_header(msg.get('Subject', ''))
-        
+
+        def find_by_message_id(message_id):
+            if lookup is not None:
+                return lookup.sent_by_message_id.get(message_id)
+            return EmailSendHistory.objects.filter(message_id=message_id).first()
+
         # PRIMARY: Check In-Reply-To header
         if in_reply_to:
             # Remove < > brackets
             message_id = in_reply_to.strip('<>')
-            sent_email = EmailSendHistory.objects.filter(
-                message_id=message_id
-            ).first()
-            
+            sent_email = find_by_message_id(message_id)
+
             if sent_email:
                 logger.info(f'Reply detected via In-Reply-To header: {message_id}')
                 return True, sent_email
@@ -1028,10 +1184,8 @@ class Command(BaseCommand):
             # References can contain multiple Message-IDs (space-separated)
             ref_message_ids = re.findall(r'<([^>]+)>', references)
             for message_id in ref_message_ids:
-                sent_email = EmailSendHistory.objects.filter(
-                    message_id=message_id
-                ).first()
-                
+                sent_email = find_by_message_id(message_id)
+
                 if sent_email:
                     logger.info(f'Reply detected via References header: {message_id}')
                     return True, sent_email
@@ -1041,15 +1195,18 @@ class Command(BaseCommand):
             # Try to match by subject and sender
             sender_email = self.get_email_address(msg['From'])
             if sender_email:
-                # Get recent sent emails (last 14 days) to this sender
-                fourteen_days_ago = timezone.now() - timedelta(days=14)
                 subject_without_re = re.sub(r'^(re:|fw:|fwd:)\s*', '', subject, flags=re.IGNORECASE).strip()
-                
-                sent_emails = EmailSendHistory.objects.filter(
-                    recipient_email=sender_email,
-                    sent_at__gte=fourteen_days_ago,
-                    status__in=['sent', 'delivered', 'opened', 'clicked']
-                ).order_by('-sent_at')[:10]
+
+                # Get recent sent emails (last 14 days) to this sender
+                if lookup is not None:
+                    sent_emails = lookup.recent_by_recipient.get(sender_email, [])
+                else:
+                    since = timezone.now() - timedelta(days=_SUBJECT_FALLBACK_DAYS)
+                    sent_emails = EmailSendHistory.objects.filter(
+                        recipient_email=sender_email,
+                        sent_at__gte=since,
+                        status__in=['sent', 'delivered', 'opened', 'clicked']
+                    ).order_by('-sent_at')[:10]
                 
                 for sent_email in sent_emails:
                     sent_subject = re.sub(r'^(re:|fw:|fwd:)\s*', '', sent_email.subject, flags=re.IGNORECASE).strip()
@@ -1059,11 +1216,30 @@ class Command(BaseCommand):
         
         return False, None
 
-    def process_reply(self, msg, sent_email, account):
+    @staticmethod
+    def _parse_reply_date(msg):
+        """Timezone-aware Date: header of ``msg``, or now() when missing/unparseable."""
+        date_str = msg.get('Date')
+        if date_str:
+            try:
+                reply_date = parsedate_to_datetime(date_str)
+                # Convert to timezone-aware datetime
+                if reply_date and timezone.is_naive(reply_date):
+                    reply_date = timezone.make_aware(reply_date)
+                if reply_date:
+                    return reply_date
+            except Exception as e:
+                logger.warning(f'Could not parse date: {str(e)}')
+        return timezone.now()
+
+    def process_reply(self, msg, sent_email, account, lookup=None):
         """
         Process a detected reply:
         1. Extract reply content
         2. Call mark_contact_replied to trigger sub-sequence logic
+
+        ``lookup`` (from _build_reply_lookup) supplies the contact and the
+        duplicate-reply check for batched syncs.
         """
         try:
             # Get sender email
@@ -1077,10 +1253,13 @@ class Command(BaseCommand):
             lead = sent_email.lead
             
             # Get or create CampaignContact
-            contact = CampaignContact.objects.filter(
-                campaign=campaign,
-                lead=lead
-            ).first()
+            if lookup is not None:
+                contact = lookup.contacts.get((campaign.id, lead.id))
+            else:
+                contact = CampaignContact.objects.filter(
+                    campaign=campaign,
+                    lead=lead
+                ).first()
             
             if not contact:
                 logger.warning(f'CampaignContact not found for campaign {campaign.id}, lead {lead.id}')
@@ -1093,34 +1272,24 @@ class Command(BaseCommand):
             reply_content, _reply_html_unused = self.get_email_body(msg)
 
             # Get reply date
-            reply_date = None
-            date_str = msg.get('Date')
-            if date_str:
-                try:
-                    reply_date = parsedate_to_datetime(date_str)
-                    # Convert to timezone-aware datetime
-                    if reply_date and timezone.is_naive(reply_date):
-                        reply_date = timezone.make_aware(reply_date)
-                except Exception as e:
-                    logger.warning(f'Could not parse date: {str(e)}')
-                    reply_date = timezone.now()
-            else:
-                reply_date = timezone.now()
+            reply_date = self._parse_reply_date(msg)
 
             # Dedupe: skip if we've already stored a Reply for this exact incoming message.
             # Keyed on (campaign, lead, subject, replied_at within 2 min). We intentionally
             # exclude triggering_email from the filter because multiple EmailSendHistory
             # rows can share a Message-ID (re-sends), which made detect_reply return a
             # different sent_email each run and broke dedupe.
-            dedupe_window_start = reply_date - timedelta(minutes=2)
-            dedupe_window_end = reply_date + timedelta(minutes=2)
-            if Reply.objects.filter(
-                campaign=campaign,
-                lead=lead,
-                reply_subject=reply_subject,
-                replied_at__gte=dedupe_window_start,
-                replied_at__lte=dedupe_window_end,
-            ).exists():
+            if lookup is not None:
+                is_duplicate = lookup.is_duplicate_reply(campaign.id, lead.id, reply_subject, reply_date)
+            else:
+                is_duplicate = Reply.objects.filter(
+                    campaign=campaign,
+                    lead=lead,
+                    reply_subject=reply_subject,
+                    replied_at__gte=reply_date - _REPLY_DEDUPE_WINDOW,
+                    replied_at__lte=reply_date + _REPLY_DEDUPE_WINDOW,
+                ).exists()
+            if is_duplicate:
                 logger.info(f'Skipping duplicate reply for {sender_email} (already stored)')
                 return True
 
@@ -1136,6 +1305,8 @@ class Command(BaseCommand):
             )
             
             if result.get('success'):
+                if lookup is not None:
+                    lookup.remember_reply(campaign.id, lead.id, reply_subject, reply_date)
                 logger.info(f'Reply processed successfully for {sender_email}: {result.get("message", "")}')
                 return True
             else:
@@ -0,0 +1,24 @@
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def populate_step_counts(apps, schema_editor):
+    EmailSequence = apps.get_model('marketing_agent', 'EmailSequence')
+    for sequence in EmailSequence.objects.annotate(n_steps=Count('steps')).filter(n_steps__gt=0):
+        EmailSequence.objects.filter(pk=sequence.pk).update(step_count=sequence.n_steps)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('marketing_agent', '0038_emailaccount_imap_sync_email_limit_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='emailsequence',
+            name='step_count',
+            field=models.PositiveIntegerField(default=0, help_text='Number of steps in this sequence (maintained on step changes)'),
+        ),
+        migrations.RunPython(populate_step_counts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,131 @@
+from datetime import timedelta
+
+from django.db import migrations, models
+from django.utils import timezone
+import django.db.models.deletion
+
+
+def backfill_next_send_at(apps, schema_editor):
+    """Seed the due-queue columns for every pending contact and run.
+
+    Historical models don't carry CampaignContact.compute_next_send_at, so
+    the same timing rules are applied here from preloaded step delays.
+    """
+    Campaign = apps.get_model('marketing_agent', 'Campaign')
+    EmailSequence = apps.get_model('marketing_agent', 'EmailSequence')
+    EmailSequenceStep = apps.get_model('marketing_agent', 'EmailSequenceStep')
+    CampaignContact = apps.get_model('marketing_agent', 'CampaignContact')
+    ReplySubSequenceRun = apps.get_model('marketing_agent', 'ReplySubSequenceRun')
+
+    now = timezone.now()
+    delays = {
+        (sequence_id, step_order): timedelta(days=days, hours=hours, minutes=minutes)
+        for sequence_id, step_order, days, hours, minutes in EmailSequenceStep.objects.values_list(
+            'sequence_id', 'step_order', 'delay_days', 'delay_hours', 'delay_minutes'
+        )
+    }
+    campaign_accounts = dict(Campaign.objects.values_list('id', 'email_account_id'))
+    sequences = {
+        row[0]: row[1:]
+        for row in EmailSequence.objects.values_list(
+            'id', 'is_sub_sequence', 'is_active', 'step_count', 'email_account_id', 'campaign_id'
+        )
+    }
+
+    def next_send_at(sequence_id, current_step, anchor, last_sent_at):
+        _, _, step_count, _, _ = sequences[sequence_id]
+        if current_step + 1 > step_count:
+            return now
+        delay = delays.get((sequence_id, current_step + 1))
+        if delay is None:
+            return None
+        if current_step == 0:
+            anchor = anchor or now
+            return anchor if delay.total_seconds() <= 60 else anchor + delay
+        return last_sent_at + delay if last_sent_at else now
+
+    def account_id(sequence_id):
+        _, _, _, email_account_id, campaign_id = sequences[sequence_id]
+        return email_account_id or campaign_accounts.get(campaign_id)
+
+    batch = []
+    pending = CampaignContact.objects.filter(completed=False, replied=False, sequence__isnull=False)
+    for contact in pending.iterator(chunk_size=1000):
+        if sequences[contact.sequence_id][0]:
+            continue
+        contact.next_send_at = next_send_at(
+            contact.sequence_id, contact.current_step,
+            contact.started_at or contact.created_at, contact.last_sent_at,
+        )
+        contact.email_account_id = account_id(contact.sequence_id)
+        batch.append(contact)
+        if len(batch) >= 500:
+            CampaignContact.objects.bulk_update(batch, ['next_send_at', 'email_account'])
+            batch = []
+    if batch:
+        CampaignContact.objects.bulk_update(batch, ['next_send_at', 'email_account'])
+
+    batch = []
+    pending = ReplySubSequenceRun.objects.filter(completed=False, cancelled=False).select_related('reply')
+    for run in pending.iterator(chunk_size=1000):
+        if not sequences[run.sub_sequence_id][1]:
+            run.next_send_at = now
+        else:
+            run.next_send_at = next_send_at(
+                run.sub_sequence_id, run.step,
+                run.reply.replied_at or run.created_at, run.last_sent_at,
+            )
+        run.email_account_id = account_id(run.sub_sequence_id)
+        batch.append(run)
+        if len(batch) >= 500:
+            ReplySubSequenceRun.objects.bulk_update(batch, ['next_send_at', 'email_account'])
+            batch = []
+    if batch:
+        ReplySubSequenceRun.objects.bulk_update(batch, ['next_send_at', 'email_account'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('marketing_agent', '0039_emailsequence_step_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='campaigncontact',
+            name='email_account',
+            field=models.ForeignKey(blank=True, help_text='Mailbox the next step is sent from', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='scheduled_contacts', to='marketing_agent.emailaccount'),
+        ),
+        migrations.AddField(
+            model_name='campaigncontact',
+            name='next_send_at',
+            field=models.DateTimeField(blank=True, help_text='When the next main-sequence step is due (null = nothing pending)', null=True),
+        ),
+        migrations.AddField(
+            model_name='replysubsequencerun',
+            name='email_account',
+            field=models.ForeignKey(blank=True, help_text='Mailbox the next step is sent from', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='scheduled_sub_sequence_runs', to='marketing_agent.emailaccount'),
+        ),
+        migrations.AddField(
+            model_name='replysubsequencerun',
+            name='next_send_at',
+            field=models.DateTimeField(blank=True, help_text='When the next sub-sequence step is due (null = nothing pending)', null=True),
+        ),
+        migrations.AddIndex(
+            model_name='campaigncontact',
+            index=models.Index(fields=['next_send_at'], name='ppp_marketi_next_se_cce3ad_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='campaigncontact',
+            index=models.Index(fields=['email_account', 'next_send_at'], name='ppp_marketi_email_a_83c793_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='replysubsequencerun',
+            index=models.Index(fields=['next_send_at'], name='ppp_marketi_next_se_677867_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='replysubsequencerun',
+            index=models.Index(fields=['email_account', 'next_send_at'], name='ppp_marketi_email_a_04432a_idx'),
+        ),
+        migrations.RunPython(backfill_next_send_at, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 4.2.10 on 2026-10-18 21:16
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('marketing_agent', '0040_campaigncontact_next_send_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EmailTrackingEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tracking_token', models.CharField(db_index=True, max_length=64)),
+                ('event_type', models.CharField(choices=[('open', 'Open'), ('click', 'Click')], max_length=10)),
+                ('url', models.TextField(blank=True, help_text='Click target (clicks only)')),
+                ('user_agent', models.CharField(blank=True, max_length=500)),
+                ('ip_address', models.GenericIPAddressField(blank=True, null=True)),
+                ('occurred_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('processed_at', models.DateTimeField(blank=True, help_text='When the batcher applied this event to EmailSendHistory', null=True)),
+            ],
+            options={
+                'db_table': 'ppp_marketingagent_emailtrackingevent',
+                'ordering': ['-occurred_at'],
+                'indexes': [models.Index(fields=['processed_at', 'id'], name='ppp_marketi_process_231df9_idx')],
+            },
+        ),
+    ]
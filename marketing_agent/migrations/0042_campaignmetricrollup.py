@@ -0,0 +1,111 @@
+from collections import Counter, defaultdict
+
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import Coalesce, TruncDate
+import django.db.models.deletion
+
+
+# Mirrors campaign_rollups.SEND_COUNTERS / REPLY_COUNTERS at the time of writing.
+SEND_COUNTERS = {
+    'sent': ('sent', 'delivered', 'opened', 'clicked'),
+    'opened': ('opened', 'clicked'),
+    'clicked': ('clicked',),
+    'bounced': ('bounced',),
+    'failed': ('failed',),
+}
+REPLY_COUNTERS = {
+    'positive': 'replies_positive',
+    'neutral': 'replies_neutral',
+    'requested_info': 'replies_requested_info',
+    'objection': 'replies_objection',
+    'negative': 'replies_negative',
+    'unsubscribe': 'replies_unsubscribe',
+}
+
+
+def backfill_rollups(apps, schema_editor):
+    """Build the initial rollup rows from existing sends and replies with one
+    GROUP BY over each table (the same buckets reconcile_campaign computes)."""
+    EmailSendHistory = apps.get_model('marketing_agent', 'EmailSendHistory')
+    EmailSequenceStep = apps.get_model('marketing_agent', 'EmailSequenceStep')
+    Reply = apps.get_model('marketing_agent', 'Reply')
+    CampaignMetricRollup = apps.get_model('marketing_agent', 'CampaignMetricRollup')
+
+    template_sequences = {}
+    for template_id, sequence_id in (
+        EmailSequenceStep.objects.order_by('sequence_id').values_list('template_id', 'sequence_id')
+    ):
+        template_sequences.setdefault(template_id, sequence_id)
+
+    buckets = defaultdict(Counter)
+    for r in (
+        EmailSendHistory.objects.filter(email_template__isnull=False)
+        .annotate(day=TruncDate(Coalesce('sent_at', 'created_at')))
+        .order_by()
+        .values('campaign_id', 'day', 'email_template_id', 'status')
+        .annotate(n=Count('id'))
+    ):
+        bucket = (r['campaign_id'], r['day'], template_sequences.get(r['email_template_id']))
+        for counter, statuses in SEND_COUNTERS.items():
+            if r['status'] in statuses:
+                buckets[bucket][counter] += r['n']
+
+    for r in (
+        Reply.objects.order_by()
+        .annotate(day=TruncDate('replied_at'))
+        .values('campaign_id', 'day', 'sequence_id', 'sub_sequence_id', 'interest_level')
+        .annotate(n=Count('id'))
+    ):
+        bucket = (r['campaign_id'], r['day'], r['sub_sequence_id'] or r['sequence_id'])
+        buckets[bucket]['replies'] += r['n']
+        buckets[bucket][REPLY_COUNTERS.get(r['interest_level'], 'replies_not_analyzed')] += r['n']
+
+    CampaignMetricRollup.objects.bulk_create(
+        [
+            CampaignMetricRollup(campaign_id=campaign_id, day=day, sequence_id=sequence_id, **counters)
+            for (campaign_id, day, sequence_id), counters in buckets.items()
+            if day is not None and any(counters.values())
+        ],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('marketing_agent', '0041_emailtrackingevent'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CampaignMetricRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('sent', models.IntegerField(default=0)),
+                ('opened', models.IntegerField(default=0)),
+                ('clicked', models.IntegerField(default=0)),
+                ('bounced', models.IntegerField(default=0)),
+                ('failed', models.IntegerField(default=0)),
+                ('replies', models.IntegerField(default=0)),
+                ('replies_positive', models.IntegerField(default=0)),
+                ('replies_neutral', models.IntegerField(default=0)),
+                ('replies_requested_info', models.IntegerField(default=0)),
+                ('replies_objection', models.IntegerField(default=0)),
+                ('replies_negative', models.IntegerField(default=0)),
+                ('replies_unsubscribe', models.IntegerField(default=0)),
+                ('replies_not_analyzed', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('campaign', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='metric_rollups', to='marketing_agent.campaign')),
+                ('sequence', models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='marketing_agent.emailsequence')),
+            ],
+            options={
+                'db_table': 'ppp_marketingagent_campaignmetricrollup',
+                'ordering': ['-day'],
+                'indexes': [models.Index(fields=['campaign', 'day'], name='ppp_marketi_campaig_23eb9a_idx')],
+                'unique_together': {('campaign', 'day', 'sequence')},
+            },
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
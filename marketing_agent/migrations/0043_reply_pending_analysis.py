@@ -0,0 +1,32 @@
+# Generated by Django 4.2.10 on 2026-10-18 21:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('marketing_agent', '0042_campaignmetricrollup'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reply',
+            name='analysis_claimed_at',
+            field=models.DateTimeField(blank=True, help_text='When a classifier worker claimed this pending reply', null=True),
+        ),
+        migrations.AddField(
+            model_name='reply',
+            name='starts_sub_sequence',
+            field=models.BooleanField(default=False, help_text='Main-sequence reply whose sub-sequence is picked once it is classified'),
+        ),
+        migrations.AlterField(
+            model_name='reply',
+            name='interest_level',
+            field=models.CharField(choices=[('positive', 'Positive/Interested'), ('negative', 'Negative/Not Interested'), ('neutral', 'Neutral'), ('requested_info', 'Requested More Information'), ('objection', 'Has Objection/Concern'), ('unsubscribe', 'Unsubscribe Request'), ('not_analyzed', 'Not Analyzed'), ('pending_analysis', 'Pending Analysis')], default='not_analyzed', max_length=20),
+        ),
+        migrations.AddIndex(
+            model_name='reply',
+            index=models.Index(fields=['interest_level', 'replied_at'], name='ppp_marketi_interes_7e838d_idx'),
+        ),
+    ]
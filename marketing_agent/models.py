@@ -3,6 +3,7 @@ from django.contrib.auth.models import User
 from django.utils import timezone
 from django.db.models.signals import m2m_changed, pre_save, post_save
 from django.dispatch import receiver
+from datetime import timedelta
 import json
 import logging
 
@@ -320,6 +321,59 @@ class CampaignPerformance(models.Model):
         return f"{self.campaign.name} - {self.get_metric_name_display()} ({self.date})"
 
 
+class CampaignMetricRollup(models.Model):
+    """Email/reply counters per (campaign, day, sequence).
+
+    Maintained incrementally by campaign_rollups.py (signals on
+    EmailSendHistory / Reply plus the tracking-event batcher) and repaired by
+    the daily reconcile_campaign_rollups_task. Dashboards, the graph agent,
+    the proactive agent and sync_campaign_performance sum these rows instead
+    of counting EmailSendHistory / Reply per request.
+
+    Sends are bucketed by sent_at (created_at while unsent) and only count
+    campaign sends (email_template set), the same rows the dashboard counts.
+    Replies are bucketed by replied_at. The send counters follow the send's
+    *current* status, so 'sent' includes opened/clicked sends just like
+    total_sent on the dashboard.
+    """
+    campaign = models.ForeignKey(Campaign, on_delete=models.CASCADE, related_name='metric_rollups')
+    day = models.DateField()
+    # No FK constraint: history must outlive a deleted sequence, and the
+    # reconciler rebuilds rows wholesale anyway.
+    sequence = models.ForeignKey('EmailSequence', on_delete=models.DO_NOTHING, db_constraint=False,
+                                 null=True, blank=True, related_name='+')
+
+    # Sends (status in sent/delivered/opened/clicked, opened/clicked, ...)
+    sent = models.IntegerField(default=0)
+    opened = models.IntegerField(default=0)
+    clicked = models.IntegerField(default=0)
+    bounced = models.IntegerField(default=0)
+    failed = models.IntegerField(default=0)
+
+    # Replies, split by Reply.interest_level
+    replies = models.IntegerField(default=0)
+    replies_positive = models.IntegerField(default=0)
+    replies_neutral = models.IntegerField(default=0)
+    replies_requested_info = models.IntegerField(default=0)
+    replies_objection = models.IntegerField(default=0)
+    replies_negative = models.IntegerField(default=0)
+    replies_unsubscribe = models.IntegerField(default=0)
+    replies_not_analyzed = models.IntegerField(default=0)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'ppp_marketingagent_campaignmetricrollup'
+        ordering = ['-day']
+        unique_together = ['campaign', 'day', 'sequence']
+        indexes = [
+            models.Index(fields=['campaign', 'day']),
+        ]
+
+    def __str__(self):
+        return f"{self.campaign_id} / {self.day} / seq {self.sequence_id}"
+
+
 class MarketingDocument(models.Model):
     """Marketing Document Model"""
     DOCUMENT_TYPE_CHOICES = [
@@ -517,6 +571,11 @@ class EmailSequence(models.Model):
         default='any',
         help_text='Interest level this sub-sequence handles (only for sub-sequences)'
     )
+
+    # Denormalized steps.count(). Kept current by the EmailSequenceStep
+    # post_save/post_delete signal (marketing_agent/signals.py) so the
+    # sequence sender never has to count steps on every run.
+    step_count = models.PositiveIntegerField(default=0, help_text='Number of steps in this sequence (maintained on step changes)')
     
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -639,6 +698,46 @@ class EmailSendHistory(models.Model):
         return f"{self.subject} to {self.recipient_email} ({self.status})"
 
 
+class EmailTrackingEvent(models.Model):
+    """Append-only log of open-pixel loads and tracked-link clicks.
+
+    The tracking views only INSERT a row here and return; they never touch
+    EmailSendHistory. Image-proxy prefetches (Gmail, Apple Mail Privacy
+    Protection) fire thousands of pixel loads at once, and updating the send
+    row inside each request contended with the sequence sender writing the
+    same rows. services/tracking_events.apply_tracking_events folds pending
+    events into EmailSendHistory status in bulk and stamps processed_at; the
+    raw rows are kept (user agent, IP, every repeat hit) for per-open
+    analytics and bot filtering.
+    """
+    EVENT_TYPE_CHOICES = [
+        ('open', 'Open'),
+        ('click', 'Click'),
+    ]
+
+    # Not a FK: resolving the token would put a lookup back into the pixel
+    # request. tracking_token is unique on EmailSendHistory, so it joins 1:1.
+    tracking_token = models.CharField(max_length=64, db_index=True)
+    event_type = models.CharField(max_length=10, choices=EVENT_TYPE_CHOICES)
+    url = models.TextField(blank=True, help_text='Click target (clicks only)')
+    user_agent = models.CharField(max_length=500, blank=True)
+    ip_address = models.GenericIPAddressField(null=True, blank=True)
+    occurred_at = models.DateTimeField(default=timezone.now)
+    processed_at = models.DateTimeField(null=True, blank=True,
+                                        help_text='When the batcher applied this event to EmailSendHistory')
+
+    class Meta:
+        db_table = 'ppp_marketingagent_emailtrackingevent'
+        ordering = ['-occurred_at']
+        indexes = [
+            # Batcher scan for unapplied events, oldest first.
+            models.Index(fields=['processed_at', 'id']),
+        ]
+
+    def __str__(self):
+        return f"{self.event_type} {self.tracking_token[:10]}... at {self.occurred_at}"
+
+
 class EmailAccount(models.Model):
     """Email Account Configuration for Sending Campaign Emails"""
     ACCOUNT_TYPE_CHOICES = [
@@ -801,6 +900,27 @@ class EmailAccount(models.Model):
         super().save(*args, **kwargs)
 
 
+def _step_delay(step):
+    return timedelta(days=step.delay_days, hours=step.delay_hours, minutes=step.delay_minutes)
+
+
+def _sequence_step(sequence, step_order):
+    """Step ``step_order`` of ``sequence``; reads prefetched ``steps`` when present."""
+    for step in sequence.steps.all():
+        if step.step_order == step_order:
+            return step
+    return None
+
+
+def _sending_account_id(sequence):
+    """Id-only mirror of EmailSequence.get_sending_account()."""
+    if sequence.email_account_id:
+        return sequence.email_account_id
+    if sequence.campaign_id:
+        return sequence.campaign.email_account_id
+    return None
+
+
 class CampaignContact(models.Model):
     """
     Tracks where each lead is in the email sequence for a campaign.
@@ -849,6 +969,16 @@ class CampaignContact(models.Model):
     # Metadata
     started_at = models.DateTimeField(null=True, blank=True, help_text='When sequence started for this contact')
     completed_at = models.DateTimeField(null=True, blank=True, help_text='When sequence completed')
+
+    # Due-queue (denormalized). Recomputed by save() on every state change
+    # (send, reply, completion) and by the step/sequence signals on
+    # sequence edits, so send_sequence_emails selects only due rows
+    # instead of walking every contact of every active campaign.
+    next_send_at = models.DateTimeField(null=True, blank=True,
+                                        help_text='When the next main-sequence step is due (null = nothing pending)')
+    email_account = models.ForeignKey('EmailAccount', on_delete=models.SET_NULL, null=True, blank=True,
+                                      related_name='scheduled_contacts',
+                                      help_text='Mailbox the next step is sent from')
     
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -863,11 +993,69 @@ class CampaignContact(models.Model):
             models.Index(fields=['campaign', 'sub_sequence', 'sub_sequence_step']),
             models.Index(fields=['last_sent_at']),
             models.Index(fields=['sub_sequence_last_sent_at']),
+            # The sender's due-queue scan.
+            models.Index(fields=['next_send_at']),
+            models.Index(fields=['email_account', 'next_send_at']),
         ]
     
     def __str__(self):
         status = 'Completed' if self.completed else ('Replied' if self.replied else f'Step {self.current_step}')
         return f"{self.lead.email} - {self.campaign.name} ({status})"
+
+    def save(self, *args, **kwargs):
+        self.refresh_schedule()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = {*update_fields, 'next_send_at', 'email_account'}
+        super().save(*args, **kwargs)
+
+    def compute_next_send_at(self):
+        """When the next main-sequence step is due, or None if nothing is pending.
+
+        Same timing rules as send_sequence_emails._should_send_email: the
+        first step is anchored on started_at/created_at (immediate when its
+        delay is under a minute), later steps on last_sent_at. A contact
+        already past its last step is due now so the sender can mark it
+        completed.
+        """
+        if self.replied or self.completed or not self.sequence_id:
+            return None
+        sequence = self.sequence
+        if sequence.is_sub_sequence:
+            return None
+        now = timezone.now()
+        next_step_number = self.current_step + 1
+        if next_step_number > sequence.step_count:
+            return now
+        step = _sequence_step(sequence, next_step_number)
+        if step is None:
+            return None
+        delay = _step_delay(step)
+        if self.current_step == 0:
+            reference = self.started_at or self.created_at or now
+            return reference if delay.total_seconds() <= 60 else reference + delay
+        if not self.last_sent_at:
+            return now
+        return self.last_sent_at + delay
+
+    def refresh_schedule(self):
+        """Recompute next_send_at / email_account in memory (no save)."""
+        self.next_send_at = self.compute_next_send_at()
+        self.email_account_id = _sending_account_id(self.sequence) if self.sequence_id else None
+
+    @classmethod
+    def refresh_schedules(cls, contacts):
+        """Recompute and persist the due-queue columns for ``contacts``.
+
+        For paths that change contact state with ``QuerySet.update()``
+        (which bypasses save()), and for sequence edits that move every
+        pending contact's due time.
+        """
+        contacts = list(contacts)
+        for contact in contacts:
+            contact.refresh_schedule()
+        cls.objects.bulk_update(contacts, ['next_send_at', 'email_account'], batch_size=500)
+        return len(contacts)
     
     def mark_replied(self, reply_subject='', reply_content='', reply_at=None, interest_level='not_analyzed', analysis='', sub_sequence=None):
         """
@@ -917,6 +1105,7 @@ class Reply(models.Model):
         ('objection', 'Has Objection/Concern'),
         ('unsubscribe', 'Unsubscribe Request'),
         ('not_analyzed', 'Not Analyzed'),
+        ('pending_analysis', 'Pending Analysis'),
     ]
     
     contact = models.ForeignKey(CampaignContact, on_delete=models.CASCADE, related_name='replies')
@@ -939,6 +1128,13 @@ class Reply(models.Model):
     # AI Analysis
     interest_level = models.CharField(max_length=20, choices=INTEREST_LEVEL_CHOICES, default='not_analyzed')
     analysis = models.TextField(blank=True)
+    # Inbox sync stores replies as 'pending_analysis'; the classification
+    # queue (services/reply_classification.py) leases them via
+    # analysis_claimed_at and fills in interest_level/analysis.
+    analysis_claimed_at = models.DateTimeField(null=True, blank=True,
+                                              help_text='When a classifier worker claimed this pending reply')
+    starts_sub_sequence = models.BooleanField(default=False,
+                                              help_text='Main-sequence reply whose sub-sequence is picked once it is classified')
     
     # Which email triggered this reply (optional)
     triggering_email = models.ForeignKey('EmailSendHistory', on_delete=models.SET_NULL, null=True, blank=True,
@@ -957,6 +1153,7 @@ class Reply(models.Model):
             models.Index(fields=['lead', '-replied_at']),
             models.Index(fields=['sequence', '-replied_at']),
             models.Index(fields=['campaign', 'sequence', '-replied_at']),
+            models.Index(fields=['interest_level', 'replied_at']),
         ]
     
     def __str__(self):
@@ -998,6 +1195,13 @@ class ReplySubSequenceRun(models.Model):
     completed = models.BooleanField(default=False, help_text='All steps sent.')
     cancelled = models.BooleanField(default=False, help_text='Run stopped early (e.g. lead replied to the sub-seq itself).')
 
+    # Due-queue (denormalized) — same contract as CampaignContact.next_send_at.
+    next_send_at = models.DateTimeField(null=True, blank=True,
+                                        help_text='When the next sub-sequence step is due (null = nothing pending)')
+    email_account = models.ForeignKey('EmailAccount', on_delete=models.SET_NULL, null=True, blank=True,
+                                      related_name='scheduled_sub_sequence_runs',
+                                      help_text='Mailbox the next step is sent from')
+
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -1008,11 +1212,60 @@ class ReplySubSequenceRun(models.Model):
             # The sender's hot query: pending runs for a campaign.
             models.Index(fields=['campaign', 'completed', 'cancelled']),
             models.Index(fields=['lead', 'created_at']),
+            models.Index(fields=['next_send_at']),
+            models.Index(fields=['email_account', 'next_send_at']),
         ]
 
     def __str__(self):
         return f"Run: {self.lead.email} / {self.sub_sequence.name} (step {self.step}{'✓' if self.completed else ''})"
 
+    def save(self, *args, **kwargs):
+        self.refresh_schedule()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = {*update_fields, 'next_send_at', 'email_account'}
+        super().save(*args, **kwargs)
+
+    def compute_next_send_at(self):
+        """When the next sub-sequence step is due, or None if the run is over.
+
+        The first step is anchored on the reply's timestamp, later steps on
+        last_sent_at (see send_sequence_emails._process_reply_run). Runs
+        past their last step, or whose sub-sequence was deactivated, are
+        due now so the sender can close them out.
+        """
+        if self.completed or self.cancelled or not self.sub_sequence_id:
+            return None
+        sub_sequence = self.sub_sequence
+        now = timezone.now()
+        next_step_number = self.step + 1
+        if not sub_sequence.is_active or next_step_number > sub_sequence.step_count:
+            return now
+        step = _sequence_step(sub_sequence, next_step_number)
+        if step is None:
+            return None
+        delay = _step_delay(step)
+        if self.step == 0:
+            reference = (self.reply.replied_at if self.reply_id else None) or self.created_at or now
+            return reference if delay.total_seconds() <= 60 else reference + delay
+        if not self.last_sent_at:
+            return now
+        return self.last_sent_at + delay
+
+    def refresh_schedule(self):
+        """Recompute next_send_at / email_account in memory (no save)."""
+        self.next_send_at = self.compute_next_send_at()
+        self.email_account_id = _sending_account_id(self.sub_sequence) if self.sub_sequence_id else None
+
+    @classmethod
+    def refresh_schedules(cls, runs):
+        """Recompute and persist the due-queue columns for ``runs``."""
+        runs = list(runs)
+        for run in runs:
+            run.refresh_schedule()
+        cls.objects.bulk_update(runs, ['next_send_at', 'email_account'], batch_size=500)
+        return len(runs)
+
 
 @receiver(post_save, sender=Reply)
 def mark_triggering_email_opened_on_reply(sender, instance, created, **kwargs):
@@ -1052,20 +1305,30 @@ def mark_triggering_email_opened_on_reply(sender, instance, created, **kwargs):
 @receiver(m2m_changed, sender=Campaign.leads.through)
 def create_campaign_contact(sender, instance, action, pk_set, **kwargs):
     """Automatically create CampaignContact when leads are added to a campaign"""
-    if action == 'post_add':
-        active_sequences = list(instance.email_sequences.filter(is_active=True))
+    if action == 'post_add' and pk_set:
+        active_sequences = list(
+            instance.email_sequences.filter(is_active=True)
+            .select_related('campaign').prefetch_related('steps')
+        )
         if not active_sequences:
             return
 
-        for lead_id in pk_set:
-            lead = Lead.objects.get(pk=lead_id)
+        # Set-based: a bulk lead import adds up to a thousand leads per call.
+        existing = set(
+            CampaignContact.objects.filter(
+                campaign=instance, lead_id__in=pk_set, sequence__in=active_sequences,
+            ).values_list('lead_id', 'sequence_id')
+        )
+        new_contacts = []
+        for lead_id in sorted(pk_set):
             for seq in active_sequences:
-                CampaignContact.objects.get_or_create(
-                    campaign=instance,
-                    lead=lead,
-                    sequence=seq,
-                    defaults={'current_step': 0},
-                )
+                if (lead_id, seq.id) in existing:
+                    continue
+                contact = CampaignContact(campaign=instance, lead_id=lead_id, sequence=seq, current_step=0)
+                # bulk_create skips save(), so fill the due-queue columns here.
+                contact.refresh_schedule()
+                new_contacts.append(contact)
+        CampaignContact.objects.bulk_create(new_contacts, batch_size=500)
 
 
 class SavedGraphPrompt(models.Model):
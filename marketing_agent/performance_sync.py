@@ -1,11 +1,11 @@
 """
-Sync CampaignPerformance table with live data from EmailSendHistory & Reply.
+Sync CampaignPerformance table with live data from the campaign metric
+rollups (campaign_rollups.py) & Reply.
 Uses the same formulas as the frontend dashboard so numbers always match.
 """
 from datetime import date
 
-from django.db.models import Q, Count
-
+from marketing_agent import campaign_rollups
 from marketing_agent.models import (
     Campaign, CampaignPerformance, EmailSendHistory, Reply,
 )
@@ -25,25 +25,20 @@ def sync_campaign_performance(campaign: Campaign):
     today = date.today()
     # Exclude reply-draft agent's one-off sends (template_id=None from send_raw_email);
     # they belong to the reply agent, not the marketing campaign's metrics.
+    # The rollups apply the same exclusion.
     email_sends = EmailSendHistory.objects.filter(
         campaign=campaign, email_template__isnull=False
     )
 
-    total_sent = email_sends.filter(
-        status__in=['sent', 'delivered', 'opened', 'clicked']
-    ).count()
-    total_opened = email_sends.filter(
-        status__in=['opened', 'clicked']
-    ).count()
-    total_clicked = email_sends.filter(status='clicked').count()
-    total_replied = Reply.objects.filter(campaign=campaign).count()
-
-    positive_replies = Reply.objects.filter(
-        campaign=campaign,
-        interest_level__in=['positive', 'neutral', 'requested_info', 'objection'],
-    ).count()
+    totals = campaign_rollups.campaign_totals([campaign.id])[campaign.id]
+    total_sent = totals['sent']
+    total_opened = totals['opened']
+    total_clicked = totals['clicked']
+    total_replied = totals['replies']
+    positive_replies = totals['positive_replies']
 
-    # Leads engagement: % of leads (sent at least one email) who opened/clicked/replied
+    # Leads engagement: % of leads (sent at least one email) who opened/clicked/replied.
+    # A distinct-lead count doesn't roll up by day, so it still reads the rows.
     leads_sent_to = (
         email_sends.values_list('lead_id', flat=True).distinct().count()
     )
@@ -0,0 +1,294 @@
+"""
+Compiled email templates and click/open tracking for campaign sends.
+
+Rendering used to build a fresh Engine() and re-parse the template source for
+every recipient, then run several regex passes over the rendered HTML to add
+the tracking pixel and rewrite links. Both depend only on the template, not
+on the recipient, so they are done once here:
+
+- compile_source() parses a template string once (LRU by source).
+- get_compiled_template() holds the parsed subject/html/text for an
+  EmailTemplate, keyed on (template id, updated_at) so an edit recompiles.
+- CompiledEmailTemplate.tracked_html() applies the tracking rewrite to the
+  template *source* with a placeholder where the token goes, and compiles
+  that. Per recipient the token is then filled in like any other context
+  variable instead of re-scanning the HTML. Templates whose link hrefs are
+  themselves template expressions (href="{{ url }}") can't be rewritten
+  ahead of time; for those tracked_html() returns None and the caller falls
+  back to apply_tracking() on the rendered HTML.
+"""
+from collections import OrderedDict
+from functools import lru_cache
+from urllib.parse import quote as url_quote
+import logging
+import re
+import threading
+from typing import Optional
+
+from django.conf import settings
+from django.template import Context, Engine
+
+logger = logging.getLogger(__name__)
+
+# One engine for every email template. Engine() loads the builtin tag and
+# filter libraries, which is most of what used to make per-recipient
+# rendering slow.
+_ENGINE = Engine()
+
+# Context variable the pre-tracked HTML uses for the send's tracking token.
+TRACKING_TOKEN_VAR = 'email_tracking_token'
+_TOKEN_PLACEHOLDER = 'xTRACKINGxTOKENx'
+
+# Compiled EmailTemplates kept per process (LRU).
+MAX_COMPILED_TEMPLATES = 256
+
+_BODY_OPEN_RE = re.compile(r'(<body[^>]*>)', re.IGNORECASE)
+_HTML_OPEN_RE = re.compile(r'(<html[^>]*>)\s*', re.IGNORECASE)
+_BODY_CLOSE_RE = re.compile(r'</body>', re.IGNORECASE)
+# First pass: href="url", href='url' and href=url. Second pass picks up
+# quoted hrefs with spaces or other characters the first pattern skips.
+_LINK_RES = (
+    re.compile(r'(<a\s+[^>]*?href\s*=\s*)(["\']?)([^"\'\s>]+?)(\2)', re.IGNORECASE),
+    re.compile(r'(<a\s+[^>]*?href\s*=\s*)(["\'])([^"\']+?)(\2)', re.IGNORECASE),
+)
+_PLACEHOLDER_RE = re.compile(r'\{\{[^}]+\}\}')
+
+
+@lru_cache(maxsize=512)
+def compile_source(source: str):
+    """Parse a template string once. Raises TemplateSyntaxError like from_string."""
+    return _ENGINE.from_string(source)
+
+
+def fallback_render(source: str, context_vars: dict) -> str:
+    """Plain {{key}} substitution for sources Django can't parse or render."""
+    content = source
+    for key, value in context_vars.items():
+        content = content.replace(f'{{{{{key}}}}}', str(value))
+    # Also remove any remaining undefined variable patterns
+    return _PLACEHOLDER_RE.sub('', content)
+
+
+def render_source(source: str, context_vars: dict, template=None) -> str:
+    """Render ``source`` (pre-compiled as ``template`` if given) with autoescape off."""
+    try:
+        if template is None:
+            template = compile_source(source)
+        return template.render(Context(context_vars, autoescape=False))
+    except Exception as e:
+        logger.error(f"Error rendering email template: {str(e)}")
+        return fallback_render(source, context_vars)
+
+
+def tracking_base_url() -> str:
+    """Root URL the tracking endpoints (/token?t=...) are served from."""
+    # Method 1: Check SITE_URL setting (recommended)
+    base_url = getattr(settings, 'SITE_URL', None)
+
+    # Method 2: Try to get from ALLOWED_HOSTS
+    if not base_url and hasattr(settings, 'ALLOWED_HOSTS') and settings.ALLOWED_HOSTS:
+        host = settings.ALLOWED_HOSTS[0]
+        if host != '*':
+            protocol = 'https' if getattr(settings, 'USE_HTTPS', False) else 'http'
+            # Add port for development if not specified
+            if ':' not in host and protocol == 'http':
+                base_url = f"{protocol}://{host}:8000"
+            else:
+                base_url = f"{protocol}://{host}"
+
+    # Method 3: Final fallback to localhost (for development only)
+    if not base_url:
+        base_url = 'http://127.0.0.1:8000'  # Default for local development
+        logger.warning(
+            f"SITE_URL not configured in settings. Using {base_url}. "
+            "Tracking URLs may not work from external email clients. "
+            "To fix: Add SITE_URL = 'http://your-domain.com' to settings.py or .env file"
+        )
+
+    # Clean up base_url - remove trailing slashes and any path components
+    # SITE_URL should be just the domain (e.g., https://example.com), not https://example.com/marketing/
+    base_url = base_url.rstrip('/')
+    # If base_url ends with /marketing, remove it (tracking URLs are at root level)
+    if base_url.endswith('/marketing'):
+        base_url = base_url[:-9]  # Remove '/marketing'
+    return base_url
+
+
+def apply_tracking(html_content: str, tracking_token: str, base_url: str,
+                   campaign_id=None, wrapped_hrefs=None) -> str:
+    """
+    Add the open pixel, a "View in browser" link and wrap every link with a
+    tracking redirect. ``wrapped_hrefs``, if given, collects the original
+    hrefs that were rewritten.
+    """
+    # Add tracking pixel using simple token URL format: /token?t=TOKEN
+    # This is simpler and works better with email clients
+    tracking_pixel_url = f"{base_url}/token?t={tracking_token}"
+    # "View in browser" link: when user clicks it we count as open (works when pixel is blocked by Gmail etc.)
+    view_in_browser_link = (
+        f'<p style="font-size:11px;color:#888;margin:0 0 12px 0;">'
+        f'<a href="{tracking_pixel_url}" style="color:#888;text-decoration:underline;">View in browser</a>'
+        f'</p>'
+    )
+    # Use multiple pixel methods for better email client compatibility
+    tracking_pixel = (
+        f'<img src="{tracking_pixel_url}" width="1" height="1" style="display:none; width:1px; height:1px; border:0;" alt="" />'
+        f'<img src="{tracking_pixel_url}" width="1" height="1" border="0" alt="" style="position:absolute; visibility:hidden; width:1px; height:1px;" />'
+    )
+    lowered = html_content.lower()
+    # Inject "View in browser" at the start so open is counted when user clicks if pixel is blocked
+    if '<body' in lowered:
+        html_content = _BODY_OPEN_RE.sub(lambda m: m.group(1) + view_in_browser_link, html_content, count=1)
+    elif '<html' in lowered:
+        html_content = _HTML_OPEN_RE.sub(lambda m: m.group(1) + view_in_browser_link, html_content, count=1)
+    else:
+        html_content = view_in_browser_link + html_content
+    # Try to inject before </body>
+    if '</body>' in html_content.lower():
+        html_content = _BODY_CLOSE_RE.sub(lambda m: tracking_pixel + '</body>', html_content)
+    else:
+        # If no body tag, append at the end
+        html_content += tracking_pixel
+
+    # Wrap all links with tracking URLs
+    def wrap_link(match):
+        full_tag = match.group(0)
+        href = match.group(3)  # The URL part (group 3 in the regex below)
+
+        # Skip if already a tracking URL or mailto/tel/javascript/data links
+        if ('/token?' in href or 'track/email' in href or
+                href.startswith('mailto:') or
+                href.startswith('tel:') or
+                href.startswith('javascript:') or
+                href.startswith('data:')):
+            return full_tag
+
+        # Handle anchor links (#) - convert to default campaign page
+        original_href = href
+        if href == '#' or href.strip() == '' or href.startswith('#'):
+            # Default to campaign page if available
+            if campaign_id:
+                href = f'/marketing/campaigns/{campaign_id}/'
+            else:
+                href = '/marketing/'
+            logger.debug(f"[EMAIL TRACKING] Converted anchor link: {original_href} -> {href}")
+
+        # Make sure href is absolute if it's relative
+        if not href.startswith('http://') and not href.startswith('https://'):
+            if not href.startswith('/'):
+                # Relative path, make it absolute
+                href = f'/{href}'
+
+        # URL encode the href for the tracking URL
+        encoded_href = url_quote(href, safe=':/?#[]@!$&\'()*+,;=')
+
+        # Create tracked URL using simple token format: /token?t=TOKEN&url=ORIGINAL_URL
+        tracked_url = f"{base_url}/token?t={tracking_token}&url={encoded_href}"
+        if wrapped_hrefs is not None:
+            wrapped_hrefs.append(original_href)
+
+        # Replace the href in the full tag
+        # Match: href="original" or href='original' or href=original
+        pattern = r'(href=)(["\']?)' + re.escape(original_href) + r'(\2)'
+        return re.sub(
+            pattern, lambda m: m.group(1) + m.group(2) + tracked_url + m.group(3),
+            full_tag, flags=re.IGNORECASE,
+        )
+
+    for link_re in _LINK_RES:
+        html_content = link_re.sub(wrap_link, html_content)
+    return html_content
+
+
+class CompiledEmailTemplate:
+    """Parsed subject/html/text of one EmailTemplate version."""
+
+    def __init__(self, template):
+        self.template_id = template.pk
+        self.updated_at = template.updated_at
+        self.subject_source = template.subject or ''
+        self.html_source = template.html_content or ''
+        self.text_source = template.text_content or ''
+        self.subject = self._compile(self.subject_source)
+        self.html = self._compile(self.html_source)
+        self.text = self._compile(self.text_source) if self.text_source else None
+        # (base_url, campaign_id) -> compiled tracked html, or None when the
+        # links can't be rewritten ahead of rendering.
+        self._tracked = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _compile(source):
+        try:
+            return compile_source(source)
+        except Exception as e:
+            # render_source() falls back to plain substitution for this part.
+            logger.error(f"Error compiling email template: {str(e)}")
+            return None
+
+    def render_subject(self, context_vars: dict) -> str:
+        return render_source(self.subject_source, context_vars, self.subject)
+
+    def render_html(self, context_vars: dict) -> str:
+        return render_source(self.html_source, context_vars, self.html)
+
+    def render_text(self, context_vars: dict) -> Optional[str]:
+        if not self.text_source:
+            return None
+        return render_source(self.text_source, context_vars, self.text)
+
+    def tracked_html(self, base_url: str, campaign_id=None):
+        """Compiled HTML with tracking applied, or None if it must be tracked per render."""
+        key = (base_url, campaign_id)
+        if key in self._tracked:
+            return self._tracked[key]
+        compiled = None
+        if self.html is not None and 'verbatim' not in self.html_source:
+            wrapped = []
+            source = apply_tracking(
+                self.html_source, _TOKEN_PLACEHOLDER, base_url, campaign_id, wrapped_hrefs=wrapped,
+            )
+            # A templated href would be URL-encoded into the redirect and never
+            # rendered, so those templates are tracked after rendering instead.
+            if not any('{' in href for href in wrapped):
+                try:
+                    compiled = compile_source(
+                        source.replace(_TOKEN_PLACEHOLDER, '{{ %s }}' % TRACKING_TOKEN_VAR)
+                    )
+                except Exception as e:
+                    logger.warning(f"Could not pre-compile tracked email template {self.template_id}: {e}")
+        with self._lock:
+            self._tracked[key] = compiled
+        return compiled
+
+    def render_tracked_html(self, context_vars: dict, tracking_token: str,
+                            base_url: str, campaign_id=None) -> str:
+        tracked = self.tracked_html(base_url, campaign_id)
+        if tracked is not None:
+            try:
+                return tracked.render(Context({**context_vars, TRACKING_TOKEN_VAR: tracking_token}, autoescape=False))
+            except Exception as e:
+                logger.error(f"Error rendering tracked email template: {str(e)}")
+        return apply_tracking(self.render_html(context_vars), tracking_token, base_url, campaign_id)
+
+
+_compiled_templates = OrderedDict()
+_compiled_lock = threading.Lock()
+
+
+def get_compiled_template(template) -> CompiledEmailTemplate:
+    """CompiledEmailTemplate for ``template``, cached on (id, updated_at)."""
+    if template.pk is None:
+        return CompiledEmailTemplate(template)
+    with _compiled_lock:
+        compiled = _compiled_templates.get(template.pk)
+        if compiled is not None and compiled.updated_at == template.updated_at:
+            _compiled_templates.move_to_end(template.pk)
+            return compiled
+    compiled = CompiledEmailTemplate(template)
+    with _compiled_lock:
+        _compiled_templates[template.pk] = compiled
+        _compiled_templates.move_to_end(template.pk)
+        while len(_compiled_templates) > MAX_COMPILED_TEMPLATES:
+            _compiled_templates.popitem(last=False)
+    return compiled
@@ -7,8 +7,11 @@ from django.template import Context, Template
 from django.conf import settings
 from django.utils import timezone
 from marketing_agent.models import Campaign, Lead, EmailTemplate, EmailSendHistory
+from marketing_agent.services.email_rendering import (
+    apply_tracking, get_compiled_template, render_source, tracking_base_url,
+)
+from marketing_agent.services.send_throttle import reserve_send
 import re
-import time
 from datetime import timedelta
 from typing import Dict, Optional, List
 import logging
@@ -19,28 +22,29 @@ logger = logging.getLogger(__name__)
 class EmailService:
     """Service for sending campaign emails with spam prevention and tracking"""
     
-    # Rate limiting: max emails per minute
-    MAX_EMAILS_PER_MINUTE = 30
-    
     def __init__(self):
         self.sent_count = 0
-        self.minute_start = timezone.now()
     
-    def check_rate_limit(self):
-        """Check if we're within rate limits"""
-        now = timezone.now()
-        if (now - self.minute_start).total_seconds() >= 60:
-            # Reset counter for new minute
-            self.sent_count = 0
-            self.minute_start = now
-        
-        if self.sent_count >= self.MAX_EMAILS_PER_MINUTE:
-            # Wait until next minute
-            wait_seconds = 60 - (now - self.minute_start).total_seconds()
-            if wait_seconds > 0:
-                time.sleep(wait_seconds)
-                self.sent_count = 0
-                self.minute_start = timezone.now()
+    def check_rate_limit(self, email_account):
+        """
+        Take a send slot for ``email_account`` from the per-mailbox scheduler
+        shared by all workers (services/send_throttle.py). Returns None if the
+        email may go out now, otherwise the time the account has capacity
+        again; the caller defers the send rather than waiting for it.
+        """
+        if email_account is None:
+            return None
+        return reserve_send(email_account)
+
+    @staticmethod
+    def _deferred_result(email_account, retry_at) -> Dict:
+        """Result for a send held back by the rate scheduler (nothing was recorded)."""
+        return {
+            'success': False,
+            'deferred': True,
+            'retry_at': retry_at,
+            'error': f'Send rate limit reached for {email_account.email}; deferred until {retry_at.isoformat()}',
+        }
     
     def calculate_spam_score(self, subject: str, html_content: str, text_content: str = '') -> float:
         """
@@ -92,28 +96,9 @@ class EmailService:
         return min(score, 100.0)
     
     def render_email_content(self, template_content: str, context_vars: Dict) -> str:
-        """Render email template with context variables"""
-        try:
-            from django.template import Engine, Context
-            # Create template engine with autoescape disabled for HTML emails
-            # But set undefined variables to empty string (Django default behavior)
-            engine = Engine()
-            template = engine.from_string(template_content)
-            context = Context(context_vars, autoescape=False)
-            rendered = template.render(context)
-            # Remove any undefined variable patterns that might have rendered as empty
-            # This shouldn't happen with Django templates, but just in case
-            return rendered
-        except Exception as e:
-            logger.error(f"Error rendering email template: {str(e)}")
-            # Fallback: simple string replacement
-            content = template_content
-            for key, value in context_vars.items():
-                content = content.replace(f'{{{{{key}}}}}', str(value))
-            # Also remove any remaining undefined variable patterns
-            import re
-            content = re.sub(r'\{\{[^}]+\}\}', '', content)
-            return content
+        """Render email template with context variables (autoescape off; the
+        parsed template is cached by source, see email_rendering)."""
+        return render_source(template_content, context_vars)
 
     def _get_lead_context(self, lead: Lead, campaign: Campaign) -> Dict:
         """Build context variables for template rendering (first_name, last_name, etc.). Used by send_email and render_with_lead."""
@@ -165,6 +150,14 @@ class EmailService:
         """
         recipient_email = test_email or (getattr(lead, 'email', None) or '')
         
+        # Use provided email account, or get default
+        from marketing_agent.models import EmailAccount
+        if not email_account:
+            email_account = EmailAccount.objects.filter(
+                owner=campaign.owner,
+                is_active=True
+            ).order_by('-is_default', '-created_at').first()
+
         # Ensure we have the latest lead data from DB (sequence sends may use cached contact.lead)
         if getattr(lead, 'pk', None) and getattr(lead, '_state', None):
             try:
@@ -192,13 +185,15 @@ class EmailService:
                     context_vars['name'] = context_vars['full_name']
                     logger.info(f"Email send: filled first_name/name from recipient local part for {recipient_email}")
 
-        # Render email content (use empty string if template fields are None)
+        # Render email content (use empty string if template fields are None).
+        # Parsed once per template version and reused across recipients.
         try:
-            subject = self.render_email_content(template.subject or '', context_vars)
-            html_content = self.render_email_content(template.html_content or '', context_vars)
+            compiled = get_compiled_template(template)
+            subject = compiled.render_subject(context_vars)
+            html_content = compiled.render_html(context_vars)
             text_content = template.text_content
             if text_content:
-                text_content = self.render_email_content(text_content, context_vars)
+                text_content = compiled.render_text(context_vars)
             else:
                 text_content = re.sub(r'<[^>]+>', '', html_content)
             # Safety net: if output still has unreplaced placeholders, force context from recipient and re-render
@@ -215,10 +210,10 @@ class EmailService:
                     context_vars['lead_name'] = context_vars['first_name'] or context_vars.get('last_name') or local
                     context_vars['full_name'] = f"{context_vars['first_name']} {context_vars['last_name']}".strip() or context_vars['lead_name']
                     context_vars['name'] = context_vars['full_name']
-                    subject = self.render_email_content(template.subject or '', context_vars)
-                    html_content = self.render_email_content(template.html_content or '', context_vars)
+                    subject = compiled.render_subject(context_vars)
+                    html_content = compiled.render_html(context_vars)
                     if text_content and template.text_content:
-                        text_content = self.render_email_content(template.text_content or '', context_vars)
+                        text_content = compiled.render_text(context_vars)
                     else:
                         text_content = re.sub(r'<[^>]+>', '', html_content)
                     logger.warning(f"Email send: placeholders were still present; re-rendered with context from {recipient_email}")
@@ -229,11 +224,17 @@ class EmailService:
                 'error': f'Template rendering error: {str(e)}'
             }
         
-        # Check rate limit
-        self.check_rate_limit()
-        
         # Test emails (when test_email is set) are not saved to history
         save_to_history = test_email is None
+
+        # Take a send slot only once the email rendered, so a broken template
+        # doesn't burn the mailbox's quota; test sends aren't throttled. A
+        # throttled mailbox defers the send to the returned ETA; nothing is
+        # written to the send history.
+        if save_to_history:
+            retry_at = self.check_rate_limit(email_account)
+            if retry_at:
+                return self._deferred_result(email_account, retry_at)
         send_history = None
         
         if save_to_history:
@@ -254,18 +255,12 @@ class EmailService:
             send_history.tracking_token = send_history.generate_tracking_token()
             send_history.save()
             # Add tracking to HTML content
-            html_content = self._add_email_tracking(html_content, send_history)
+            html_content = self._add_email_tracking(
+                html_content, send_history, compiled=compiled, context_vars=context_vars,
+            )
         
         # Send email
         try:
-            # Use provided email account, or get default
-            from marketing_agent.models import EmailAccount
-            if not email_account:
-                email_account = EmailAccount.objects.filter(
-                    owner=campaign.owner,
-                    is_active=True
-            ).order_by('-is_default', '-created_at').first()
-            
             if not email_account:
                 raise ValueError('No active email account found. Please add an email account first.')
             
@@ -406,7 +401,9 @@ class EmailService:
         if not email_account:
             return {'success': False, 'error': 'No active email account found.'}
 
-        self.check_rate_limit()
+        retry_at = self.check_rate_limit(email_account)
+        if retry_at:
+            return self._deferred_result(email_account, retry_at)
 
         send_history = None
         if campaign is not None and lead is not None:
@@ -615,47 +612,17 @@ class EmailService:
             except Exception:
                 pass
 
-    def _add_email_tracking(self, html_content: str, send_history: EmailSendHistory) -> str:
+    def _add_email_tracking(self, html_content: str, send_history: EmailSendHistory,
+                            compiled=None, context_vars: Optional[Dict] = None) -> str:
         """
-        Add tracking pixel and wrap links with tracking URLs
+        Add tracking pixel and wrap links with tracking URLs.
+
+        With ``compiled`` (and the context ``html_content`` was rendered with)
+        the template's pre-tracked HTML is rendered with this send's token
+        instead of rewriting ``html_content`` link by link.
         """
-        from django.conf import settings
-        from django.urls import reverse
-        
         try:
-            # Get base URL for tracking endpoints
-            # Try multiple methods to get the correct base URL
-            base_url = None
-            
-            # Method 1: Check SITE_URL setting (recommended)
-            base_url = getattr(settings, 'SITE_URL', None)
-            
-            # Method 2: Try to get from ALLOWED_HOSTS
-            if not base_url and hasattr(settings, 'ALLOWED_HOSTS') and settings.ALLOWED_HOSTS:
-                host = settings.ALLOWED_HOSTS[0]
-                if host != '*':
-                    protocol = 'https' if getattr(settings, 'USE_HTTPS', False) else 'http'
-                    # Add port for development if not specified
-                    if ':' not in host and protocol == 'http':
-                        base_url = f"{protocol}://{host}:8000"
-                    else:
-                        base_url = f"{protocol}://{host}"
-            
-            # Method 3: Final fallback to localhost (for development only)
-            if not base_url:
-                base_url = 'http://127.0.0.1:8000'  # Default for local development
-                logger.warning(
-                    f"SITE_URL not configured in settings. Using {base_url}. "
-                    "Tracking URLs may not work from external email clients. "
-                    "To fix: Add SITE_URL = 'http://your-domain.com' to settings.py or .env file"
-                )
-            
-            # Clean up base_url - remove trailing slashes and any path components
-            # SITE_URL should be just the domain (e.g., https://example.com), not https://example.com/marketing/
-            base_url = base_url.rstrip('/')
-            # If base_url ends with /marketing, remove it (tracking URLs are at root level)
-            if base_url.endswith('/marketing'):
-                base_url = base_url[:-9]  # Remove '/marketing'
+            base_url = tracking_base_url()
             logger.info(f"[EMAIL TRACKING] Using base URL: {base_url}")
             
             tracking_token = send_history.tracking_token
@@ -664,112 +631,18 @@ class EmailService:
                 logger.error(f"No tracking token for EmailSendHistory {send_history.id}")
                 return html_content
             
-            # Add tracking pixel using simple token URL format: /token?t=TOKEN
-            # This is simpler and works better with email clients
-            tracking_pixel_url = f"{base_url}/token?t={tracking_token}"
-            # "View in browser" link: when user clicks it we count as open (works when pixel is blocked by Gmail etc.)
-            view_in_browser_link = (
-                f'<p style="font-size:11px;color:#888;margin:0 0 12px 0;">'
-                f'<a href="{tracking_pixel_url}" style="color:#888;text-decoration:underline;">View in browser</a>'
-                f'</p>'
-            )
-            # Use multiple pixel methods for better email client compatibility
-            tracking_pixel = (
-                f'<img src="{tracking_pixel_url}" width="1" height="1" style="display:none; width:1px; height:1px; border:0;" alt="" />'
-                f'<img src="{tracking_pixel_url}" width="1" height="1" border="0" alt="" style="position:absolute; visibility:hidden; width:1px; height:1px;" />'
-            )
-            # Inject "View in browser" at the start so open is counted when user clicks if pixel is blocked
-            if '<body' in html_content.lower():
-                html_content = re.sub(r'(<body[^>]*>)', r'\1' + view_in_browser_link, html_content, count=1, flags=re.IGNORECASE)
-            elif '<html' in html_content.lower():
-                html_content = re.sub(r'(<html[^>]*>)\s*', r'\1' + view_in_browser_link, html_content, count=1, flags=re.IGNORECASE)
-            else:
-                html_content = view_in_browser_link + html_content
-            # Try to inject before </body>
-            if '</body>' in html_content.lower():
-                html_content = re.sub(r'</body>', tracking_pixel + '</body>', html_content, flags=re.IGNORECASE)
+            if compiled is not None and context_vars is not None:
+                html_content = compiled.render_tracked_html(
+                    context_vars, tracking_token, base_url, send_history.campaign_id,
+                )
             else:
-                # If no body tag, append at the end
-                html_content += tracking_pixel
-            
-            # Wrap all links with tracking URLs
-            def wrap_link(match):
-                full_tag = match.group(0)
-                href = match.group(3)  # The URL part (group 3 in the regex below)
-                
-                logger.info(f"[EMAIL TRACKING] Processing link: {full_tag[:100]}... href={href}")
-                
-                # Skip if already a tracking URL or mailto/tel/javascript/data links
-                if ('/token?' in href or 'track/email' in href or 
-                    href.startswith('mailto:') or 
-                    href.startswith('tel:') or 
-                    href.startswith('javascript:') or
-                    href.startswith('data:')):
-                    logger.info(f"[EMAIL TRACKING] Skipping link (already tracked or special): {href}")
-                    return full_tag
-                
-                # Handle anchor links (#) - convert to default campaign page
-                original_href = href
-                if href == '#' or href.strip() == '' or href.startswith('#'):
-                    logger.warning(f"[EMAIL TRACKING] Found anchor link (href='{href}') - converting to campaign page")
-                    # Default to campaign page if available
-                    if send_history.campaign:
-                        href = f'/marketing/campaigns/{send_history.campaign.id}/'
-                    else:
-                        href = '/marketing/'
-                    logger.info(f"[EMAIL TRACKING] Converted anchor link: {original_href} -> {href}")
-                
-                # Make sure href is absolute if it's relative
-                if not href.startswith('http://') and not href.startswith('https://'):
-                    if href.startswith('/'):
-                        # Already absolute path, keep as is for encoding
-                        pass
-                    else:
-                        # Relative path, make it absolute
-                        href = f'/{href}'
-                
-                # URL encode the href for the tracking URL
-                from urllib.parse import quote as url_quote
-                encoded_href = url_quote(href, safe=':/?#[]@!$&\'()*+,;=')
-                
-                # Create tracked URL using simple token format: /token?t=TOKEN&url=ORIGINAL_URL
-                tracked_url = f"{base_url}/token?t={tracking_token}&url={encoded_href}"
-                logger.info(f"[EMAIL TRACKING] Wrapping link: {original_href} -> {tracked_url}")
-                
-                # Replace the href in the full tag - use regex for reliable replacement
-                # Match: href="original" or href='original' or href=original
-                pattern = r'(href=)(["\']?)' + re.escape(original_href) + r'(\2)'
-                replacement = r'\1\2' + tracked_url + r'\3'
-                result = re.sub(pattern, replacement, full_tag, flags=re.IGNORECASE)
-                
-                logger.info(f"[EMAIL TRACKING] Link replaced: {full_tag[:80]}... -> {result[:80]}...")
-                return result
-            
-            # Find all <a href="..."> tags and wrap them
-            # Pattern handles: href="url", href='url', and href=url (without quotes)
-            # Match: <a ... href="value" ...> or <a ... href='value' ...> or <a ... href=value ...>
-            # Use non-greedy matching and handle special characters in href values
-            html_content = re.sub(
-                r'(<a\s+[^>]*?href\s*=\s*)(["\']?)([^"\'\s>]+?)(\2)',
-                wrap_link,
-                html_content,
-                flags=re.IGNORECASE
-            )
-            
-            # Also handle cases where href might have spaces or special formatting
-            # Second pass for any links that might have been missed
-            html_content = re.sub(
-                r'(<a\s+[^>]*?href\s*=\s*)(["\'])([^"\']+?)(\2)',
-                wrap_link,
-                html_content,
-                flags=re.IGNORECASE
-            )
+                html_content = apply_tracking(html_content, tracking_token, base_url, send_history.campaign_id)
             
             # Log tracking info
             logger.info(
                 f"[EMAIL TRACKING] Added tracking to email {send_history.id}, "
                 f"Token: {tracking_token[:10]}..., "
-                f"Pixel: {tracking_pixel_url}"
+                f"Pixel: {base_url}/token?t={tracking_token}"
             )
             
         except Exception as e:
@@ -778,6 +651,45 @@ class EmailService:
         
         return html_content
     
+    def render_batch(
+        self,
+        template: EmailTemplate,
+        campaign: Campaign,
+        leads: List[Lead],
+        tracking_tokens: Optional[Dict[int, str]] = None,
+    ) -> List[Dict]:
+        """
+        Render one template for every lead of a send cycle.
+        
+        The template is parsed (and its tracking links resolved) once; each lead
+        only costs a render. ``tracking_tokens`` maps lead id -> tracking token;
+        leads with a token get tracked HTML, as send_email would produce.
+        
+        Returns:
+            List of dicts (lead, subject, html_content, text_content), in ``leads`` order
+        """
+        compiled = get_compiled_template(template)
+        tracking_tokens = tracking_tokens or {}
+        base_url = tracking_base_url() if tracking_tokens else None
+        rendered = []
+        for lead in leads:
+            context_vars = self._get_lead_context(lead, campaign)
+            html_content = compiled.render_html(context_vars)
+            if template.text_content:
+                text_content = compiled.render_text(context_vars)
+            else:
+                text_content = re.sub(r'<[^>]+>', '', html_content)
+            token = tracking_tokens.get(lead.id)
+            if token:
+                html_content = compiled.render_tracked_html(context_vars, token, base_url, campaign.id)
+            rendered.append({
+                'lead': lead,
+                'subject': compiled.render_subject(context_vars),
+                'html_content': html_content,
+                'text_content': text_content,
+            })
+        return rendered
+    
     def select_ab_test_template(self, templates: List[EmailTemplate], lead_id: int) -> Optional[EmailTemplate]:
         """
         Select A/B test variant based on lead ID (deterministic selection)
@@ -0,0 +1,259 @@
+"""
+Set-based import of uploaded lead lists into a campaign.
+
+The three upload paths (the campaign upload API, the legacy upload_leads
+view and OutreachCampaignAgent's leads file) each loaded the whole file into
+a pandas DataFrame and then ran Lead.get_or_create, campaign.leads.add and a
+CampaignContact lookup per row, so a large list cost several queries per
+lead. import_campaign_leads() streams the file (core.tabular_import) and
+works IMPORT_CHUNK_SIZE rows at a time:
+
+- rows are normalized and validated in memory; rows repeating an email
+  earlier in the chunk are merged into it,
+- existing leads are found with one IN lookup on the (email, owner) unique
+  index, filled in (or overwritten) and written back with bulk_update,
+- new leads go in with bulk_create,
+- the chunk is linked to the campaign with a single leads.add() and the
+  missing CampaignContacts are bulk-created.
+
+Each chunk commits on its own, so a failure partway keeps the earlier
+chunks. The caller picks the per-path rules (name required, overwrite vs.
+fill-blank, contact defaults) through keyword arguments.
+"""
+from itertools import chain
+import logging
+
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from core.tabular_import import TabularImportError, chunked, iter_rows
+from marketing_agent.models import CampaignContact, EmailSequence, Lead
+
+logger = logging.getLogger(__name__)
+
+IMPORT_CHUNK_SIZE = 1000
+BULK_BATCH_SIZE = 500
+# Per-row rejection details kept for the response (counts are always exact).
+MAX_REJECTED_ROWS = 200
+
+# Lead field -> accepted (lowercased) column headers, first match wins.
+COLUMN_ALIASES = {
+    'first_name': ('first_name', 'first name'),
+    'last_name': ('last_name', 'last name'),
+    'phone': ('phone',),
+    'company': ('company',),
+    'job_title': ('job_title', 'job title'),
+    'source': ('source',),
+}
+UPDATABLE_FIELDS = ('first_name', 'last_name', 'phone', 'company', 'job_title', 'source')
+# Fields an overwriting import replaces on an existing lead (source is kept).
+OVERWRITE_FIELDS = ('first_name', 'last_name', 'phone', 'company', 'job_title')
+
+
+def _pick(row, aliases):
+    for key in aliases:
+        if row.get(key):
+            return row[key]
+    return ''
+
+
+def _normalize(row, require_name, default_source):
+    """(email, fields) for one row, or (None, rejection) when it is skipped."""
+    email = (row.get('email') or '').lower()
+    if not email:
+        return None, ('missing_email', 'email', 'Missing email', '')
+    fields = {field: _pick(row, aliases) for field, aliases in COLUMN_ALIASES.items()}
+    if not fields['first_name'] and not fields['last_name'] and row.get('name'):
+        parts = row['name'].split(None, 1)
+        fields['first_name'] = parts[0]
+        fields['last_name'] = parts[1] if len(parts) > 1 else ''
+    # First and last name are required (directly, or via a "name" column
+    # split into both) so personalization tokens are never silently blank.
+    if require_name and not fields['first_name'] and not fields['last_name']:
+        return None, ('missing_name', 'name', 'Missing name (first/last or name)', email)
+    fields['source'] = fields['source'] or default_source
+    for field, value in chain((('email', email),), fields.items()):
+        max_length = Lead._meta.get_field(field).max_length
+        if max_length and len(value) > max_length:
+            return None, ('other', field, f'Error: {field} is longer than {max_length} characters', email)
+    return email, fields
+
+
+def _merge(target, fields, overwrite):
+    """Apply a row's values to an existing lead or pending-row dict.
+    Returns True if anything changed."""
+    changed = False
+    get = target.get if isinstance(target, dict) else lambda f: getattr(target, f)
+    for field in UPDATABLE_FIELDS:
+        value = fields.get(field)
+        if not value or get(field) == value:
+            continue
+        if get(field) and not (overwrite and field in OVERWRITE_FIELDS):
+            continue
+        if isinstance(target, dict):
+            target[field] = value
+        else:
+            setattr(target, field, value)
+        changed = True
+    return changed
+
+
+def _create_leads(user, pending):
+    """bulk_create the new leads; row by row (get_or_create) if that fails,
+    e.g. another upload inserted one of the emails first. Returns the emails
+    that could not be saved, with the error."""
+    leads = [Lead(owner=user, email=email, **fields) for email, fields in pending.items()]
+    if not leads:
+        return {}
+    try:
+        with transaction.atomic():
+            Lead.objects.bulk_create(leads, batch_size=BULK_BATCH_SIZE)
+        return {}
+    except IntegrityError as exc:
+        logger.info(f"Lead import: batch insert conflicted ({exc}); inserting row by row")
+    failed = {}
+    for email, fields in pending.items():
+        try:
+            with transaction.atomic():
+                Lead.objects.get_or_create(email=email, owner=user, defaults=fields)
+        except Exception as exc:
+            failed[email] = exc
+    return failed
+
+
+def _ensure_contacts(campaign, lead_ids, sequence, contact_defaults):
+    """CampaignContact for every lead in ``lead_ids`` that has none yet."""
+    have = set(
+        CampaignContact.objects.filter(campaign=campaign, lead_id__in=lead_ids)
+        .values_list('lead_id', flat=True)
+    )
+    new_contacts = []
+    for lead_id in lead_ids:
+        if lead_id in have:
+            continue
+        contact = CampaignContact(campaign=campaign, lead_id=lead_id, sequence=sequence,
+                                  current_step=0, **contact_defaults)
+        # bulk_create skips save(), so fill the due-queue columns here.
+        contact.refresh_schedule()
+        new_contacts.append(contact)
+    CampaignContact.objects.bulk_create(new_contacts, batch_size=BULK_BATCH_SIZE)
+
+
+def _reject(result, reason, detail):
+    result['rejected_reasons'][reason] += 1
+    if len(result['rejected_rows']) < MAX_REJECTED_ROWS:
+        result['rejected_rows'].append(detail)
+
+
+def _import_chunk(campaign, user, chunk, options, result):
+    pending = {}    # email -> fields, in file order
+    row_emails = []  # (row_no, email) for every accepted row
+    for row_no, raw in chunk:
+        result['total_rows'] += 1
+        row = {key.lower().strip(): value for key, value in raw.items()}
+        email, fields = _normalize(row, options['require_name'], options['default_source'])
+        if email is None:
+            reason, field, message, value = fields
+            _reject(result, reason, {'row': row_no, 'field': field, 'reason': message, 'value': value})
+            continue
+        if email in pending:
+            _merge(pending[email], fields, options['overwrite'])
+        else:
+            pending[email] = fields
+        row_emails.append((row_no, email))
+    if not pending:
+        return
+
+    with transaction.atomic():
+        emails = list(pending)
+        # Keyed lowercased: a case-insensitive collation can match "Ann@x.com".
+        existing = {lead.email.lower(): lead for lead in Lead.objects.filter(owner=user, email__in=emails)}
+        now = timezone.now()
+        changed = []
+        for email, lead in existing.items():
+            fields = pending.pop(email, None)
+            if fields and _merge(lead, fields, options['overwrite']):
+                lead.updated_at = now
+                changed.append(lead)
+        Lead.objects.bulk_update(changed, [*UPDATABLE_FIELDS, 'updated_at'], batch_size=BULK_BATCH_SIZE)
+        failed = _create_leads(user, pending)
+
+        lead_ids = {
+            email.lower(): lead_id
+            for email, lead_id in Lead.objects.filter(
+                owner=user, email__in=[e for e in emails if e not in failed],
+            ).values_list('email', 'id')
+        }
+        # One add() for the chunk: Django inserts only the missing links and
+        # the m2m_changed receiver creates the sequence contacts.
+        campaign.leads.add(*lead_ids.values())
+        if options['create_contacts']:
+            _ensure_contacts(campaign, list(lead_ids.values()), options['sequence'], options['contact_defaults'])
+
+    result['new_count'] += len(pending) - len(failed)
+    result['updated_count'] += len(changed)
+    for row_no, email in row_emails:
+        if email in lead_ids:
+            result['created_count'] += 1
+        else:
+            _reject(result, 'other', {
+                'row': row_no, 'field': '',
+                'reason': f'Error: {str(failed.get(email, "not saved"))[:120]}', 'value': email,
+            })
+
+
+def import_campaign_leads(campaign, user, fileobj, file_name, *, require_name=True,
+                          overwrite=False, default_source='', create_contacts=True,
+                          contact_defaults=None):
+    """
+    Import a CSV / Excel lead list into ``campaign`` for ``user``.
+
+    require_name: skip rows with neither first/last name nor a "name" column.
+    overwrite: replace an existing lead's details with the file's values
+        (otherwise only blank fields are filled in).
+    create_contacts: give every imported lead a CampaignContact in the first
+        active sequence (created with ``contact_defaults``).
+
+    Returns {
+        'total_rows', 'created_count' (rows added to the campaign, new or
+        existing lead), 'new_count' (leads created), 'updated_count'
+        (existing leads changed), 'rejected_count', 'rejected_reasons',
+        'rejected_rows',
+    }. Raises TabularImportError for a file-level problem (format, empty
+    file, no email column).
+    """
+    rows = iter_rows(fileobj, file_name)
+    first = next(rows, None)
+    if first is None:
+        raise TabularImportError('File is empty')
+    if 'email' not in {key.lower().strip() for key in first[1]}:
+        raise TabularImportError('Email column is required in the file')
+
+    options = {
+        'require_name': require_name,
+        'overwrite': overwrite,
+        'default_source': default_source,
+        'create_contacts': create_contacts,
+        'contact_defaults': contact_defaults or {},
+        'sequence': (
+            EmailSequence.objects.filter(campaign=campaign, is_active=True)
+            .select_related('campaign').prefetch_related('steps').first()
+            if create_contacts else None
+        ),
+    }
+    result = {
+        'total_rows': 0,
+        'created_count': 0,
+        'new_count': 0,
+        'updated_count': 0,
+        'rejected_reasons': {'missing_email': 0, 'missing_name': 0, 'other': 0},
+        'rejected_rows': [],
+    }
+    for chunk in chunked(chain([first], rows), IMPORT_CHUNK_SIZE):
+        _import_chunk(campaign, user, chunk, options, result)
+    result['rejected_count'] = sum(result['rejected_reasons'].values())
+    logger.info(
+        f"Lead import into campaign {campaign.id}: {result['created_count']} of {result['total_rows']} rows added "
+        f"({result['new_count']} new, {result['updated_count']} updated, {result['rejected_count']} rejected)"
+    )
+    return result
@@ -0,0 +1,167 @@
+"""
+Queue consumer that classifies inbound replies off the inbox-sync path.
+
+process_reply_directly stores every reply with interest_level
+'pending_analysis' and returns, so sync_inbox no longer waits on an LLM
+round-trip per message. classify_pending_replies() runs on Celery Beat:
+
+- Claims a batch of pending replies oldest first. Candidates are re-selected
+  with select_for_update(skip_locked=True) and leased by stamping
+  analysis_claimed_at, so overlapping workers split the queue; a lease older
+  than CLAIM_LEASE (worker died mid-batch) is claimable again.
+- Groups the batch by campaign and hands each group to
+  ReplyAnalyzer.analyze_replies, which settles obvious replies with the
+  keyword rules and _apply_rule_overrides and sends the rest to the LLM
+  several replies per prompt.
+- Writes each result with a conditional UPDATE (only while the reply is
+  still pending), feeds the change to the campaign rollups, refreshes the
+  contact's latest-reply fields and, for main-sequence replies, starts the
+  sub-sequence run the interest level selects.
+"""
+from collections import defaultdict
+from datetime import timedelta
+import logging
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from marketing_agent import campaign_rollups
+from marketing_agent.models import CampaignContact, Reply
+from marketing_agent.services.reply_processor import (
+    PENDING_ANALYSIS, _company_id_for_campaign, start_sub_sequence_run,
+)
+from marketing_agent.utils.reply_analyzer import ReplyAnalyzer
+
+logger = logging.getLogger(__name__)
+
+# Pending replies claimed per batch; classify_pending_replies loops batches
+# until the queue is drained or max_batches is hit.
+BATCH_SIZE = 50
+# How long a claim holds before another worker may take the reply over.
+CLAIM_LEASE = timedelta(minutes=10)
+
+
+def _claimable(now):
+    return Q(interest_level=PENDING_ANALYSIS) & (
+        Q(analysis_claimed_at__isnull=True) | Q(analysis_claimed_at__lt=now - CLAIM_LEASE)
+    )
+
+
+def _claim_batch(batch_size, now):
+    """Lease up to ``batch_size`` pending replies; returns their ids."""
+    candidate_ids = list(
+        Reply.objects.filter(_claimable(now))
+        .order_by('replied_at')
+        .values_list('id', flat=True)[:batch_size]
+    )
+    if not candidate_ids:
+        return []
+    with transaction.atomic():
+        claimed_ids = list(
+            Reply.objects.select_for_update(skip_locked=True)
+            .filter(_claimable(now), id__in=candidate_ids)
+            .values_list('id', flat=True)
+        )
+        if claimed_ids:
+            Reply.objects.filter(id__in=claimed_ids).update(analysis_claimed_at=now)
+    return claimed_ids
+
+
+def _apply_result(reply, result):
+    """Store one classification. Returns (interest_level, analysis, sub_sequence),
+    or None if the reply was no longer pending (classified elsewhere)."""
+    interest_level = result.get('interest_level') or 'neutral'
+    analysis = result.get('analysis', '')
+    if result.get('ai_fallback') and result.get('ai_fallback_reason'):
+        logger.info(f"Reply #{reply.id} classified by keyword rules: {result['ai_fallback_reason']}")
+
+    old_state = campaign_rollups.reply_state(reply)
+    updated = Reply.objects.filter(id=reply.id, interest_level=PENDING_ANALYSIS).update(
+        interest_level=interest_level,
+        analysis=analysis,
+        analysis_claimed_at=None,
+        updated_at=timezone.now(),
+    )
+    if not updated:
+        return None
+    reply.interest_level = interest_level
+    reply.analysis = analysis
+    # A conditional UPDATE skips the post_save rollup signal.
+    try:
+        campaign_rollups.record_reply_changes([(old_state, campaign_rollups.reply_state(reply))])
+    except Exception as e:
+        logger.error(f"[ROLLUPS] Failed to record classification of reply #{reply.id}: {e}", exc_info=True)
+
+    # mark_replied copied the pending level onto the contact; replace it if
+    # this is still the contact's latest reply.
+    latest_id = (
+        Reply.objects.filter(contact_id=reply.contact_id)
+        .order_by('-replied_at', '-id')
+        .values_list('id', flat=True)
+        .first()
+    )
+    if latest_id == reply.id:
+        CampaignContact.objects.filter(id=reply.contact_id).update(
+            reply_interest_level=interest_level, reply_analysis=analysis,
+        )
+
+    sub_sequence = None
+    if reply.starts_sub_sequence and reply.contact.sequence_id:
+        sub_sequence = start_sub_sequence_run(reply, reply.contact, interest_level)
+    logger.info(f"Classified reply #{reply.id} from {reply.lead.email}: {interest_level}")
+    return interest_level, analysis, sub_sequence
+
+
+def classify_replies(reply_ids):
+    """Classify the given pending replies. Returns {reply_id: (interest_level, analysis, sub_sequence)}."""
+    replies = list(
+        Reply.objects.filter(id__in=reply_ids, interest_level=PENDING_ANALYSIS)
+        .select_related('campaign', 'campaign__owner', 'contact', 'contact__sequence', 'lead')
+        .order_by('replied_at', 'id')
+    )
+    by_campaign = defaultdict(list)
+    for reply in replies:
+        by_campaign[reply.campaign_id].append(reply)
+
+    outcomes = {}
+    company_ids = {}
+    for group in by_campaign.values():
+        campaign = group[0].campaign
+        owner_id = campaign.owner_id
+        if owner_id not in company_ids:
+            company_ids[owner_id] = _company_id_for_campaign(campaign)
+        try:
+            results = ReplyAnalyzer().analyze_replies(
+                [(r.reply_subject, r.reply_content) for r in group],
+                campaign_name=campaign.name,
+                company_id=company_ids[owner_id],
+            )
+        except Exception as e:
+            # Leave the group pending; the claim lease expires and a later
+            # run retries it.
+            logger.error(f"Error classifying {len(group)} reply(ies) for campaign #{campaign.id}: {e}", exc_info=True)
+            continue
+        for reply, result in zip(group, results):
+            try:
+                outcome = _apply_result(reply, result or {})
+            except Exception as e:
+                logger.error(f"Error storing classification for reply #{reply.id}: {e}", exc_info=True)
+                continue
+            if outcome is not None:
+                outcomes[reply.id] = outcome
+    return outcomes
+
+
+def classify_pending_replies(batch_size=BATCH_SIZE, max_batches=20):
+    """Drain the pending-analysis queue."""
+    claimed = classified = 0
+    for _ in range(max_batches):
+        reply_ids = _claim_batch(batch_size, timezone.now())
+        if not reply_ids:
+            break
+        claimed += len(reply_ids)
+        classified += len(classify_replies(reply_ids))
+    if claimed:
+        logger.info(f"[REPLY CLASSIFICATION] classified {classified} of {claimed} claimed reply(ies)")
+    return {'claimed': claimed, 'classified': classified}
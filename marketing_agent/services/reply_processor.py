@@ -5,7 +5,6 @@ Used by sync_inbox command to avoid middleware issues
 from django.utils import timezone
 from datetime import timedelta, datetime
 from marketing_agent.models import Campaign, Lead, CampaignContact, EmailSequence, Reply, EmailSendHistory
-from marketing_agent.utils.reply_analyzer import ReplyAnalyzer
 import logging
 import re
 
@@ -208,7 +207,71 @@ def find_triggering_email(campaign, lead, reply_subject, reply_content, replied_
     return triggering_email
 
 
-def process_reply_directly(campaign, lead, reply_subject, reply_content, reply_date=None):
+PENDING_ANALYSIS = 'pending_analysis'
+
+
+def start_sub_sequence_run(reply_record, contact, interest_level):
+    """
+    Pick the sub-sequence of ``contact.sequence`` that handles ``interest_level``
+    (falling back to an 'any' sub-sequence) and start a ReplySubSequenceRun for
+    ``reply_record``. Returns the sub-sequence, or None if the parent sequence
+    has no matching active sub-sequence. Only call this for replies to
+    main-sequence emails.
+    """
+    interest_mapping = {
+        'positive': 'positive',
+        'negative': 'negative',
+        'neutral': 'neutral',
+        'requested_info': 'requested_info',
+        'objection': 'objection',
+        'unsubscribe': 'unsubscribe',
+        'not_analyzed': 'any'
+    }
+    target_interest = interest_level if interest_level and interest_level != 'not_analyzed' else 'neutral'
+    target_interest = interest_mapping.get(target_interest, target_interest if target_interest in ['positive', 'negative', 'neutral', 'requested_info', 'objection', 'unsubscribe'] else 'any')
+
+    sub_sequences = EmailSequence.objects.filter(
+        parent_sequence=contact.sequence,
+        is_sub_sequence=True,
+        is_active=True,
+        interest_level=target_interest
+    )
+    if not sub_sequences.exists() and target_interest != 'any':
+        sub_sequences = EmailSequence.objects.filter(
+            parent_sequence=contact.sequence,
+            is_sub_sequence=True,
+            is_active=True,
+            interest_level='any'
+        )
+    sub_sequence = sub_sequences.first()
+    if sub_sequence is None:
+        return None
+    logger.info(f"Found sub-sequence '{sub_sequence.name}' for contact #{contact.id}")
+
+    # Per-reply run: create an independent sub-sequence run tied to THIS
+    # reply, so a lead's different replies each get their own sub-sequence
+    # in parallel (instead of the latest reply overwriting the contact's
+    # single sub_sequence slot). The sender drives off these run rows.
+    if reply_record is not None:
+        try:
+            from marketing_agent.models import ReplySubSequenceRun
+            ReplySubSequenceRun.objects.get_or_create(
+                reply=reply_record,
+                defaults={
+                    'contact': contact,
+                    'campaign_id': contact.campaign_id,
+                    'lead_id': contact.lead_id,
+                    'sub_sequence': sub_sequence,
+                    'interest_level': target_interest,
+                },
+            )
+            logger.info(f"Created ReplySubSequenceRun for reply #{reply_record.id} -> '{sub_sequence.name}'")
+        except Exception as e:
+            logger.warning(f"Could not create ReplySubSequenceRun: {e}")
+    return sub_sequence
+
+
+def process_reply_directly(campaign, lead, reply_subject, reply_content, reply_date=None, defer_analysis=True):
     """
     Process an email reply directly (without HTTP request)
     This is the core logic extracted from mark_contact_replied view
@@ -219,6 +282,9 @@ def process_reply_directly(campaign, lead, reply_subject, reply_content, reply_d
         reply_subject: Reply email subject
         reply_content: Reply email content
         reply_date: Reply date (optional, defaults to now)
+        defer_analysis: Store the reply as 'pending_analysis' and leave the
+            LLM classification (and the sub-sequence it selects) to the
+            classification queue. False classifies before returning.
     
     Returns:
         dict: {'success': bool, 'message': str, 'error': str (if failed)}
@@ -356,25 +422,14 @@ def process_reply_directly(campaign, lead, reply_subject, reply_content, reply_d
         
         # ALWAYS analyze every reply that has content. No skipping - so no reply is ever left "not analyzed".
         # (Main vs sub only controls whether we start a new sub-sequence, not whether we run the analyzer.)
-        interest_level = 'not_analyzed'
+        # The analysis itself is an LLM round-trip, so it runs off the inbox-sync
+        # path: the reply is stored as pending and classify_pending_replies picks it up.
+        interest_level = PENDING_ANALYSIS if (reply_content or reply_subject) else 'not_analyzed'
         analysis = ''
-        if reply_content or reply_subject:
-            try:
-                analyzer = ReplyAnalyzer()
-                analysis_result = analyzer.analyze_reply(
-                    reply_subject=reply_subject,
-                    reply_content=reply_content,
-                    campaign_name=campaign.name,
-                    company_id=_company_id_for_campaign(campaign),
-                )
-                interest_level = analysis_result.get('interest_level', 'neutral')
-                analysis = analysis_result.get('analysis', '')
-                logger.info(f"AI analyzed reply for {lead.email}: {interest_level}" + (" (sub-seq)" if is_sub_sequence_reply else ""))
-            except Exception as e:
-                logger.error(f"Error analyzing reply with AI: {str(e)}")
-                interest_level = 'not_analyzed'
-                analysis = f'AI analysis failed: {str(e)}'
-        
+        starts_sub_sequence = (
+            interest_level == PENDING_ANALYSIS and not is_sub_sequence_reply and contact.sequence_id is not None
+        )
+
         # Create Reply record
         reply_record = None
         try:
@@ -388,66 +443,23 @@ def process_reply_directly(campaign, lead, reply_subject, reply_content, reply_d
                 reply_content=reply_content,
                 interest_level=interest_level,
                 analysis=analysis,
+                starts_sub_sequence=starts_sub_sequence,
                 triggering_email=triggering_email,
                 replied_at=reply_date
             )
-            logger.info(f"Created Reply record #{reply_record.id} for {lead.email} - {'Sub-sequence reply (not analyzed)' if is_sub_sequence_reply else 'Main sequence reply (analyzed)'}")
+            logger.info(f"Created Reply record #{reply_record.id} for {lead.email} - {'Sub-sequence reply' if is_sub_sequence_reply else 'Main sequence reply'} ({interest_level})")
         except Exception as e:
             logger.warning(f'Could not create Reply record: {str(e)}')
+            # Nothing to queue; the contact is still marked replied below.
+            interest_level = 'not_analyzed'
         
         # Find sub-sequence for main sequence replies only.
         # Sub-sequence replies do not assign or switch sub-sequences (design rule).
+        # A main-sequence reply still waiting for classification gets its
+        # sub-sequence from the classification queue instead.
         sub_sequence = None
-        interest_mapping = {
-            'positive': 'positive',
-            'negative': 'negative',
-            'neutral': 'neutral',
-            'requested_info': 'requested_info',
-            'objection': 'objection',
-            'unsubscribe': 'unsubscribe',
-            'not_analyzed': 'any'
-        }
-        target_interest = interest_level if interest_level and interest_level != 'not_analyzed' else 'neutral'
-        target_interest = interest_mapping.get(target_interest, target_interest if target_interest in ['positive', 'negative', 'neutral', 'requested_info', 'objection', 'unsubscribe'] else 'any')
-
-        if not is_sub_sequence_reply and contact.sequence:
-            sub_sequences = EmailSequence.objects.filter(
-                parent_sequence=contact.sequence,
-                is_sub_sequence=True,
-                is_active=True,
-                interest_level=target_interest
-            )
-            if not sub_sequences.exists() and target_interest != 'any':
-                sub_sequences = EmailSequence.objects.filter(
-                    parent_sequence=contact.sequence,
-                    is_sub_sequence=True,
-                    is_active=True,
-                    interest_level='any'
-                )
-            if sub_sequences.exists():
-                sub_sequence = sub_sequences.first()
-                logger.info(f"Found sub-sequence '{sub_sequence.name}' for contact {lead.email}")
-
-                # Per-reply run: create an independent sub-sequence run tied to THIS
-                # reply, so a lead's different replies each get their own sub-sequence
-                # in parallel (instead of the latest reply overwriting the contact's
-                # single sub_sequence slot). The sender drives off these run rows.
-                if reply_record is not None:
-                    try:
-                        from marketing_agent.models import ReplySubSequenceRun
-                        ReplySubSequenceRun.objects.get_or_create(
-                            reply=reply_record,
-                            defaults={
-                                'contact': contact,
-                                'campaign': campaign,
-                                'lead': lead,
-                                'sub_sequence': sub_sequence,
-                                'interest_level': target_interest,
-                            },
-                        )
-                        logger.info(f"Created ReplySubSequenceRun for reply #{reply_record.id} -> '{sub_sequence.name}'")
-                    except Exception as e:
-                        logger.warning(f"Could not create ReplySubSequenceRun: {e}")
+        if not is_sub_sequence_reply and contact.sequence and interest_level != PENDING_ANALYSIS:
+            sub_sequence = start_sub_sequence_run(reply_record, contact, interest_level)
         # Design rule: replies to sub-sequence emails do nothing — no switch, no restart.
         # The tick cleanup in send_sequence_emails clears the sub-sequence so no further
         # emails go out. The lead resumes only if they reply to a main-sequence email.
@@ -462,6 +474,12 @@ def process_reply_directly(campaign, lead, reply_subject, reply_content, reply_d
             analysis=analysis,
         )
 
+        if interest_level == PENDING_ANALYSIS and not defer_analysis:
+            from marketing_agent.services.reply_classification import classify_replies
+            outcome = classify_replies([reply_record.id]).get(reply_record.id)
+            if outcome:
+                interest_level, analysis, sub_sequence = outcome
+
         # Build message
         if is_sub_sequence_reply:
             message = f'Reply received from {lead.email} for sub-sequence email. Reply recorded.'
@@ -469,6 +487,8 @@ def process_reply_directly(campaign, lead, reply_subject, reply_content, reply_d
             message = f'Contact {lead.email} marked as replied. Main sequence stopped.'
             if sub_sequence:
                 message += f' Sub-sequence "{sub_sequence.name}" started for this reply.'
+            elif interest_level == PENDING_ANALYSIS:
+                message += ' Reply queued for analysis.'
         
         return {
             'success': True,
@@ -0,0 +1,210 @@
+"""
+Per-mailbox send-rate scheduler for campaign email.
+
+EmailService used to keep a per-instance "sent this minute" counter and
+time.sleep() up to 60 s when it hit 30. That stalled the whole worker, was
+not shared between processes and ignored which mailbox was sending. Here
+each EmailAccount gets:
+
+- a token bucket (burst = per_minute, refilled at per_minute / 60 tokens a
+  second), so one busy mailbox can't starve the others, and
+- a daily counter (UTC day) capped at the provider's daily sending limit.
+
+Limits come from the account's provider (account_type, or the SMTP host for
+generic accounts) via SEND_LIMITS, overridable with the EMAIL_SEND_LIMITS
+setting. State lives in Redis (the Celery broker), updated by one Lua script
+so every worker draws from the same bucket. Without Redis it falls back to
+in-process buckets, which is what a single worker had before.
+
+reserve_send() never waits: it either takes a token or returns the time the
+account can send again, and the caller defers the send to that ETA.
+"""
+from datetime import datetime, time as dt_time, timedelta, timezone as dt_timezone
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.utils import timezone
+
+try:
+    import redis as _redis
+except ImportError:
+    _redis = None
+
+logger = logging.getLogger(__name__)
+
+# Provider -> limits per mailbox. per_minute is the sustained rate (and the
+# burst size); per_day is the provider's daily sending cap (0 = no cap).
+SEND_LIMITS = {
+    'gmail': {'per_minute': 20, 'per_day': 500},
+    'outlook': {'per_minute': 30, 'per_day': 300},
+    'hostinger': {'per_minute': 30, 'per_day': 3000},
+    'default': {'per_minute': 30, 'per_day': 2000},
+}
+
+_KEY_PREFIX = 'send_throttle:account:'
+# Buckets for idle accounts expire; a missing bucket starts full.
+_BUCKET_TTL_SECONDS = 10 * 60
+_DAY_TTL_SECONDS = 2 * 24 * 3600
+
+# Returns {allowed, wait_seconds} as strings (Lua numbers are truncated to
+# integers on the way back).
+_RESERVE_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local daily_cap = tonumber(ARGV[4])
+local until_midnight = tonumber(ARGV[5])
+local bucket_ttl = tonumber(ARGV[6])
+local day_ttl = tonumber(ARGV[7])
+
+local sent_today = tonumber(redis.call('GET', KEYS[2]) or '0')
+if daily_cap > 0 and sent_today >= daily_cap then
+    return {'0', tostring(until_midnight)}
+end
+
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+
+local allowed = '0'
+local wait = '0'
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = '1'
+    redis.call('INCR', KEYS[2])
+    redis.call('EXPIRE', KEYS[2], day_ttl)
+else
+    wait = tostring((1 - tokens) / rate)
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('EXPIRE', KEYS[1], bucket_ttl)
+return {allowed, wait}
+"""
+
+_client = None
+_client_lock = threading.Lock()
+_script = None
+# After a Redis error, use the in-process buckets for this long instead of
+# paying the connect timeout on every send.
+_REDIS_RETRY_SECONDS = 60
+_redis_down_until = 0.0
+
+# In-process fallback: account id -> [tokens, ts] and (account id, day) -> sent.
+_local_buckets = {}
+_local_daily = {}
+_local_lock = threading.Lock()
+
+
+def provider_for(email_account) -> str:
+    """SEND_LIMITS key for an account: its type, or a guess from the SMTP host."""
+    account_type = (getattr(email_account, 'account_type', '') or '').lower()
+    if account_type in ('gmail', 'outlook', 'hostinger'):
+        return account_type
+    host = (getattr(email_account, 'smtp_host', '') or '').lower()
+    if 'gmail' in host or 'google' in host:
+        return 'gmail'
+    if 'office365' in host or 'outlook' in host or 'hotmail' in host or 'live.com' in host:
+        return 'outlook'
+    if 'hostinger' in host:
+        return 'hostinger'
+    return 'default'
+
+
+def limits_for(email_account) -> dict:
+    provider = provider_for(email_account)
+    overrides = getattr(settings, 'EMAIL_SEND_LIMITS', None) or {}
+    return {
+        **SEND_LIMITS['default'], **overrides.get('default', {}),
+        **SEND_LIMITS.get(provider, {}), **overrides.get(provider, {}),
+    }
+
+
+def _get_redis_client():
+    """Redis client on the Celery broker, or None (sqlite broker / no redis)."""
+    global _client, _script
+    if _redis is None or time.time() < _redis_down_until:
+        return None
+    url = getattr(settings, 'CELERY_BROKER_URL', '') or ''
+    if not url.startswith('redis://') and not url.startswith('rediss://'):
+        return None
+    with _client_lock:
+        if _client is None:
+            try:
+                _client = _redis.Redis.from_url(url, socket_connect_timeout=2, socket_timeout=2)
+                _script = _client.register_script(_RESERVE_SCRIPT)
+            except Exception:
+                return None
+    return _client
+
+
+def _seconds_until_midnight(now_ts):
+    now = datetime.fromtimestamp(now_ts, tz=dt_timezone.utc)
+    midnight = datetime.combine(now.date() + timedelta(days=1), dt_time.min, tzinfo=dt_timezone.utc)
+    return max(1.0, (midnight - now).total_seconds())
+
+
+def _reserve_local(account_id, per_minute, per_day, now_ts):
+    day = datetime.fromtimestamp(now_ts, tz=dt_timezone.utc).date()
+    rate = per_minute / 60.0
+    with _local_lock:
+        if per_day and _local_daily.get((account_id, day), 0) >= per_day:
+            return False, _seconds_until_midnight(now_ts)
+        tokens, ts = _local_buckets.get(account_id, (float(per_minute), now_ts))
+        tokens = min(float(per_minute), tokens + max(0.0, now_ts - ts) * rate)
+        if tokens >= 1:
+            _local_buckets[account_id] = (tokens - 1, now_ts)
+            _local_daily[(account_id, day)] = _local_daily.get((account_id, day), 0) + 1
+            return True, 0.0
+        _local_buckets[account_id] = (tokens, now_ts)
+        return False, (1 - tokens) / rate
+
+
+def reserve_send(email_account):
+    """
+    Take a send slot for ``email_account``.
+
+    Returns None when the email may go out now, or the datetime at which the
+    account will have capacity again (rate or daily cap). Accounts without a
+    primary key (unsaved/test objects) are not throttled.
+    """
+    global _redis_down_until
+    account_id = getattr(email_account, 'pk', None)
+    if account_id is None:
+        return None
+    limits = limits_for(email_account)
+    per_minute = max(1, int(limits.get('per_minute') or 1))
+    per_day = int(limits.get('per_day') or 0)
+    now_ts = time.time()
+
+    allowed = wait = None
+    client = _get_redis_client()
+    if client is not None:
+        day = datetime.fromtimestamp(now_ts, tz=dt_timezone.utc).date().isoformat()
+        try:
+            allowed, wait = _script(
+                keys=[f'{_KEY_PREFIX}{account_id}', f'{_KEY_PREFIX}{account_id}:day:{day}'],
+                args=[
+                    per_minute, per_minute / 60.0, now_ts, per_day,
+                    _seconds_until_midnight(now_ts), _BUCKET_TTL_SECONDS, _DAY_TTL_SECONDS,
+                ],
+                client=client,
+            )
+            allowed, wait = allowed in (b'1', '1'), float(wait)
+        except Exception as e:
+            logger.warning(f"Send throttle: Redis unavailable ({e}); using in-process limits")
+            _redis_down_until = now_ts + _REDIS_RETRY_SECONDS
+            allowed = None
+    if allowed is None:
+        allowed, wait = _reserve_local(account_id, per_minute, per_day, now_ts)
+
+    if allowed:
+        return None
+    retry_at = timezone.now() + timedelta(seconds=max(1.0, wait))
+    logger.info(
+        f"Send throttle: account {account_id} ({provider_for(email_account)}) at its limit; "
+        f"next slot {retry_at.isoformat()}"
+    )
+    return retry_at
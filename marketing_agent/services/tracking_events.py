@@ -0,0 +1,175 @@
+"""
+Write-behind application of open/click tracking events.
+
+The tracking views (views_email_tracking.py) append an EmailTrackingEvent
+and return the pixel/redirect immediately. apply_tracking_events() runs on
+Celery Beat, picks up the pending events, dedupes them per send and applies
+the status transitions with a handful of bulk UPDATEs:
+
+- open:  any status except opened/clicked -> 'opened' (opened_at = first
+         open in the batch; delivered_at filled in for 'sent' rows). Sends
+         already opened/clicked only get a missing opened_at back-filled.
+- click: any status except clicked -> 'clicked' (clicked_at = first click;
+         delivered_at/opened_at filled in as the old view did). Repeat
+         clicks keep the first clicked_at.
+
+These are the same transitions the views used to make with a full-row
+save(), just without the per-request read-modify-write. Bulk UPDATEs skip
+the post_save rollup signal, so the batch's before/after states are handed
+to campaign_rollups.record_send_changes directly.
+"""
+from django.db import transaction
+from django.db.models import Case, DateTimeField, F, Q, Value, When
+from django.utils import timezone
+import logging
+
+from marketing_agent import campaign_rollups
+from marketing_agent.models import EmailSendHistory, EmailTrackingEvent
+
+logger = logging.getLogger(__name__)
+
+# Pending events applied per batch; apply_tracking_events loops batches
+# until the buffer is drained or max_batches is hit.
+BATCH_SIZE = 1000
+# Sends per UPDATE statement — each send adds a WHEN branch, and mssql caps
+# a statement at 2100 parameters.
+UPDATE_CHUNK = 200
+
+_OPENABLE_STATUSES = tuple(
+    s for s, _ in EmailSendHistory.STATUS_CHOICES if s not in ('opened', 'clicked')
+)
+_CLICKABLE_STATUSES = tuple(
+    s for s, _ in EmailSendHistory.STATUS_CHOICES if s != 'clicked'
+)
+
+
+def _per_send_time(times):
+    """CASE id WHEN ... THEN <event time> for a {send_id: datetime} map."""
+    return Case(
+        *[When(id=send_id, then=Value(ts)) for send_id, ts in times.items()],
+        output_field=DateTimeField(),
+    )
+
+
+def _chunks(mapping):
+    items = list(mapping.items())
+    for start in range(0, len(items), UPDATE_CHUNK):
+        yield dict(items[start:start + UPDATE_CHUNK])
+
+
+def _apply_opens(open_times, now):
+    updated = 0
+    for chunk in _chunks(open_times):
+        ts = _per_send_time(chunk)
+        updated += EmailSendHistory.objects.filter(
+            id__in=list(chunk), status__in=_OPENABLE_STATUSES,
+        ).update(
+            delivered_at=Case(
+                When(Q(status='sent', delivered_at__isnull=True), then=ts),
+                default=F('delivered_at'),
+            ),
+            status='opened',
+            opened_at=ts,
+            updated_at=now,
+        )
+        # Already opened/clicked (e.g. by a reply) but no open timestamp yet.
+        EmailSendHistory.objects.filter(
+            id__in=list(chunk), status__in=('opened', 'clicked'), opened_at__isnull=True,
+        ).update(opened_at=ts, updated_at=now)
+    return updated
+
+
+def _apply_clicks(click_times, now):
+    updated = 0
+    for chunk in _chunks(click_times):
+        ts = _per_send_time(chunk)
+        updated += EmailSendHistory.objects.filter(
+            id__in=list(chunk), status__in=_CLICKABLE_STATUSES,
+        ).update(
+            delivered_at=Case(
+                When(Q(status='sent', delivered_at__isnull=True), then=ts),
+                default=F('delivered_at'),
+            ),
+            opened_at=Case(
+                When(Q(status__in=('sent', 'delivered'), opened_at__isnull=True), then=ts),
+                default=F('opened_at'),
+            ),
+            status='clicked',
+            clicked_at=ts,
+            updated_at=now,
+        )
+    return updated
+
+
+def _apply_batch(batch_size):
+    """Claim and apply one batch of pending events. Returns (events, opened, clicked)."""
+    candidate_ids = list(
+        EmailTrackingEvent.objects.filter(processed_at__isnull=True)
+        .order_by('id')
+        .values_list('id', flat=True)[:batch_size]
+    )
+    if not candidate_ids:
+        return 0, 0, 0
+
+    now = timezone.now()
+    with transaction.atomic():
+        # skip_locked so two batchers (or an overlapping beat tick) split the
+        # buffer instead of applying the same events twice.
+        events = list(
+            EmailTrackingEvent.objects.select_for_update(skip_locked=True)
+            .filter(id__in=candidate_ids, processed_at__isnull=True)
+            .values_list('id', 'tracking_token', 'event_type', 'occurred_at')
+        )
+        if not events:
+            return 0, 0, 0
+
+        send_by_token = dict(
+            EmailSendHistory.objects.filter(
+                tracking_token__in={token for _, token, _, _ in events},
+            ).values_list('tracking_token', 'id')
+        )
+
+        # Dedupe: the earliest open and earliest click per send.
+        open_times, click_times = {}, {}
+        for _, token, event_type, occurred_at in events:
+            send_id = send_by_token.get(token)
+            if send_id is None:
+                continue
+            target = click_times if event_type == 'click' else open_times
+            if send_id not in target or occurred_at < target[send_id]:
+                target[send_id] = occurred_at
+
+        touched = set(open_times) | set(click_times)
+        before = campaign_rollups.snapshot_sends(touched)
+        opened = _apply_opens(open_times, now)
+        clicked = _apply_clicks(click_times, now)
+        after = campaign_rollups.snapshot_sends(touched)
+        campaign_rollups.record_send_changes(
+            [(state, after.get(send_id)) for send_id, state in before.items()]
+        )
+        EmailTrackingEvent.objects.filter(
+            id__in=[event_id for event_id, _, _, _ in events],
+        ).update(processed_at=now)
+
+    unknown = sum(1 for _, token, _, _ in events if token not in send_by_token)
+    if unknown:
+        logger.warning("[TRACKING EVENTS] %d event(s) with unknown tracking token", unknown)
+    return len(events), opened, clicked
+
+
+def apply_tracking_events(batch_size=BATCH_SIZE, max_batches=50):
+    """Drain the tracking-event buffer into EmailSendHistory status."""
+    total_events = total_opened = total_clicked = 0
+    for _ in range(max_batches):
+        events, opened, clicked = _apply_batch(batch_size)
+        if not events:
+            break
+        total_events += events
+        total_opened += opened
+        total_clicked += clicked
+    if total_events:
+        logger.info(
+            "[TRACKING EVENTS] applied %d event(s): %d send(s) -> opened, %d send(s) -> clicked",
+            total_events, total_opened, total_clicked,
+        )
+    return {'events': total_events, 'opened': total_opened, 'clicked': total_clicked}
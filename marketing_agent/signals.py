@@ -1,10 +1,17 @@
 """
 Signals for the marketing agent app.
-Re-activates completed contacts when new steps are added to a sequence.
+Re-activates completed contacts when new steps are added to a sequence,
+keeps EmailSequence.step_count in sync, re-schedules the sequence
+sender's due-queue (next_send_at) when a sequence or its steps change, and
+feeds EmailSendHistory / Reply changes into the campaign metric rollups.
 """
-from django.db.models.signals import post_save, post_delete
+import logging
+
+from django.db.models.signals import post_init, post_save, post_delete
 from django.dispatch import receiver
 
+logger = logging.getLogger(__name__)
+
 
 @receiver(post_save, sender='marketing_agent.EmailSequenceStep')
 @receiver(post_delete, sender='marketing_agent.EmailSequenceStep')
@@ -14,11 +21,15 @@ def reactivate_completed_contacts_on_step_change(sender, instance, **kwargs):
     'completed' but haven't actually finished all steps. If so, un-complete them
     so the sequence continues.
     """
-    from marketing_agent.models import CampaignContact
+    from marketing_agent.models import CampaignContact, EmailSequence
 
     sequence = instance.sequence
     total_steps = sequence.steps.count()
 
+    # Keep the denormalized count in step with the rows so the sender can
+    # read it instead of counting steps per sequence on every run.
+    EmailSequence.objects.filter(pk=instance.sequence_id).update(step_count=total_steps)
+
     # Find contacts that are marked completed but have done fewer steps than now exist
     contacts_to_reactivate = CampaignContact.objects.filter(
         sequence=sequence,
@@ -33,3 +44,106 @@ def reactivate_completed_contacts_on_step_change(sender, instance, **kwargs):
             f'[SIGNAL] Reactivated {count} contact(s) for sequence "{sequence.name}" '
             f'(now has {total_steps} steps, contacts had done fewer)'
         )
+
+    reschedule_sequence(instance.sequence_id)
+
+
+@receiver(post_save, sender='marketing_agent.EmailSequence')
+def reschedule_on_sequence_change(sender, instance, created, **kwargs):
+    """Activation or sending-account changes move every pending contact's
+    due-queue entry; a brand-new sequence has nothing to re-schedule."""
+    if not created:
+        reschedule_sequence(instance.pk)
+
+
+def reschedule_sequence(sequence_id):
+    """Recompute next_send_at for every pending contact / run on a sequence."""
+    from marketing_agent.models import CampaignContact, EmailSequence, ReplySubSequenceRun
+
+    sequence = (
+        EmailSequence.objects.filter(pk=sequence_id)
+        .select_related('campaign')
+        .prefetch_related('steps')
+        .first()
+    )
+    if sequence is None:
+        return
+    contacts = list(CampaignContact.objects.filter(sequence_id=sequence_id, completed=False, replied=False))
+    for contact in contacts:
+        contact.sequence = sequence
+    CampaignContact.refresh_schedules(contacts)
+
+    runs = list(
+        ReplySubSequenceRun.objects
+        .filter(sub_sequence_id=sequence_id, completed=False, cancelled=False)
+        .select_related('reply')
+    )
+    for run in runs:
+        run.sub_sequence = sequence
+    ReplySubSequenceRun.refresh_schedules(runs)
+
+
+# ---------------------------------------------------------------------------
+# Campaign metric rollups (campaign_rollups.py)
+# ---------------------------------------------------------------------------
+# post_init stashes the fields that decide a row's rollup bucket; post_save /
+# post_delete apply the old -> new difference. Rows loaded with those fields
+# deferred are skipped (reconcile_campaign_rollups_task repairs them), and a
+# rollup failure is logged, never raised into the send/reply path.
+
+def _stash_rollup_state(instance, fields, state_fn):
+    if instance.pk is None or fields & instance.get_deferred_fields():
+        instance._rollup_state = None
+    else:
+        instance._rollup_state = state_fn(instance)
+
+
+def _record_rollup_change(instance, created, state_fn, record_fn, deleted=False):
+    from marketing_agent import campaign_rollups
+
+    old = None if created else getattr(instance, '_rollup_state', None)
+    if old is None and not created:
+        return
+    new = None if deleted else state_fn(instance)
+    try:
+        getattr(campaign_rollups, record_fn)([(old, new)])
+    except Exception as e:
+        logger.error("[ROLLUPS] Failed to record %s change for id=%s: %s",
+                     type(instance).__name__, instance.pk, e, exc_info=True)
+    instance._rollup_state = new
+
+
+@receiver(post_init, sender='marketing_agent.EmailSendHistory')
+def stash_send_rollup_state(sender, instance, **kwargs):
+    from marketing_agent.campaign_rollups import SEND_STATE_FIELDS, send_state
+    _stash_rollup_state(instance, set(SEND_STATE_FIELDS), send_state)
+
+
+@receiver(post_save, sender='marketing_agent.EmailSendHistory')
+def record_send_rollup(sender, instance, created, **kwargs):
+    from marketing_agent.campaign_rollups import send_state
+    _record_rollup_change(instance, created, send_state, 'record_send_changes')
+
+
+@receiver(post_delete, sender='marketing_agent.EmailSendHistory')
+def remove_send_rollup(sender, instance, **kwargs):
+    from marketing_agent.campaign_rollups import send_state
+    _record_rollup_change(instance, False, send_state, 'record_send_changes', deleted=True)
+
+
+@receiver(post_init, sender='marketing_agent.Reply')
+def stash_reply_rollup_state(sender, instance, **kwargs):
+    from marketing_agent.campaign_rollups import REPLY_STATE_FIELDS, reply_state
+    _stash_rollup_state(instance, set(REPLY_STATE_FIELDS), reply_state)
+
+
+@receiver(post_save, sender='marketing_agent.Reply')
+def record_reply_rollup(sender, instance, created, **kwargs):
+    from marketing_agent.campaign_rollups import reply_state
+    _record_rollup_change(instance, created, reply_state, 'record_reply_changes')
+
+
+@receiver(post_delete, sender='marketing_agent.Reply')
+def remove_reply_rollup(sender, instance, **kwargs):
+    from marketing_agent.campaign_rollups import reply_state
+    _record_rollup_change(instance, False, reply_state, 'record_reply_changes', deleted=True)
@@ -309,3 +309,56 @@ def sync_campaign_performance_task():
     except Exception as e:
         print(f'Error in performance sync task: {str(e)}')
         return {'status': 'error', 'error': str(e)}
+
+
+@shared_task
+def apply_tracking_events_task():
+    """
+    Apply buffered open/click tracking events to EmailSendHistory.
+    The tracking pixel/link views only append EmailTrackingEvent rows; this
+    folds them into send status with bulk updates.
+
+    Scheduled: Every minute via Celery Beat
+    """
+    try:
+        from marketing_agent.services.tracking_events import apply_tracking_events
+        result = apply_tracking_events()
+        return {'status': 'success', **result}
+    except Exception as e:
+        print(f'Error in tracking events task: {str(e)}')
+        return {'status': 'error', 'error': str(e)}
+
+
+@shared_task
+def classify_pending_replies_task():
+    """
+    Classify replies that inbox sync stored as 'pending_analysis' and start
+    the sub-sequences their interest level selects.
+
+    Scheduled: Every minute via Celery Beat
+    """
+    try:
+        from marketing_agent.services.reply_classification import classify_pending_replies
+        result = classify_pending_replies()
+        return {'status': 'success', **result}
+    except Exception as e:
+        print(f'Error in reply classification task: {str(e)}')
+        return {'status': 'error', 'error': str(e)}
+
+
+@shared_task
+def reconcile_campaign_rollups_task():
+    """
+    Rebuild CampaignMetricRollup rows from EmailSendHistory and Reply and
+    repair any drift from the incremental updates (bulk .update() writers,
+    lost races, failed signal handlers).
+
+    Scheduled: Daily via Celery Beat
+    """
+    try:
+        from marketing_agent.campaign_rollups import reconcile_all
+        checked, repaired = reconcile_all()
+        return {'status': 'success', 'campaigns_checked': checked, 'campaigns_repaired': repaired}
+    except Exception as e:
+        print(f'Error in rollup reconciliation task: {str(e)}')
+        return {'status': 'error', 'error': str(e)}
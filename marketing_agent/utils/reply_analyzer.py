@@ -5,7 +5,7 @@ Analyzes email replies to determine if the lead is interested (positive) or not
 import json
 import logging
 import re
-from typing import Dict, Optional
+from typing import Dict, List, Optional
 from marketing_agent.agents.marketing_base_agent import MarketingBaseAgent
 
 logger = logging.getLogger(__name__)
@@ -41,6 +41,61 @@ def strip_quoted_thread(text: str) -> str:
     return '\n'.join(lines).strip()
 
 
+# Category definitions shared by the single-reply and batch prompts.
+_CLASSIFICATION_GUIDE = """CLASSIFICATION OPTIONS (use these exact labels):
+1. "positive" - Lead is INTERESTED:
+   - Expresses interest, asks questions, requests more information
+   - Agrees to a meeting, call, or demo (include brief agreement: "yes", "yes okay", "sure", "okay", "sounds good", "let's do it")
+   - Shows enthusiasm, excitement, or curiosity
+   - Asks about pricing, features, or next steps
+   - Forward-looking or warm sign-off: "see you soon", "thank you and see you soon", "looking forward to", "talk soon", "thanks, let's connect"
+   - Positive language: "interested", "sounds good", "I'd like to", "tell me more"
+   - When in doubt between neutral and positive for short replies, prefer "positive" if there is any agreement or warmth (e.g. "Yes okay" = positive; "Thank you and see you soon!" = positive).
+   - CRITICAL: Any reply that contains BOTH a thank-you ("thank you", "thanks") AND a forward-looking phrase ("see you soon", "talk soon", "looking forward", "catch you later") MUST be "positive", never "neutral".
+   - CRITICAL: "Thanks and same to you!" / "Thank you, same to you" = positive (warm reciprocation of goodwill). Do NOT classify as neutral.
+   - "We will update you soon" / "will update you" / "get back to you" = still engaged, prefer "positive" (they are staying in the conversation).
+
+2. "negative" - Lead is NOT INTERESTED:
+   - Explicitly declines or says "no thanks"
+   - Negative language: "not interested", "don't contact me", "spam"
+   - Complaints or criticism
+   - Very short dismissive replies: "no", "not interested" (without agreement or warmth)
+
+3. "neutral" - NEUTRAL/Acknowledgment only (no clear interest or disinterest):
+   - Purely informational: "received", "got it", "noted"
+   - Vague or minimal: "ok" alone with no other context, "thanks" with no forward-looking or agreeing tone
+   - Do NOT use neutral for: "yes okay", "thank you and see you soon", "sure", "sounds good" — these are positive.
+   - Do NOT use neutral for: "make it more clear", "please clarify", "can you explain" — these are requested_info.
+
+4. "requested_info" - REQUESTED MORE INFORMATION:
+   - Asks specific questions about features, pricing, capabilities
+   - Wants detailed information, case studies, examples, or clarification
+   - Requests documentation, demos, samples, or REQUIREMENTS (e.g. "send me further requirements", "send me the requirements")
+   - Asks to make something clearer or to clarify: "make it more clear", "make it clearer", "please clarify", "could you clarify", "can you explain"
+   - Language: "tell me more about", "what are the features", "how much does it cost", "can you send", "send me requirements", "further requirements"
+   - CRITICAL: "make it more clear please" / "please clarify" = requested_info (they want clearer info), NOT neutral.
+   - CRITICAL: If the reply is PRIMARILY asking for more information, details, or requirements (e.g. "Send me further requirements", "Send further details"), use "requested_info", NOT "positive".
+
+5. "objection" - HAS OBJECTION/CONCERN:
+   - Raises concerns, objections, or doubts about the approach or feasibility
+   - "I don't think it can be done like this" / "dont think it can be done" = objection (they have a concern about how it works), NOT "negative"
+   - Questions about value, ROI, or fit
+   - Mentions competitors or alternatives
+   - Language: "but", "however", "concerned about", "worried", "not sure if", "don't think it can"
+
+6. "unsubscribe" - UNSUBSCRIBE REQUEST:
+   - Explicit unsubscribe requests: "unsubscribe", "remove me", "stop emailing", "don't send again", "dont send again"
+   - Opt-out language: "remove from list", "don't email me", "opt out", "stop sending"
+   - CRITICAL: "dont send again" / "don't send again" = unsubscribe (they want to stop receiving emails), NOT just "negative"."""
+
+VALID_LEVELS = ('positive', 'negative', 'neutral', 'requested_info', 'objection', 'unsubscribe')
+
+# Replies per LLM call in analyze_replies, and how much of each reply's new
+# text goes into the batch prompt.
+REPLY_BATCH_SIZE = 8
+BATCH_REPLY_CHARS = 2000
+
+
 class ReplyAnalyzer(MarketingBaseAgent):
     """AI agent for analyzing email reply sentiment and interest level"""
     
@@ -78,6 +133,100 @@ Return your analysis in a structured format."""
             self.company_id = company_id
             self.agent_key_name = 'marketing_agent'
 
+        ruled = self.rule_based_analysis(reply_subject, reply_content)
+        if ruled is not None:
+            return ruled
+
+        new_reply_only = strip_quoted_thread(reply_content or '')
+
+        # Build analysis prompt
+        prompt = f"""Analyze this email reply from a lead in a marketing campaign.
+
+CAMPAIGN: {campaign_name or 'Marketing Campaign'}
+
+REPLY SUBJECT: {reply_subject or '(No subject)'}
+
+REPLY CONTENT:
+{new_reply_only or reply_content or '(No content)'}
+
+TASK:
+Determine if this reply indicates the lead is INTERESTED (positive) or NOT INTERESTED (negative).
+You MUST choose exactly ONE of the six categories below. Use the definitions and examples to pick the best match.
+
+{_CLASSIFICATION_GUIDE}
+
+Return your analysis in this EXACT JSON format (no markdown, just JSON):
+{{
+    "interest_level": "positive" or "negative" or "neutral" or "requested_info" or "objection" or "unsubscribe",
+    "analysis": "Detailed explanation of why you classified it this way, including key phrases or indicators",
+    "confidence": 0-100 (how confident you are in the classification)
+}}
+
+Be specific and cite the actual words/phrases from the reply that led to your decision.
+
+REMINDER: "Thank you and see you soon!" = positive. "Thanks and same to you!" = positive. "We will update you soon" = positive. "Make it more clear please" / "please clarify" = requested_info (not neutral)."""
+        
+        try:
+            # Use Groq for analysis (faster and cheaper)
+            response = self._call_groq_qa(
+                prompt,
+                self.system_prompt,
+                temperature=0.3,  # Lower temperature for more consistent analysis
+                max_tokens=500
+            )
+            
+            # Parse JSON response (json/re imported at module top so the
+            # `except json.JSONDecodeError` below can never hit an unbound name).
+
+            # Try to extract JSON from response (may have markdown formatting)
+            json_match = re.search(r'\{[^{}]*"interest_level"[^{}]*\}', response, re.DOTALL)
+            if json_match:
+                analysis_data = json.loads(json_match.group())
+            else:
+                # Try to parse entire response as JSON
+                analysis_data = json.loads(response.strip())
+            
+            # Validate and return
+            interest_level = self._normalize_level(analysis_data.get('interest_level', 'neutral'))
+            
+            # Post-process: override AI when reply clearly matches our rules (AI sometimes returns neutral for these)
+            # Strip the quoted original email first — rule overrides must fire on
+            # what the lead just wrote, not on quoted history from the thread.
+            new_reply_text = strip_quoted_thread(reply_content or '')
+            combined = f"{reply_subject or ''} {new_reply_text}".lower()
+            overridden = self._apply_rule_overrides(combined, interest_level)
+            if overridden is not None:
+                interest_level = overridden
+                logger.info(f"Reply analyzer: overridden to '{interest_level}' based on rule match")
+            
+            return {
+                'interest_level': interest_level,
+                'analysis': analysis_data.get('analysis', 'Analysis completed.'),
+                'confidence': int(analysis_data.get('confidence', 50))
+            }
+            
+        except json.JSONDecodeError as e:
+            logger.error(f"Error parsing AI analysis JSON: {str(e)}. Response: {response[:200]}")
+            # Fallback: try to determine from keywords
+            return self._fallback_analysis(reply_subject, reply_content)
+        except Exception as e:
+            # Note WHY the AI path was skipped so it shows in the reply's analysis
+            # (not a silent drop to keywords). Token/quota exhaustion is the common
+            # case — surface it plainly.
+            note = self._ai_fallback_note(e)
+            logger.warning(f"Reply analyzer falling back to keywords: {note}")
+            result = self._fallback_analysis(reply_subject, reply_content)
+            # Don't clutter every reply's analysis text with the reason — expose it
+            # once via a flag + reason so the UI can show a single banner instead.
+            result['ai_fallback'] = True
+            result['ai_fallback_reason'] = note
+            return result
+    
+    def rule_based_analysis(self, reply_subject: str, reply_content: str) -> Optional[Dict]:
+        """
+        Classify a reply with the keyword rules alone. Returns the same dict as
+        analyze_reply for replies the rules settle, or None when the LLM is needed.
+        """
         if not reply_content and not reply_subject:
             return {
                 'interest_level': 'neutral',
@@ -244,154 +393,168 @@ Return your analysis in a structured format."""
                 'confidence': 90
             }
 
-        # Build analysis prompt
-        prompt = f"""Analyze this email reply from a lead in a marketing campaign.
-
-CAMPAIGN: {campaign_name or 'Marketing Campaign'}
-
-REPLY SUBJECT: {reply_subject or '(No subject)'}
-
-REPLY CONTENT:
-{new_reply_only or reply_content or '(No content)'}
-
-TASK:
-Determine if this reply indicates the lead is INTERESTED (positive) or NOT INTERESTED (negative).
-You MUST choose exactly ONE of the six categories below. Use the definitions and examples to pick the best match.
-
-CLASSIFICATION OPTIONS (use these exact labels):
-1. "positive" - Lead is INTERESTED:
-   - Expresses interest, asks questions, requests more information
-   - Agrees to a meeting, call, or demo (include brief agreement: "yes", "yes okay", "sure", "okay", "sounds good", "let's do it")
-   - Shows enthusiasm, excitement, or curiosity
-   - Asks about pricing, features, or next steps
-   - Forward-looking or warm sign-off: "see you soon", "thank you and see you soon", "looking forward to", "talk soon", "thanks, let's connect"
-   - Positive language: "interested", "sounds good", "I'd like to", "tell me more"
-   - When in doubt between neutral and positive for short replies, prefer "positive" if there is any agreement or warmth (e.g. "Yes okay" = positive; "Thank you and see you soon!" = positive).
-   - CRITICAL: Any reply that contains BOTH a thank-you ("thank you", "thanks") AND a forward-looking phrase ("see you soon", "talk soon", "looking forward", "catch you later") MUST be "positive", never "neutral".
-   - CRITICAL: "Thanks and same to you!" / "Thank you, same to you" = positive (warm reciprocation of goodwill). Do NOT classify as neutral.
-   - "We will update you soon" / "will update you" / "get back to you" = still engaged, prefer "positive" (they are staying in the conversation).
-
-2. "negative" - Lead is NOT INTERESTED:
-   - Explicitly declines or says "no thanks"
-   - Negative language: "not interested", "don't contact me", "spam"
-   - Complaints or criticism
-   - Very short dismissive replies: "no", "not interested" (without agreement or warmth)
+        return None
 
-3. "neutral" - NEUTRAL/Acknowledgment only (no clear interest or disinterest):
-   - Purely informational: "received", "got it", "noted"
-   - Vague or minimal: "ok" alone with no other context, "thanks" with no forward-looking or agreeing tone
-   - Do NOT use neutral for: "yes okay", "thank you and see you soon", "sure", "sounds good" — these are positive.
-   - Do NOT use neutral for: "make it more clear", "please clarify", "can you explain" — these are requested_info.
+    @staticmethod
+    def _normalize_level(level) -> str:
+        """Map a model-returned label onto one of VALID_LEVELS."""
+        interest_level = str(level or 'neutral').lower()
+        if interest_level in VALID_LEVELS:
+            return interest_level
+        # Fallback: map to closest valid level
+        if 'unsubscribe' in interest_level or 'remove' in interest_level or 'stop' in interest_level:
+            return 'unsubscribe'
+        if 'objection' in interest_level or 'concern' in interest_level or 'worried' in interest_level:
+            return 'objection'
+        if 'info' in interest_level or 'more' in interest_level or 'details' in interest_level:
+            return 'requested_info'
+        if interest_level in ['positive', 'interested', 'yes']:
+            return 'positive'
+        if interest_level in ['negative', 'not interested', 'no']:
+            return 'negative'
+        return 'neutral'
+
+    @staticmethod
+    def _ai_fallback_note(e) -> str:
+        """Why the AI path was skipped, worded for the reply's analysis banner."""
+        from core.api_key_service import QuotaExhausted, NoKeyAvailable
+        if isinstance(e, QuotaExhausted):
+            return 'AI tokens finished — analyzed with keyword rules instead. Top up the agent quota to re-enable AI analysis.'
+        if isinstance(e, NoKeyAvailable):
+            return 'No AI key available — analyzed with keyword rules instead. Assign an API key to enable AI analysis.'
+        return f'AI analysis unavailable ({e or "unknown error"}) — analyzed with keyword rules instead.'
+
+    def analyze_replies(self, replies, campaign_name: str = '', company_id=None,
+                        batch_size: int = REPLY_BATCH_SIZE) -> List[Dict]:
+        """
+        Classify several replies from one campaign, in order.
+
+        ``replies`` is a list of (reply_subject, reply_content). Replies the
+        keyword rules or _apply_rule_overrides settle never reach the LLM; the
+        rest are sent ``batch_size`` per prompt. Entries the model leaves out or
+        garbles are re-run through analyze_reply, and when the AI is unavailable
+        (no key, quota) the remaining replies use the keyword fallback, flagged
+        the same way analyze_reply flags it.
+        """
+        if company_id:
+            self.company_id = company_id
+            self.agent_key_name = 'marketing_agent'
 
-4. "requested_info" - REQUESTED MORE INFORMATION:
-   - Asks specific questions about features, pricing, capabilities
-   - Wants detailed information, case studies, examples, or clarification
-   - Requests documentation, demos, samples, or REQUIREMENTS (e.g. "send me further requirements", "send me the requirements")
-   - Asks to make something clearer or to clarify: "make it more clear", "make it clearer", "please clarify", "could you clarify", "can you explain"
-   - Language: "tell me more about", "what are the features", "how much does it cost", "can you send", "send me requirements", "further requirements"
-   - CRITICAL: "make it more clear please" / "please clarify" = requested_info (they want clearer info), NOT neutral.
-   - CRITICAL: If the reply is PRIMARILY asking for more information, details, or requirements (e.g. "Send me further requirements", "Send further details"), use "requested_info", NOT "positive".
+        results = [None] * len(replies)
+        pending = []
+        for i, (reply_subject, reply_content) in enumerate(replies):
+            ruled = self.rule_based_analysis(reply_subject, reply_content)
+            if ruled is None:
+                combined = f"{reply_subject or ''} {strip_quoted_thread(reply_content or '')}".lower()
+                forced = self._apply_rule_overrides(combined, 'neutral')
+                if forced is not None:
+                    ruled = {'interest_level': forced, 'analysis': 'Matched a clear rule.', 'confidence': 85}
+            if ruled is not None:
+                results[i] = ruled
+            else:
+                pending.append(i)
+
+        ai_unavailable = None
+        for start in range(0, len(pending), max(1, batch_size)):
+            chunk = pending[start:start + max(1, batch_size)]
+            if ai_unavailable:
+                for i in chunk:
+                    results[i] = self._fallback_analysis(*replies[i])
+                    results[i]['ai_fallback'] = True
+                    results[i]['ai_fallback_reason'] = ai_unavailable
+                continue
+            if len(chunk) == 1:
+                i = chunk[0]
+                results[i] = self.analyze_reply(replies[i][0], replies[i][1], campaign_name)
+                if results[i].get('ai_fallback'):
+                    ai_unavailable = results[i].get('ai_fallback_reason')
+                continue
+            try:
+                parsed = self._analyze_batch([replies[i] for i in chunk], campaign_name)
+            except json.JSONDecodeError as e:
+                logger.error(f"Error parsing batched AI analysis JSON: {str(e)}")
+                parsed = {}
+            except Exception as e:
+                ai_unavailable = self._ai_fallback_note(e)
+                logger.warning(f"Reply analyzer falling back to keywords: {ai_unavailable}")
+                for i in chunk:
+                    results[i] = self._fallback_analysis(*replies[i])
+                    results[i]['ai_fallback'] = True
+                    results[i]['ai_fallback_reason'] = ai_unavailable
+                continue
+            for n, i in enumerate(chunk, start=1):
+                results[i] = parsed.get(n) or self.analyze_reply(replies[i][0], replies[i][1], campaign_name)
+        return results
+
+    def _analyze_batch(self, replies, campaign_name: str) -> Dict[int, Dict]:
+        """One LLM call for several replies; returns {1-based position: result}."""
+        blocks = []
+        texts = []
+        for n, (reply_subject, reply_content) in enumerate(replies, start=1):
+            new_reply_only = strip_quoted_thread(reply_content or '')
+            texts.append(f"{reply_subject or ''} {new_reply_only}".lower())
+            body = (new_reply_only or reply_content or '(No content)')[:BATCH_REPLY_CHARS]
+            blocks.append(f"### REPLY {n}\nSUBJECT: {reply_subject or '(No subject)'}\nCONTENT:\n{body}")
+        replies_text = '\n\n'.join(blocks)
+        prompt = f"""Analyze each of these {len(replies)} email replies from leads in a marketing campaign.
+Classify every reply on its own; do not let one reply influence another.
 
-5. "objection" - HAS OBJECTION/CONCERN:
-   - Raises concerns, objections, or doubts about the approach or feasibility
-   - "I don't think it can be done like this" / "dont think it can be done" = objection (they have a concern about how it works), NOT "negative"
-   - Questions about value, ROI, or fit
-   - Mentions competitors or alternatives
-   - Language: "but", "however", "concerned about", "worried", "not sure if", "don't think it can"
+CAMPAIGN: {campaign_name or 'Marketing Campaign'}
 
-6. "unsubscribe" - UNSUBSCRIBE REQUEST:
-   - Explicit unsubscribe requests: "unsubscribe", "remove me", "stop emailing", "don't send again", "dont send again"
-   - Opt-out language: "remove from list", "don't email me", "opt out", "stop sending"
-   - CRITICAL: "dont send again" / "don't send again" = unsubscribe (they want to stop receiving emails), NOT just "negative".
+{replies_text}
 
-Return your analysis in this EXACT JSON format (no markdown, just JSON):
-{{
-    "interest_level": "positive" or "negative" or "neutral" or "requested_info" or "objection" or "unsubscribe",
-    "analysis": "Detailed explanation of why you classified it this way, including key phrases or indicators",
-    "confidence": 0-100 (how confident you are in the classification)
-}}
-
-Be specific and cite the actual words/phrases from the reply that led to your decision.
+TASK:
+For EACH reply, determine if it indicates the lead is INTERESTED (positive) or NOT INTERESTED (negative).
+You MUST choose exactly ONE of the six categories below per reply. Use the definitions and examples to pick the best match.
+
+{_CLASSIFICATION_GUIDE}
+
+Return a JSON array with one object per reply, in this EXACT format (no markdown, just JSON):
+[
+    {{
+        "reply": 1,
+        "interest_level": "positive" or "negative" or "neutral" or "requested_info" or "objection" or "unsubscribe",
+        "analysis": "Why you classified it this way, citing the reply's own words",
+        "confidence": 0-100
+    }}
+]
 
 REMINDER: "Thank you and see you soon!" = positive. "Thanks and same to you!" = positive. "We will update you soon" = positive. "Make it more clear please" / "please clarify" = requested_info (not neutral)."""
-        
-        try:
-            # Use Groq for analysis (faster and cheaper)
-            response = self._call_groq_qa(
-                prompt,
-                self.system_prompt,
-                temperature=0.3,  # Lower temperature for more consistent analysis
-                max_tokens=500
-            )
-            
-            # Parse JSON response (json/re imported at module top so the
-            # `except json.JSONDecodeError` below can never hit an unbound name).
 
-            # Try to extract JSON from response (may have markdown formatting)
-            json_match = re.search(r'\{[^{}]*"interest_level"[^{}]*\}', response, re.DOTALL)
-            if json_match:
-                analysis_data = json.loads(json_match.group())
-            else:
-                # Try to parse entire response as JSON
-                analysis_data = json.loads(response.strip())
-            
-            # Validate and return
-            interest_level = analysis_data.get('interest_level', 'neutral').lower()
-            valid_levels = ['positive', 'negative', 'neutral', 'requested_info', 'objection', 'unsubscribe']
-            if interest_level not in valid_levels:
-                # Fallback: map to closest valid level
-                if 'unsubscribe' in interest_level or 'remove' in interest_level or 'stop' in interest_level:
-                    interest_level = 'unsubscribe'
-                elif 'objection' in interest_level or 'concern' in interest_level or 'worried' in interest_level:
-                    interest_level = 'objection'
-                elif 'info' in interest_level or 'more' in interest_level or 'details' in interest_level:
-                    interest_level = 'requested_info'
-                elif interest_level in ['positive', 'interested', 'yes']:
-                    interest_level = 'positive'
-                elif interest_level in ['negative', 'not interested', 'no']:
-                    interest_level = 'negative'
-                else:
-                    interest_level = 'neutral'
-            
-            # Post-process: override AI when reply clearly matches our rules (AI sometimes returns neutral for these)
-            # Strip the quoted original email first — rule overrides must fire on
-            # what the lead just wrote, not on quoted history from the thread.
-            new_reply_text = strip_quoted_thread(reply_content or '')
-            combined = f"{reply_subject or ''} {new_reply_text}".lower()
-            overridden = self._apply_rule_overrides(combined, interest_level)
-            if overridden is not None:
-                interest_level = overridden
-                logger.info(f"Reply analyzer: overridden to '{interest_level}' based on rule match")
-            
-            return {
-                'interest_level': interest_level,
-                'analysis': analysis_data.get('analysis', 'Analysis completed.'),
-                'confidence': int(analysis_data.get('confidence', 50))
+        response = self._call_groq_qa(
+            prompt,
+            self.system_prompt,
+            temperature=0.3,
+            max_tokens=min(4000, 200 + 250 * len(replies)),
+        )
+        json_match = re.search(r'\[.*\]', response, re.DOTALL)
+        items = json.loads(json_match.group() if json_match else response.strip())
+        if not isinstance(items, list):
+            raise json.JSONDecodeError('expected a JSON array', response, 0)
+
+        parsed = {}
+        for item in items:
+            if not isinstance(item, dict):
+                continue
+            try:
+                n = int(item.get('reply'))
+            except (TypeError, ValueError):
+                continue
+            if not 1 <= n <= len(replies) or not item.get('interest_level'):
+                continue
+            interest_level = self._normalize_level(item.get('interest_level'))
+            overridden = self._apply_rule_overrides(texts[n - 1], interest_level)
+            try:
+                confidence = int(item.get('confidence', 50))
+            except (TypeError, ValueError):
+                confidence = 50
+            parsed[n] = {
+                'interest_level': overridden or interest_level,
+                'analysis': item.get('analysis') or 'Analysis completed.',
+                'confidence': confidence,
             }
-            
-        except json.JSONDecodeError as e:
-            logger.error(f"Error parsing AI analysis JSON: {str(e)}. Response: {response[:200]}")
-            # Fallback: try to determine from keywords
-            return self._fallback_analysis(reply_subject, reply_content)
-        except Exception as e:
-            # Note WHY the AI path was skipped so it shows in the reply's analysis
-            # (not a silent drop to keywords). Token/quota exhaustion is the common
-            # case — surface it plainly.
-            from core.api_key_service import QuotaExhausted, NoKeyAvailable
-            if isinstance(e, QuotaExhausted):
-                note = 'AI tokens finished — analyzed with keyword rules instead. Top up the agent quota to re-enable AI analysis.'
-            elif isinstance(e, NoKeyAvailable):
-                note = 'No AI key available — analyzed with keyword rules instead. Assign an API key to enable AI analysis.'
-            else:
-                note = f'AI analysis unavailable ({e or "unknown error"}) — analyzed with keyword rules instead.'
-            logger.warning(f"Reply analyzer falling back to keywords: {note}")
-            result = self._fallback_analysis(reply_subject, reply_content)
-            # Don't clutter every reply's analysis text with the reason — expose it
-            # once via a flag + reason so the UI can show a single banner instead.
-            result['ai_fallback'] = True
-            result['ai_fallback_reason'] = note
-            return result
-    
+        return parsed
+
     def _apply_rule_overrides(self, combined_text_lower: str, ai_level: str):
         """
         Override AI result when reply clearly matches rules (avoids AI returning neutral for clear positives).
@@ -1,6 +1,6 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
-from django.http import JsonResponse, HttpResponseRedirect, HttpResponse
+from django.http import JsonResponse, HttpResponseRedirect
 from django.views.decorators.http import require_http_methods
 from django.contrib import messages
 from django.urls import reverse
@@ -13,14 +13,13 @@ from django.conf import settings
 logger = logging.getLogger(__name__)
 
 from .models import Campaign, MarketResearch, CampaignPerformance, Lead, EmailTemplate, EmailSequence, EmailSequenceStep, EmailSendHistory, EmailAccount, MarketingNotification
-from django.db.models import Sum, Avg, Count, F, Q
+from django.db.models import Sum, Avg, Count, F
 from decimal import Decimal
 from datetime import timedelta, datetime
 from django.utils import timezone
 from django.utils.dateparse import parse_date
-import pandas as pd
-import csv
-from io import StringIO
+from core.tabular_export import streaming_response
+from .exports import campaign_lead_export
 
 
 def auto_pause_expired_campaigns(user=None):
@@ -700,25 +699,22 @@ def campaign_detail(request, campaign_id):
     )
     
     # Open/click rate: total_sent = sent+delivered+opened+clicked; total_opened = opened+clicked (pixel or reply→opened); total_clicked = clicked (tracked link)
-    total_sent = all_email_sends.filter(status__in=['sent', 'delivered', 'opened', 'clicked']).count()
-    total_opened = all_email_sends.filter(status__in=['opened', 'clicked']).count()
-    total_clicked = all_email_sends.filter(status='clicked').count()
-    total_failed = all_email_sends.filter(status='failed').count()
-    total_bounced = all_email_sends.filter(status='bounced').count()
-    
-    # Use Reply model so total matches Email Sending page (count of reply events)
+    # Read from the per-day campaign rollups (campaign_rollups.py), which use the same sets.
+    from marketing_agent import campaign_rollups
+    totals = campaign_rollups.campaign_totals([campaign.id])[campaign.id]
+    total_sent = totals['sent']
+    total_opened = totals['opened']
+    total_clicked = totals['clicked']
+    total_failed = totals['failed']
+    total_bounced = totals['bounced']
+    
+    # Count of reply events so total matches Email Sending page
     from marketing_agent.models import CampaignContact, Reply
-    total_replied = Reply.objects.filter(campaign=campaign).count()
+    total_replied = totals['replies']
     # Positive = interested, requested_info, neutral, objection (Positive/Neutral on dashboard)
-    positive_replies = Reply.objects.filter(
-        campaign=campaign,
-        interest_level__in=['positive', 'neutral', 'requested_info', 'objection']
-    ).count()
+    positive_replies = totals['positive_replies']
     # Negative = not interested + unsubscribe
-    negative_replies = Reply.objects.filter(
-        campaign=campaign,
-        interest_level__in=['negative', 'unsubscribe']
-    ).count()
+    negative_replies = totals['negative_replies']
     
     # Calculate rates based on actual email data
     # Impressions = emails sent (equivalent to impressions in email marketing)
@@ -772,61 +768,16 @@ def campaign_detail(request, campaign_id):
     else:
         analytics['leads_progress'] = None
     
-    # Get recent performance data for charts (last 30 days) from EmailSendHistory
-    thirty_days_ago = timezone.now() - timedelta(days=30)
-    
-    # Get all emails sent in last 30 days (use sent_at if available, otherwise created_at)
-    recent_email_sends = all_email_sends.filter(
-        Q(sent_at__gte=thirty_days_ago) | 
-        Q(created_at__gte=thirty_days_ago, sent_at__isnull=True)
-    )
-    
-    # Prepare chart data grouped by date
-    metrics_by_date = {}
-    
-    # Initialize all dates in the last 30 days (fill gaps with zeros)
-    for i in range(30):
-        date_obj = (timezone.now().date() - timedelta(days=i))
-        date_str = date_obj.strftime('%Y-%m-%d')
-        if date_str not in metrics_by_date:
-            metrics_by_date[date_str] = {
-                'sent': 0,
-                'opened': 0,
-                'clicked': 0,
-                'replied': 0
-            }
-    
-    # Count emails sent per day
-    for email_send in recent_email_sends:
-        # Use sent_at if available, otherwise use created_at
-        email_date = email_send.sent_at.date() if email_send.sent_at else email_send.created_at.date()
-        date_str = email_date.strftime('%Y-%m-%d')
-        
-        if date_str in metrics_by_date:
-            # Count sent emails
-            if email_send.status in ['sent', 'delivered', 'opened', 'clicked']:
-                metrics_by_date[date_str]['sent'] += 1
-            
-            # Count opened emails (use opened_at if available)
-            if email_send.status in ['opened', 'clicked']:
-                metrics_by_date[date_str]['opened'] += 1
-            
-            # Count clicked emails (use clicked_at if available)
-            if email_send.status == 'clicked':
-                metrics_by_date[date_str]['clicked'] += 1
-    
-    # Count replies per day (from Reply model to match Email Sending page)
-    recent_replies = Reply.objects.filter(
-        campaign=campaign,
-        replied_at__isnull=False,
-        replied_at__gte=thirty_days_ago
-    )
-    for reply in recent_replies:
-        if reply.replied_at:
-            reply_date = reply.replied_at.date()
-            date_str = reply_date.strftime('%Y-%m-%d')
-            if date_str in metrics_by_date:
-                metrics_by_date[date_str]['replied'] += 1
+    # Get recent performance data for charts (last 30 days) from the daily rollups
+    metrics_by_date = {
+        day.strftime('%Y-%m-%d'): {
+            'sent': day_totals['sent'],
+            'opened': day_totals['opened'],
+            'clicked': day_totals['clicked'],
+            'replied': day_totals['replies'],
+        }
+        for day, day_totals in campaign_rollups.daily_totals(campaign.id, days=30).items()
+    }
     
     # Convert to arrays for chart (JSON serializable) - sorted by date (oldest first for proper chart display)
     sorted_dates = sorted(metrics_by_date.keys())
@@ -1016,244 +967,68 @@ def campaign_edit(request, campaign_id):
 @require_http_methods(["POST"])
 def upload_leads(request, campaign_id):
     """Upload leads from CSV/Excel file"""
-    import logging
+    from core.tabular_import import SUPPORTED_EXTENSIONS, TabularImportError, file_extension
+    from marketing_agent.models import CampaignContact
+    from marketing_agent.services.lead_import import import_campaign_leads
     logger = logging.getLogger(__name__)
-    print("upload_leads", request)
     try:
         campaign = get_object_or_404(Campaign, id=campaign_id, owner=request.user)
         logger.info(f'Upload leads request for campaign {campaign_id} by user {request.user.username}')
-        print("request.FILES", request.FILES, '\n\n\n')
         if 'file' not in request.FILES:
             logger.warning('No file in request.FILES')
-            print("No file in request.FILES")
             return JsonResponse({'success': False, 'error': 'No file uploaded'}, status=400)
         
         uploaded_file = request.FILES['file']
         logger.info(f'File received: {uploaded_file.name}, size: {uploaded_file.size}')
         
-        file_extension = uploaded_file.name.split('.')[-1].lower()
-        
-        if file_extension not in ['csv', 'xlsx', 'xls']:
-            logger.warning(f'Invalid file format: {file_extension}')
+        if file_extension(uploaded_file.name) not in SUPPORTED_EXTENSIONS:
+            logger.warning(f'Invalid file format: {uploaded_file.name}')
             return JsonResponse({'success': False, 'error': 'Invalid file format. Please upload CSV, XLSX, or XLS files.'}, status=400)
         
         try:
-            # Read the file
-            if file_extension == 'csv':
-                df = pd.read_csv(uploaded_file)
-            else:
-                df = pd.read_excel(uploaded_file)
-        
-            if df.empty:
-                return JsonResponse({'success': False, 'error': 'File is empty'}, status=400)
-            
-            # Normalize column names (lowercase, strip spaces)
-            df.columns = df.columns.str.lower().str.strip()
-            print("column",df.columns)
-            # Required: email
-            if 'email' not in df.columns:
-                print("Email column is required in the file")
-                return JsonResponse({'success': False, 'error': 'Email column is required in the file'}, status=400)
-            # Process leads
-            created_count = 0
-            updated_count = 0
-            skipped_count = 0
-            errors = []
-            
-            # Use transaction to ensure all leads are saved before returning
-            from django.db import transaction
-            from django.db import connection
-            
-            with transaction.atomic():
-                for index, row in df.iterrows():
-                    try:
-                        print(f"\n=== Processing Row {index + 2} ===")
-                        email = str(row['email']).strip().lower()
-                        print(f"email: {email}")
-                        if not email or pd.isna(row['email']) or email == 'nan':
-                            logger.warning(f'Row {index + 2}: Skipping row with empty/invalid email: {row.get("email", "N/A")}')
-                            skipped_count += 1
-                            continue
-                        
-                        # Get or create lead
-                        lead, created = Lead.objects.get_or_create(
-                            email=email,
-                            owner=request.user,
-                            defaults={
-                                'first_name': str(row.get('first_name', '')).strip() if pd.notna(row.get('first_name')) else '',
-                                'last_name': str(row.get('last_name', '')).strip() if pd.notna(row.get('last_name')) else '',
-                                'phone': str(row.get('phone', '')).strip() if pd.notna(row.get('phone')) else '',
-                                'company': str(row.get('company', '')).strip() if pd.notna(row.get('company')) else '',
-                                'job_title': str(row.get('job_title', '')).strip() if pd.notna(row.get('job_title')) else '',
-                                'source': str(row.get('source', '')).strip() if pd.notna(row.get('source')) else '',
-                            }
-                        )
-                        print(f"lead: {lead.email} - {'New' if created else 'Existing'}")
-                        if created:
-                            created_count += 1
-                            print(f"✓ Lead {email} CREATED (count: {created_count})")
-                        else:
-                            print(f"✓ Lead {email} already EXISTS")
-                            print(f"Updating lead {email}...")
-                            # Update existing lead fields if empty
-                            updated = False
-                            if not lead.first_name and pd.notna(row.get('first_name')):
-                                lead.first_name = str(row.get('first_name', '')).strip()
-                                updated = True
-                            if not lead.last_name and pd.notna(row.get('last_name')):
-                                lead.last_name = str(row.get('last_name', '')).strip()
-                                updated = True
-                            if not lead.phone and pd.notna(row.get('phone')):
-                                lead.phone = str(row.get('phone', '')).strip()
-                                updated = True
-                            if not lead.company and pd.notna(row.get('company')):
-                                lead.company = str(row.get('company', '')).strip()
-                                updated = True
-                            if not lead.job_title and pd.notna(row.get('job_title')):
-                                lead.job_title = str(row.get('job_title', '')).strip()
-                                updated = True
-                            if updated:
-                                lead.save()
-                                updated_count += 1
-                                print(f"✓ Lead {email} UPDATED (count: {updated_count})")
-                            else:
-                                print(f"✓ Lead {email} already UPDATED")
-                        
-                        # Always associate with campaign (even if lead already exists)
-                        # Don't check inside transaction - just add (it's safe to add even if already there)
-                        print(f"Adding lead {email} to campaign {campaign.id}...")
-                        campaign.leads.add(lead)  # ManyToMany.add() is safe to call even if already added
-                        print(f"✓ Added lead {email} to campaign")
-                        logger.info(f'DEBUG Row {index + 2}: Added lead {email} to campaign {campaign.id}')
-                        # Count as added to campaign if it wasn't newly created
-                        if not created:
-                            created_count += 1  # Count as "added to campaign"
-                        
-                        # Always ensure CampaignContact exists for automation tracking
-                        from marketing_agent.models import CampaignContact, EmailSequence
-                        from django.utils import timezone
-                        from django.core.exceptions import MultipleObjectsReturned
-                        print(f"Creating CampaignContact for {email}...")
-                        try:
-                            # Use filter().first() to safely check for existing contact
-                            # This handles cases where duplicates might exist
-                            contact = CampaignContact.objects.filter(
-                                campaign=campaign,
-                                lead=lead
-                            ).first()
-                            
-                            if not contact:
-                                # Create new contact if it doesn't exist
-                                contact = CampaignContact.objects.create(
-                                    campaign=campaign,
-                                    lead=lead,
-                                    sequence=campaign.email_sequences.filter(is_active=True).first(),
-                                    current_step=0,
-                                    started_at=timezone.now(),
-                                )
-                                print(f"✓ CampaignContact created for {email}")
-                            else:
-                                print(f"✓ CampaignContact already exists for {email}")
-                        except MultipleObjectsReturned:
-                            # If duplicates exist, just use the first one
-                            contact = CampaignContact.objects.filter(
-                                campaign=campaign,
-                                lead=lead
-                            ).first()
-                            print(f"✓ Using existing CampaignContact for {email} (duplicates found)")
-                        except Exception as e:
-                            logger.warning(f'Error creating CampaignContact for {email}: {str(e)}')
-                            print(f"⚠ Warning creating CampaignContact for {email}: {str(e)}")
-                        print(f"=== Row {index + 2} COMPLETE ===\n")
-                    except Exception as e:
-                        import traceback
-                        error_trace = traceback.format_exc()
-                        print(f"ERROR processing row {index + 2}: {str(e)}")
-                        print(f"Full traceback:\n{error_trace}")
-                        logger.error(f'Row {index + 2}: Error processing lead - {str(e)}', exc_info=True)
-                        errors.append(f"Row {index + 2}: {str(e)}")
-                        skipped_count += 1
-            
-            # Transaction commits here automatically
-            
-            # After transaction commits, refresh and ensure CampaignContact exists
-            campaign.refresh_from_db()
-            
-            # Ensure CampaignContact exists for ALL leads in campaign (backfill if needed)
-            from marketing_agent.models import CampaignContact, EmailSequence
-            from django.utils import timezone
-            from django.core.exceptions import MultipleObjectsReturned
-            contacts_created = 0
-            for lead in campaign.leads.all():
-                try:
-                    # Use filter().first() to safely check for existing contact
-                    contact = CampaignContact.objects.filter(
-                        campaign=campaign,
-                        lead=lead
-                    ).first()
-                    
-                    if not contact:
-                        # Create new contact if it doesn't exist
-                        contact = CampaignContact.objects.create(
-                    campaign=campaign,
-                    lead=lead,
-                            sequence=campaign.email_sequences.filter(is_active=True).first(),
-                            current_step=0,
-                            started_at=timezone.now(),
-                        )
-                    contacts_created += 1
-                except MultipleObjectsReturned:
-                    # If duplicates exist, just use the first one (already exists)
-                    pass
-                except Exception as e:
-                    logger.warning(f'Error creating CampaignContact for lead {lead.email}: {str(e)}')
-            
-            # Force refresh from database to get latest state
-            campaign.refresh_from_db()
-            
-            # Get updated lead count after upload
-            updated_lead_count = campaign.leads.count()
-            contact_count = CampaignContact.objects.filter(campaign=campaign).count()
-            
-            # Debug: Log all leads in campaign
-            all_leads = list(campaign.leads.all().values_list('email', flat=True))
-            logger.info(f'Upload complete: {created_count} created, {updated_count} updated, {skipped_count} skipped, {contacts_created} contacts created, total leads: {updated_lead_count}, total contacts: {contact_count}')
-            logger.info(f'DEBUG: All leads in campaign after upload: {all_leads}')
-            
-            # Double-check by querying the relationship directly
-            from django.db import connection
-            with connection.cursor() as cursor:
-                cursor.execute("SELECT COUNT(*) FROM ppp_marketingagent_campaign_leads WHERE campaign_id = %s", [campaign.id])
-                direct_count = cursor.fetchone()[0]
-                logger.info(f'DEBUG: Direct database query shows {direct_count} leads in campaign_leads table')
-            
-            if updated_lead_count == 0 and created_count > 0:
-                logger.error(f'ERROR: Created {created_count} leads but campaign shows 0 leads! This indicates a transaction or save issue.')
-            
-            # Include detailed error information
-            error_message = ''
-            if errors:
-                error_message = f' Errors: {"; ".join(errors[:5])}'
-            if skipped_count > 0:
-                if created_count == 0 and updated_count == 0:
-                    error_message += f' All {skipped_count} lead(s) were skipped. Possible reasons: emails are empty/invalid, or leads already exist in this campaign. Check CSV format and ensure "Email" column exists.'
-                else:
-                    error_message += f' {skipped_count} row(s) skipped (empty email or invalid data).'
-            
-            return JsonResponse({
-                'success': True,
-                'message': f'Successfully processed {created_count + updated_count} lead(s). Total leads in campaign: {updated_lead_count}.{error_message}',
-                'created': created_count,
-                'updated': updated_count,
-                'skipped': skipped_count,
-                'total_leads': updated_lead_count,
-                'total_contacts': contact_count,
-                'errors': errors[:10]  # Limit errors shown
-            })
-            
+            # Email is the only required column here; existing leads only get
+            # their blank fields filled in.
+            result = import_campaign_leads(
+                campaign, request.user, uploaded_file, uploaded_file.name,
+                require_name=False, contact_defaults={'started_at': timezone.now()},
+            )
+        except TabularImportError as e:
+            return JsonResponse({'success': False, 'error': str(e)}, status=400)
         except Exception as e:
             logger.error(f'Error processing file: {str(e)}', exc_info=True)
             return JsonResponse({'success': False, 'error': f'Error processing file: {str(e)}'}, status=500)
+        
+        created_count = result['created_count'] - result['updated_count']
+        updated_count = result['updated_count']
+        skipped_count = result['rejected_count']
+        errors = [
+            f"Row {r['row']}: {r['reason']}" for r in result['rejected_rows']
+            if r['field'] != 'email'
+        ]
+        updated_lead_count = campaign.leads.count()
+        contact_count = CampaignContact.objects.filter(campaign=campaign).count()
+        logger.info(f'Upload complete: {created_count} created, {updated_count} updated, {skipped_count} skipped, total leads: {updated_lead_count}, total contacts: {contact_count}')
+        
+        # Include detailed error information
+        error_message = ''
+        if errors:
+            error_message = f' Errors: {"; ".join(errors[:5])}'
+        if skipped_count > 0:
+            if created_count == 0 and updated_count == 0:
+                error_message += f' All {skipped_count} lead(s) were skipped. Possible reasons: emails are empty/invalid, or leads already exist in this campaign. Check CSV format and ensure "Email" column exists.'
+            else:
+                error_message += f' {skipped_count} row(s) skipped (empty email or invalid data).'
+        
+        return JsonResponse({
+            'success': True,
+            'message': f'Successfully processed {created_count + updated_count} lead(s). Total leads in campaign: {updated_lead_count}.{error_message}',
+            'created': created_count,
+            'updated': updated_count,
+            'skipped': skipped_count,
+            'total_leads': updated_lead_count,
+            'total_contacts': contact_count,
+            'errors': errors[:10]  # Limit errors shown
+        })
             
     except Exception as e:
         logger.error(f'Error in upload_leads view: {str(e)}', exc_info=True)
@@ -1420,8 +1195,11 @@ def mark_contact_replied(request, campaign_id, lead_id):
             reply_subject = request.POST.get('reply_subject', '')
             reply_content = request.POST.get('reply_content', '')
 
+        # Manual marking answers with the classification, so analyze now
+        # rather than leaving it to the classification queue.
         result = process_reply_directly(
-            campaign, lead, reply_subject, reply_content, reply_date=_tz.now()
+            campaign, lead, reply_subject, reply_content, reply_date=_tz.now(),
+            defer_analysis=False,
         )
         return JsonResponse(result, status=200 if result.get('success') else 400)
 
@@ -1432,28 +1210,6 @@ def mark_contact_replied(request, campaign_id, lead_id):
 
 @login_required
 def export_leads(request, campaign_id):
-    """Export leads to CSV"""
+    """Export leads to CSV (streamed)"""
     campaign = get_object_or_404(Campaign, id=campaign_id, owner=request.user)
-    leads = campaign.leads.all().order_by('-created_at')
-    
-    response = HttpResponse(content_type='text/csv')
-    response['Content-Disposition'] = f'attachment; filename="campaign_{campaign_id}_leads.csv"'
-    
-    writer = csv.writer(response)
-    writer.writerow(['Email', 'First Name', 'Last Name', 'Phone', 'Company', 'Job Title', 'Status', 'Source', 'Notes', 'Created At'])
-    
-    for lead in leads:
-        writer.writerow([
-            lead.email,
-            lead.first_name,
-            lead.last_name,
-            lead.phone,
-            lead.company,
-            lead.job_title,
-            lead.get_status_display(),
-            lead.source,
-            lead.notes,
-            lead.created_at.strftime('%Y-%m-%d %H:%M:%S')
-        ])
-    
-    return response
+    return streaming_response(campaign_lead_export(campaign.id, detailed=True), 'csv')
@@ -4,12 +4,15 @@ Handles email open and click tracking.
 
 How open/click rate is tracked:
 - Open: A 1x1 tracking pixel is embedded in sent emails; when the client loads images,
-  GET /marketing/track/email/<token>/open/ (or /token?t=<token>) is hit and EmailSendHistory
-  status is set to 'opened'. Reply also implies open: when a Reply is saved with
+  GET /marketing/track/email/<token>/open/ (or /token?t=<token>) is hit and an 'open'
+  EmailTrackingEvent is logged. Reply also implies open: when a Reply is saved with
   triggering_email, that send is marked 'opened' (see Reply post_save signal in models.py).
 - Click: Links in emails are wrapped with a redirect URL; when the user clicks,
-  GET /marketing/track/email/<token>/click/?url=... is hit, status is set to 'clicked',
+  GET /marketing/track/email/<token>/click/?url=... is hit, a 'click' event is logged,
   then redirect to the original URL.
+- The views never update EmailSendHistory themselves: apply_tracking_events_task
+  (services/tracking_events.py, every minute) applies logged events in bulk, so
+  EmailSendHistory status becomes 'opened'/'clicked' within about a minute.
 - Open rate = (count of sends with status in ['opened','clicked']) / total_sent * 100.
 - Click rate = (count of sends with status 'clicked') / total_sent * 100.
 """
@@ -17,57 +20,63 @@ from django.shortcuts import get_object_or_404
 from django.http import HttpResponse, HttpResponseRedirect
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
-from django.utils import timezone
 from django.urls import reverse
 from urllib.parse import unquote
+import ipaddress
 import logging
 
-from .models import EmailSendHistory
+from .models import EmailSendHistory, EmailTrackingEvent
 
 logger = logging.getLogger(__name__)
 
 
+def _client_ip(request):
+    forwarded = request.META.get('HTTP_X_FORWARDED_FOR', '')
+    ip = forwarded.split(',')[0].strip() or request.META.get('REMOTE_ADDR', '')
+    try:
+        return str(ipaddress.ip_address(ip))
+    except ValueError:
+        return None
+
+
+def _record_tracking_event(request, tracking_token, event_type, url=''):
+    """Append an open/click event. This is the only write a tracking request
+    makes; services/tracking_events.py applies the status change later."""
+    EmailTrackingEvent.objects.create(
+        tracking_token=tracking_token[:64],
+        event_type=event_type,
+        url=url or '',
+        user_agent=(request.META.get('HTTP_USER_AGENT') or '')[:500],
+        ip_address=_client_ip(request),
+    )
+
+
+def _campaign_id_for_token(tracking_token):
+    """Campaign of the send behind a token — only needed when a click has no
+    usable target URL and we fall back to the campaign page."""
+    return EmailSendHistory.objects.filter(
+        tracking_token=tracking_token,
+    ).values_list('campaign_id', flat=True).first()
+
+
+def _campaign_fallback_url(tracking_token):
+    campaign_id = _campaign_id_for_token(tracking_token)
+    if campaign_id:
+        return f'/marketing/campaigns/{campaign_id}/'
+    return '/marketing/'
+
+
 @csrf_exempt  # Tracking pixels and links don't send CSRF tokens
 @require_http_methods(["GET"])
 def track_email_open(request, tracking_token):
     """
     Track email open by serving a 1x1 transparent pixel
-    UPDATES STATUS IMMEDIATELY when pixel loads
+    Logs an open event; status is applied by apply_tracking_events_task
     """
     try:
-        send_history = get_object_or_404(EmailSendHistory, tracking_token=tracking_token)
-        
-        logger.info(
-            f"[OPEN TRACKING REQUEST] Token: {tracking_token[:10]}..., "
-            f"Email: {send_history.recipient_email}, "
-            f"Current Status: {send_history.status}"
-        )
-        
-        # STEP 1: UPDATE STATUS IMMEDIATELY (before returning pixel)
-        old_status = send_history.status
-        
-        # Only update if not already opened/clicked
-        if send_history.status not in ['opened', 'clicked']:
-            # Mark as delivered first if needed
-            if send_history.status == 'sent' and not send_history.delivered_at:
-                send_history.delivered_at = timezone.now()
-            
-            # Update to opened
-            send_history.status = 'opened'
-            send_history.opened_at = timezone.now()
-            send_history.save()  # SAVE IMMEDIATELY
-            
-            logger.info(
-                f"✅ [STATUS UPDATED] Email: {send_history.recipient_email}, "
-                f"Status: {old_status} → opened, "
-                f"Opened At: {send_history.opened_at}"
-            )
-        else:
-            # Update opened_at timestamp even if already opened (for analytics)
-            if not send_history.opened_at:
-                send_history.opened_at = timezone.now()
-                send_history.save()
-                logger.info(f"[OPEN TRACKING] Updated opened_at timestamp for already tracked email")
+        # STEP 1: LOG THE EVENT (one INSERT, no EmailSendHistory read/write)
+        _record_tracking_event(request, tracking_token, 'open')
+        logger.debug(f"[OPEN TRACKING] Event logged for token {tracking_token[:10]}...")
         
         # STEP 2: Return 1x1 transparent GIF pixel
         # Standard 1x1 transparent GIF (actual GIF file bytes)
@@ -96,51 +105,23 @@ def track_email_open(request, tracking_token):
 def track_email_click(request, tracking_token):
     """
     Track email link click and redirect to original URL
-    UPDATES STATUS FIRST, then redirects (this is critical!)
+    Logs a click event first (status is applied by apply_tracking_events_task),
+    then redirects
     """
+    event_logged = False
     try:
-        # Get email send history
-        send_history = get_object_or_404(EmailSendHistory, tracking_token=tracking_token)
-        
-        logger.info(
-            f"[CLICK TRACKING REQUEST] Token: {tracking_token[:10]}..., "
-            f"Email: {send_history.recipient_email}, "
-            f"Current Status: {send_history.status}"
-        )
-        
-        # STEP 1: UPDATE STATUS FIRST (before any redirect logic)
-        old_status = send_history.status
-        
-        # Mark as delivered/opened first if needed
-        if send_history.status == 'sent' and not send_history.delivered_at:
-            send_history.delivered_at = timezone.now()
-        
-        if send_history.status in ['sent', 'delivered'] and not send_history.opened_at:
-            send_history.opened_at = timezone.now()
-        
-        # Update to clicked
-        send_history.status = 'clicked'
-        send_history.clicked_at = timezone.now()
-        send_history.save()  # SAVE IMMEDIATELY
-        
-        logger.info(
-            f"✅ [STATUS UPDATED] Email: {send_history.recipient_email}, "
-            f"Status: {old_status} → clicked, "
-            f"Clicked At: {send_history.clicked_at}"
-        )
-        
-        # STEP 2: Get redirect URL from query parameter
+        # STEP 1: LOG THE EVENT (before any redirect logic)
         original_url = request.GET.get('url', '')
-        logger.info(f"[CLICK TRACKING] URL parameter: {original_url}")
+        _record_tracking_event(request, tracking_token, 'click', url=original_url)
+        event_logged = True
+        logger.info(f"[CLICK TRACKING] Token: {tracking_token[:10]}..., URL parameter: {original_url}")
         
+        # STEP 2: Resolve redirect URL from query parameter
         # Handle missing or invalid URLs
         if not original_url or original_url == '#' or original_url == '%23':
             logger.warning(f"No valid URL in click tracking, using default")
             # Default to campaign page
-            if send_history.campaign:
-                original_url = f'/marketing/campaigns/{send_history.campaign.id}/'
-            else:
-                original_url = '/marketing/'
+            original_url = _campaign_fallback_url(tracking_token)
         else:
             # Decode URL
             try:
@@ -151,10 +132,7 @@ def track_email_click(request, tracking_token):
             
             # Handle anchor links
             if original_url == '#' or original_url.startswith('#'):
-                if send_history.campaign:
-                    original_url = f'/marketing/campaigns/{send_history.campaign.id}/'
-                else:
-                    original_url = '/marketing/'
+                original_url = _campaign_fallback_url(tracking_token)
         
         # STEP 3: Build absolute redirect URL
         from django.conf import settings
@@ -189,16 +167,13 @@ def track_email_click(request, tracking_token):
         logger.error(f"❌ Error tracking email click: {str(e)}", exc_info=True)
         logger.error(f"Traceback: {traceback.format_exc()}")
         
-        # Try to update status even on error
-        try:
-            send_history = EmailSendHistory.objects.filter(tracking_token=tracking_token).first()
-            if send_history and send_history.status != 'clicked':
-                send_history.status = 'clicked'
-                send_history.clicked_at = timezone.now()
-                send_history.save()
-                logger.info(f"✅ [ERROR RECOVERY] Updated status to clicked for token {tracking_token[:10]}...")
-        except Exception as save_error:
-            logger.error(f"Failed to update status on error: {save_error}")
+        # Try to log the click even on error (if that isn't what failed)
+        if not event_logged:
+            try:
+                _record_tracking_event(request, tracking_token, 'click', url=request.GET.get('url', ''))
+                logger.info(f"✅ [ERROR RECOVERY] Logged click for token {tracking_token[:10]}...")
+            except Exception as save_error:
+                logger.error(f"Failed to log click on error: {save_error}")
         
         # Try to redirect to original URL anyway
         original_url = request.GET.get('url', '')
@@ -325,44 +300,10 @@ def simple_track_open(request, tracking_token=None):
             pixel = b'\x47\x49\x46\x38\x39\x61\x01\x00\x01\x00\x80\x00\x00\xff\xff\xff\x00\x00\x00\x21\xf9\x04\x01\x00\x00\x00\x00\x2c\x00\x00\x00\x00\x01\x00\x01\x00\x00\x02\x02\x04\x01\x00\x3b'
             return HttpResponse(pixel, content_type='image/gif')
         
-        # Find email send history by token
-        send_history = EmailSendHistory.objects.filter(tracking_token=tracking_token).first()
-        
-        if not send_history:
-            logger.warning(f"[SIMPLE TRACK] Token not found: {tracking_token[:10]}...")
-            # Return pixel anyway
-            pixel = b'\x47\x49\x46\x38\x39\x61\x01\x00\x01\x00\x80\x00\x00\xff\xff\xff\x00\x00\x00\x21\xf9\x04\x01\x00\x00\x00\x00\x2c\x00\x00\x00\x00\x01\x00\x01\x00\x00\x02\x02\x04\x01\x00\x3b'
-            return HttpResponse(pixel, content_type='image/gif')
-        
-        logger.info(
-            f"[SIMPLE OPEN TRACK] Token: {tracking_token[:10]}..., "
-            f"Email: {send_history.recipient_email}, "
-            f"Current Status: {send_history.status}"
-        )
-        
-        # Update status if not already opened/clicked
-        old_status = send_history.status
-        
-        if send_history.status not in ['opened', 'clicked']:
-            # Mark as delivered first if needed
-            if send_history.status == 'sent' and not send_history.delivered_at:
-                send_history.delivered_at = timezone.now()
-            
-            # Update to opened
-            send_history.status = 'opened'
-            send_history.opened_at = timezone.now()
-            send_history.save()
-            
-            logger.info(
-                f"✅ [SIMPLE TRACK UPDATED] Email: {send_history.recipient_email}, "
-                f"Status: {old_status} → opened, "
-                f"Opened At: {send_history.opened_at}"
-            )
-        else:
-            # Update opened_at timestamp even if already opened
-            if not send_history.opened_at:
-                send_history.opened_at = timezone.now()
-                send_history.save()
+        # Log the open; status is applied by apply_tracking_events_task.
+        # Unknown tokens are dropped by the batcher.
+        _record_tracking_event(request, tracking_token, 'open')
+        logger.debug(f"[SIMPLE OPEN TRACK] Event logged for token {tracking_token[:10]}...")
         
         # If request is from a browser (user clicked "View in browser" link), return HTML page
         # so open is still counted and they see a message. Email client pixel request gets image.
@@ -420,60 +361,14 @@ def simple_track_click(request, tracking_token=None):
             base_url = getattr(settings, 'SITE_URL', 'http://127.0.0.1:8000')
             return HttpResponseRedirect(f"{base_url.rstrip('/')}/marketing/")
         
-        # Find email send history by token
-        send_history = EmailSendHistory.objects.filter(tracking_token=tracking_token).first()
-        
-        if not send_history:
-            logger.warning(f"[SIMPLE CLICK TRACK] Token not found: {tracking_token[:10]}...")
-            # Try to redirect to original URL anyway
-            original_url = request.GET.get('url', '/marketing/')
-            if original_url and original_url != '#':
-                try:
-                    original_url = unquote(original_url)
-                    if original_url.startswith('http://') or original_url.startswith('https://'):
-                        return HttpResponseRedirect(original_url)
-                except:
-                    pass
-            from django.conf import settings
-            base_url = getattr(settings, 'SITE_URL', 'http://127.0.0.1:8000')
-            return HttpResponseRedirect(f"{base_url.rstrip('/')}/marketing/")
-        
-        logger.info(
-            f"[SIMPLE CLICK TRACK] Token: {tracking_token[:10]}..., "
-            f"Email: {send_history.recipient_email}, "
-            f"Current Status: {send_history.status}"
-        )
-        
-        # Update status first
-        old_status = send_history.status
-        
-        # Mark as delivered/opened first if needed
-        if send_history.status == 'sent' and not send_history.delivered_at:
-            send_history.delivered_at = timezone.now()
-        
-        if send_history.status in ['sent', 'delivered'] and not send_history.opened_at:
-            send_history.opened_at = timezone.now()
-        
-        # Update to clicked
-        send_history.status = 'clicked'
-        send_history.clicked_at = timezone.now()
-        send_history.save()
-        
-        logger.info(
-            f"✅ [SIMPLE CLICK UPDATED] Email: {send_history.recipient_email}, "
-            f"Status: {old_status} → clicked, "
-            f"Clicked At: {send_history.clicked_at}"
-        )
-        
-        # Get redirect URL
+        # Log the click first; status is applied by apply_tracking_events_task
         original_url = request.GET.get('url', '')
+        _record_tracking_event(request, tracking_token, 'click', url=original_url)
+        logger.info(f"[SIMPLE CLICK TRACK] Token: {tracking_token[:10]}..., URL parameter: {original_url}")
         
         # Handle missing or invalid URLs
         if not original_url or original_url == '#' or original_url == '%23':
-            if send_history.campaign:
-                original_url = f'/marketing/campaigns/{send_history.campaign.id}/'
-            else:
-                original_url = '/marketing/'
+            original_url = _campaign_fallback_url(tracking_token)
         else:
             try:
                 original_url = unquote(original_url)
@@ -481,10 +376,7 @@ def simple_track_click(request, tracking_token=None):
                 original_url = '/marketing/'
             
             if original_url == '#' or original_url.startswith('#'):
-                if send_history.campaign:
-                    original_url = f'/marketing/campaigns/{send_history.campaign.id}/'
-                else:
-                    original_url = '/marketing/'
+                original_url = _campaign_fallback_url(tracking_token)
         
         # Build absolute redirect URL
         from django.conf import settings
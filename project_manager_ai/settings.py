@@ -328,7 +328,6 @@ MIDDLEWARE = [
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'recruitment_agent.middleware.AutoInterviewFollowupMiddleware',  # Auto follow-up email checking
-    'ai_sdr_agent.middleware.AutoLeadResearchMiddleware',  # Apify auto lead research every 24h
 ]
 
 ROOT_URLCONF = 'project_manager_ai.urls'
@@ -822,6 +821,12 @@ CELERY_BEAT_SCHEDULE = {
         'schedule': 3600.0,  # Every hour
         'options': {'expires': 3600},
     },
+    # Delete background CSV / Excel export files past their retention window — every hour
+    'purge-tabular-exports': {
+        'task': 'core.tasks.purge_tabular_exports',
+        'schedule': 3600.0,  # Every hour
+        'options': {'expires': 3600},
+    },
     # Send sequence emails - runs every 5 minutes
     # Checks for emails ready to send based on user-defined sequence step delays
     'send-sequence-emails': {
@@ -837,6 +842,22 @@ CELERY_BEAT_SCHEDULE = {
         'options': {'expires': 600}
     },
     
+    # Apply buffered open/click tracking events - runs every minute
+    # The tracking views only log events; this updates EmailSendHistory status
+    'apply-tracking-events': {
+        'task': 'marketing_agent.tasks.apply_tracking_events_task',
+        'schedule': 60.0,  # Every minute
+        'options': {'expires': 120}
+    },
+
+    # Classify replies stored as pending by inbox sync - runs every minute
+    # Runs the LLM analysis and starts the sub-sequence it selects
+    'classify-pending-replies': {
+        'task': 'marketing_agent.tasks.classify_pending_replies_task',
+        'schedule': 60.0,  # Every minute
+        'options': {'expires': 120}
+    },
+    
     # Retry failed emails - runs every 15 minutes
     'retry-failed-emails': {
         'task': 'marketing_agent.tasks.retry_failed_emails_task',
@@ -875,6 +896,13 @@ CELERY_BEAT_SCHEDULE = {
         'options': {'expires': 3600}
     },
 
+    # Reconcile campaign metric rollups with EmailSendHistory/Reply - runs daily
+    'reconcile-campaign-rollups': {
+        'task': 'marketing_agent.tasks.reconcile_campaign_rollups_task',
+        'schedule': 86400.0,  # Daily
+        'options': {'expires': 43200}
+    },
+
     # Auto-expire module purchases - runs every hour
     # Checks active purchases whose expires_at has passed and marks them expired
     'expire-module-purchases': {
@@ -921,12 +949,14 @@ CELERY_BEAT_SCHEDULE = {
         'options': {'expires': 172800}
     },
 
-    # Wake snoozed frontline tickets - runs every 5 minutes
-    # Clears snoozed_until on tickets whose snooze time has passed
-    'frontline-wake-snoozed-tickets': {
-        'task': 'Frontline_agent.tasks.wake_snoozed_tickets',
-        'schedule': 300.0,  # Every 5 minutes
-        'options': {'expires': 600}
+    # Frontline ticket timers - runs every minute. Wakes snoozed tickets, bumps
+    # tickets within FRONTLINE_SLA_ESCALATION_MINUTES of SLA breach to urgent
+    # (firing `ticket_near_breach`), and closes tickets resolved for
+    # FRONTLINE_AUTO_CLOSE_DAYS (default 7). Reads only the timers that are due.
+    'frontline-process-ticket-timers': {
+        'task': 'Frontline_agent.tasks.process_ticket_timers',
+        'schedule': 60.0,  # Every minute
+        'options': {'expires': 120}
     },
 
     # Process pending / retry-ready frontline notifications every minute.
@@ -958,23 +988,6 @@ CELERY_BEAT_SCHEDULE = {
         'options': {'expires': 1209600}
     },
 
-    # T4 — auto-close resolved tickets after FRONTLINE_AUTO_CLOSE_DAYS (default 7).
-    # Daily tick: cheap query, idempotent via status filter.
-    'frontline-auto-close-inactive-tickets': {
-        'task': 'Frontline_agent.tasks.auto_close_inactive_tickets',
-        'schedule': 86400.0,  # daily
-        'options': {'expires': 172800},
-    },
-
-    # S3 — bump priority + fire `ticket_near_breach` event for tickets within
-    # FRONTLINE_SLA_ESCALATION_MINUTES of SLA breach. Frequent enough that an
-    # urgent escalation actually surfaces in time; idempotent via priority filter.
-    'frontline-escalate-near-breach-tickets': {
-        'task': 'Frontline_agent.tasks.escalate_near_breach_tickets',
-        'schedule': 300.0,  # every 5 minutes
-        'options': {'expires': 600},
-    },
-
     # ----- HR Support Agent -----
     # Process pending HRScheduledNotification rows: send + retry/DLQ.
     'hr-process-scheduled-notifications': {
@@ -0,0 +1,85 @@
+"""
+Tabular export sources for recruitment (see core.tabular_export).
+
+Each function rebuilds an export from JSON-safe arguments, so the same code
+serves the streamed download and the background build.
+"""
+import json
+
+from core.tabular_export import TabularExport, iter_chunks
+
+CANDIDATE_HEADER = ['ID', 'File Name', 'Job Title', 'Role Fit Score', 'Rank',
+                    'Qualification Decision', 'Qualification Confidence', 'Created At']
+INTERVIEW_HEADER = ['ID', 'Candidate Name', 'Candidate Email', 'Candidate Phone',
+                    'Job Role', 'Interview Type', 'Status', 'Outcome',
+                    'Scheduled Date/Time', 'Selected Slot', 'Created At']
+
+
+def _minutes(value):
+    return value.strftime('%Y-%m-%d %H:%M') if value else ''
+
+
+def _candidate_name(parsed_json):
+    try:
+        parsed = json.loads(parsed_json) if parsed_json else {}
+    except Exception:
+        return None
+    return parsed.get('name') if isinstance(parsed, dict) else None
+
+
+def candidate_export(company_user_id, job_id=None):
+    """The company user's CVRecord candidates, newest first, optionally for one job."""
+    from recruitment_agent.models import CVRecord
+
+    qs = CVRecord.objects.filter(job_description__company_user_id=company_user_id).order_by('-created_at')
+    if job_id:
+        qs = qs.filter(job_description_id=job_id)
+
+    def rows():
+        fields = ('id', 'file_name', 'parsed_json', 'job_description__title', 'role_fit_score', 'rank',
+                  'qualification_decision', 'qualification_confidence', 'created_at')
+        for chunk in iter_chunks(qs, fields):
+            for cv in chunk:
+                yield [
+                    cv['id'],
+                    _candidate_name(cv['parsed_json']) or cv['file_name'],
+                    cv['job_description__title'] or '',
+                    cv['role_fit_score'] or '',
+                    cv['rank'] or '',
+                    cv['qualification_decision'] or '',
+                    cv['qualification_confidence'] or '',
+                    _minutes(cv['created_at']),
+                ]
+
+    return TabularExport(f'candidates_{job_id or "all"}', CANDIDATE_HEADER, rows())
+
+
+def interview_export(company_user_id, job_id=None):
+    """The company user's interviews, newest first, optionally for one job."""
+    from recruitment_agent.models import Interview
+
+    qs = Interview.objects.filter(company_user_id=company_user_id).order_by('-created_at')
+    if job_id:
+        qs = qs.filter(cv_record__job_description_id=job_id)
+
+    def rows():
+        fields = ('id', 'candidate_name', 'candidate_email', 'candidate_phone', 'job_role',
+                  'interview_type', 'status', 'outcome', 'scheduled_datetime', 'selected_slot',
+                  'created_at')
+        for chunk in iter_chunks(qs, fields):
+            for iv in chunk:
+                yield [
+                    iv['id'],
+                    iv['candidate_name'] or '',
+                    iv['candidate_email'] or '',
+                    iv['candidate_phone'] or '',
+                    iv['job_role'] or '',
+                    iv['interview_type'] or '',
+                    iv['status'] or '',
+                    iv['outcome'] or '',
+                    _minutes(iv['scheduled_datetime']),
+                    iv['selected_slot'] or '',
+                    _minutes(iv['created_at']),
+                ]
+
+    return TabularExport(f'interviews_{job_id or "all"}', INTERVIEW_HEADER, rows())